@@ -73,14 +73,14 @@
 
 
 # DineFlow/agents/greeter.py
-import os
-from llm.client import call_llm
+from llm.client import async_call_llm, call_llm
+from llm.prompt_registry import prompts
 from llm.response_parser import parse_action
 from validation.schemas import ActionRequest, ActionType, IntentType
 
 class GreeterAgent:
     def __init__(self):
-        self.prompt_path = "DineFlow/llm/prompts/greeter.md"
+        self.prompt_name = "greeter"
         self.fallback_prompt = (
             "You are DineFlow, a friendly restaurant greeter. "
             "Greet users warmly in 1-2 sentences. "
@@ -89,12 +89,19 @@ class GreeterAgent:
         )
     
     def run(self, user_input: str, session, memory) -> ActionRequest:
+        # Call LLM
+        # Not cached: the prompt never changes, so every "hi" would replay one greeting
+        response_text = call_llm(self._system_prompt(), user_input, cache=False)
+        return self._finish(response_text)
+
+    async def arun(self, user_input: str, session, memory) -> ActionRequest:
+        response_text = await async_call_llm(self._system_prompt(), user_input, cache=False)
+        return self._finish(response_text)
+
+    def _system_prompt(self) -> str:
         # Load prompt with fallback
-        if os.path.exists(self.prompt_path):
-            with open(self.prompt_path, "r") as f:
-                system_prompt = f.read()
-        else:
-            system_prompt = self.fallback_prompt
+        template = prompts.find(self.prompt_name)
+        system_prompt = template.text if template is not None else self.fallback_prompt
         
         # 🆕 STRONGER JSON ENFORCEMENT
         if "json" not in system_prompt.lower():
@@ -104,10 +111,9 @@ class GreeterAgent:
                 "Required fields: action_type, message, confidence\n"
                 "Example: {\"action_type\": \"NO_OP\", \"message\": \"Hello!\", \"confidence\": 1.0}"
             )
-        
-        # Call LLM
-        response_text = call_llm(system_prompt, user_input)
-        
+        return system_prompt
+
+    def _finish(self, response_text: str) -> ActionRequest:
         # Parse response (parser now auto-fixes incomplete JSON)
         parsed = parse_action(response_text)
         
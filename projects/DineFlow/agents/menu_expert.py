@@ -261,20 +261,27 @@
 
 
 # DineFlow/agents/menu_expert.py
-from pathlib import Path
-from llm.client import call_llm
+import asyncio
+
+from llm.client import async_call_llm, call_llm
+from llm.prompt_registry import prompts
 from llm.response_parser import parse_action
 from orchestration.helpers import render_menu_context
+from tools.search.filters import ItemFilters
 from tools.search.hybrid import hybrid_search
 from validation.schemas import ActionRequest, ActionType
 from state_machine.types import ContextScope
 
 
 class MenuExpertAgent:
-    def __init__(self, all_menu_items: list, bm25_engine):
+    def __init__(self, all_menu_items: list, bm25_engine, search_filters: ItemFilters = None):
+        """
+        search_filters: optional hybrid_search filters for FILTERED_SEARCH
+        retrieval (e.g. {"in_stock": True}); None searches the whole menu.
+        """
         self.all_menu_items = all_menu_items
         self.bm25_engine = bm25_engine
-        self.prompt_path = Path(__file__).parent.parent / "llm" / "prompts" / "menu_expert.md"
+        self.search_filters = search_filters
 
     def run(self, user_input: str, session, memory) -> ActionRequest:
         """
@@ -290,25 +297,42 @@ class MenuExpertAgent:
         specifically from relevant_items that were actually shown to the user,
         not from what the user asked for.
         """
+        full_prompt, relevant_items = self._prepare(user_input, session, memory)
+
+        # 4️⃣ LLM INFERENCE
+        # Cached: read-only, and the prompt carries the menu slice and history
+        # it depends on, so an exact match is the same question in the same context
+        raw_output = call_llm(full_prompt, user_input, cache=True)
+        return self._finish(raw_output, session, relevant_items)
 
+    async def arun(self, user_input: str, session, memory) -> ActionRequest:
+        """
+        run() for the event loop. Retrieval and history (hybrid_search, the
+        query embedding, memory.get_context) block, so _prepare runs on a
+        worker thread and other sessions keep the loop meanwhile.
+        """
+        full_prompt, relevant_items = await asyncio.to_thread(self._prepare, user_input, session, memory)
+        raw_output = await async_call_llm(full_prompt, user_input, cache=True)
+        return self._finish(raw_output, session, relevant_items)
+
+    def _prepare(self, user_input: str, session, memory):
         # 1️⃣ DATA RETRIEVAL — respect the scope permit granted by Authority
         if session.context_scope == ContextScope.FULL_CATALOG:
             relevant_items = self.all_menu_items
         else:
-            relevant_items = hybrid_search(user_input, self.all_menu_items, self.bm25_engine)
-            relevant_items = relevant_items[:5]
+            relevant_items = hybrid_search(user_input, self.all_menu_items, self.bm25_engine, k=5,
+                                           filters=self.search_filters)
 
         # 2️⃣ CONTEXT PREPARATION
         menu_string = render_menu_context(menu_items=relevant_items, include_skus=False)
         history_str = memory.get_context(user_input, limit=3)
 
         # 3️⃣ PROMPT CONSTRUCTION
-        system_prompt_template = self.prompt_path.read_text(encoding="utf-8")
-        system_prompt = system_prompt_template.replace("{{MENU_CONTEXT}}", menu_string)
+        system_prompt = prompts.render("menu_expert", MENU_CONTEXT=menu_string)
         full_prompt = f"{system_prompt}\n\nHISTORY:\n{history_str}"
+        return full_prompt, relevant_items
 
-        # 4️⃣ LLM INFERENCE
-        raw_output = call_llm(full_prompt, user_input)
+    def _finish(self, raw_output: str, session, relevant_items) -> ActionRequest:
         action = parse_action(raw_output)
 
         # 5️⃣ CONTEXT UPDATE — delegated to golden_loop
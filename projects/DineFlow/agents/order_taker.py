@@ -314,9 +314,12 @@
 
 
 # DineFlow/agents/order_taker.py
-from llm.client import call_llm
+import asyncio
+
+from llm.client import async_call_llm, call_llm
 from llm.response_parser import parse_action
-from orchestration.helpers import load_order_taker_prompt, render_menu_context, resolve_menu_item
+from llm.prompt_registry import prompts
+from orchestration.helpers import render_menu_context, resolve_menu_item
 from tools.search.hybrid import hybrid_search
 from validation.schemas import ActionRequest, ActionType
 
@@ -346,7 +349,24 @@ class OrderTakerAgent:
         ── Normal turn ────────────────────────────────────────────────────────
             Hybrid search + standard context.
         """
+        system_prompt = self._build_prompt(user_input, session, memory)
+
+        # 6. LLM INFERENCE
+        # Never cached: the reply is a cart-changing decision for this turn
+        raw_output = call_llm(system_prompt, user_input, cache=False)
+        return self._enforce_contract(parse_action(raw_output))
+
+    async def arun(self, user_input: str, session, memory) -> ActionRequest:
+        """
+        run() for the event loop. _build_prompt blocks on hybrid_search and
+        memory lookups, so it runs on a worker thread and other sessions
+        keep the loop meanwhile.
+        """
+        system_prompt = await asyncio.to_thread(self._build_prompt, user_input, session, memory)
+        raw_output = await async_call_llm(system_prompt, user_input, cache=False)
+        return self._enforce_contract(parse_action(raw_output))
 
+    def _build_prompt(self, user_input: str, session, memory) -> str:
         # 1. DETECT CLARIFICATION RESPONSE — highest priority, check first
         pending = memory.pending_clarification()
 
@@ -378,17 +398,10 @@ class OrderTakerAgent:
         combined_history = focus_block + history_str
 
         # 5. PROMPT CONSTRUCTION
-        prompt_template = load_order_taker_prompt()
-        system_prompt = (
-            prompt_template
-            .replace("{{MENU_CONTEXT}}", menu_string)
-            .replace("{{CHAT_HISTORY}}", combined_history)
-        )
-
-        # 6. LLM INFERENCE
-        raw_output = call_llm(system_prompt, user_input)
-        action = parse_action(raw_output)
+        return prompts.render("order_taker", MENU_CONTEXT=menu_string, CHAT_HISTORY=combined_history)
 
+    @staticmethod
+    def _enforce_contract(action: ActionRequest) -> ActionRequest:
         # 7. CONTRACT ENFORCEMENT
         # OrderTaker cannot decide to transfer — that is the Router's job.
         if action.action_type == ActionType.TRANSFER:
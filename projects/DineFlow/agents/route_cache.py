@@ -0,0 +1,260 @@
+# DineFlow/agents/route_cache.py
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+Embedder = Callable[[List[str]], np.ndarray]
+
+SEED_PATH = Path(__file__).parent.parent / "llm" / "prompts" / "router_exemplars.json"
+LEARNED_PATH = str(Path(__file__).parent.parent / "vector_index" / "routes.jsonl")
+
+SIMILARITY_THRESHOLD = 0.85   # cosine; below this the LLM decides
+AMBIGUITY_MARGIN = 0.03       # a different-target exemplar this close → LLM decides
+LEARN_MIN_CONFIDENCE = 0.9    # LLM confidence needed to keep a route as an exemplar
+DUPLICATE_SIMILARITY = 0.97   # an exemplar this close already covers the input
+MAX_LEARNED = 2048
+
+SOURCE_SEED = "seed"
+SOURCE_LEARNED = "learned"
+
+
+@dataclass(frozen=True)
+class Exemplar:
+    text: str
+    target_agent: str
+    intent: str
+    source: str = SOURCE_SEED
+    # Learned routes only apply under the agent they were learned with —
+    # the router prompt is sticky ("yes" → active agent). Seeds apply anywhere.
+    active_agent: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class RouteMatch:
+    exemplar: Exemplar
+    similarity: float
+
+
+class SemanticRouteCache:
+    """
+    Nearest-neighbour routing tier between IntentRouter's keyword sets and
+    its LLM fallback.
+
+    Labelled exemplars — a seed file plus LLM routes made with confidence
+    ≥ LEARN_MIN_CONFIDENCE — are kept as one L2-normalised float32 matrix;
+    lookup() is a single matrix-vector product. A match needs cosine
+    similarity ≥ threshold AND no exemplar for a different agent within
+    AMBIGUITY_MARGIN of it; anything else goes to the LLM as before.
+
+    The tier never loads the embedding model itself: `ready()` reports
+    whether it is loaded (warm-up or the first vector search does that),
+    and until then lookup() returns None and learn() does nothing. Query
+    embeddings go through the backend's shared LRU, so the vector leg of the
+    same turn's hybrid_search reuses them.
+
+    Learned exemplars are appended to learned_path (JSONL, text + labels —
+    re-embedded on load, so a model change cannot leave stale vectors) and
+    survive restarts. At most max_learned are kept, oldest dropped first.
+    The file is rewritten with just the kept rows on load when it holds
+    more, and whenever appends take it past twice max_learned, so it stays
+    bounded too.
+    """
+
+    def __init__(self, embed: Embedder, ready: Callable[[], bool] = lambda: True,
+                 seed_path: Optional[os.PathLike] = SEED_PATH,
+                 learned_path: Optional[str] = LEARNED_PATH,
+                 threshold: float = SIMILARITY_THRESHOLD,
+                 max_learned: int = MAX_LEARNED):
+        self._embed = embed
+        self._ready = ready
+        self.seed_path = seed_path
+        self.learned_path = learned_path
+        self.threshold = threshold
+        self.max_learned = max_learned
+        self._lock = threading.Lock()
+        # (exemplars, matrix) swapped as one tuple so lookups never see a
+        # half-updated index
+        self._index: Optional[Tuple[List[Exemplar], np.ndarray]] = None
+        # Rows currently in learned_path; appends and rewrites hold _file_lock
+        self._file_rows = 0
+        self._file_lock = threading.Lock()
+        # Counters are bumped from concurrent router threads
+        self._stats_lock = threading.Lock()
+
+        self.lookups = 0
+        self.hits = 0
+        self.ambiguous = 0
+        self.learned = 0
+
+    # ── Public API ─────────────────────────────────────────────────────────────
+
+    def lookup(self, user_input: str, active_agent: Optional[str] = None) -> Optional[RouteMatch]:
+        index = self._get_index()
+        if index is None or not user_input.strip():
+            return None
+        exemplars, matrix = index
+        with self._stats_lock:
+            self.lookups += 1
+        if not exemplars:
+            return None
+
+        scores = matrix @ self._embed([user_input])[0]
+        applicable = np.fromiter(
+            (e.active_agent is None or e.active_agent == active_agent for e in exemplars),
+            dtype=bool, count=len(exemplars),
+        )
+        scores = np.where(applicable, scores, -1.0)
+        best = int(np.argmax(scores))
+        similarity = float(scores[best])
+        if similarity < self.threshold:
+            return None
+
+        winner = exemplars[best]
+        rivals = np.fromiter((e.target_agent != winner.target_agent for e in exemplars),
+                             dtype=bool, count=len(exemplars))
+        if rivals.any() and float(scores[rivals].max()) >= similarity - AMBIGUITY_MARGIN:
+            with self._stats_lock:
+                self.ambiguous += 1
+            return None
+
+        with self._stats_lock:
+            self.hits += 1
+        return RouteMatch(winner, similarity)
+
+    def learn(self, user_input: str, target_agent: str, intent: str, confidence: float,
+              active_agent: Optional[str] = None) -> bool:
+        """Keeps a confident LLM route as an exemplar. True if it was added."""
+        text = user_input.strip()
+        if confidence < LEARN_MIN_CONFIDENCE or not text or not target_agent:
+            return False
+        index = self._get_index()
+        if index is None:
+            return False
+
+        vector = self._embed([text])[0]
+        exemplar = Exemplar(text, target_agent, intent, SOURCE_LEARNED, active_agent)
+        with self._lock:
+            exemplars, matrix = self._index
+            if exemplars and float((matrix @ vector).max()) >= DUPLICATE_SIMILARITY:
+                return False
+            exemplars = exemplars + [exemplar]
+            matrix = np.vstack([matrix, vector[None, :]]) if len(matrix) else vector[None, :]
+            exemplars, matrix = self._evict(exemplars, matrix)
+            self._index = (exemplars, np.ascontiguousarray(matrix, dtype=np.float32))
+        with self._stats_lock:
+            self.learned += 1
+        self._append_learned(exemplar)
+        return True
+
+    def stats(self) -> dict:
+        index = self._index
+        exemplars = index[0] if index else []
+        with self._stats_lock:
+            return {
+                "exemplars": len(exemplars),
+                "learned_exemplars": sum(e.source == SOURCE_LEARNED for e in exemplars),
+                "lookups": self.lookups,
+                "hits": self.hits,
+                "ambiguous": self.ambiguous,
+                "learned": self.learned,
+                "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            }
+
+    # ── Internals ──────────────────────────────────────────────────────────────
+
+    def _get_index(self) -> Optional[Tuple[List[Exemplar], np.ndarray]]:
+        if self._index is not None:
+            return self._index
+        if not self._ready():
+            return None
+        with self._lock:
+            if self._index is None:
+                exemplars = self._load_seed() + self._load_learned()
+                matrix = (self._embed([e.text for e in exemplars]) if exemplars
+                          else np.zeros((0, 0), dtype=np.float32))
+                exemplars, matrix = self._evict(exemplars, np.asarray(matrix, dtype=np.float32))
+                self._index = (exemplars, np.ascontiguousarray(matrix))
+                kept = [e for e in exemplars if e.source == SOURCE_LEARNED]
+                if self._file_rows > len(kept):
+                    self._rewrite_learned(kept)
+                logger.info("Semantic route cache: %d exemplars", len(exemplars))
+            return self._index
+
+    def _evict(self, exemplars: List[Exemplar], matrix: np.ndarray):
+        learned = [i for i, e in enumerate(exemplars) if e.source == SOURCE_LEARNED]
+        excess = len(learned) - self.max_learned
+        if excess <= 0:
+            return exemplars, matrix
+        drop = set(learned[:excess])
+        keep = [i for i in range(len(exemplars)) if i not in drop]
+        return [exemplars[i] for i in keep], matrix[keep]
+
+    def _load_seed(self) -> List[Exemplar]:
+        if not self.seed_path or not os.path.exists(self.seed_path):
+            return []
+        with open(self.seed_path, "r", encoding="utf-8") as f:
+            rows = json.load(f)
+        return [Exemplar(r["text"], r["target_agent"], r["intent"], SOURCE_SEED) for r in rows]
+
+    def _load_learned(self) -> List[Exemplar]:
+        if not self.learned_path or not os.path.exists(self.learned_path):
+            return []
+        exemplars = []
+        with open(self.learned_path, "r", encoding="utf-8") as f:
+            for line in f:
+                self._file_rows += 1
+                try:
+                    r = json.loads(line)
+                    exemplars.append(Exemplar(r["text"], r["target_agent"], r["intent"],
+                                              SOURCE_LEARNED, r.get("active_agent")))
+                except (ValueError, KeyError):
+                    logger.warning("Skipping malformed learned route: %r", line[:80])
+        return exemplars
+
+    def _append_learned(self, exemplar: Exemplar) -> None:
+        if not self.learned_path:
+            return
+        with self._file_lock:
+            try:
+                os.makedirs(os.path.dirname(self.learned_path) or ".", exist_ok=True)
+                with open(self.learned_path, "a", encoding="utf-8") as f:
+                    f.write(_row(exemplar))
+                self._file_rows += 1
+            except OSError as e:
+                logger.warning("Could not persist learned route: %s", e)
+                return
+        if self._file_rows > 2 * self.max_learned:
+            index = self._index
+            self._rewrite_learned([e for e in index[0] if e.source == SOURCE_LEARNED])
+
+    def _rewrite_learned(self, exemplars: List[Exemplar]) -> None:
+        """Replaces learned_path with exactly these rows (write + rename)."""
+        if not self.learned_path:
+            return
+        tmp = f"{self.learned_path}.tmp"
+        with self._file_lock:
+            try:
+                os.makedirs(os.path.dirname(self.learned_path) or ".", exist_ok=True)
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.writelines(_row(e) for e in exemplars)
+                os.replace(tmp, self.learned_path)
+                self._file_rows = len(exemplars)
+            except OSError as e:
+                logger.warning("Could not compact learned routes: %s", e)
+
+
+def _row(exemplar: Exemplar) -> str:
+    return json.dumps({
+        "text": exemplar.text,
+        "target_agent": exemplar.target_agent,
+        "intent": exemplar.intent,
+        "active_agent": exemplar.active_agent,
+    }, ensure_ascii=False) + "\n"
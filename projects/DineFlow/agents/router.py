@@ -358,22 +358,43 @@
 
 # DineFlow/agents/router.py
 
-import string
 import logging
-from llm.client import call_llm
+import threading
+from collections import Counter
+from typing import Optional
+
+from agents.route_cache import SemanticRouteCache
+from llm.client import async_call_llm, call_llm
+from llm.prompt_registry import prompts
 from llm.response_parser import parse_action
+from validation import turn_features as tf
 from validation.schemas import ActionRequest, ActionType, IntentType
 
 logger = logging.getLogger(__name__)
 
+
+def _embed_query(texts):
+    from tools.search.vector import backend
+    return backend.embed_query(texts)
+
+
+def _encoder_ready() -> bool:
+    from tools.search.vector import backend
+    return backend.encoder_ready
+
+
+# Shared by every IntentRouter in the process (exemplars are learned once)
+route_cache = SemanticRouteCache(embed=_embed_query, ready=_encoder_ready)
+
+
 class IntentRouter:
     """
     ⚖️ SCALABLE ENTERPRISE ROUTER (v1.5 — PRODUCTION HARDENED)
     """
 
-    GREETINGS = {"hi", "hello", "hey", "bye", "thanks", "thank you"}
+    GREETINGS = tf.GREETINGS
 
-    STRONG_ORDER_VERBS = {"add", "order", "buy", "checkout"}
+    STRONG_ORDER_VERBS = tf.STRONG_ORDER_VERBS
 
     # Continuation phrases that always indicate ordering intent.
     # These bypass LLM routing to prevent misclassification as greetings.
@@ -381,23 +402,107 @@ class IntentRouter:
     # "another" / "one more" → increment last item
     # These are kept separate from STRONG_ORDER_VERBS to make intent
     # explicit in routing meta for downstream logging.
-    CONTINUATION_PHRASES = {"same", "another", "one more", "same again"}
+    CONTINUATION_PHRASES = tf.CONTINUATION_PHRASES
 
-    def __init__(self):
-        self.prompt_path = "llm/prompts/router.md"
+    def __init__(self, semantic_cache: Optional[SemanticRouteCache] = None):
+        # Tier 1.5: nearest labelled exemplar (see agents/route_cache.py)
+        self.semantic_cache = semantic_cache if semantic_cache is not None else route_cache
+        # Decisions per source — how many LLM routing calls each tier avoided
+        self.decisions: Counter = Counter()
+        self._decisions_lock = threading.Lock()
 
     def _load_prompt(self, active_agent: str) -> str:
-        with open(self.prompt_path, "r") as f:
-            template = f.read()
-        return template.replace("{{ACTIVE_AGENT}}", active_agent)
+        return prompts.render("router", ACTIVE_AGENT=active_agent)
 
     def route(self, user_input: str, active_agent: str) -> ActionRequest:
-        text = user_input.lower().strip()
-        text_clean = text.translate(str.maketrans('', '', string.punctuation))
-        tokens = set(text_clean.split())
+        # 1️⃣ TIER 1: DETERMINISTIC (Fast/Free) + SEMANTIC (nearest exemplar)
+        decided = self._fast_tiers(user_input, active_agent)
+        if decided is not None:
+            return self._record(decided, user_input)
 
-        # 1️⃣ TIER 1: DETERMINISTIC (Fast/Free)
-        if text_clean in self.GREETINGS:
+        # 2️⃣ TIER 2: LLM FALLBACK (Resilient/Hardened)
+        try:
+            system_prompt = self._load_prompt(active_agent)
+            # Common phrasings repeat all day — cache the routing decision
+            raw_output = call_llm(system_prompt, user_input, cache=True)
+            action = self._from_llm(raw_output, user_input, active_agent)
+        except Exception as e:
+            action = self._llm_failure(e)
+        return self._record(action, user_input)
+
+    async def aroute(self, user_input: str, active_agent: str) -> ActionRequest:
+        """route() for the event loop — only the LLM tier awaits."""
+        decided = self._fast_tiers(user_input, active_agent)
+        if decided is not None:
+            return self._record(decided, user_input)
+
+        try:
+            system_prompt = self._load_prompt(active_agent)
+            raw_output = await async_call_llm(system_prompt, user_input, cache=True)
+            action = self._from_llm(raw_output, user_input, active_agent)
+        except Exception as e:
+            action = self._llm_failure(e)
+        return self._record(action, user_input)
+
+    def stats(self) -> dict:
+        """Routing decisions per source, plus the semantic tier's own counters."""
+        with self._decisions_lock:
+            decisions = dict(self.decisions)
+        total = sum(decisions.values())
+        llm = decisions.get("llm_fallback", 0) + decisions.get("fallback_error", 0)
+        return {
+            "decisions": decisions,
+            "total": total,
+            "llm_calls_avoided": total - llm,
+            "semantic": self.semantic_cache.stats(),
+        }
+
+    def _record(self, action: ActionRequest, user_input: str) -> ActionRequest:
+        source = (action.meta or {}).get("routing", "unknown")
+        with self._decisions_lock:
+            self.decisions[source.split(":", 1)[0]] += 1
+        logger.info(
+            "route source=%s target=%s intent=%s confidence=%.2f input=%r",
+            source, action.target_agent, getattr(action.intent, "value", action.intent),
+            action.confidence, user_input[:80],
+        )
+        return action
+
+    def _fast_tiers(self, user_input: str, active_agent: str) -> Optional[ActionRequest]:
+        decided = self._deterministic(user_input)
+        if decided is None:
+            decided = self._semantic(user_input, active_agent)
+        return decided
+
+    def _semantic(self, user_input: str, active_agent: str) -> Optional[ActionRequest]:
+        try:
+            match = self.semantic_cache.lookup(user_input, active_agent)
+        except Exception as e:
+            # The tier is an optimisation; the LLM still routes correctly
+            logger.warning(f"Semantic routing failed: {e}")
+            return None
+        if match is None:
+            return None
+        exemplar = match.exemplar
+        return ActionRequest(
+            action_type=ActionType.TRANSFER,
+            target_agent=exemplar.target_agent,
+            intent=IntentType(exemplar.intent),
+            # Same ceiling as the LLM tier — neither is as sure as a keyword
+            confidence=min(round(match.similarity, 3), 0.85),
+            meta={
+                "routing": "semantic",
+                "similarity": round(match.similarity, 4),
+                "exemplar": exemplar.text,
+                "exemplar_source": exemplar.source,
+            }
+        )
+
+    def _deterministic(self, user_input: str) -> Optional[ActionRequest]:
+        # Shared with the resolver / classifier for this turn (see turn_features)
+        features = tf.turn_features(user_input)
+
+        if features.is_greeting:
             return ActionRequest(
                 action_type=ActionType.TRANSFER,
                 target_agent="Greeter",
@@ -406,7 +511,7 @@ class IntentRouter:
                 meta={"routing": "deterministic:greeting"}
             )
 
-        if tokens & self.STRONG_ORDER_VERBS:
+        if features.has_order_verb:
             return ActionRequest(
                 action_type=ActionType.TRANSFER,
                 target_agent="OrderTaker",
@@ -418,7 +523,7 @@ class IntentRouter:
         # Continuation phrases — ordering intent, always route to OrderTaker.
         # Checked after STRONG_ORDER_VERBS and GREETINGS so they don't shadow
         # explicit orders that happen to contain "same" or "another".
-        if text_clean in self.CONTINUATION_PHRASES or tokens & self.CONTINUATION_PHRASES:
+        if features.is_continuation:
             return ActionRequest(
                 action_type=ActionType.TRANSFER,
                 target_agent="OrderTaker",
@@ -427,33 +532,41 @@ class IntentRouter:
                 meta={"routing": "deterministic:continuation"}
             )
 
-        # 2️⃣ TIER 2: LLM FALLBACK (Resilient/Hardened)
-        try:
-            system_prompt = self._load_prompt(active_agent)
-            raw_output = call_llm(system_prompt, user_input)
-            parsed = parse_action(raw_output)
-
-            return ActionRequest(
-                action_type=ActionType.TRANSFER,
-                target_agent=parsed.target_agent or "OrderTaker",
-                intent=parsed.intent or IntentType.ORDERING,
-                confidence=min(parsed.confidence or 0.7, 0.85),
-                meta={
-                    **(parsed.meta or {}),
-                    "routing": "llm_fallback"
-                }
-            )
-
-        except Exception as e:
-            logger.error(f"Router LLM Failure: {e}")
-
-            return ActionRequest(
-                action_type=ActionType.TRANSFER,
-                target_agent="OrderTaker",
-                intent=IntentType.ORDERING,
-                confidence=0.5,
-                meta={
-                    "routing": "fallback_error",
-                    "error_type": type(e).__name__
-                }
-            )
\ No newline at end of file
+        return None
+
+    def _from_llm(self, raw_output: str, user_input: str, active_agent: str) -> ActionRequest:
+        parsed = parse_action(raw_output)
+
+        # Confident LLM routes become exemplars, so the next paraphrase is
+        # routed without a call
+        if parsed.target_agent and parsed.intent:
+            try:
+                self.semantic_cache.learn(user_input, parsed.target_agent, parsed.intent.value,
+                                          parsed.confidence or 0.0, active_agent)
+            except Exception as e:
+                logger.warning(f"Semantic route learning failed: {e}")
+
+        return ActionRequest(
+            action_type=ActionType.TRANSFER,
+            target_agent=parsed.target_agent or "OrderTaker",
+            intent=parsed.intent or IntentType.ORDERING,
+            confidence=min(parsed.confidence or 0.7, 0.85),
+            meta={
+                **(parsed.meta or {}),
+                "routing": "llm_fallback"
+            }
+        )
+
+    def _llm_failure(self, e: Exception) -> ActionRequest:
+        logger.error(f"Router LLM Failure: {e}")
+
+        return ActionRequest(
+            action_type=ActionType.TRANSFER,
+            target_agent="OrderTaker",
+            intent=IntentType.ORDERING,
+            confidence=0.5,
+            meta={
+                "routing": "fallback_error",
+                "error_type": type(e).__name__
+            }
+        )
\ No newline at end of file
@@ -0,0 +1,92 @@
+# DineFlow/benchmarks/bench_bm25.py
+"""
+MenuBM25 benchmark: native inverted index vs. the previous rank_bm25 path.
+
+Usage (from the DineFlow directory):
+    python -m benchmarks.bench_bm25
+    python -m benchmarks.bench_bm25 --sizes 100 1000 10000 --repeat 20
+
+Rows: search / score_all / top_k use the default "index" mode; "sparse"
+is search() in CSR mode; "batch/q" is score_batch() over all sample
+queries at once, reported per query.
+
+The "legacy" column reproduces the pre-index implementation exactly:
+BM25Okapi.get_scores() over every document followed by
+sorted(zip(items, scores)). rank_bm25 is only needed to run this script.
+"""
+import argparse
+import time
+from statistics import median
+
+from benchmarks.fixtures import synthetic_menu, sample_queries
+from tools.search.bm25 import MenuBM25, tokenize_item, tokenize_query
+
+
+class LegacyMenuBM25:
+    """Pre-index implementation, kept verbatim for comparison."""
+
+    def __init__(self, menu_items):
+        from rank_bm25 import BM25Okapi
+        self.items = menu_items
+        self.bm25 = BM25Okapi([tokenize_item(item) for item in menu_items])
+
+    def search(self, query):
+        scores = self.bm25.get_scores(tokenize_query(query))
+        ranked = sorted(zip(self.items, scores), key=lambda x: x[1], reverse=True)
+        return [item.sku for item, score in ranked if score > 0]
+
+    def score_all(self, query):
+        scores = self.bm25.get_scores(tokenize_query(query))
+        return sorted(zip(self.items, scores), key=lambda x: x[1], reverse=True)
+
+
+def _time_per_query(fn, queries, repeat: int) -> float:
+    """Median wall time of one pass over all queries, divided per query (µs)."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for query in queries:
+            fn(query)
+        samples.append(time.perf_counter() - start)
+    return median(samples) / len(queries) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    queries = sample_queries()
+    print(f"{'items':>7} | {'op':<10} | {'legacy µs':>10} | {'native µs':>10} | {'speedup':>7}")
+    print("-" * 56)
+    for size in args.sizes:
+        menu = synthetic_menu(size)
+
+        start = time.perf_counter()
+        legacy = LegacyMenuBM25(menu)
+        legacy_build = (time.perf_counter() - start) * 1e3
+        start = time.perf_counter()
+        native = MenuBM25(menu)
+        native_build = (time.perf_counter() - start) * 1e3
+
+        for op in ("search", "score_all"):
+            old = _time_per_query(getattr(legacy, op), queries, args.repeat)
+            new = _time_per_query(getattr(native, op), queries, args.repeat)
+            print(f"{size:>7} | {op:<10} | {old:>10.1f} | {new:>10.1f} | {old / new:>6.1f}x")
+        top = _time_per_query(lambda q: native.top_k(q, 5), queries, args.repeat)
+        print(f"{size:>7} | {'top_k(5)':<10} | {'-':>10} | {top:>10.1f} |")
+
+        sparse = MenuBM25(menu, mode="sparse")
+        sparse.search(queries[0])  # build the CSR matrix outside the timed loop
+        old = _time_per_query(legacy.search, queries, args.repeat)
+        new = _time_per_query(sparse.search, queries, args.repeat)
+        print(f"{size:>7} | {'sparse':<10} | {old:>10.1f} | {new:>10.1f} | {old / new:>6.1f}x")
+        batch = _time_per_query(lambda _: sparse.score_batch(queries), [None], args.repeat) / len(queries)
+        print(f"{size:>7} | {'batch/q':<10} | {old:>10.1f} | {batch:>10.1f} | {old / batch:>6.1f}x")
+        print(f"{size:>7} | {'build ms':<10} | {legacy_build:>10.1f} | {native_build:>10.1f} |")
+        print("-" * 56)
+
+
+if __name__ == "__main__":
+    main()
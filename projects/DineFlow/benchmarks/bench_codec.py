@@ -0,0 +1,114 @@
+# DineFlow/benchmarks/bench_codec.py
+"""
+Serialisation benchmark: the previous json/model_dump path vs. the fast path.
+
+Usage (from the DineFlow directory):
+    python -m benchmarks.bench_codec
+    python -m benchmarks.bench_codec --context 5 50 200 --repeat 20 --codec orjson
+
+Rows, per object, for sessions with N items in active_context:
+
+  session enc   legacy: json.dumps(session.model_dump(), indent=2), as
+                session_store.json was written
+                fast:   session.model_dump_json() (pydantic-core, compact)
+  session dec   legacy: SessionState(**json.loads(text))
+                fast:   SessionState.model_validate_json(bytes)
+  action dec    legacy: ActionRequest.model_validate(json.loads(raw)), the
+                old parse_action core
+                fast:   parse_action(raw_bytes), validated straight from bytes
+  events enc    one delta-save event batch: json.dumps vs. the active codec
+  events dec    the same batch: json.loads vs. the active codec
+
+"fast MB/s" is throughput of the fast side over its own output size.
+"""
+import argparse
+import json
+import time
+from statistics import median
+
+from benchmarks.fixtures import synthetic_menu, synthetic_session
+from llm.response_parser import parse_action
+from state_machine.session_events import mark_clean, pending_events
+from state_machine.types import ContextItem, SessionState
+from validation.codec import get_codec
+from validation.schemas import ActionRequest
+
+ACTION = (b'{"action_type": "ADD_TO_CART", "intent": "ORDERING", "sku": "SKU-00042", "quantity": 2,'
+          b' "message": "Added 2 Smoky Truffle Pizzas to your order.", "confidence": 0.93,'
+          b' "meta": {"source": "order_taker", "matched": ["SKU-00042"]}}')
+
+
+def _time_per_op(fn, repeat: int, number: int) -> float:
+    """Median wall time of one call to fn, in µs."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append(time.perf_counter() - start)
+    return median(samples) / number * 1e6
+
+
+def _turn_events(session: SessionState) -> list:
+    """The event batch of one typical turn: counter, agent switch, cart line, two context marks."""
+    mark_clean(session, "bench")
+    session.turn_id += 1
+    session.active_agent = "MenuExpert"
+    sku = next(iter(session.active_context), "SKU-00001")
+    session.cart[sku] = session.cart.get(sku, 0) + 1
+    if sku in session.active_context:
+        session.active_context[sku].selected = True
+    session.active_context["SKU-99999"] = ContextItem(sku="SKU-99999", name="Crispy Tofu Wrap", mentioned=True)
+    return pending_events(session, "bench")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--context", type=int, nargs="+", default=[5, 50, 200])
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--number", type=int, default=200)
+    parser.add_argument("--codec", default="auto")
+    args = parser.parse_args()
+
+    codec = get_codec(args.codec)
+    menu = synthetic_menu(1000)
+    print(f"codec: {codec.name}")
+    print(f"{'context':>7} | {'op':<12} | {'legacy µs':>10} | {'fast µs':>10} | {'speedup':>7} | {'fast MB/s':>9}")
+    print("-" * 72)
+
+    def row(label, size, legacy, fast, payload_bytes):
+        old = _time_per_op(legacy, args.repeat, args.number)
+        new = _time_per_op(fast, args.repeat, args.number)
+        mbps = payload_bytes / new  # bytes/µs == MB/s
+        print(f"{size:>7} | {label:<12} | {old:>10.1f} | {new:>10.1f} | {old / new:>6.1f}x | {mbps:>9.1f}")
+
+    for size in args.context:
+        session = synthetic_session(menu, size)
+        legacy_text = json.dumps(session.model_dump(), indent=2)
+        fast_bytes = session.model_dump_json().encode("utf-8")
+        assert SessionState.model_validate_json(fast_bytes) == SessionState(**json.loads(legacy_text))
+
+        row("session enc", size,
+            lambda: json.dumps(session.model_dump(), indent=2),
+            session.model_dump_json, len(fast_bytes))
+        row("session dec", size,
+            lambda: SessionState(**json.loads(legacy_text)),
+            lambda: SessionState.model_validate_json(fast_bytes), len(fast_bytes))
+
+        events = _turn_events(synthetic_session(menu, size))
+        event_bytes = codec.dumps(events)
+        row("events enc", size, lambda: json.dumps(events), lambda: codec.dumps(events), len(event_bytes))
+        row("events dec", size, lambda: json.loads(event_bytes), lambda: codec.loads(event_bytes),
+            len(event_bytes))
+        print(f"{size:>7} | {'bytes':<12} | {len(legacy_text.encode()):>10} | {len(fast_bytes):>10} |"
+              f" snapshot; one turn's delta is {len(event_bytes)} bytes")
+        print("-" * 72)
+
+    action_text = ACTION.decode("utf-8")
+    row("action dec", "-",
+        lambda: ActionRequest.model_validate(json.loads(action_text)),
+        lambda: parse_action(ACTION), len(ACTION))
+
+
+if __name__ == "__main__":
+    main()
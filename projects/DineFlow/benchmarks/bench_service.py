@@ -0,0 +1,145 @@
+# DineFlow/benchmarks/bench_service.py
+"""
+HTTP service throughput: turns/s through POST /sessions/{id}/turns.
+
+Usage (from the DineFlow directory):
+    python -m benchmarks.bench_service
+    python -m benchmarks.bench_service --workers 1 2 4 --sessions 64 --turns 5 --llm-latency 0.2
+
+Everything is local and laid out as deployed: the LLM is
+service/fake_llm (a fixed reply after --llm-latency seconds) and the
+service is `python -m service.app`, each its own process, so the load
+generator, the ASGI front and the LLM stub never share an interpreter. The
+service runs the real golden_loop in its worker pool against a fresh
+SQLite session store. Each session sends its turns one after another (a
+user waits for the reply); sessions run concurrently, --concurrency at a
+time. Worker scaling needs as many free cores as workers.
+
+The default messages are greetings, which route deterministically to
+Greeter — one LLM call per turn and no vector search, so the numbers show
+orchestration + transport + persistence cost rather than retrieval.
+--no-memory-writes skips the long-term memory (embedding) writes for the
+same reason, and for machines without the embedding model.
+
+Columns: turns/s over the whole run, p50/p95 per-turn latency (ms) as seen
+by the client, and the number of non-200 replies.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from statistics import quantiles
+from typing import List
+
+import httpx
+
+from service.workers import DEFAULT_HANDLER, GoldenLoopHandler
+
+DEFAULT_MESSAGES = ["hi", "hello", "hi", "hello", "hi"]
+
+
+def golden_loop_without_memory_writes(db_path: str) -> GoldenLoopHandler:
+    from unittest.mock import patch
+    patch("orchestration.memory_manager.save_memory").start()
+    return GoldenLoopHandler(db_path=db_path)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def _process(module: str, args: List[str], env: dict, ready_path: str, timeout: float = 60.0):
+    """`python -m module --port P args...`, yielded as its base URL once it answers."""
+    port = _free_port()
+    url = f"http://127.0.0.1:{port}"
+    proc = subprocess.Popen([sys.executable, "-m", module, "--port", str(port), *args],
+                            env={**os.environ, **env}, stdout=subprocess.DEVNULL)
+    try:
+        expires = time.monotonic() + timeout
+        while True:
+            try:
+                httpx.get(url + ready_path, timeout=1.0)
+                break
+            except httpx.TransportError:
+                if proc.poll() is not None or time.monotonic() > expires:
+                    raise RuntimeError(f"{module} did not start")
+                time.sleep(0.05)
+        yield url
+    finally:
+        proc.terminate()
+        proc.wait(timeout)
+
+
+async def _drive(url: str, sessions: int, messages: List[str], concurrency: int):
+    latencies: List[float] = []
+    errors = 0
+    gate = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, timeout=120, limits=limits) as client:
+        async def conversation(n: int) -> None:
+            nonlocal errors
+            async with gate:
+                for message in messages:
+                    start = time.perf_counter()
+                    reply = await client.post(f"/sessions/bench-{n:05d}/turns",
+                                              json={"message": message, "user_id": f"user-{n}"})
+                    latencies.append(time.perf_counter() - start)
+                    errors += reply.status_code != 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(conversation(n) for n in range(sessions)))
+        elapsed = time.perf_counter() - start
+    return elapsed, latencies, errors
+
+
+def run(workers: int, args, llm_url: str) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {"OPENAI_BASE_URL": llm_url + "/v1", "OPENAI_API_KEY": "fake",
+               "LLM_WORKERS": str(args.concurrency), "LOG_LEVEL": "ERROR"}
+        handler = ("benchmarks.bench_service:golden_loop_without_memory_writes"
+                   if args.no_memory_writes else DEFAULT_HANDLER)
+        service_args = ["--workers", str(workers), "--handler", handler,
+                        "--db", os.path.join(tmp, "sessions.sqlite")]
+        with _process("service.app", service_args, env, "/healthz") as url:
+            # Warm-up: every worker imports the agent stack on its first turn
+            asyncio.run(_drive(url, workers * 4, messages=["hi"], concurrency=workers * 4))
+            elapsed, latencies, errors = asyncio.run(
+                _drive(url, args.sessions, args.messages, args.concurrency))
+
+    cuts = quantiles(latencies, n=20)
+    print(f"{workers:>7} | {len(latencies) / elapsed:>8.1f} | {cuts[9] * 1e3:>8.1f} | "
+          f"{cuts[18] * 1e3:>8.1f} | {errors:>6}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--sessions", type=int, default=64)
+    parser.add_argument("--turns", type=int, default=len(DEFAULT_MESSAGES))
+    parser.add_argument("--messages", nargs="+", default=DEFAULT_MESSAGES)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake LLM seconds per call")
+    parser.add_argument("--no-memory-writes", action="store_true")
+    args = parser.parse_args()
+    args.messages = (args.messages * args.turns)[:args.turns]
+
+    print(f"{args.sessions} sessions x {args.turns} turns, concurrency {args.concurrency}, "
+          f"fake LLM latency {args.llm_latency * 1e3:.0f} ms")
+    print(f"{'workers':>7} | {'turns/s':>8} | {'p50 ms':>8} | {'p95 ms':>8} | {'errors':>6}")
+    print("-" * 50)
+    with _process("service.fake_llm", ["--latency", str(args.llm_latency)], {}, "/") as llm_url:
+        for workers in args.workers:
+            run(workers, args, llm_url)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# DineFlow/benchmarks/bench_vector.py
+"""
+Menu vector search benchmark: in-process MenuVectorIndex vs. a Chroma collection.
+
+Usage (from the DineFlow directory):
+    python -m benchmarks.bench_vector
+    python -m benchmarks.bench_vector --sizes 100 1000 10000 --repeat 20
+
+Both sides get the same precomputed, normalised 384-d embeddings (the
+all-MiniLM-L6-v2 width), so only the retrieval step is timed — the query
+embedding cost is identical for both and excluded. The Chroma side is an
+ephemeral in-memory client (no disk IO), which is its best case; chromadb is
+only needed to run this script.
+
+Rows: "query" is one top-3 lookup; "batch/q" is search_batch() over all
+sample queries at once, reported per query; "load ms" is mapping the saved
+.npy back in vs. nothing (Chroma's persistent client load is not measured).
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.bench_bm25 import _time_per_query
+from tools.search.vector_index import MenuVectorIndex
+
+DIM = 384
+N_RESULTS = 3
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    import chromadb
+
+    rng = np.random.default_rng(7)
+    client = chromadb.EphemeralClient()
+    queries = rng.standard_normal((args.queries, DIM)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    print(f"{'items':>7} | {'op':<10} | {'chroma µs':>10} | {'numpy µs':>10} | {'speedup':>7}")
+    print("-" * 56)
+    for size in args.sizes:
+        skus = [f"SKU-{i:05d}" for i in range(size)]
+        index = MenuVectorIndex(skus, rng.standard_normal((size, DIM)))
+
+        coll = client.create_collection(f"menu_{size}", metadata={"hnsw:space": "cosine"},
+                                        embedding_function=None)
+        for start in range(0, size, 5000):
+            coll.add(ids=skus[start:start + 5000], embeddings=index.matrix[start:start + 5000].tolist())
+
+        rows = list(queries)
+        old = _time_per_query(
+            lambda q: coll.query(query_embeddings=[q.tolist()], n_results=N_RESULTS), rows, args.repeat)
+        new = _time_per_query(lambda q: index.search(q, N_RESULTS), rows, args.repeat)
+        print(f"{size:>7} | {'query':<10} | {old:>10.1f} | {new:>10.1f} | {old / new:>6.1f}x")
+
+        old_b = _time_per_query(
+            lambda _: coll.query(query_embeddings=queries.tolist(), n_results=N_RESULTS),
+            [None], args.repeat) / len(rows)
+        new_b = _time_per_query(lambda _: index.search_batch(queries, N_RESULTS), [None], args.repeat) / len(rows)
+        print(f"{size:>7} | {'batch/q':<10} | {old_b:>10.1f} | {new_b:>10.1f} | {old_b / new_b:>6.1f}x")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "menu.npy")
+            index.save(path)
+            start = time.perf_counter()
+            MenuVectorIndex.load(path)
+            load_ms = (time.perf_counter() - start) * 1e3
+        print(f"{size:>7} | {'load ms':<10} | {'-':>10} | {load_ms:>10.2f} |")
+        print("-" * 56)
+        client.delete_collection(f"menu_{size}")
+
+
+if __name__ == "__main__":
+    main()
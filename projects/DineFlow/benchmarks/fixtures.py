@@ -0,0 +1,86 @@
+# DineFlow/benchmarks/fixtures.py
+"""
+Synthetic catalogue generator shared by the benchmark scripts.
+
+The real registry only has five items, which is far too small to show how
+retrieval cost scales. These items mimic the registry's shape: a two or
+three word name, a one-sentence description, seven tags and a SKU, drawn
+from a fixed vocabulary so term frequencies look like a real menu (a few
+very common words such as "pizza", a long tail of rare ones).
+"""
+import random
+from typing import List
+from state_machine.types import ContextItem, ContextScope, MenuItemSnapshot, SessionState
+
+_CATEGORIES = ["pizza", "burger", "salad", "pasta", "beer", "wine", "soup", "wrap", "taco", "curry"]
+_ADJECTIVES = [
+    "spicy", "mild", "classic", "smoky", "fresh", "crispy", "creamy", "tangy", "rich", "light",
+    "zesty", "earthy", "sweet", "savory", "hot", "cold", "grilled", "roasted", "garlic", "herb",
+]
+_INGREDIENTS = [
+    "pepperoni", "mushroom", "truffle", "basil", "mozzarella", "chicken", "beef", "tofu",
+    "paneer", "chorizo", "olive", "onion", "pepper", "tomato", "cheddar", "halloumi", "lamb",
+    "prawn", "salmon", "avocado", "jalapeno", "pineapple", "spinach", "feta", "ricotta",
+]
+_QUERIES = [
+    "anything spicy", "is the truffle pizza vegetarian", "cold beer", "something light and fresh",
+    "pepperoni pizza", "creamy pasta with mushroom", "what salads do you have",
+    "add 2 chicken burgers", "grilled halloumi wrap", "mild curry with paneer",
+]
+
+
+def synthetic_menu(n: int, seed: int = 7) -> List[MenuItemSnapshot]:
+    rng = random.Random(seed)
+    items = []
+    for idx in range(n):
+        category = rng.choice(_CATEGORIES)
+        ingredient = rng.choice(_INGREDIENTS)
+        adjective = rng.choice(_ADJECTIVES)
+        items.append(MenuItemSnapshot(
+            sku=f"SKU-{idx:05d}",
+            name=f"{adjective.title()} {ingredient.title()} {category.title()}",
+            price=round(rng.uniform(4.0, 30.0), 2),
+            in_stock=rng.random() > 0.1,
+            is_alcohol=category in {"beer", "wine"},
+            complexity_score=rng.randint(1, 5),
+            description=(
+                f"A {adjective} {category} with {ingredient}, "
+                f"{rng.choice(_INGREDIENTS)} and {rng.choice(_INGREDIENTS)}. "
+                f"{rng.choice(_ADJECTIVES).title()} and {rng.choice(_ADJECTIVES)}."
+            ),
+            tags=rng.sample(_ADJECTIVES, 4) + [category, ingredient, rng.choice(_INGREDIENTS)],
+        ))
+    return items
+
+
+def sample_queries() -> List[str]:
+    return list(_QUERIES)
+
+
+def synthetic_session(menu: List[MenuItemSnapshot], context_size: int, seed: int = 7) -> SessionState:
+    """A mid-conversation session: a few cart lines, context_size items in focus."""
+    rng = random.Random(seed)
+    focus = rng.sample(menu, min(context_size, len(menu)))
+    turn = rng.randint(5, 30)
+    return SessionState(
+        user_id=f"user-{seed}",
+        session_id=f"sess-{seed:04d}",
+        active_agent="OrderTaker",
+        age_verified=True,
+        tool_budget_remaining=3,
+        cart={item.sku: rng.randint(1, 3) for item in focus[:4]},
+        active_intent="ORDERING",
+        context_scope=ContextScope.FILTERED_SEARCH,
+        last_action_sku=focus[0].sku if focus else None,
+        last_quantity=1,
+        last_action_type="ADD_TO_CART",
+        pending_items=[item.sku for item in focus[:3]],
+        turn_id=turn,
+        active_context={
+            item.sku: ContextItem(
+                sku=item.sku, name=item.name, mentioned=True, selected=idx < 4,
+                last_mentioned_turn=turn - rng.randint(0, 5), confidence=round(rng.uniform(0.6, 1.0), 2),
+            )
+            for idx, item in enumerate(focus)
+        },
+    )
@@ -199,29 +199,28 @@
 
 # projects/DineFlow/cli_app.py
 import uuid
-import json
 import warnings
 import os
+from state_machine.session_repository import SessionRepository
 from state_machine.types import SessionState, KitchenSnapshot
 from orchestration.golden_loop import golden_loop
 from orchestration.memory_manager import MemoryManager
+from tools.search.vector import backend as vector_backend
 # Suppress HuggingFace warnings
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 warnings.filterwarnings("ignore", category=FutureWarning, module="huggingface_hub")
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-STATE_DB_PATH = os.path.join(BASE_DIR, "session_store.json")
+STATE_DB_PATH = os.path.join(BASE_DIR, "session_store.sqlite")
+
+# One row per session (SQLite, WAL). Import an old session_store.json with:
+#   python -m state_machine.session_repository session_store.json
+session_repository = SessionRepository(STATE_DB_PATH)
 
 def get_session_for_user(user_id: str) -> SessionState:
-    if os.path.exists(STATE_DB_PATH):
-        with open(STATE_DB_PATH, "r") as f:
-            try:
-                data = json.load(f)
-                for sess_id, state in data.items():
-                    if state.get("user_id") == user_id and state.get("order_status") == "DRAFT":
-                        return SessionState(**state)
-            except json.JSONDecodeError:
-                pass
+    existing = session_repository.find_active(user_id, "DRAFT")
+    if existing is not None:
+        return existing
     
     # 🆕 Starting as OrderTaker is fine as a default, 
     # but the Router will immediately move them to Greeter on first "Hi"
@@ -233,24 +232,18 @@ def get_session_for_user(user_id: str) -> SessionState:
     )
 
 def save_session_state(session: SessionState):
-    """Saves session state with a safeguard for the file existing."""
-    data = {}
+    """Persists this turn's changes as a delta (periodically a full snapshot)."""
     try:
-        if os.path.exists(STATE_DB_PATH):
-            with open(STATE_DB_PATH, "r") as f:
-                content = f.read()
-                data = json.loads(content) if content else {}
-        
-        data[session.session_id] = session.model_dump()
-        
-        with open(STATE_DB_PATH, "w") as f:
-            json.dump(data, f, indent=2)
+        session_repository.save(session)
     except Exception as e:
         print(f"Critical: Could not save session state: {e}")
 
 def run_dine_flow(user_id: str = "guest_user-77"):
+    # Load Chroma + the embedding model while the user types their first message
+    vector_backend.warm_up()
     session = get_session_for_user(user_id)
-    memory = MemoryManager(session_id=session.session_id)
+    # turn_id 0: no turn has been saved yet, so long-term memory is empty
+    memory = MemoryManager(session_id=session.session_id, new_session=session.turn_id == 0)
     
     # We can simulate a varying kitchen load
     kitchen = KitchenSnapshot(load_percentage=40) 
@@ -1,6 +1,8 @@
 # DineFlow/config/settings.py
 from dotenv import load_dotenv
 import os
+from typing import Optional
+
 from pydantic import BaseModel
 
 load_dotenv()  # <-- loads .env automatically
@@ -9,11 +11,35 @@ class Settings(BaseModel):
     OPENAI_API_KEY: str
     ENV: str = "local"
 
+    # ── LLM transport (llm/transport.py) ──────────────────────────────────────
+    LLM_MODEL: str = "gpt-4o-mini"
+    # Worker processes/threads calling the LLM concurrently; sizes the pool
+    LLM_WORKERS: int = 8
+    LLM_TIMEOUT_S: float = 20.0          # per-call deadline, retries included
+    LLM_MAX_RETRIES: int = 3
+    LLM_RETRY_BUDGET_RATIO: float = 0.2  # retries allowed per first attempt
+
+    # ── LLM response cache (llm/cache.py) ─────────────────────────────────────
+    # Default for callers that pass no cache= — off: replaying a stored reply
+    # is only safe for repeatable, read-only prompts, and those opt in
+    LLM_CACHE_ENABLED: bool = False
+    LLM_CACHE_SIZE: int = 1024           # in-memory LRU entries
+    LLM_CACHE_TTL_S: float = 3600.0
+    LLM_CACHE_PATH: Optional[str] = None  # SQLite file for the shared disk tier
+
 def load_settings() -> Settings:
     return Settings(
         OPENAI_API_KEY=os.getenv("OPENAI_API_KEY"),
         ENV=os.getenv("ENV", "local"),
+        LLM_MODEL=os.getenv("LLM_MODEL", "gpt-4o-mini"),
+        LLM_WORKERS=int(os.getenv("LLM_WORKERS", "8")),
+        LLM_TIMEOUT_S=float(os.getenv("LLM_TIMEOUT_S", "20")),
+        LLM_MAX_RETRIES=int(os.getenv("LLM_MAX_RETRIES", "3")),
+        LLM_RETRY_BUDGET_RATIO=float(os.getenv("LLM_RETRY_BUDGET_RATIO", "0.2")),
+        LLM_CACHE_ENABLED=os.getenv("LLM_CACHE_ENABLED", "false").lower() in {"1", "true", "yes"},
+        LLM_CACHE_SIZE=int(os.getenv("LLM_CACHE_SIZE", "1024")),
+        LLM_CACHE_TTL_S=float(os.getenv("LLM_CACHE_TTL_S", "3600")),
+        LLM_CACHE_PATH=os.getenv("LLM_CACHE_PATH") or None,
     )
 
 settings = load_settings()
-
@@ -1,39 +1,34 @@
 # inspect_db.py
-import json
 import os
 from tabulate import tabulate # You may need to: pip install tabulate
+from state_machine.session_repository import SESSION_DB_PATH, SessionRepository
 
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-STATE_DB_PATH = os.path.join(BASE_DIR, "session_store.json")
+STATE_DB_PATH = SESSION_DB_PATH
 
 def view_database():
     if not os.path.exists(STATE_DB_PATH):
         print("❌ No database file found yet. Place an order first!")
         return
 
-    with open(STATE_DB_PATH, "r") as f:
-        try:
-            data = json.load(f)
-        except json.JSONDecodeError:
-            print("❌ Database file is empty or corrupted.")
-            return
+    with SessionRepository(STATE_DB_PATH) as repository:
+        sessions = list(repository.iter_sessions())
 
     print("\n" + "="*80)
-    print(f"       📊 DineFlow SESSION DATABASE ({len(data)} Sessions Found)")
+    print(f"       📊 DineFlow SESSION DATABASE ({len(sessions)} Sessions Found)")
     print("="*80)
 
     table_data = []
-    for sess_id, state in data.items():
+    for session in sessions:
         # Format the cart for better readability
-        cart = state.get("cart", {})
+        cart = session.cart
         cart_str = ", ".join([f"{qty}x {sku}" for sku, qty in cart.items()]) if cart else "Empty"
         
         table_data.append([
-            sess_id,
-            state.get("user_id", "N/A"),
-            state.get("active_agent", "N/A"),
-            f"{state.get('tool_budget_remaining', 0)}/5",
-            state.get("order_status", "N/A"),
+            session.session_id,
+            session.user_id,
+            session.active_agent,
+            f"{session.tool_budget_remaining}/5",
+            session.order_status,
             cart_str
         ])
 
@@ -42,4 +37,4 @@ def view_database():
     print("="*80 + "\n")
 
 if __name__ == "__main__":
-    view_database()
\ No newline at end of file
+    view_database()
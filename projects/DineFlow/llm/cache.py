@@ -0,0 +1,239 @@
+# DineFlow/llm/cache.py
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from validation.codec import codec
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_S = 3600.0
+
+
+def cache_key(model: str, system_prompt: str, user_input: str) -> str:
+    """
+    (model, system prompt hash, user input) as one digest. The prompt is
+    hashed on its own first so the key's parts stay unambiguous — a prompt
+    ending in the user input's first characters cannot collide with another
+    split of the same text.
+    """
+    prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+    material = json.dumps([model, prompt_hash, user_input], ensure_ascii=False)
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(response: Optional[str]) -> bool:
+    """
+    Only well-formed JSON objects are stored. A truncated or non-JSON
+    completion is retried on the next identical call instead of being
+    replayed for the whole TTL.
+    """
+    if not response:
+        return False
+    try:
+        return isinstance(codec.loads(response), dict)
+    except ValueError:
+        return False
+
+
+class ResponseCache:
+    """
+    Exact-match cache of LLM completions, keyed by cache_key().
+
+    call_llm runs at temperature 0 with response_format=json_object, so the
+    same (model, prompt, input) gives the same answer; router prompts for
+    common phrasings ("menu please") and resolver fallbacks repeat all day.
+
+      memory tier  LRU of max_entries keys, expiry checked on read
+      disk tier    optional SQLite file (WAL) shared by every process on the
+                   host and surviving restarts; a disk hit is promoted into
+                   memory with its remaining TTL
+      TTL          per entry (put(..., ttl=)), default_ttl otherwise; expired
+                   entries count as misses and are dropped when seen
+
+    Whether a call uses the cache is the caller's decision (call_llm's
+    `cache` argument) — this class only stores. stats() exposes hit rates
+    per tier.
+
+    The tiers have separate locks: the memory tier's guards only dict
+    operations, and SQLite I/O runs under its own, so a memory hit never
+    waits behind another thread's disk read or write. get() is
+    get_memory() then get_disk(); async callers run get_disk() / put() off
+    the event loop when has_disk.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, default_ttl: float = DEFAULT_TTL_S,
+                 path: Optional[str] = None, clock=time.time):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.path = path
+        self._clock = clock
+        self._lock = threading.Lock()       # memory tier + counters
+        self._db_lock = threading.Lock()    # the SQLite connection
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()  # key → (value, expires_at)
+        self._db: Optional[sqlite3.Connection] = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stores = 0
+        self.bypassed = 0
+
+    # ── Public API ─────────────────────────────────────────────────────────────
+
+    @property
+    def has_disk(self) -> bool:
+        return self.path is not None
+
+    def get(self, key: str) -> Optional[str]:
+        value = self.get_memory(key)
+        return value if value is not None else self.get_disk(key)
+
+    def get_memory(self, key: str) -> Optional[str]:
+        """Memory tier only; a miss here is not counted (get_disk() settles it)."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return value
+            del self._entries[key]
+            self.expired += 1
+            return None
+
+    def get_disk(self, key: str) -> Optional[str]:
+        """Disk tier (blocking SQLite read); a hit is promoted into memory."""
+        row = self._disk_get(key)
+        now = self._clock()
+        if row is not None and row[1] <= now:
+            self._disk_delete(key)
+            with self._lock:
+                self.expired += 1
+            row = None
+        with self._lock:
+            if row is None:
+                self.misses += 1
+                return None
+            value, expires_at = row
+            self._remember(key, value, expires_at)
+            self.disk_hits += 1
+            return value
+
+    def put(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        ttl = self.default_ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        expires_at = self._clock() + ttl
+        with self._lock:
+            self._remember(key, value, expires_at)
+            self.stores += 1
+        self._disk_put(key, value, expires_at)
+
+    def record_bypass(self) -> None:
+        """A call that opted out of the cache — counted so the hit rate is honest."""
+        with self._lock:
+            self.bypassed += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        with self._db_lock:
+            db = self._connect()
+            if db is not None:
+                with db:
+                    db.execute("DELETE FROM llm_cache")
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            hits = self.memory_hits + self.disk_hits
+            return {
+                "entries": len(self._entries),
+                "lookups": lookups,
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "stores": self.stores,
+                "bypassed": self.bypassed,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "disk": self.path,
+            }
+
+    # ── Internals ──────────────────────────────────────────────────────────────
+
+    def _remember(self, key: str, value: str, expires_at: float) -> None:
+        # Called with self._lock held
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        # Called with self._db_lock held
+        if self.path is None:
+            return None
+        if self._db is None:
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db = db
+        return self._db
+
+    def _disk_get(self, key: str) -> Optional[Tuple[str, float]]:
+        try:
+            with self._db_lock:
+                db = self._connect()
+                if db is None:
+                    return None
+                return db.execute("SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error as e:
+            # The disk tier is an optimisation — never fail the LLM call over it
+            logger.warning("LLM cache disk read failed: %s", e)
+            return None
+
+    def _disk_put(self, key: str, value: str, expires_at: float) -> None:
+        try:
+            with self._db_lock:
+                db = self._connect()
+                if db is None:
+                    return
+                with db:
+                    db.execute(
+                        "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                        (key, value, expires_at),
+                    )
+        except sqlite3.Error as e:
+            logger.warning("LLM cache disk write failed: %s", e)
+
+    def _disk_delete(self, key: str) -> None:
+        try:
+            with self._db_lock:
+                db = self._connect()
+                if db is not None:
+                    with db:
+                        db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+        except sqlite3.Error as e:
+            logger.warning("LLM cache disk delete failed: %s", e)
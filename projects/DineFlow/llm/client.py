@@ -1,18 +1,78 @@
 # DineFlow/llm/client.py
-from openai import OpenAI
+import asyncio
+from typing import Optional
+
 from config.settings import settings
+from llm.cache import ResponseCache, cache_key, is_cacheable
+from llm.transport import LLMTransport, TransportConfig
+
+# Shared by every agent: pooled keep-alive connections, per-call deadline,
+# budgeted retries and call metrics (transport.stats()). The OpenAI client
+# itself is created on the first call.
+transport = LLMTransport(TransportConfig.from_settings(settings), api_key=settings.OPENAI_API_KEY)
+
+# Exact-match completions cache (response_cache.stats() for hit rates).
+# Memory-only unless LLM_CACHE_PATH names a SQLite file.
+response_cache = ResponseCache(
+    max_entries=settings.LLM_CACHE_SIZE,
+    default_ttl=settings.LLM_CACHE_TTL_S,
+    path=settings.LLM_CACHE_PATH,
+)
+
+
+def _cache_key_for(system_prompt: str, user_input: str, cache: Optional[bool]) -> Optional[str]:
+    """
+    The cache key when this call may use the cache, else None.
+
+    cache=None follows LLM_CACHE_ENABLED (off by default); True / False are
+    a caller's explicit opt-in / opt-out. Only repeatable, read-only prompts
+    opt in (routing, reference classification, menu questions); anything
+    whose reply changes the cart, or that should vary per turn, opts out.
+    """
+    enabled = settings.LLM_CACHE_ENABLED if cache is None else cache
+    if not enabled:
+        response_cache.record_bypass()
+        return None
+    return cache_key(transport.config.model, system_prompt, user_input)
+
+
+def _store(key: Optional[str], response: str, cache_ttl: Optional[float]) -> None:
+    if key is not None and is_cacheable(response):
+        response_cache.put(key, response, ttl=cache_ttl)
+
+
+def call_llm(system_prompt: str, user_input: str, deadline: Optional[float] = None,
+             cache: Optional[bool] = None, cache_ttl: Optional[float] = None) -> str:
+    key = _cache_key_for(system_prompt, user_input, cache)
+    if key is not None:
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached
+    response = transport.complete(system_prompt, user_input, deadline=deadline)
+    _store(key, response, cache_ttl)
+    return response
+
+
+async def async_call_llm(system_prompt: str, user_input: str, deadline: Optional[float] = None,
+                         cache: Optional[bool] = None, cache_ttl: Optional[float] = None) -> str:
+    """call_llm for the event loop (async_golden_loop, agents' arun).
 
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
-
-def call_llm(system_prompt: str, user_input: str) -> str:
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        temperature=0,
-        response_format={"type": "json_object"},  # HARD GUARANTEE
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_input}
-        ]
-    )
-    print("llm------- response", response.choices[0].message.content)
-    return response.choices[0].message.content
+    The memory tier is read inline; the SQLite disk tier, when configured,
+    is read and written in a worker thread so the loop never blocks on it.
+    """
+    key = _cache_key_for(system_prompt, user_input, cache)
+    if key is not None:
+        cached = response_cache.get_memory(key)
+        if cached is None:
+            if response_cache.has_disk:
+                cached = await asyncio.to_thread(response_cache.get_disk, key)
+            else:
+                cached = response_cache.get_disk(key)   # no I/O: just counts the miss
+        if cached is not None:
+            return cached
+    response = await transport.acomplete(system_prompt, user_input, deadline=deadline)
+    if response_cache.has_disk:
+        await asyncio.to_thread(_store, key, response, cache_ttl)
+    else:
+        _store(key, response, cache_ttl)
+    return response
@@ -0,0 +1,151 @@
+# DineFlow/llm/prompt_registry.py
+import logging
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROMPTS_DIR = Path(__file__).parent / "prompts"
+PROMPT_SUFFIX = ".md"
+# Seconds between mtime checks of the prompt directory
+CHECK_INTERVAL_S = 1.0
+
+_PLACEHOLDER_RE = re.compile(r"\{\{([A-Z0-9_]+)\}\}")
+
+
+class PromptTemplate:
+    """
+    A prompt pre-split at its {{PLACEHOLDER}} slots.
+
+    render() is one join over the literal pieces and the supplied values.
+    Unlike chained str.replace() calls it never rescans inserted text, so a
+    chat history that happens to contain "{{MENU_CONTEXT}}" stays literal.
+    A placeholder without a value is left as written, as replace() did.
+    """
+
+    def __init__(self, name: str, text: str):
+        self.name = name
+        self.text = text
+        pieces = _PLACEHOLDER_RE.split(text)
+        # Even indices are literals, odd indices are placeholder names
+        self._literals: List[str] = pieces[0::2]
+        self._slots: List[str] = pieces[1::2]
+        self.placeholders = frozenset(self._slots)
+
+    def render(self, **values: str) -> str:
+        if not self._slots:
+            return self.text
+        out = [self._literals[0]]
+        for slot, literal in zip(self._slots, self._literals[1:]):
+            value = values.get(slot)
+            out.append("{{" + slot + "}}" if value is None else value)
+            out.append(literal)
+        return "".join(out)
+
+
+class PromptRegistry:
+    """
+    Every prompt template in a directory, loaded once and kept current.
+
+    Agents used to read their prompt file on every turn (router.md,
+    menu_expert.md, the 14 KB order_taker.md) and Greeter looked for its own
+    under a cwd-relative path that never resolved, so it always ran on the
+    hard-coded fallback.
+
+    All *.md files are read and split into PromptTemplates when the registry
+    is built. get() / render() re-stat the directory at most every
+    check_interval seconds and reload only files whose mtime or size
+    changed, so an edited prompt applies to the next turn without a restart.
+    A file that disappears or fails to read keeps serving its last good
+    version.
+    """
+
+    def __init__(self, directory: os.PathLike = PROMPTS_DIR, check_interval: float = CHECK_INTERVAL_S,
+                 clock=time.monotonic):
+        self.directory = Path(directory)
+        self.check_interval = check_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._templates: Dict[str, PromptTemplate] = {}
+        self._signatures: Dict[str, Tuple[int, int]] = {}   # name → (mtime_ns, size)
+        self._next_check = 0.0
+
+        self.reloads = 0
+        self.checks = 0
+        self._scan()
+
+    # ── Public API ─────────────────────────────────────────────────────────────
+
+    def get(self, name: str) -> PromptTemplate:
+        """The current template for name (file stem). KeyError if there is none."""
+        self._maybe_refresh()
+        try:
+            return self._templates[name]
+        except KeyError:
+            raise KeyError(f"No prompt template {name!r} in {self.directory}") from None
+
+    def find(self, name: str) -> Optional[PromptTemplate]:
+        self._maybe_refresh()
+        return self._templates.get(name)
+
+    def render(self, name: str, **values: str) -> str:
+        return self.get(name).render(**values)
+
+    def refresh(self) -> None:
+        """Checks the directory now, ignoring check_interval."""
+        with self._lock:
+            self._scan()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "templates": sorted(self._templates),
+                "reloads": self.reloads,
+                "checks": self.checks,
+            }
+
+    # ── Internals ──────────────────────────────────────────────────────────────
+
+    def _maybe_refresh(self) -> None:
+        if self._clock() < self._next_check:
+            return
+        with self._lock:
+            if self._clock() >= self._next_check:
+                self._scan()
+
+    def _scan(self) -> None:
+        # Called with self._lock held (or from __init__)
+        self.checks += 1
+        self._next_check = self._clock() + self.check_interval
+        try:
+            entries = list(os.scandir(self.directory))
+        except OSError as e:
+            logger.warning("Prompt directory %s unreadable: %s", self.directory, e)
+            return
+
+        for entry in entries:
+            if not entry.name.endswith(PROMPT_SUFFIX) or not entry.is_file():
+                continue
+            name = entry.name[:-len(PROMPT_SUFFIX)]
+            try:
+                st = entry.stat()
+                signature = (st.st_mtime_ns, st.st_size)
+                if self._signatures.get(name) == signature:
+                    continue
+                text = Path(entry.path).read_text(encoding="utf-8")
+            except OSError as e:
+                logger.warning("Prompt %s not reloaded: %s", entry.name, e)
+                continue
+            if name in self._templates:
+                self.reloads += 1
+                logger.info("Prompt %s reloaded", entry.name)
+            self._templates[name] = PromptTemplate(name, text)
+            self._signatures[name] = signature
+
+
+# Shared by every agent; templates are read once here, at import
+prompts = PromptRegistry()
@@ -52,15 +52,33 @@
 import json
 import logging
 import re
+from typing import Optional, Union
+
+from pydantic import ValidationError
+from validation.codec import codec
 from validation.schemas import ActionRequest, ActionType  # ✅ Fixed import
 
 logger = logging.getLogger(__name__)
 
-def parse_action(raw_output: str) -> ActionRequest:
+
+def _validate_json(raw: Union[str, bytes]) -> Optional[ActionRequest]:
+    """ActionRequest validated directly from JSON text, or None if it isn't one."""
+    try:
+        return ActionRequest.model_validate_json(raw)
+    except ValidationError:
+        return None
+
+
+def parse_action(raw_output: Union[str, bytes]) -> ActionRequest:
     """
     Safely parse raw LLM output into an ActionRequest.
     Uses Regex to extract JSON from Markdown and applies systematic auto-fixes
     for incomplete LLM responses.
+
+    A complete ActionRequest (the usual case with response_format=json_object)
+    is validated straight from the str/bytes by pydantic-core, with no
+    intermediate dict; only output that fails that goes through the
+    dict-based repairs below.
     """
     # 1. Guard against empty/None input
     if not raw_output:
@@ -72,7 +90,14 @@ def parse_action(raw_output: str) -> ActionRequest:
             meta={"parser_error": "empty_input"}
         )
     
-    # 2. 🆕 ROBUST REGEX EXTRACTION
+    # 2. ⚡ FAST PATH: already a valid ActionRequest document
+    action = _validate_json(raw_output)
+    if action is not None:
+        return action
+    if isinstance(raw_output, bytes):
+        raw_output = raw_output.decode("utf-8", "replace")
+
+    # 3. 🆕 ROBUST REGEX EXTRACTION
     # Finds JSON even if LLM includes conversational text around code blocks
     clean_output = raw_output.strip()
     json_match = re.search(r"```(?:json)?\s*(\{.*?\})\s*```", clean_output, re.DOTALL)
@@ -83,11 +108,16 @@ def parse_action(raw_output: str) -> ActionRequest:
         # Fallback: Strip backticks manually if no code block found
         clean_output = clean_output.strip("`").replace("json", "", 1).strip()
     
+    if clean_output != raw_output:
+        action = _validate_json(clean_output)
+        if action is not None:
+            return action
+
     try:
-        # 3. Parse as Dictionary
-        data = json.loads(clean_output)
+        # 4. Parse as Dictionary
+        data = codec.loads(clean_output)
         
-        # 4. ✅ SYSTEMATIC AUTO-FIX: Complete missing schema fields
+        # 5. ✅ SYSTEMATIC AUTO-FIX: Complete missing schema fields
         if "action_type" not in data:
             if "message" in data:
                 logger.warning("LLM returned incomplete JSON (missing action_type). Auto-fixing...")
@@ -103,11 +133,11 @@ def parse_action(raw_output: str) -> ActionRequest:
                     meta={"parser_error": "missing_required_fields", "data": str(data)[:100]}
                 )
         
-        # 5. Validate against Pydantic schema
+        # 6. Validate against Pydantic schema
         return ActionRequest.model_validate(data)
     
     except json.JSONDecodeError as e:
-        # 6. Handle non-JSON plain text responses
+        # 7. Handle non-JSON plain text responses
         logger.error(f"Failed to parse LLM output as JSON: {e}")
         
         return ActionRequest(
@@ -118,12 +148,12 @@ def parse_action(raw_output: str) -> ActionRequest:
         )
     
     except Exception as e:
-        # 7. Handle Pydantic validation errors
+        # 8. Handle Pydantic validation errors
         logger.error(f"Pydantic validation error: {e}")
         
         # Attempt to salvage the 'message' field
         try:
-            salvaged_data = json.loads(clean_output)
+            salvaged_data = codec.loads(clean_output)
             message = salvaged_data.get("message", "Hello! Welcome to DineFlow.")
         except:
             message = "Hello! I'm here to help, but I had trouble formatting my response."
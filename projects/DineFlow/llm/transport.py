@@ -0,0 +1,391 @@
+# DineFlow/llm/transport.py
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# HTTP statuses worth another attempt: request timeout, conflict, rate limit, 5xx
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+LATENCY_WINDOW = 512
+
+
+class DeadlineExceeded(TimeoutError):
+    """The call's deadline passed before a successful response."""
+
+
+@dataclass
+class TransportConfig:
+    model: str = "gpt-4o-mini"
+    # Pool sizing: one connection per worker that may be mid-call, plus
+    # headroom; keep-alive connections are reused across calls.
+    max_connections: int = 16
+    max_keepalive: int = 8
+    keepalive_expiry: float = 30.0
+    max_concurrency: int = 16        # calls in flight at once (semaphore)
+    deadline: float = 20.0           # seconds per call, all attempts included
+    connect_timeout: float = 5.0
+    max_retries: int = 3
+    base_delay: float = 0.25         # first backoff ceiling, doubles per retry
+    max_delay: float = 4.0
+    retry_budget_ratio: float = 0.2  # retries earned per first attempt
+    retry_budget_min: float = 10.0   # starting balance so a cold process can retry
+
+    @classmethod
+    def from_settings(cls, settings) -> "TransportConfig":
+        workers = max(1, settings.LLM_WORKERS)
+        return cls(
+            model=settings.LLM_MODEL,
+            max_connections=workers * 2,
+            max_keepalive=workers,
+            max_concurrency=workers * 2,
+            deadline=settings.LLM_TIMEOUT_S,
+            max_retries=settings.LLM_MAX_RETRIES,
+            retry_budget_ratio=settings.LLM_RETRY_BUDGET_RATIO,
+        )
+
+
+class RetryBudget:
+    """
+    Process-wide cap on retries, shared by every call.
+
+    Each first attempt deposits `ratio` tokens; each retry withdraws one.
+    During an outage every call fails, the deposits stop covering the
+    withdrawals, and retries shut off instead of multiplying the load on a
+    provider that is already struggling. The budget starts with `minimum`
+    tokens so a freshly started process can still ride out a transient blip.
+    """
+
+    def __init__(self, ratio: float, minimum: float, maximum: Optional[float] = None):
+        self.ratio = ratio
+        self.minimum = minimum
+        # Cap so a long quiet spell cannot bank unlimited retries
+        self.maximum = maximum if maximum is not None else max(10.0, minimum * 10)
+        self._balance = minimum
+        self._lock = threading.Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._balance = min(self._balance + self.ratio, self.maximum)
+
+    def try_withdraw(self) -> bool:
+        with self._lock:
+            if self._balance >= 1.0:
+                self._balance -= 1.0
+                return True
+            return False
+
+    @property
+    def balance(self) -> float:
+        with self._lock:
+            return self._balance
+
+
+class LLMMetrics:
+    """Call / retry / failure counters, token usage and a latency window."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._lock = threading.Lock()
+        self._latencies: deque = deque(maxlen=window)
+        self.calls = 0
+        self.attempts = 0
+        self.retries = 0
+        self.failures = 0
+        self.deadline_exceeded = 0
+        self.budget_exhausted = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def record(self, *, latency_ms: float, attempts: int, ok: bool,
+               prompt_tokens: int = 0, completion_tokens: int = 0,
+               deadline_hit: bool = False, budget_hit: bool = False) -> None:
+        with self._lock:
+            self.calls += 1
+            self.attempts += attempts
+            self.retries += attempts - 1
+            self.failures += 0 if ok else 1
+            self.deadline_exceeded += int(deadline_hit)
+            self.budget_exhausted += int(budget_hit)
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self._latencies.append(latency_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            ordered = sorted(self._latencies)
+
+            def pct(p: float) -> Optional[float]:
+                if not ordered:
+                    return None
+                return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+            return {
+                "calls": self.calls,
+                "attempts": self.attempts,
+                "retries": self.retries,
+                "failures": self.failures,
+                "deadline_exceeded": self.deadline_exceeded,
+                "budget_exhausted": self.budget_exhausted,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "p50_ms": pct(0.50),
+                "p95_ms": pct(0.95),
+                "p99_ms": pct(0.99),
+            }
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Connection errors, timeouts, 408/409/429 and 5xx are retried; the rest are not."""
+    import openai
+
+    if isinstance(exc, (openai.APIConnectionError, openai.APITimeoutError)):
+        return True
+    if isinstance(exc, openai.APIStatusError):
+        return exc.status_code in RETRYABLE_STATUS
+    return False
+
+
+class LLMTransport:
+    """
+    The one path from DineFlow to the chat-completions API.
+
+    call_llm used a module-level OpenAI client with library defaults: no
+    deadline, the SDK's own fixed retries, no limit on concurrent calls, and
+    a print() of every response. Under load the LLM dominated p99 and a slow
+    provider turned into stuck workers.
+
+      pooling      one httpx client with keep-alive limits sized from the
+                   worker count (TransportConfig.from_settings), built on
+                   first use so importing the module stays cheap
+      concurrency  a semaphore caps calls in flight; waiting for a slot
+                   counts against the call's deadline
+      deadlines    `deadline` seconds per call, retries and backoff included;
+                   each attempt's HTTP timeout is the time remaining
+      retries      jittered exponential backoff ("full jitter": sleep a
+                   random amount up to base * 2**n, capped at max_delay) on
+                   retryable errors only, and only while the shared
+                   RetryBudget has tokens
+      metrics      LLMMetrics — latency percentiles, attempts/retries,
+                   failures and token usage — via stats(); every call is
+                   also logged at DEBUG with the same fields
+
+    complete() is the blocking path; acomplete() is the same call for an
+    event loop, on AsyncOpenAI over an httpx.AsyncClient with the same
+    limits. Both share the retry budget and the metrics. The async client
+    and its semaphore are per event loop — httpx connections cannot move
+    between loops — so in a server there is exactly one of each. A loop
+    that made async calls must await aclose() before it ends (worker
+    shutdown, the end of an asyncio.run()), or its pooled connections are
+    left open when the loop is collected.
+
+    client / async_client may be injected (tests, alternative SDK clients);
+    they only need chat.completions.create(...), awaitable for async_client.
+    """
+
+    def __init__(self, config: TransportConfig, api_key: Optional[str] = None,
+                 client: Any = None, sleep: Callable[[float], None] = time.sleep,
+                 async_client: Any = None,
+                 async_sleep: Callable[[float], Awaitable[None]] = asyncio.sleep):
+        self.config = config
+        self._api_key = api_key
+        self._client = client
+        self._client_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(config.max_concurrency)
+        self._sleep = sleep
+        self._async_client = async_client
+        self._async_sleep = async_sleep
+        # event loop → (AsyncOpenAI client, asyncio.Semaphore)
+        self._loop_state: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self.budget = RetryBudget(config.retry_budget_ratio, config.retry_budget_min)
+        self.metrics = LLMMetrics()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._build_client()
+        return self._client
+
+    def _build_client(self):
+        import httpx
+        from openai import OpenAI
+
+        cfg = self.config
+        http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=cfg.max_connections,
+                max_keepalive_connections=cfg.max_keepalive,
+                keepalive_expiry=cfg.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(cfg.deadline, connect=cfg.connect_timeout),
+        )
+        # Retries are ours (budgeted); the SDK's would multiply them.
+        return OpenAI(api_key=self._api_key, http_client=http_client, max_retries=0)
+
+    def _build_async_client(self):
+        import httpx
+        from openai import AsyncOpenAI
+
+        cfg = self.config
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=cfg.max_connections,
+                max_keepalive_connections=cfg.max_keepalive,
+                keepalive_expiry=cfg.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(cfg.deadline, connect=cfg.connect_timeout),
+        )
+        return AsyncOpenAI(api_key=self._api_key, http_client=http_client, max_retries=0)
+
+    def _async_state(self) -> Tuple[Any, asyncio.Semaphore]:
+        loop = asyncio.get_running_loop()
+        state = self._loop_state.get(loop)
+        if state is None:
+            client = self._async_client if self._async_client is not None else self._build_async_client()
+            state = self._loop_state[loop] = (client, asyncio.Semaphore(self.config.max_concurrency))
+        return state
+
+    async def aclose(self) -> None:
+        """
+        Closes the running loop's AsyncOpenAI client and its connection pool.
+        An injected async_client belongs to the caller and is left open.
+        """
+        state = self._loop_state.pop(asyncio.get_running_loop(), None)
+        if state is not None and self._async_client is None:
+            await state[0].close()
+
+    def complete(self, system_prompt: str, user_input: str, *, deadline: Optional[float] = None,
+                 model: Optional[str] = None, json_mode: bool = True) -> str:
+        """Returns the first choice's content. Raises DeadlineExceeded or the last API error."""
+        start = time.monotonic()
+        expires = start + (deadline if deadline is not None else self.config.deadline)
+        request = self._request(system_prompt, user_input, model, json_mode)
+
+        self.budget.deposit()
+        attempts = 0
+        budget_hit = [False]
+        try:
+            if not self._slots.acquire(timeout=max(0.0, expires - time.monotonic())):
+                raise DeadlineExceeded("no LLM connection slot before the deadline")
+            try:
+                while True:
+                    remaining = self._remaining(start, expires)
+                    attempts += 1
+                    try:
+                        response = self.client.chat.completions.create(timeout=remaining, **request)
+                    except Exception as exc:
+                        self._sleep(self._backoff(exc, attempts, expires, budget_hit))
+                        continue
+                    break
+            finally:
+                self._slots.release()
+        except Exception as exc:
+            self._record_failure(exc, start, attempts, budget_hit[0])
+            raise
+        return self._record_success(response, request, start, attempts)
+
+    async def acomplete(self, system_prompt: str, user_input: str, *, deadline: Optional[float] = None,
+                        model: Optional[str] = None, json_mode: bool = True) -> str:
+        """complete() for an event loop: waits on slots, the API and backoff without blocking it."""
+        start = time.monotonic()
+        expires = start + (deadline if deadline is not None else self.config.deadline)
+        request = self._request(system_prompt, user_input, model, json_mode)
+        client, slots = self._async_state()
+
+        self.budget.deposit()
+        attempts = 0
+        budget_hit = [False]
+        try:
+            try:
+                await asyncio.wait_for(slots.acquire(), timeout=max(0.0, expires - time.monotonic()))
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded("no LLM connection slot before the deadline") from None
+            try:
+                while True:
+                    remaining = self._remaining(start, expires)
+                    attempts += 1
+                    try:
+                        response = await client.chat.completions.create(timeout=remaining, **request)
+                    except Exception as exc:
+                        await self._async_sleep(self._backoff(exc, attempts, expires, budget_hit))
+                        continue
+                    break
+            finally:
+                slots.release()
+        except Exception as exc:
+            self._record_failure(exc, start, attempts, budget_hit[0])
+            raise
+        return self._record_success(response, request, start, attempts)
+
+    # ── Shared by complete() / acomplete() ─────────────────────────────────────
+
+    def _request(self, system_prompt: str, user_input: str,
+                 model: Optional[str], json_mode: bool) -> dict:
+        request = {
+            "model": model or self.config.model,
+            "temperature": 0,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_input},
+            ],
+        }
+        if json_mode:
+            request["response_format"] = {"type": "json_object"}  # HARD GUARANTEE
+        return request
+
+    @staticmethod
+    def _remaining(start: float, expires: float) -> float:
+        remaining = expires - time.monotonic()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"LLM call exceeded {expires - start:.1f}s")
+        return remaining
+
+    def _backoff(self, exc: Exception, attempts: int, expires: float, budget_hit: list) -> float:
+        """
+        Seconds to sleep before the next attempt after exc. Re-raises exc when
+        it is not retryable, the attempts or the retry budget are used up, or
+        the sleep would run past the deadline. Call from an except block.
+        """
+        cfg = self.config
+        if not is_retryable(exc) or attempts > cfg.max_retries:
+            raise exc
+        if not self.budget.try_withdraw():
+            budget_hit[0] = True
+            raise exc
+        delay = random.uniform(0, min(cfg.max_delay, cfg.base_delay * 2 ** (attempts - 1)))
+        if time.monotonic() + delay >= expires:
+            raise exc
+        logger.info("LLM attempt %d failed (%s); retrying in %.2fs",
+                    attempts, type(exc).__name__, delay)
+        return delay
+
+    def _record_failure(self, exc: Exception, start: float, attempts: int, budget_hit: bool) -> None:
+        latency_ms = (time.monotonic() - start) * 1e3
+        self.metrics.record(latency_ms=latency_ms, attempts=max(attempts, 1), ok=False,
+                            deadline_hit=isinstance(exc, DeadlineExceeded), budget_hit=budget_hit)
+        logger.warning("LLM call failed after %d attempt(s), %.0fms: %s",
+                       attempts, latency_ms, exc)
+
+    def _record_success(self, response, request: dict, start: float, attempts: int) -> str:
+        latency_ms = (time.monotonic() - start) * 1e3
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        self.metrics.record(latency_ms=latency_ms, attempts=attempts, ok=True,
+                            prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+        logger.debug(
+            "llm_call model=%s latency_ms=%.1f attempts=%d prompt_tokens=%d completion_tokens=%d",
+            request["model"], latency_ms, attempts, prompt_tokens, completion_tokens,
+        )
+        return response.choices[0].message.content
+
+    def stats(self) -> dict:
+        return {**self.metrics.snapshot(), "retry_budget": round(self.budget.balance, 2)}
@@ -206,6 +206,7 @@
 # DineFlow/orchestration/ambiguity_gate.py
 from typing import List
 from state_machine.types import SessionState, MenuItemSnapshot
+from tools.search.filters import ItemFilters
 from tools.search.hybrid import hybrid_search
 from validation.schemas import ActionRequest, ActionType
 
@@ -217,10 +218,11 @@ class AmbiguityGate:
     MAX_RETRIES = 2
 
     @staticmethod
-    def top_suggestions(user_input: str, menu_items: List[MenuItemSnapshot], bm25_engine: any) -> List[str]:
-        """Get top 3 menu suggestions."""
-        results = hybrid_search(user_input, menu_items, bm25_engine)
-        return [item.name for item in results[:3]]
+    def top_suggestions(user_input: str, menu_items: List[MenuItemSnapshot], bm25_engine: any,
+                        filters: ItemFilters = None) -> List[str]:
+        """Get top 3 menu suggestions; filters (e.g. {"in_stock": True}) narrows them."""
+        results = hybrid_search(user_input, menu_items, bm25_engine, k=3, filters=filters)
+        return [item.name for item in results]
 
     @staticmethod
     def process(
@@ -2288,12 +2288,20 @@
 
 
 # DineFlow/orchestration/golden_loop.py
+import asyncio
+import inspect
+import re
+from typing import List
+
+import numpy as np
+
 from agents.router import IntentRouter
 from agents.order_taker import OrderTakerAgent
 from agents.greeter import GreeterAgent
 from agents.menu_expert import MenuExpertAgent
-from tools.registry import get_menu_items
+from tools.registry import MenuCatalog, get_menu_items
 from tools.search.bm25 import MenuBM25
+from tools.search.name_matcher import matcher_for
 from tools.search.vector import sync_menu_to_vector
 from validation.schemas import ActionType, ActionRequest
 from log_system.intent_logger import log_intent
@@ -2303,12 +2311,18 @@ from state_machine.authority import evaluate_action, decide_context_scope
 from orchestration.helpers import consume_tool_budget, resolve_menu_item, apply_approved_action
 from state_machine.types import SessionState, KitchenSnapshot, ContextItem
 from orchestration.memory_manager import MemoryManager
-from orchestration.semantic_resolver import resolve, ReferenceIntent
+from orchestration.semantic_resolver import aresolve, resolve, ReferenceIntent
+from validation.turn_features import turn_features
 from validation.errors import ViolationType, Severity
 
 # --- SEARCH & INFRASTRUCTURE BOOTSTRAP ---
-all_menu_items = get_menu_items()
-sync_menu_to_vector(all_menu_items)
+# One indexed catalog shared by the loop and every agent (O(1) SKU lookups)
+all_menu_items = MenuCatalog(get_menu_items())
+# Names this process's menu for per-menu caches (e.g. the classifier registry)
+MENU_ID = "default"
+# Deferred: Chroma + the embedding model load on first vector query (or via
+# tools.search.vector.backend.warm_up()), not when this module is imported.
+sync_menu_to_vector(all_menu_items, defer=True)
 bm25_engine = MenuBM25(all_menu_items)
 
 # Instantiate agents once
@@ -2333,25 +2347,50 @@ def _is_age_confirmation(text: str) -> bool:
     age_keywords = {"over 18", "18 years", "i'm 18", "i am 18", "old enough", "of age"}
     return any(kw in normalized for kw in age_keywords)
 
-def _llm_detect_age_confirmation(user_input: str) -> bool:
-    from llm.client import call_llm
-    import json as _json
-    prompt = (
+def _age_confirmation_prompt(user_input: str) -> str:
+    return (
         "You are a compliance checker for a restaurant ordering system. "
         "The user was asked to confirm they are 18 or older before receiving alcohol. "
         f"User response: \"{user_input}\" "
         "Is the user confirming they are 18 or older? "
         "Return ONLY valid JSON with no explanation: {\"confirmed\": true} or {\"confirmed\": false}"
     )
+
+
+def _parse_age_confirmation(raw: str) -> bool:
+    import json as _json
+    raw = raw.strip().strip("`").strip()
+    data = _json.loads(raw)
+    return bool(data.get("confirmed", False))
+
+
+def _llm_detect_age_confirmation(user_input: str) -> bool:
+    from llm.client import call_llm
+    # Compliance decision: always asked fresh, never served from the cache
+    try:
+        return _parse_age_confirmation(call_llm(_age_confirmation_prompt(user_input), user_input, cache=False))
+    except Exception:
+        return False
+
+
+async def _allm_detect_age_confirmation(user_input: str) -> bool:
+    from llm.client import async_call_llm
     try:
-        raw = call_llm(prompt, user_input)
-        raw = raw.strip().strip("`").strip()
-        data = _json.loads(raw)
-        return bool(data.get("confirmed", False))
+        return _parse_age_confirmation(
+            await async_call_llm(_age_confirmation_prompt(user_input), user_input, cache=False)
+        )
     except Exception:
         return False
 
 
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+def _response_sentences(text: str) -> List[str]:
+    """Non-empty sentences / lines of a system response."""
+    return [part.strip() for part in _SENTENCE_BREAK.split(text) if part.strip()]
+
+
 def _populate_context_from_response(response_text: str, session: SessionState) -> None:
     """
     Extracts menu item names from a system response and marks them as
@@ -2385,21 +2424,37 @@ def _populate_context_from_response(response_text: str, session: SessionState) -
 
         Minimum score guard: items with score=0 are always excluded, even if
         all items score 0 (in which case nothing is added to context).
+
+    Per-sentence scoring:
+        A multi-sentence response is scored as a whole AND sentence by
+        sentence, in one MenuBM25.score_batch() call (one sparse product).
+        An item passes the relative threshold if it does so in any row, so
+        an item named in one sentence of a long answer is not crowded out by
+        an item with rarer words named in another.
     """
     if not response_text.strip():
         return
 
-    scored = bm25_engine.score_all(response_text)
+    sentences = _response_sentences(response_text)
+    queries = [response_text] + (sentences if len(sentences) > 1 else [])
+    scores = bm25_engine.score_batch(queries)
 
-    if not scored:
+    if scores.size == 0:
         return
 
-    top_score = scored[0][1]
+    tops = scores.max(axis=1)
 
     # Nothing matched at all — response contains no menu-relevant tokens
-    if top_score <= 0:
+    if tops[0] <= 0:
         return
 
+    # Each item's best score relative to its row's top score
+    relative = np.divide(scores, tops[:, None], out=np.zeros_like(scores), where=tops[:, None] > 0)
+    best = relative.max(axis=0)
+    # Best relative score first, then whole-response score; ties in menu order
+    order = np.lexsort((-scores[0], -best))
+    items = bm25_engine.items
+
     # Two-stage matching: BM25 score + name presence confirmation.
     #
     # BM25 alone is insufficient for context population because items sharing
@@ -2418,17 +2473,18 @@ def _populate_context_from_response(response_text: str, session: SessionState) -
     #   Response: "the Pepperoni Pizza is our only spicy option"
     #   PZ-PEP: BM25 high ✓, "pepperoni" in response ✓ → added
     #   PZ-MARG: BM25 medium (shares "pizza"), "margherita" NOT in response ✗ → skipped
-    threshold = top_score * 0.50
+    threshold = 0.50
     MAX_CONTEXT_ITEMS = 5
     items_added = 0
-    response_lower = response_text.lower()
+    matcher = matcher_for(all_menu_items)
+    mentioned = matcher.mentioned_skus(response_text)
 
-    for item, score in scored:
-        if score < threshold or items_added >= MAX_CONTEXT_ITEMS:
+    for column in order:
+        if best[column] < threshold or items_added >= MAX_CONTEXT_ITEMS:
             break
+        item = items[column]
         # Stage 2: confirm item's significant name tokens appear in response
-        significant_tokens = [t for t in item.name.lower().split() if len(t) > 3]
-        if significant_tokens and not any(t in response_lower for t in significant_tokens):
+        if matcher.has_significant_tokens(item.sku) and item.sku not in mentioned:
             continue
         if item.sku in session.active_context:
             session.active_context[item.sku].mentioned = True
@@ -2517,8 +2573,85 @@ def _execute_bulk_add(skus: list, session: SessionState, kitchen: KitchenSnapsho
 _MAX_HANDOFF_DEPTH = 3
 
 
+class _SyncSteps:
+    """
+    The blocking implementations of the turn's four LLM-capable steps.
+
+    Each coroutine returns without ever suspending, so golden_loop can drive
+    the shared turn coroutine to completion with a single send(). Module
+    names (router, resolve, ...) are looked up per call, so patching them on
+    this module still takes effect.
+    """
+
+    async def confirm_age(self, user_input):
+        return _llm_detect_age_confirmation(user_input)
+
+    async def resolve(self, user_input, session):
+        return resolve(user_input, session)
+
+    async def route(self, user_input, active_agent):
+        return router.route(user_input, active_agent)
+
+    async def run_agent(self, agent, user_input, session, memory):
+        return agent.run(user_input, session, memory)
+
+
+class _AsyncSteps:
+    """The same steps awaiting AsyncOpenAI (llm.client.async_call_llm)."""
+
+    async def confirm_age(self, user_input):
+        return await _allm_detect_age_confirmation(user_input)
+
+    async def resolve(self, user_input, session):
+        return await aresolve(user_input, session)
+
+    async def route(self, user_input, active_agent):
+        return await router.aroute(user_input, active_agent)
+
+    async def run_agent(self, agent, user_input, session, memory):
+        arun = getattr(agent, "arun", None)
+        if inspect.iscoroutinefunction(arun):
+            return await arun(user_input, session, memory)
+        # An agent without arun still works, off the event loop
+        return await asyncio.to_thread(agent.run, user_input, session, memory)
+
+
+_SYNC_STEPS = _SyncSteps()
+_ASYNC_STEPS = _AsyncSteps()
+
+
 def golden_loop(*, session: SessionState, user_input: str, kitchen: KitchenSnapshot,
                 memory: MemoryManager, _handoff_depth: int = 0):
+    """
+    One conversational turn, blocking. A thin driver over the same turn
+    coroutine async_golden_loop awaits: with _SyncSteps nothing inside it
+    ever suspends, so it runs to completion on the first send() and no event
+    loop is involved.
+    """
+    turn = _golden_loop_impl(session=session, user_input=user_input, kitchen=kitchen,
+                             memory=memory, steps=_SYNC_STEPS, _handoff_depth=_handoff_depth)
+    try:
+        turn.send(None)
+    except StopIteration as done:
+        return done.value
+    turn.close()
+    raise RuntimeError("golden_loop turn suspended — a step awaited real I/O")
+
+
+async def async_golden_loop(*, session: SessionState, user_input: str, kitchen: KitchenSnapshot,
+                            memory: MemoryManager):
+    """
+    One conversational turn for an event loop: router, agents, age
+    confirmation and resolver LLM calls are awaited, so one loop serves many
+    sessions concurrently. Turns of the SAME session must still run one at
+    a time — the turn mutates session and memory.
+    """
+    return await _golden_loop_impl(session=session, user_input=user_input, kitchen=kitchen,
+                                   memory=memory, steps=_ASYNC_STEPS)
+
+
+async def _golden_loop_impl(*, session: SessionState, user_input: str, kitchen: KitchenSnapshot,
+                            memory: MemoryManager, steps, _handoff_depth: int = 0):
 
     # ── TURN COUNTER ──────────────────────────────────────────────────────────
     # Incremented first so all context writes in this turn use the correct turn_id.
@@ -2546,7 +2679,7 @@ def golden_loop(*, session: SessionState, user_input: str, kitchen: KitchenSnaps
     # not covered by the English set.
     _age_confirmed = _is_age_confirmation(user_input)
     if session.pending_deferred_sku and not _age_confirmed:
-        _age_confirmed = _llm_detect_age_confirmation(user_input)
+        _age_confirmed = await steps.confirm_age(user_input)
 
     if session.pending_deferred_sku and _age_confirmed:
         session.age_verified = True
@@ -2611,12 +2744,10 @@ def golden_loop(*, session: SessionState, user_input: str, kitchen: KitchenSnaps
         or bool(session.pending_items)
         or bool(session.pending_deferred_sku)
     )
-    # Use normalized token count so politeness words ("please", "thanks") don't
-    # inflate the count. "all please" = 2 raw tokens but 1 meaningful token.
-    # We inline a minimal normalization here rather than importing from
-    # semantic_resolver to avoid circular dependency risk.
-    _clean_for_gate = ''.join(c if c.isalnum() or c == ' ' else ' ' for c in user_input.lower()).split()
-    _is_short_input = len(_clean_for_gate) <= 6
+    # Token count over alphanumeric runs (punctuation never counts as a
+    # token). Read from the turn's shared TurnFeatures — the router, resolver
+    # and classifier use the same object instead of re-normalising the input.
+    _is_short_input = len(turn_features(user_input).words) <= 6
 
     # EXPLICIT ORDER BYPASS
     # If the input names a specific menu item, it is an explicit order —
@@ -2631,16 +2762,12 @@ def golden_loop(*, session: SessionState, user_input: str, kitchen: KitchenSnaps
     #
     # Detection: all significant tokens (>3 chars) of any item name must
     # appear in the input. Case-insensitive. Ignores short words ("and",
-    # "the") to avoid false negatives on partial matches.
-    _input_lower = user_input.lower()
-    _has_named_item = any(
-        all(tok in _input_lower for tok in item.name.lower().split() if len(tok) > 3)
-        for item in all_menu_items
-        if any(len(tok) > 3 for tok in item.name.lower().split())
-    )
+    # "the") to avoid false negatives on partial matches. One pass of the
+    # shared name automaton instead of a scan per item and token.
+    _has_named_item = bool(matcher_for(all_menu_items).named_skus(user_input))
 
     resolved = (
-        resolve(user_input, session)
+        await steps.resolve(user_input, session)
         if (_has_resolvable_state and _is_short_input and not _has_named_item)
         else None
     )
@@ -2746,7 +2873,7 @@ def golden_loop(*, session: SessionState, user_input: str, kitchen: KitchenSnaps
         # Resolved but could not execute (no SKU found) — fall through to router
 
     # 1️⃣ ROUTING
-    routing_action = router.route(user_input, session.active_agent)
+    routing_action = await steps.route(user_input, session.active_agent)
     if routing_action.intent:
         session.active_intent = routing_action.intent
 
@@ -2755,13 +2882,13 @@ def golden_loop(*, session: SessionState, user_input: str, kitchen: KitchenSnaps
         session.active_agent = target if target in AGENT_REGISTRY else "OrderTaker"
 
     # 2️⃣ GOVERNANCE: Context Scope Decision (BEFORE AGENT EXECUTION)
-    policy = decide_context_scope(session, user_input, all_menu_items)
+    policy = decide_context_scope(session, user_input, all_menu_items, menu_id=MENU_ID)
     session.context_scope = policy["context_scope"]
     session.authority_hint = policy["system_hint"]
 
     # 3️⃣ AGENT EXECUTION
     agent = AGENT_REGISTRY[session.active_agent]
-    action = agent.run(user_input, session, memory)
+    action = await steps.run_agent(agent, user_input, session, memory)
 
     # 4️⃣ LOG INTENT
     log_intent(session.session_id, user_input, action)
@@ -2845,11 +2972,12 @@ def golden_loop(*, session: SessionState, user_input: str, kitchen: KitchenSnaps
                     memory.update(user_input, final_resp, agent_name=session.active_agent)
                     return final_resp
                 session.active_agent = target_agent
-                return golden_loop(
+                return await _golden_loop_impl(
                     session=session,
                     user_input=user_input,
                     kitchen=kitchen,
                     memory=memory,
+                    steps=steps,
                     _handoff_depth=_handoff_depth + 1
                 )
 
@@ -382,16 +382,16 @@
 
 
 # DineFlow/orchestration/helpers.py
-from pathlib import Path
 from typing import List, Optional
 from state_machine.types import MenuItemSnapshot, SessionState
+from tools.registry import MenuCatalog
 from validation.schemas import ActionRequest, ActionType
 
 
 def load_order_taker_prompt() -> str:
-    base_dir = Path(__file__).parent.parent
-    prompt_path = base_dir / "llm" / "prompts" / "order_taker.md"
-    return prompt_path.read_text(encoding="utf-8")
+    # Served from the shared PromptRegistry (read once, reloaded on change)
+    from llm.prompt_registry import prompts
+    return prompts.get("order_taker").text
 
 
 def render_menu_context(*, menu_items: List[MenuItemSnapshot], include_skus: bool = False) -> str:
@@ -441,9 +441,16 @@ def resolve_menu_item(
     menu_items: List[MenuItemSnapshot],
     sku: Optional[str],
 ) -> Optional[MenuItemSnapshot]:
-    """Finds the specific item object from the list based on SKU."""
+    """
+    Finds the specific item object from the list based on SKU.
+
+    O(1) through the SKU index when menu_items is the shared MenuCatalog;
+    plain lists fall back to a scan.
+    """
     if not sku:
         return None
+    if isinstance(menu_items, MenuCatalog):
+        return menu_items.get(sku)
     search_sku = sku.strip().upper()
     return next(
         (item for item in menu_items if item.sku.upper() == search_sku),
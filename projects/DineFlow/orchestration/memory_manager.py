@@ -337,19 +337,29 @@
 
 
 # DineFlow/orchestration/memory_manager.py
-from tools.search.vector import save_memory, retrieve_memories
+from tools.search.vector import save_memory, retrieve_memories, start_session_memory
+from tools.registry import MenuCatalog
 from typing import Optional, Any
 
 
 class MemoryManager:
-    def __init__(self, session_id: str):
+    def __init__(self, session_id: str, new_session: bool = False):
+        """
+        new_session=True for a session that has just been created (nothing in
+        long-term memory yet): its first retrieval then skips the vector store.
+        """
         self.session_id = session_id
         self.window = []  # Short-term sliding window
+        if new_session:
+            start_session_memory(session_id)
 
     def update(self, user_in: str, dine_flow_out: str, agent_name: str = "OrderTaker", **meta: Any):
         """
         Records the turn in both the short-term window and long-term vector store.
         Meta can include: status, action_type, pending_sku, violation, intent, etc.
+
+        The vector-store write is write-behind (queued by save_memory), so it
+        no longer adds embedding + insert latency to the turn.
         """
         record = {
             "agent": agent_name,
@@ -471,7 +481,10 @@ class MemoryManager:
         if not focus_sku:
             return ""
 
-        item = next((i for i in all_menu_items if i.sku == focus_sku), None)
+        if isinstance(all_menu_items, MenuCatalog):
+            item = all_menu_items.get(focus_sku)
+        else:
+            item = next((i for i in all_menu_items if i.sku == focus_sku), None)
         if not item:
             return ""
 
@@ -40,6 +40,8 @@ from dataclasses import dataclass, field
 from enum import Enum
 from typing import List, Optional, Dict, TYPE_CHECKING
 
+from validation.turn_features import POLITENESS_RE, POSITION_WORDS, TurnFeatures, turn_features
+
 if TYPE_CHECKING:
     from state_machine.types import SessionState
 
@@ -55,15 +57,10 @@ _LLM_CONFIDENCE_THRESHOLD = 0.7
 _LLM_MIN_TOKENS = 2
 
 # ── Politeness normalization (regex — extensible, not a brittle set) ──────────
-_POLITENESS_RE = re.compile(
-    r"\b(please|pls|plz|kindly|thanks|thank you|thank you so much|thx|cheers)\b",
-    re.IGNORECASE
-)
-
 # ── Positional words ──────────────────────────────────────────────────────────
-_POSITION_WORDS: Dict[str, int] = {
-    "first": 0, "second": 1, "third": 2, "fourth": 3, "last": -1,
-}
+# Both live in turn_features, which normalises each turn's input once.
+_POLITENESS_RE = POLITENESS_RE
+_POSITION_WORDS = POSITION_WORDS
 
 
 class ReferenceIntent(str, Enum):
@@ -123,31 +120,10 @@ def _normalize(text: str) -> str:
     Strips punctuation, politeness words, and collapses whitespace.
     Does NOT strip semantic meaning — only noise.
     """
-    text = text.lower().strip()
-    text = re.sub(r"[^\w\s]", "", text)
-    text = _POLITENESS_RE.sub("", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
+    return turn_features(text).clean
 
 
-def _extract_number(clean: str) -> Optional[int]:
-    """Extracts the first integer from cleaned input. Catches '2 more', 'add 2'."""
-    match = re.search(r"\b(\d+)\b", clean)
-    return int(match.group(1)) if match else None
-
-
-def _extract_position(clean: str) -> Optional[int]:
-    """
-    Extracts positional index: 'first' → 0, 'last' → -1.
-    Returns position as int so resolve() can index into _fresh_mentioned.
-    """
-    for word, pos in _POSITION_WORDS.items():
-        if word in clean.split():
-            return pos
-    return None
-
-
-def _rule_confidence(clean: str) -> float:
+def _rule_confidence(features: TurnFeatures) -> float:
     """
     Scores rule engine confidence for the cleaned input.
 
@@ -158,9 +134,10 @@ def _rule_confidence(clean: str) -> float:
     that would create false confidence and block LLM for non-English inputs.
     Zero confidence correctly routes all unmatched inputs to LLM.
     """
+    clean = features.clean
     if clean in _COLLECTION_WORDS:
         return 1.0
-    if clean in _THAT_WORDS or _extract_position(clean) is not None:
+    if clean in _THAT_WORDS or features.position is not None:
         return 0.9
     if clean in _REPEAT_WORDS:
         return 0.9
@@ -169,7 +146,7 @@ def _rule_confidence(clean: str) -> float:
     # Only return high confidence for numbers when the number IS the intent —
     # i.e. nothing meaningful accompanies it. "remove 2" has a number but the
     # intent is not QUANTITY — it should reach LLM. Same logic as _classify.
-    number = _extract_number(clean)
+    number = features.first_number
     if number is not None:
         without_number = re.sub(r"\b" + str(number) + r"\b", "", clean).strip()
         non_trivial = [t for t in without_number.split() if len(t) > 2]
@@ -216,6 +193,28 @@ def _llm_classify(
     """
     from llm.client import call_llm
 
+    try:
+        raw = call_llm(_llm_classify_prompt(user_input, session), user_input, cache=True)
+        return _parse_llm_classification(raw)
+    except Exception:
+        return ReferenceIntent.NOT_RESOLVED, None, 0.0
+
+
+async def _allm_classify(
+    user_input: str,
+    session: "SessionState"
+) -> tuple[ReferenceIntent, Optional[int], float]:
+    """_llm_classify for the event loop (aresolve)."""
+    from llm.client import async_call_llm
+
+    try:
+        raw = await async_call_llm(_llm_classify_prompt(user_input, session), user_input, cache=True)
+        return _parse_llm_classification(raw)
+    except Exception:
+        return ReferenceIntent.NOT_RESOLVED, None, 0.0
+
+
+def _llm_classify_prompt(user_input: str, session: "SessionState") -> str:
     context_payload = _build_context_payload(session)
     normalized_input = _normalize(user_input)
 
@@ -252,29 +251,28 @@ STRICT RULES:
 
 Return ONLY valid JSON with no explanation or markdown:
 {{"intent": "ADD_ALL", "quantity": null, "confidence": 0.9}}"""
+    return prompt
 
-    try:
-        raw = call_llm(prompt, user_input)
-        raw = re.sub(r"```[a-z]*", "", raw).strip().strip("`").strip()
-        data = json.loads(raw)
-        intent_str = data.get("intent", "NOT_RESOLVED").upper()
-        llm_confidence = float(data.get("confidence", 0.5))
 
-        try:
-            intent = ReferenceIntent(intent_str)
-        except ValueError:
-            intent = ReferenceIntent.NOT_RESOLVED
+def _parse_llm_classification(raw: str) -> tuple[ReferenceIntent, Optional[int], float]:
+    """Raises on malformed output — callers map that to NOT_RESOLVED."""
+    raw = re.sub(r"```[a-z]*", "", raw).strip().strip("`").strip()
+    data = json.loads(raw)
+    intent_str = data.get("intent", "NOT_RESOLVED").upper()
+    llm_confidence = float(data.get("confidence", 0.5))
 
-        quantity = data.get("quantity")
-        try:
-            quantity = int(quantity) if quantity is not None else None
-        except (ValueError, TypeError):
-            quantity = None
+    try:
+        intent = ReferenceIntent(intent_str)
+    except ValueError:
+        intent = ReferenceIntent.NOT_RESOLVED
 
-        return intent, quantity, llm_confidence
+    quantity = data.get("quantity")
+    try:
+        quantity = int(quantity) if quantity is not None else None
+    except (ValueError, TypeError):
+        quantity = None
 
-    except Exception:
-        return ReferenceIntent.NOT_RESOLVED, None, 0.0
+    return intent, quantity, llm_confidence
 
 
 def _classify(
@@ -283,12 +281,43 @@ def _classify(
 ) -> tuple[ReferenceIntent, Optional[int]]:
     """
     Hybrid classification:
-        1. Normalize
+        1. Normalize (shared TurnFeatures — computed once per turn)
         2. Rule engine — exact set membership and regex only (no English verbs)
         3. Confidence gate — high confidence skips LLM
         4. LLM fallback — single-token allowed when confidence=0 (multilingual)
     """
-    clean = _normalize(user_input)
+    decided = _classify_rules(user_input, session)
+    if decided is not None:
+        return decided
+
+    intent, qty, llm_conf = _llm_classify(user_input, session)
+    # Log LLM confidence (what the model returned), not rule confidence (0.0)
+    # Rule confidence is always < threshold here — logging it is misleading.
+    _log_resolution(user_input, turn_features(user_input).clean, intent, source="llm", confidence=llm_conf)
+    return intent, qty
+
+
+async def _aclassify(
+    user_input: str,
+    session: "SessionState"
+) -> tuple[ReferenceIntent, Optional[int]]:
+    """_classify with the LLM fallback awaited."""
+    decided = _classify_rules(user_input, session)
+    if decided is not None:
+        return decided
+
+    intent, qty, llm_conf = await _allm_classify(user_input, session)
+    _log_resolution(user_input, turn_features(user_input).clean, intent, source="llm", confidence=llm_conf)
+    return intent, qty
+
+
+def _classify_rules(
+    user_input: str,
+    session: "SessionState"
+) -> Optional[tuple[ReferenceIntent, Optional[int]]]:
+    """Steps 1-3 of _classify. None means the confidence gate wants the LLM."""
+    features = turn_features(user_input)
+    clean = features.clean
 
     if not clean:
         return ReferenceIntent.NOT_RESOLVED, None
@@ -304,7 +333,7 @@ def _classify(
     if clean in _THAT_WORDS:
         return ReferenceIntent.ADD_THAT, None
 
-    position = _extract_position(clean)
+    position = features.position
     if position is not None:
         return ReferenceIntent.ADD_THAT, position
 
@@ -324,7 +353,7 @@ def _classify(
     # Detection: after removing the number itself from the cleaned input,
     # if nothing meaningful remains (≤1 non-trivial token left), treat as
     # QUANTITY. If other words remain, let LLM classify the full intent.
-    number = _extract_number(clean)
+    number = features.first_number
     if number is not None:
         without_number = re.sub(r"\b" + str(number) + r"\b", "", clean).strip()
         non_trivial = [t for t in without_number.split() if len(t) > 2]
@@ -336,10 +365,10 @@ def _classify(
         return ReferenceIntent.QUANTITY, _NUMBER_WORDS[clean]
 
     # ── CONFIDENCE GATE + LLM FALLBACK ───────────────────────────────────────
-    confidence = _rule_confidence(clean)
+    confidence = _rule_confidence(features)
     fresh_items = _fresh_mentioned(session)
     has_context = bool(fresh_items) or bool(session.last_action_sku)
-    token_count = len(clean.split())
+    token_count = len(features.clean_tokens)
 
     # Allow LLM for single-token inputs when confidence == 0.0 — these may be
     # meaningful single-word references in non-English languages.
@@ -351,11 +380,7 @@ def _classify(
     )
 
     if should_use_llm:
-        intent, qty, llm_conf = _llm_classify(user_input, session)
-        # Log LLM confidence (what the model returned), not rule confidence (0.0)
-        # Rule confidence is always < threshold here — logging it is misleading.
-        _log_resolution(user_input, clean, intent, source="llm", confidence=llm_conf)
-        return intent, qty
+        return None
 
     _log_resolution(user_input, clean, ReferenceIntent.NOT_RESOLVED, source="rules", confidence=confidence)
     return ReferenceIntent.NOT_RESOLVED, None
@@ -419,7 +444,21 @@ def resolve(user_input: str, session: "SessionState") -> Optional[ResolvedIntent
     Returns None if input is a normal request — golden_loop proceeds to router.
     """
     intent_type, quantity = _classify(user_input, session)
+    return _resolve_intent(intent_type, quantity, session)
+
+
+async def aresolve(user_input: str, session: "SessionState") -> Optional[ResolvedIntent]:
+    """resolve() for async_golden_loop — the LLM fallback is awaited."""
+    intent_type, quantity = await _aclassify(user_input, session)
+    return _resolve_intent(intent_type, quantity, session)
 
+
+def _resolve_intent(
+    intent_type: ReferenceIntent,
+    quantity: Optional[int],
+    session: "SessionState"
+) -> Optional[ResolvedIntent]:
+    """Derives concrete SKUs for a classified intent from session state."""
     if intent_type == ReferenceIntent.NOT_RESOLVED:
         return None
 
@@ -40,6 +40,7 @@
 from typing import Optional, List
 from state_machine.authority import ValidationResult
 from state_machine.types import MenuItemSnapshot
+from tools.registry import MenuCatalog
 from validation.schemas import ActionType, ActionRequest
 
 
@@ -110,5 +111,8 @@ def _resolve_item_name(sku: Optional[str], menu_items: Optional[List[MenuItemSna
         return sku  # Fallback to SKU if menu not available
     
     # Find the item
+    if isinstance(menu_items, MenuCatalog):
+        item = menu_items.get(sku)
+        return item.name if item else sku
     item = next((item for item in menu_items if item.sku.upper() == sku.upper()), None)
     return item.name if item else sku
\ No newline at end of file
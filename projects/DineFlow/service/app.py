@@ -0,0 +1,217 @@
+# DineFlow/service/app.py
+"""
+DineFlow over HTTP: a plain ASGI app in front of a WorkerPool.
+
+    POST /sessions/{session_id}/turns   {"message": "...", "user_id": "..."}
+        → 200 {"session_id", "response", "active_agent", "order_status",
+               "cart", "turn_id", "worker", "pid"}
+    GET  /healthz                       → 200 WorkerPool.stats()
+
+Run it with exactly ONE front process — the affinity hashing lives in the
+front, so `uvicorn --workers N` would give each front its own pool and
+break it. Scale with --workers, which sizes the golden_loop pool:
+
+    python -m service.app --workers 4 --port 8000
+
+Against the local fake LLM instead of OpenAI:
+
+    python -m service.fake_llm --port 8001 &
+    OPENAI_BASE_URL=http://127.0.0.1:8001/v1 python -m service.app --workers 4
+
+Errors: 400 bad JSON, 413 body too large, 422 missing message, 500 the
+turn raised, 503 pool not running, 504 turn exceeded the pool timeout.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import re
+import socket
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from service.workers import DEFAULT_HANDLER, TURN_TIMEOUT_S, WorkerPool, WorkerUnavailable
+from validation.codec import codec
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 64 * 1024
+_TURNS_PATH = re.compile(r"^/sessions/([A-Za-z0-9_.:-]{1,128})/turns$")
+
+
+# ── ASGI helpers ────────────────────────────────────────────────────────────
+
+async def read_body(receive, limit: int = MAX_BODY_BYTES) -> Optional[bytes]:
+    """The request body, or None once it exceeds limit bytes."""
+    chunks: List[bytes] = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+async def send_json(send, status: int, body: Any, headers: Tuple[Tuple[bytes, bytes], ...] = ()) -> None:
+    payload = codec.dumps(body)
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"),
+                    (b"content-length", str(len(payload)).encode()), *headers],
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+
+# ── Service ─────────────────────────────────────────────────────────────────
+
+class DineFlowService:
+    """
+    ASGI callable. Request handling only validates and forwards; every
+    turn runs in the pool (any object with start/stop/submit/stats), and
+    the pool is started and stopped by the ASGI lifespan.
+    """
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    await asyncio.to_thread(self.pool.start)
+                except Exception as e:
+                    logger.exception("Worker pool failed to start")
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await asyncio.to_thread(self.pool.stop)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send) -> None:
+        path, method = scope["path"], scope["method"]
+        if path == "/healthz":
+            return await send_json(send, 200, self.pool.stats())
+
+        match = _TURNS_PATH.match(path)
+        if match is None:
+            return await send_json(send, 404, {"error": "not found"})
+        if method != "POST":
+            return await send_json(send, 405, {"error": "method not allowed"}, ((b"allow", b"POST"),))
+
+        body = await read_body(receive)
+        if body is None:
+            return await send_json(send, 413, {"error": f"body exceeds {MAX_BODY_BYTES} bytes"})
+        try:
+            payload = codec.loads(body)
+        except ValueError:
+            return await send_json(send, 400, {"error": "body is not valid JSON"})
+
+        message = payload.get("message") if isinstance(payload, dict) else None
+        user_id = payload.get("user_id") if isinstance(payload, dict) else None
+        if not isinstance(message, str) or not message.strip():
+            return await send_json(send, 422, {"error": "'message' must be a non-empty string"})
+        if user_id is not None and not isinstance(user_id, str):
+            return await send_json(send, 422, {"error": "'user_id' must be a string"})
+
+        session_id = match.group(1)
+        try:
+            result = await self.pool.submit(session_id, {"message": message, "user_id": user_id})
+        except asyncio.TimeoutError:
+            return await send_json(send, 504, {"error": "turn timed out", "session_id": session_id})
+        except WorkerUnavailable as e:
+            return await send_json(send, 503, {"error": str(e)})
+        except Exception as e:
+            # Details stay in the logs (the worker logs the traceback); clients get a generic error
+            logger.error("Turn for session %s failed: %s", session_id, e)
+            return await send_json(send, 500, {"error": "turn failed", "session_id": session_id})
+        await send_json(send, 200, result)
+
+
+# ── Serving ─────────────────────────────────────────────────────────────────
+
+class BackgroundServer:
+    """
+    Serves an ASGI app with uvicorn on a daemon thread, on an OS-assigned
+    port unless one is given — for tests, benchmarks and local stubs.
+    """
+
+    def __init__(self, app, host: str = "127.0.0.1", port: int = 0, lifespan: str = "auto",
+                 startup_timeout: float = 60.0):
+        import uvicorn
+
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port))
+        self.url = f"http://{host}:{self._sock.getsockname()[1]}"
+        self.startup_timeout = startup_timeout
+        self._server = uvicorn.Server(uvicorn.Config(app, lifespan=lifespan, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [self._sock]},
+                                        name="asgi-server", daemon=True)
+
+    def start(self) -> str:
+        self._thread.start()
+        expires = time.monotonic() + self.startup_timeout
+        while not self._server.started:
+            if not self._thread.is_alive() or time.monotonic() > expires:
+                raise RuntimeError(f"Server on {self.url} failed to start")
+            time.sleep(0.01)
+        return self.url
+
+    def stop(self) -> None:
+        self._server.should_exit = True
+        self._thread.join()
+        self._sock.close()
+
+    def __enter__(self) -> "BackgroundServer":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def create_app(workers: Optional[int] = None, handler: str = DEFAULT_HANDLER,
+               handler_kwargs: Optional[Dict[str, Any]] = None,
+               env: Optional[Dict[str, str]] = None, timeout: float = TURN_TIMEOUT_S) -> DineFlowService:
+    workers = workers or int(os.getenv("DINEFLOW_WORKERS", "0")) or os.cpu_count() or 1
+    return DineFlowService(WorkerPool(workers=workers, handler=handler, handler_kwargs=handler_kwargs,
+                                      env=env, timeout=timeout))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="DineFlow HTTP service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=None, help="golden_loop worker processes")
+    parser.add_argument("--handler", default=DEFAULT_HANDLER, help="module:factory of the turn handler")
+    parser.add_argument("--db", default=None, help="SQLite session store (default: session_store.sqlite)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    handler_kwargs = {"db_path": args.db} if args.db else None
+    uvicorn.run(create_app(args.workers, args.handler, handler_kwargs), host=args.host, port=args.port,
+                lifespan="on", log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
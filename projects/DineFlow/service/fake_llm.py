@@ -0,0 +1,96 @@
+# DineFlow/service/fake_llm.py
+"""
+A local stand-in for the OpenAI chat completions endpoint.
+
+Point the workers at it with OPENAI_BASE_URL=<url>/v1 (the SDK reads it
+when LLMTransport builds its client) and the whole service runs — router,
+agents, retries, cache — without network access or API cost. Used by the
+service tests and benchmarks/bench_service.py:
+
+    with BackgroundServer(FakeLLM(latency=0.05)) as server:
+        env = {"OPENAI_BASE_URL": server.url + "/v1", "OPENAI_API_KEY": "fake"}
+
+or standalone: python -m service.fake_llm --port 8001 --latency 0.05
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+from typing import Callable, List, Optional, Union
+
+from service.app import read_body, send_json
+
+DEFAULT_REPLY = {
+    "action_type": "NO_OP",
+    "message": "Hello from DineFlow! What can I get you?",
+    "confidence": 0.9,
+}
+
+
+class FakeLLM:
+    """
+    ASGI app answering POST .../chat/completions with `reply` after
+    `latency` seconds. reply is a fixed JSON object, or a callable taking
+    the request's messages and returning the content string.
+    """
+
+    def __init__(self, reply: Union[dict, Callable[[List[dict]], str], None] = None,
+                 latency: float = 0.0, model: str = "fake-llm"):
+        self.reply = reply if reply is not None else DEFAULT_REPLY
+        self.latency = latency
+        self.model = model
+        self.calls = 0
+        self._ids = itertools.count(1)
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+        if scope["method"] != "POST" or not scope["path"].endswith("/chat/completions"):
+            return await send_json(send, 404, {"error": {"message": "not found"}})
+
+        request = json.loads(await read_body(receive) or b"{}")
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        content = self._content(request.get("messages", []))
+        await send_json(send, 200, {
+            "id": f"chatcmpl-fake-{next(self._ids)}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", self.model),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        })
+
+    def _content(self, messages: List[dict]) -> str:
+        if callable(self.reply):
+            return self.reply(messages)
+        return json.dumps(self.reply)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible stub.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds per completion")
+    args = parser.parse_args(argv)
+    uvicorn.run(FakeLLM(latency=args.latency), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
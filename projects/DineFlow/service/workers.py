@@ -0,0 +1,376 @@
+# DineFlow/service/workers.py
+"""
+Worker processes that run golden_loop turns, with session affinity.
+
+    ASGI front (one process)           worker processes
+    ────────────────────────           ─────────────────────────────────
+    POST /sessions/{id}/turns  ──►  worker_for(id)  ──►  inbox[i]
+                                                          SessionLocks
+                                                          async_golden_loop
+                               ◄──  outbox (shared)  ◄──  result
+
+Every turn of a session goes to the same worker, picked by rendezvous
+hashing of the session_id (stable across restarts, unlike hash()), so a
+session's MemoryManager window lives in exactly one process. Inside a
+worker, turns of the same session run one at a time under a per-session
+asyncio.Lock; turns of different sessions interleave on the worker's
+event loop while they wait on the LLM.
+
+SessionState goes through the shared SQLite store (SessionRepository), so
+a worker that is restarted picks its sessions back up.
+"""
+import asyncio
+import hashlib
+import importlib
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from state_machine.session_repository import SESSION_DB_PATH
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HANDLER = "service.workers:GoldenLoopHandler"
+TURN_TIMEOUT_S = 60.0
+# Per-worker MemoryManagers kept for idle sessions (LRU beyond this)
+MAX_MEMORIES = 1024
+
+# (session_id, payload) → JSON-compatible result; an optional close() is
+# called when the worker stops
+TurnHandler = Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+def worker_for(session_id: str, workers: int) -> int:
+    """
+    Rendezvous (highest random weight) hashing: the worker whose
+    (session_id, index) digest is largest. Deterministic in every process,
+    and changing the worker count only moves the sessions whose winner was
+    added or removed.
+    """
+    if workers <= 1:
+        return 0
+    key = session_id.encode("utf-8")
+
+    def weight(index: int) -> bytes:
+        return hashlib.blake2b(key, digest_size=8, salt=index.to_bytes(8, "big")).digest()
+
+    return max(range(workers), key=weight)
+
+
+class SessionLocks:
+    """
+    One asyncio.Lock per session_id, created on demand and dropped when no
+    turn holds or waits for it, so idle sessions cost nothing.
+    """
+
+    def __init__(self):
+        self._locks: Dict[str, Tuple[asyncio.Lock, int]] = {}
+
+    @asynccontextmanager
+    async def hold(self, session_id: str):
+        lock, users = self._locks.get(session_id, (None, 0))
+        if lock is None:
+            lock = asyncio.Lock()
+        self._locks[session_id] = (lock, users + 1)
+        try:
+            async with lock:
+                yield
+        finally:
+            lock, users = self._locks[session_id]
+            if users == 1:
+                del self._locks[session_id]
+            else:
+                self._locks[session_id] = (lock, users - 1)
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+class GoldenLoopHandler:
+    """
+    The default TurnHandler: load (or start) the session, run one
+    async_golden_loop turn with the session's process-local MemoryManager,
+    save. Callers serialise turns per session (SessionLocks). A turn that
+    fails discards the session from the repository's cache, so its partial
+    edits are not served to the next turn.
+    """
+
+    def __init__(self, db_path: str = SESSION_DB_PATH, load_percentage: int = 40):
+        # Imported here so the ASGI front process never loads the agent stack
+        from orchestration.golden_loop import async_golden_loop
+        from orchestration.memory_manager import MemoryManager
+        from state_machine.session_repository import SessionRepository
+        from state_machine.types import KitchenSnapshot
+
+        self._golden_loop = async_golden_loop
+        self._memory_factory = MemoryManager
+        self.repository = SessionRepository(db_path)
+        self.kitchen = KitchenSnapshot(load_percentage=load_percentage)
+        self.memories: "OrderedDict[str, Any]" = OrderedDict()
+
+    async def __call__(self, session_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        from state_machine.types import SessionState
+
+        session = await asyncio.to_thread(self.repository.get, session_id)
+        new_session = session is None
+        if new_session:
+            session = SessionState(session_id=session_id, user_id=payload.get("user_id") or "guest",
+                                   active_agent="OrderTaker", tool_budget_remaining=5)
+        try:
+            response = await self._golden_loop(session=session, user_input=payload["message"],
+                                               kitchen=self.kitchen, memory=self._memory(session_id, new_session))
+            await asyncio.to_thread(self.repository.save, session)
+        except BaseException:
+            # Includes cancellation: the shared cached session may be half-edited
+            self.repository.discard(session_id)
+            raise
+        return {
+            "session_id": session.session_id,
+            "response": response,
+            "active_agent": session.active_agent,
+            "order_status": session.order_status,
+            "cart": session.cart,
+            "turn_id": session.turn_id,
+        }
+
+    async def aclose(self) -> None:
+        """Closes this worker loop's pooled LLM connections, then close()."""
+        from llm.client import transport
+
+        await transport.aclose()
+        await asyncio.to_thread(self.close)
+
+    def close(self) -> None:
+        """Drains pending long-term memory writes before the worker exits."""
+        from tools.search.vector import memory_writer
+
+        memory_writer.close()
+        self.repository.close()
+
+    def _memory(self, session_id: str, new_session: bool = False):
+        memory = self.memories.get(session_id)
+        if memory is None:
+            memory = self.memories[session_id] = self._memory_factory(session_id=session_id,
+                                                                      new_session=new_session)
+        self.memories.move_to_end(session_id)
+        while len(self.memories) > MAX_MEMORIES:
+            self.memories.popitem(last=False)
+        return memory
+
+
+def load_handler(path: str, **kwargs) -> TurnHandler:
+    """'package.module:factory' → factory(**kwargs)."""
+    module_name, _, attr = path.partition(":")
+    return getattr(importlib.import_module(module_name), attr)(**kwargs)
+
+
+# ── Worker process ──────────────────────────────────────────────────────────
+
+def _worker_main(index: int, inbox, outbox, handler_path: str, handler_kwargs: dict,
+                 env: Dict[str, str]) -> None:
+    os.environ.update(env)
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING"))
+    handler = load_handler(handler_path, **handler_kwargs)
+    asyncio.run(_serve(index, inbox, outbox, handler))
+
+
+async def _serve(index: int, inbox, outbox, handler: TurnHandler) -> None:
+    loop = asyncio.get_running_loop()
+    locks = SessionLocks()
+    running = set()
+    pid = os.getpid()
+
+    async def run(request_id: int, session_id: str, payload: Dict[str, Any]) -> None:
+        try:
+            async with locks.hold(session_id):
+                result = await handler(session_id, payload)
+            outbox.put((request_id, True, {**result, "worker": index, "pid": pid}))
+        except Exception as e:
+            logger.exception("Turn for session %s failed on worker %d", session_id, index)
+            outbox.put((request_id, False, f"{type(e).__name__}: {e}"))
+
+    while True:
+        job = await loop.run_in_executor(None, inbox.get)
+        if job is None:
+            break
+        task = asyncio.create_task(run(*job))
+        running.add(task)
+        task.add_done_callback(running.discard)
+    if running:
+        await asyncio.gather(*running)
+    # Handlers holding loop-bound resources (GoldenLoopHandler's LLM
+    # connections) release them with aclose(), on this loop
+    aclose = getattr(handler, "aclose", None)
+    close = getattr(handler, "close", None)
+    if aclose is not None:
+        await aclose()
+    elif close is not None:
+        await asyncio.to_thread(close)
+
+
+# ── Front-process pool ──────────────────────────────────────────────────────
+
+class WorkerUnavailable(RuntimeError):
+    pass
+
+
+class WorkerPool:
+    """
+    Starts `workers` processes and routes each submit() to the session's
+    affinity worker. Results come back on one shared queue, drained by a
+    reader thread that completes the waiting asyncio futures.
+
+    A worker found dead on submit is restarted at the same index, so
+    affinity is unchanged. `env` is applied in each worker before the
+    handler is built (e.g. OPENAI_BASE_URL for a local LLM).
+    """
+
+    def __init__(self, workers: int = 2, handler: str = DEFAULT_HANDLER,
+                 handler_kwargs: Optional[dict] = None, env: Optional[Dict[str, str]] = None,
+                 timeout: float = TURN_TIMEOUT_S, start_method: str = "spawn"):
+        self.workers = max(1, workers)
+        self.handler = handler
+        self.handler_kwargs = handler_kwargs or {}
+        self.env = env or {}
+        self.timeout = timeout
+        self._ctx = multiprocessing.get_context(start_method)
+        self._processes: List[Optional[multiprocessing.process.BaseProcess]] = [None] * self.workers
+        self._inboxes: List[Any] = []
+        self._outbox = None
+        self._reader: Optional[threading.Thread] = None
+        self._pending: Dict[int, Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self._pending_lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._start_lock = threading.Lock()
+
+        self.submitted = [0] * self.workers
+        self.failed = 0
+        self.timeouts = 0
+        self.restarts = 0
+
+    # ── Lifecycle ─────────────────────────────────────────────────────────────
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._outbox is not None:
+                return
+            self._outbox = self._ctx.Queue()
+            self._inboxes = [self._ctx.Queue() for _ in range(self.workers)]
+            for index in range(self.workers):
+                self._spawn(index)
+            self._reader = threading.Thread(target=self._read_results, name="worker-results", daemon=True)
+            self._reader.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Lets every worker finish its queued turns, then joins it."""
+        with self._start_lock:
+            if self._outbox is None:
+                return
+            for inbox in self._inboxes:
+                inbox.put(None)
+            for process in self._processes:
+                if process is None:
+                    continue
+                process.join(timeout)
+                if process.is_alive():
+                    logger.warning("Worker pid=%s did not stop in %.0fs; terminating", process.pid, timeout)
+                    process.terminate()
+                    process.join()
+            self._outbox.put(None)
+            self._reader.join()
+            for queue in (*self._inboxes, self._outbox):
+                queue.close()
+                queue.join_thread()
+            self._inboxes, self._outbox = [], None
+            with self._pending_lock:
+                pending, self._pending = self._pending, {}
+            for loop, future in pending.values():
+                loop.call_soon_threadsafe(_settle, future, WorkerUnavailable("Worker pool stopped"))
+
+    def __enter__(self) -> "WorkerPool":
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ── Turns ─────────────────────────────────────────────────────────────────
+
+    async def submit(self, session_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Runs one turn on the session's worker. Raises WorkerUnavailable or asyncio.TimeoutError."""
+        if self._outbox is None:
+            raise WorkerUnavailable("Worker pool is not running")
+        index = worker_for(session_id, self.workers)
+        if not self._processes[index].is_alive():
+            with self._start_lock:
+                if not self._processes[index].is_alive():
+                    logger.warning("Worker %d (pid=%s) died; restarting", index, self._processes[index].pid)
+                    self.restarts += 1
+                    self._spawn(index)
+
+        request_id = next(self._ids)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._pending_lock:
+            self._pending[request_id] = (loop, future)
+        self.submitted[index] += 1
+        self._inboxes[index].put((request_id, session_id, payload))
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "alive": sum(1 for p in self._processes if p is not None and p.is_alive()),
+            "submitted": list(self.submitted),
+            "in_flight": len(self._pending),
+            "failed": self.failed,
+            "timeouts": self.timeouts,
+            "restarts": self.restarts,
+        }
+
+    # ── Internals ─────────────────────────────────────────────────────────────
+
+    def _spawn(self, index: int) -> None:
+        process = self._ctx.Process(
+            target=_worker_main, name=f"dineflow-worker-{index}", daemon=True,
+            args=(index, self._inboxes[index], self._outbox, self.handler, self.handler_kwargs, self.env),
+        )
+        process.start()
+        self._processes[index] = process
+
+    def _read_results(self) -> None:
+        while True:
+            message = self._outbox.get()
+            if message is None:
+                return
+            request_id, ok, result = message
+            with self._pending_lock:
+                waiter = self._pending.get(request_id)
+            if waiter is None:
+                continue  # timed out already
+            if not ok:
+                self.failed += 1
+                result = RuntimeError(result)
+            loop, future = waiter
+            loop.call_soon_threadsafe(_settle, future, result)
+
+
+def _settle(future: asyncio.Future, outcome: Any) -> None:
+    if future.done():
+        return
+    if isinstance(outcome, BaseException):
+        future.set_exception(outcome)
+    else:
+        future.set_result(outcome)
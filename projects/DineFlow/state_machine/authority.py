@@ -1743,6 +1743,7 @@
 # DineFlow/state_machine/authority.py
 from typing import List, Dict, Any
 from state_machine.types import SessionState, MenuItemSnapshot, KitchenSnapshot, ContextScope
+from state_machine.classifier_registry import ClassifierRegistry
 from state_machine.query_classifier import QueryClassifier, QueryClass
 from validation.schemas import ActionRequest, ValidationResult, ActionType, IntentType
 from validation.errors import RejectionCode, ViolationType, Severity
@@ -1790,22 +1791,16 @@ AGENT_PERMISSION_MATRIX = {
 }
 
 
-# QueryClassifier is instantiated lazily on first call to decide_context_scope.
-# It cannot be instantiated here at module load time because all_menu_items
-# is not yet available — the registry is bootstrapped in golden_loop.py.
-# The classifier is then cached for the lifetime of the process.
-_query_classifier: QueryClassifier | None = None
+# QueryClassifiers are built lazily on first use of each menu version, not at
+# module load — all_menu_items is bootstrapped in golden_loop.py. The registry
+# keeps a bounded LRU of versions and rebuilds off the request thread when a
+# named menu (menu_id) changes.
+classifier_registry = ClassifierRegistry()
 
 
-def _get_classifier(all_menu_items: list) -> QueryClassifier:
-    """
-    Returns the shared QueryClassifier instance, creating it on first call.
-    Thread-safe for read-heavy workloads (construction is idempotent).
-    """
-    global _query_classifier
-    if _query_classifier is None:
-        _query_classifier = QueryClassifier(all_menu_items)
-    return _query_classifier
+def _get_classifier(all_menu_items: list, menu_id: str | None = None) -> QueryClassifier:
+    """Returns the QueryClassifier for this menu's version (see ClassifierRegistry)."""
+    return classifier_registry.get(all_menu_items, menu_id)
 
 
 def evaluate_action(
@@ -2025,7 +2020,8 @@ def _check_category_ambiguity(
     return None
 
 
-def decide_context_scope(session: SessionState, user_input: str, all_menu_items: list = None) -> Dict[str, Any]:
+def decide_context_scope(session: SessionState, user_input: str, all_menu_items: list = None,
+                         menu_id: str | None = None) -> Dict[str, Any]:
     """
     ⚖️ CONTEXT SCOPE POLICY — v1.2 (QueryClassifier-backed)
 
@@ -2049,14 +2045,24 @@ def decide_context_scope(session: SessionState, user_input: str, all_menu_items:
     Args:
         session:        Current session state (intent used as secondary signal).
         user_input:     Raw user query — primary input for classification.
-        all_menu_items: Menu data for name-index construction. Optional because
-                        the classifier is cached after first call; pass on first
-                        call or whenever the menu changes.
+        all_menu_items: Menu data for name-index construction. Optional when
+                        menu_id already has a classifier; classifiers are
+                        cached per menu version, so pass it every turn and
+                        a changed menu is picked up automatically.
+        menu_id:        Which menu this is (one per restaurant). With it, a
+                        changed menu is rebuilt in the background while the
+                        previous classifier keeps serving.
     """
-    # Resolve classifier (lazy init, cached after first call)
-    # If all_menu_items not passed and classifier not yet built, we fall back
-    # gracefully to intent-only logic rather than crashing.
-    classifier = _get_classifier(all_menu_items) if all_menu_items else _query_classifier
+    # Resolve classifier (cached per menu version)
+    # Without all_menu_items: menu_id's current classifier, or with no menu_id
+    # the most recently used one. If none exists yet, we fall back gracefully
+    # to intent-only logic rather than crashing.
+    if all_menu_items:
+        classifier = _get_classifier(all_menu_items, menu_id)
+    elif menu_id:
+        classifier = classifier_registry.current(menu_id)
+    else:
+        classifier = classifier_registry.latest()
 
     # ── Primary Path: Structural Classification ────────────────────────────────
     # Check `is not None` explicitly — empty string is valid input that the classifier
@@ -0,0 +1,214 @@
+# DineFlow/state_machine/classifier_registry.py
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, Optional, Sequence
+
+from state_machine.query_classifier import QueryClassifier
+from state_machine.types import MenuItemSnapshot
+from tools.registry import MenuCatalog, catalog_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CLASSIFIERS = 8
+
+
+class ClassifierRegistry:
+    """
+    QueryClassifier instances keyed by catalogue version (tools.registry.menu_version).
+
+    authority used to build one classifier into a module global on the first
+    call and keep it forever: a menu change was silently ignored, and two
+    restaurants in one process shared whichever menu arrived first.
+
+    ── Lookup ────────────────────────────────────────────────────────────────
+    get(menu_items, menu_id) returns the classifier for that exact menu
+    version when it is cached (bounded LRU, maxsize versions).
+
+    On a miss the behaviour depends on menu_id — the caller's name for a
+    menu that evolves over time (one per restaurant):
+
+      menu_id with a current classifier
+          the menu changed. The new classifier is built on a background
+          thread and the previous one keeps serving until it is ready; the
+          swap (cache insert + current pointer) happens atomically under the
+          lock, so a request sees either the old or the new classifier whole.
+      no menu_id, or nothing built yet for it
+          built synchronously — there is nothing sensible to serve instead.
+
+    One build per version is ever in flight; wait_idle() blocks until all
+    pending builds have been swapped in (tests, graceful reloads).
+
+    ── Plain lists ───────────────────────────────────────────────────────────
+    Pass the shared MenuCatalog (get_menu_catalog(), golden_loop's
+    all_menu_items) where possible: its version is precomputed, so a hit
+    costs one dict lookup. A plain list is first compared with the catalogue
+    menu_id is currently served from (equal items → that classifier, no
+    hashing); otherwise its version is hashed, and only a miss wraps it in
+    a MenuCatalog — the classifier is built from that immutable copy, so a
+    background build never sees later edits to the caller's list.
+
+    latest() is the classifier most recently returned — the fallback for
+    callers that pass neither a menu nor a menu_id.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAX_CLASSIFIERS):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._by_version: "OrderedDict[str, QueryClassifier]" = OrderedDict()
+        self._catalogs: Dict[str, MenuCatalog] = {}  # version → catalogue it was built from
+        self._latest: Optional[QueryClassifier] = None
+        self._current: Dict[str, str] = {}           # menu_id → version serving
+        self._building: Dict[str, Future] = {}       # version → pending build
+        self._target: Dict[str, str] = {}            # menu_id → newest version requested
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._generation = 0                         # bumped by clear()
+
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+        self.stale_serves = 0
+
+    def get(self, menu_items: Sequence[MenuItemSnapshot], menu_id: Optional[str] = None) -> QueryClassifier:
+        if isinstance(menu_items, MenuCatalog):
+            return self._get(menu_items.version, menu_items, menu_id)
+        classifier = self._serving_unchanged(menu_items, menu_id)
+        if classifier is not None:
+            return classifier
+        return self._get(catalog_version(menu_items), menu_items, menu_id)
+
+    def _get(self, version: str, menu_items: Sequence[MenuItemSnapshot],
+             menu_id: Optional[str]) -> QueryClassifier:
+        with self._lock:
+            generation = self._generation
+            classifier = self._by_version.get(version)
+            if classifier is not None:
+                self._hit(version, classifier, menu_id)
+                return classifier
+            self.misses += 1
+
+        # Wrap a plain list only now that a build is needed
+        catalog = menu_items if isinstance(menu_items, MenuCatalog) else MenuCatalog(menu_items)
+        with self._lock:
+            classifier = self._by_version.get(version)
+            if classifier is not None:      # built meanwhile by another thread
+                self._hit(version, classifier, menu_id)
+                return classifier
+            previous = None
+            if menu_id is not None and menu_id in self._current:
+                previous = self._by_version.get(self._current[menu_id])
+            if previous is not None:
+                self._target[menu_id] = version
+                if version not in self._building:
+                    self._building[version] = self._get_pool().submit(
+                        self._build, version, catalog, menu_id, generation
+                    )
+                self.stale_serves += 1
+                self._latest = previous
+                return previous
+
+        return self._build(version, catalog, menu_id, generation)
+
+    def _serving_unchanged(self, menu_items: Sequence[MenuItemSnapshot],
+                           menu_id: Optional[str]) -> Optional[QueryClassifier]:
+        """menu_id's current classifier if menu_items equals the catalogue it was built from."""
+        if menu_id is None:
+            return None
+        with self._lock:
+            version = self._current.get(menu_id)
+            classifier = self._by_version.get(version) if version else None
+            catalog = self._catalogs.get(version) if version else None
+        if classifier is None or catalog is None or tuple(menu_items) != tuple(catalog):
+            return None
+        with self._lock:
+            self._hit(version, classifier, menu_id)
+        return classifier
+
+    def _hit(self, version: str, classifier: QueryClassifier, menu_id: Optional[str]) -> None:
+        # Called with self._lock held
+        if version in self._by_version:
+            self._by_version.move_to_end(version)
+        if menu_id is not None:
+            self._current[menu_id] = version
+        self._latest = classifier
+        self.hits += 1
+
+    def current(self, menu_id: str) -> Optional[QueryClassifier]:
+        """The classifier menu_id is being served with, if any."""
+        with self._lock:
+            version = self._current.get(menu_id)
+            return self._by_version.get(version) if version else None
+
+    def latest(self) -> Optional[QueryClassifier]:
+        """The classifier most recently returned by get(), for any menu."""
+        with self._lock:
+            return self._latest
+
+    def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until no build is pending. False on timeout."""
+        with self._lock:
+            pending = list(self._building.values())
+        done, not_done = wait(pending, timeout=timeout)
+        return not not_done
+
+    def clear(self) -> None:
+        """Forgets every classifier; builds still running finish but are not cached."""
+        with self._lock:
+            self._generation += 1
+            self._by_version.clear()
+            self._catalogs.clear()
+            self._latest = None
+            self._current.clear()
+            self._target.clear()
+            self._building.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "versions": len(self._by_version),
+                "menus": len(self._current),
+                "building": len(self._building),
+                "hits": self.hits,
+                "misses": self.misses,
+                "builds": self.builds,
+                "stale_serves": self.stale_serves,
+            }
+
+    # ── Internals ──────────────────────────────────────────────────────────────
+
+    def _build(self, version: str, catalog: MenuCatalog, menu_id: Optional[str],
+               generation: int) -> QueryClassifier:
+        try:
+            classifier = QueryClassifier(catalog)
+        except Exception:
+            logger.exception("QueryClassifier build for menu version %s failed", version)
+            with self._lock:
+                if generation == self._generation:
+                    self._building.pop(version, None)
+            raise
+        with self._lock:
+            self.builds += 1
+            if generation != self._generation:
+                return classifier
+            self._by_version[version] = classifier
+            self._by_version.move_to_end(version)
+            self._catalogs[version] = catalog
+            while len(self._by_version) > self.maxsize:
+                evicted, _ = self._by_version.popitem(last=False)
+                self._catalogs.pop(evicted, None)
+            # A build that finishes after a newer menu was requested must not
+            # move the menu back to the older version.
+            if menu_id is not None and self._target.get(menu_id, version) == version:
+                self._current[menu_id] = version
+                self._target.pop(menu_id, None)
+            if menu_id is None or self._current.get(menu_id) == version:
+                self._latest = classifier
+            self._building.pop(version, None)
+        return classifier
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        # Called with self._lock held
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="classifier-build")
+        return self._pool
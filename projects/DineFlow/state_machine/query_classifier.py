@@ -2,6 +2,8 @@
 from enum import Enum
 from dataclasses import dataclass
 from typing import Optional
+from validation.turn_features import CATEGORICAL_RE, COMPARATOR_RE, turn_features
+from tools.search.name_matcher import matcher_for
 
 
 # =============================================================================
@@ -50,8 +52,8 @@ class QueryClassifier:
     structural signals, not vocabulary matching.
 
     Instantiated once at bootstrap and reused across all requests.
-    The name index is built at construction time (O(n) once),
-    and all classify() calls are O(n) name lookups at worst.
+    The name index and name matcher are built at construction time (O(n)
+    once); classify() is then a dict lookup plus one pass over the query.
     """
 
     def __init__(self, all_menu_items: list):
@@ -65,6 +67,8 @@ class QueryClassifier:
         self._name_index: dict[str, str] = {
             item.name.lower(): item.sku for item in all_menu_items
         }
+        # Shared Aho-Corasick matcher over the same names (one pass per query)
+        self._matcher = matcher_for(all_menu_items)
 
     def classify(self, user_input: str) -> ClassifiedQuery:
         """
@@ -79,7 +83,8 @@ class QueryClassifier:
                 reasoning="Empty input; defaulting to AMBIGUOUS."
             )
 
-        normalized = user_input.lower().strip()
+        features = turn_features(user_input)
+        normalized = features.text
 
         # ── Signal 1: Named Entity Resolution ─────────────────────────────────
         # If the user mentions a known item by name, this is entity-bound.
@@ -96,7 +101,7 @@ class QueryClassifier:
         # ── Signal 2: Categorical Grammar Patterns ────────────────────────────
         # These words grammatically indicate the user is scanning a category,
         # not referencing a specific item. Stable regardless of menu content.
-        if self._has_categorical_structure(normalized):
+        if features.is_categorical:
             return ClassifiedQuery(
                 query_class=QueryClass.ATTRIBUTE_BOUND,
                 confidence=0.88,
@@ -107,7 +112,7 @@ class QueryClassifier:
         # ── Signal 3: Price/Quantity Comparator Patterns ──────────────────────
         # Comparators ("under $15", "cheapest", "less than") structurally
         # require scanning the full catalog to find qualifying items.
-        if self._has_comparator_structure(normalized):
+        if features.is_comparator:
             return ClassifiedQuery(
                 query_class=QueryClass.ATTRIBUTE_BOUND,
                 confidence=0.85,
@@ -131,11 +136,9 @@ class QueryClassifier:
         # Exact match
         if text in self._name_index:
             return self._name_index[text]
-        # Substring match — item name appears anywhere in the query
-        for name, sku in self._name_index.items():
-            if name in text:
-                return sku
-        return None
+        # Substring match — item name appears anywhere in the query; first
+        # item in menu order wins, as with the old scan of _name_index
+        return self._matcher.first_named(text)
 
     def _has_categorical_structure(self, text: str) -> bool:
         """
@@ -146,26 +149,11 @@ class QueryClassifier:
         "any vegan options" → "any " signals category scan
         "what do you have that's gluten-free" → "what do you have" signals scan
         "show me something light" → "something" signals category scan
+
+        Patterns: turn_features.CATEGORICAL_PATTERNS, compiled into one regex.
+        classify() reads the same flag from the turn's TurnFeatures.
         """
-        categorical_patterns = [
-            "anything",
-            "something",
-            "any ",
-            "what's on",
-            "what do you have",
-            "what do you offer",
-            "which ",
-            "do you have any",
-            "do you have anything",
-            "what are your",
-            "show me",
-            "what kind",
-            "options",
-            "what can i get",
-            "what would you recommend",
-            "suggestions",
-        ]
-        return any(p in text for p in categorical_patterns)
+        return CATEGORICAL_RE.search(text) is not None
 
     def _has_comparator_structure(self, text: str) -> bool:
         """
@@ -175,19 +163,7 @@ class QueryClassifier:
         These are structural patterns (under $, cheaper than, most expensive),
         not open-ended adjectives like "cheap" which can appear in non-scan
         contexts ("is the beer cheap?").
+
+        Patterns: turn_features.COMPARATOR_PATTERNS, compiled into one regex.
         """
-        comparator_patterns = [
-            "under $",
-            "over $",
-            "less than $",
-            "more than $",
-            "cheaper than",
-            "most expensive",
-            "least expensive",
-            "cheapest",
-            "between $",
-            "around $",
-            "within my budget",
-            "affordable",
-        ]
-        return any(p in text for p in comparator_patterns)
\ No newline at end of file
+        return COMPARATOR_RE.search(text) is not None
\ No newline at end of file
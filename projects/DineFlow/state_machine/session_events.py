@@ -0,0 +1,102 @@
+# DineFlow/state_machine/session_events.py
+"""
+Turn-by-turn changes to a SessionState, as a list of small events.
+
+A session that was loaded from (or saved to) the repository carries a
+baseline: a cheap copy of its containers plus the row version it matches.
+pending_events() compares the live session against that baseline and
+returns only what the turn changed:
+
+    ["agent",   null,      "MenuExpert"]      agent switch
+    ["set",     "turn_id", 7]                 any other assigned field
+    ["cart",    "PZ-PEP",  2]                 cart line set (null = removed)
+    ["context", "PZ-PEP",  {...ContextItem}]  context mark (null = dropped)
+    ["pending", null,      ["PZ-PEP"]]        pending_items replaced
+
+Scalars come from SessionState's dirty-field set (every assignment is
+recorded); cart, active_context and pending_items are mutated in place all
+over the golden loop, so those are diffed against the baseline instead.
+
+apply_events() replays a list onto the JSON dict of an older snapshot.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from state_machine.types import SessionState
+
+SessionEvent = List[Any]   # [op, key, value] — a list so it round-trips through JSON
+
+_CONTAINERS = frozenset({"cart", "active_context", "pending_items"})
+
+
+@dataclass
+class Baseline:
+    origin: Hashable                      # e.g. (db path, row version)
+    cart: Dict[str, int]
+    pending_items: List[str]
+    context: Dict[str, Tuple[Any, ...]]   # sku → ContextItem field values
+
+
+def mark_clean(session: SessionState, origin: Hashable) -> None:
+    """Records that session now matches the persisted state identified by origin."""
+    session._baseline = Baseline(
+        origin=origin,
+        cart=dict(session.cart),
+        pending_items=list(session.pending_items),
+        context={sku: tuple(item.__dict__.values()) for sku, item in session.active_context.items()},
+    )
+    session._dirty.clear()
+
+
+def pending_events(session: SessionState, origin: Hashable) -> Optional[List[SessionEvent]]:
+    """
+    The events that turn the persisted state into session, or None when
+    session has no baseline for origin (never saved there, or the row has
+    since been written by someone else) and needs a full snapshot.
+    """
+    baseline: Optional[Baseline] = session._baseline
+    if baseline is None or baseline.origin != origin:
+        return None
+
+    events: List[SessionEvent] = []
+    for name in sorted(session._dirty - _CONTAINERS):
+        value = getattr(session, name)
+        events.append(["agent", None, value] if name == "active_agent" else ["set", name, value])
+
+    cart = session.cart
+    for sku, qty in cart.items():
+        if baseline.cart.get(sku) != qty:
+            events.append(["cart", sku, qty])
+    for sku in baseline.cart.keys() - cart.keys():
+        events.append(["cart", sku, None])
+
+    context = session.active_context
+    for sku, item in context.items():
+        if baseline.context.get(sku) != tuple(item.__dict__.values()):
+            events.append(["context", sku, item.model_dump(mode="json")])
+    for sku in baseline.context.keys() - context.keys():
+        events.append(["context", sku, None])
+
+    if session.pending_items != baseline.pending_items:
+        events.append(["pending", None, list(session.pending_items)])
+    return events
+
+
+def apply_events(state: Dict[str, Any], events: List[SessionEvent]) -> Dict[str, Any]:
+    """Replays events, in order, onto a snapshot's JSON dict (mutated and returned)."""
+    for op, key, value in events:
+        if op == "set":
+            state[key] = value
+        elif op == "agent":
+            state["active_agent"] = value
+        elif op == "cart" or op == "context":
+            target = state.setdefault("cart" if op == "cart" else "active_context", {})
+            if value is None:
+                target.pop(key, None)
+            else:
+                target[key] = value
+        elif op == "pending":
+            state["pending_items"] = value
+        else:
+            raise ValueError(f"Unknown session event {op!r}")
+    return state
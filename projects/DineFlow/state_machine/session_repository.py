@@ -0,0 +1,489 @@
+# DineFlow/state_machine/session_repository.py
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from state_machine.session_events import apply_events, mark_clean, pending_events
+from state_machine.types import SessionState
+from validation.codec import codec
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SESSION_DB_PATH = os.path.join(BASE_DIR, "session_store.sqlite")
+LEGACY_JSON_PATH = os.path.join(BASE_DIR, "session_store.json")
+DEFAULT_CACHE_SIZE = 1024
+# Delta saves appended to a session's event log before the next save
+# writes a full snapshot and truncates the log
+DEFAULT_SNAPSHOT_EVERY = 32
+
+SCHEMA_VERSION = 3
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS sessions (
+        session_id   TEXT PRIMARY KEY,
+        user_id      TEXT NOT NULL,
+        order_status TEXT NOT NULL,
+        state        TEXT NOT NULL,
+        updated_at   REAL NOT NULL,
+        version      INTEGER NOT NULL DEFAULT 1,
+        snapshot_seq INTEGER NOT NULL DEFAULT 0,
+        last_seq     INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    # Append-only per-session log: one row of events per delta save,
+    # replayed onto the state snapshot (which covers seq <= snapshot_seq)
+    """
+    CREATE TABLE IF NOT EXISTS session_events (
+        session_id TEXT NOT NULL,
+        seq        INTEGER NOT NULL,
+        turn_id    INTEGER NOT NULL,
+        events     TEXT NOT NULL,
+        PRIMARY KEY (session_id, seq)
+    ) WITHOUT ROWID
+    """,
+    # Picks the next newest session when the indexed one leaves a status
+    "CREATE INDEX IF NOT EXISTS ix_sessions_user_status"
+    " ON sessions (user_id, order_status, updated_at DESC)",
+    # Secondary index maintained on write: (user, status) → newest session
+    """
+    CREATE TABLE IF NOT EXISTS user_sessions (
+        user_id      TEXT NOT NULL,
+        order_status TEXT NOT NULL,
+        session_id   TEXT NOT NULL,
+        PRIMARY KEY (user_id, order_status)
+    ) WITHOUT ROWID
+    """,
+)
+
+# Fixed SQL text, so sqlite3's statement cache prepares each one once per
+# connection and every save reuses the compiled statement.
+_UPSERT = (
+    "INSERT INTO sessions (session_id, user_id, order_status, state, updated_at)"
+    " VALUES (?, ?, ?, ?, ?)"
+    " ON CONFLICT(session_id) DO UPDATE SET"
+    " user_id = excluded.user_id,"
+    " order_status = excluded.order_status,"
+    " state = excluded.state,"
+    " updated_at = excluded.updated_at,"
+    " version = sessions.version + 1,"
+    " snapshot_seq = sessions.last_seq"
+)
+# Delta save: only the indexed columns change; the state snapshot stays put
+_APPEND = (
+    "UPDATE sessions SET user_id = ?, order_status = ?, updated_at = ?,"
+    " version = version + 1, last_seq = last_seq + ?"
+    " WHERE session_id = ? AND version = ?"
+)
+_INSERT_EVENTS = "INSERT INTO session_events (session_id, seq, turn_id, events) VALUES (?, ?, ?, ?)"
+_TRUNCATE_EVENTS = "DELETE FROM session_events WHERE session_id = ?"
+_SELECT_EVENTS = "SELECT events FROM session_events WHERE session_id = ? AND seq > ? ORDER BY seq"
+_SELECT_KEY = "SELECT user_id, order_status FROM sessions WHERE session_id = ?"
+_SELECT_ROW = (
+    "SELECT user_id, order_status, version, last_seq - snapshot_seq FROM sessions WHERE session_id = ?"
+)
+_SELECT_VERSION = "SELECT version FROM sessions WHERE session_id = ?"
+_SELECT_STATE = (
+    "SELECT state, version, snapshot_seq, last_seq FROM sessions WHERE session_id = ?"
+)
+_SELECT_ACTIVE = (
+    "SELECT s.session_id, s.version FROM user_sessions u"
+    " JOIN sessions s ON s.session_id = u.session_id"
+    " WHERE u.user_id = ? AND u.order_status = ?"
+)
+_INDEX_SESSION = (
+    "INSERT OR REPLACE INTO user_sessions (user_id, order_status, session_id) VALUES (?, ?, ?)"
+)
+_UNINDEX_SESSION = (
+    "DELETE FROM user_sessions WHERE user_id = ? AND order_status = ? AND session_id = ?"
+)
+_REINDEX_NEWEST = (
+    "INSERT OR REPLACE INTO user_sessions (user_id, order_status, session_id)"
+    " SELECT user_id, order_status, session_id FROM sessions"
+    " WHERE user_id = ? AND order_status = ? ORDER BY updated_at DESC LIMIT 1"
+)
+
+
+@dataclass
+class ImportReport:
+    """Outcome of import_json — invalid entries are skipped, not fatal."""
+    imported: int = 0
+    skipped: List[str] = field(default_factory=list)
+
+
+class SessionRepository:
+    """
+    SessionState persistence: one SQLite row per session.
+
+    cli_app used to keep every session in session_store.json and, after
+    each turn, read the whole file, parse every session, replace one and
+    rewrite it indented — O(all sessions ever) per turn, and two processes
+    saving at once silently dropped one of the writes.
+
+    Here a save is one prepared upsert of one row. The database runs in WAL
+    mode: readers never block the writer, and concurrent writers from other
+    threads or processes queue on the write lock (busy_timeout) instead of
+    overwriting each other. The full state is the SessionState JSON.
+
+    ── Resuming a session ────────────────────────────────────────────────────
+    find_active(user_id, status) is O(1) in the number of stored sessions:
+
+      user_sessions   (user_id, order_status) → newest session_id, kept up
+                      to date inside every save/delete transaction. A session
+                      that leaves a status hands its slot to the user's next
+                      newest session in that status.
+      session cache   in-process LRU of SessionState objects keyed by
+                      session_id, each tagged with the row's version (bumped
+                      on every save). A hit costs one primary-key read of the
+                      version — no JSON parse or validation — and a session
+                      saved meanwhile by another process is reloaded.
+
+    Cached objects are shared: get() returns the instance that was last
+    saved or loaded, without copying it (a copy costs more than the parse
+    the cache saves). A caller that mutates a session must therefore
+    either save() it or discard() it — a turn that fails half-way leaves
+    its edits on the shared object. As a backstop, a cached session with
+    field assignments not yet saved (dirty_fields) is reloaded rather
+    than served; in-place cart/context edits are only caught by discard().
+
+    ── Delta saves ───────────────────────────────────────────────────────────
+    A session this repository loaded or saved remembers what was persisted
+    (state_machine/session_events.py). Saving it again appends just the
+    turn's events — field assignments, cart lines, context marks, agent
+    switches — as one small row of session_events instead of re-serialising
+    the whole active_context graph. Every snapshot_every deltas the next
+    save writes a full snapshot and truncates the log; loading replays any
+    events newer than the snapshot. A session that is new here, or whose
+    row someone else wrote since, is saved as a full snapshot.
+
+    Connections are per thread (sqlite3 connections must not be shared).
+    """
+
+    def __init__(self, path: str = SESSION_DB_PATH, busy_timeout_ms: int = 5000,
+                 cache_size: int = DEFAULT_CACHE_SIZE, snapshot_every: int = DEFAULT_SNAPSHOT_EVERY):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size = cache_size
+        self.snapshot_every = snapshot_every
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._cache: "OrderedDict[str, Tuple[int, SessionState]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_stale = 0
+        self.snapshots = 0
+        self.deltas = 0
+        self.replayed = 0
+        self._migrate()
+
+    # ── Reads ──────────────────────────────────────────────────────────────────
+
+    def get(self, session_id: str) -> Optional[SessionState]:
+        db = self._conn()
+        cached = self._cache_get(session_id)
+        if cached is not None:
+            row = db.execute(_SELECT_VERSION, (session_id,)).fetchone()
+            if row is not None and row[0] == cached[0] and not cached[1]._dirty:
+                self._count(hit=True)
+                return cached[1]
+            self._count_stale()
+        return self._load(db, session_id)
+
+    def find_active(self, user_id: str, order_status: str = "DRAFT") -> Optional[SessionState]:
+        """The user's most recently saved session in order_status."""
+        db = self._conn()
+        row = db.execute(_SELECT_ACTIVE, (user_id, order_status)).fetchone()
+        if row is None:
+            return None
+        session_id, version = row
+        cached = self._cache_get(session_id)
+        if cached is not None:
+            if cached[0] == version and not cached[1]._dirty:
+                self._count(hit=True)
+                return cached[1]
+            self._count_stale()
+        return self._load(db, session_id)
+
+    def iter_sessions(self) -> Iterator[SessionState]:
+        db = self._conn()
+        rows = db.execute(
+            "SELECT session_id, state, snapshot_seq, last_seq FROM sessions ORDER BY updated_at"
+        ).fetchall()
+        for session_id, state, snapshot_seq, last_seq in rows:
+            yield self._decode(db, session_id, state, snapshot_seq, last_seq)
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def stats(self) -> dict:
+        with self._cache_lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                "size": len(self._cache),
+                "maxsize": self.cache_size,
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "stale": self.cache_stale,
+                "hit_rate": self.cache_hits / lookups if lookups else 0.0,
+                "snapshots": self.snapshots,
+                "deltas": self.deltas,
+                "replayed": self.replayed,
+            }
+
+    # ── Writes ─────────────────────────────────────────────────────────────────
+
+    def save(self, session: SessionState) -> None:
+        with self._conn() as db:
+            version = self._save_row(db, session)
+        mark_clean(session, (self.path, version))
+        self._cache_put(session.session_id, version, session)
+
+    def save_many(self, sessions: Iterable[SessionState]) -> int:
+        """One transaction; saved sessions are not added to the LRU (imports)."""
+        saved = 0
+        with self._conn() as db:
+            for session in sessions:
+                self._save_row(db, session)
+                self._cache_evict(session.session_id)
+                saved += 1
+        return saved
+
+    def discard(self, session_id: str) -> None:
+        """Forgets the cached session: the next get() reloads the persisted state.
+
+        Call it when a session was changed but will not be saved (a failed
+        turn), so those changes are not served to the next caller.
+        """
+        self._cache_evict(session_id)
+
+    def delete(self, session_id: str) -> bool:
+        with self._conn() as db:
+            key = db.execute(_SELECT_KEY, (session_id,)).fetchone()
+            if key is None:
+                return False
+            db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            db.execute(_TRUNCATE_EVENTS, (session_id,))
+            self._reindex(db, key, session_id)
+        self._cache_evict(session_id)
+        return True
+
+    def import_json(self, json_path: str = LEGACY_JSON_PATH) -> ImportReport:
+        """
+        Imports a legacy session_store.json ({session_id: state}) in one
+        transaction. Existing rows with the same session_id are overwritten;
+        entries that do not validate as SessionState are reported, not fatal.
+        """
+        report = ImportReport()
+        with open(json_path, "rb") as f:
+            content = f.read()
+        data = codec.loads(content) if content.strip() else {}
+
+        sessions = []
+        for session_id, state in data.items():
+            try:
+                sessions.append(SessionState(**{"session_id": session_id, **state}))
+            except (ValidationError, TypeError) as e:
+                logger.warning("Skipping session %s: %s", session_id, e)
+                report.skipped.append(session_id)
+        report.imported = self.save_many(sessions)
+        return report
+
+    def close(self) -> None:
+        with self._connections_lock:
+            for db in self._connections:
+                db.close()
+            self._connections.clear()
+        self._local = threading.local()
+        with self._cache_lock:
+            self._cache.clear()
+
+    def __enter__(self) -> "SessionRepository":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # ── Internals ──────────────────────────────────────────────────────────────
+
+    def _migrate(self) -> None:
+        with self._conn() as db:
+            current = db.execute("PRAGMA user_version").fetchone()[0]
+            if current >= SCHEMA_VERSION:
+                return
+            columns = {row[1] for row in db.execute("PRAGMA table_info(sessions)")}
+            if columns:
+                for column, default in (("version", 1), ("snapshot_seq", 0), ("last_seq", 0)):
+                    if column not in columns:
+                        db.execute(f"ALTER TABLE sessions ADD COLUMN {column} INTEGER NOT NULL DEFAULT {default}")
+            for statement in _SCHEMA:
+                db.execute(statement)
+            # Backfill the secondary index for rows written before it existed;
+            # ascending updated_at so the newest session per key wins
+            db.execute(
+                "INSERT OR REPLACE INTO user_sessions (user_id, order_status, session_id)"
+                " SELECT user_id, order_status, session_id FROM sessions ORDER BY updated_at"
+            )
+            db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _save_row(self, db: sqlite3.Connection, session: SessionState) -> int:
+        """Delta or snapshot + secondary-index maintenance, inside the caller's transaction."""
+        previous = db.execute(_SELECT_ROW, (session.session_id,)).fetchone()
+        now = time.time()
+        if previous is None or not self._append(db, session, previous, now):
+            db.execute(_UPSERT, (session.session_id, session.user_id, session.order_status,
+                                 session.model_dump_json(), now))
+            db.execute(_TRUNCATE_EVENTS, (session.session_id,))
+            self.snapshots += 1
+        db.execute(_INDEX_SESSION, (session.user_id, session.order_status, session.session_id))
+        if previous is not None and tuple(previous[:2]) != (session.user_id, session.order_status):
+            self._reindex(db, previous[:2], session.session_id)
+        return db.execute(_SELECT_VERSION, (session.session_id,)).fetchone()[0]
+
+    def _append(self, db: sqlite3.Connection, session: SessionState, previous: tuple, now: float) -> bool:
+        """Appends the session's pending events; False when a full snapshot is due instead."""
+        _, _, version, deltas_since_snapshot = previous
+        if deltas_since_snapshot >= self.snapshot_every:
+            return False
+        events = pending_events(session, (self.path, version))
+        if events is None:
+            return False
+        # version = ? makes this a compare-and-set against a concurrent writer
+        updated = db.execute(_APPEND, (session.user_id, session.order_status, now, 1 if events else 0,
+                                       session.session_id, version))
+        if updated.rowcount == 0:
+            return False
+        if events:
+            seq = db.execute("SELECT last_seq FROM sessions WHERE session_id = ?",
+                             (session.session_id,)).fetchone()[0]
+            db.execute(_INSERT_EVENTS, (session.session_id, seq, session.turn_id,
+                                        codec.dumps(events).decode("utf-8")))
+        self.deltas += 1
+        return True
+
+    @staticmethod
+    def _reindex(db: sqlite3.Connection, key: tuple, session_id: str) -> None:
+        """session_id left key (user_id, order_status): hand the slot to the next newest."""
+        user_id, order_status = key
+        if db.execute(_UNINDEX_SESSION, (user_id, order_status, session_id)).rowcount:
+            db.execute(_REINDEX_NEWEST, (user_id, order_status))
+
+    def _load(self, db: sqlite3.Connection, session_id: str) -> Optional[SessionState]:
+        self._count(hit=False)
+        # One read transaction, so a concurrent compaction cannot remove
+        # events between reading the snapshot and reading the log
+        with self._read_transaction(db):
+            row = db.execute(_SELECT_STATE, (session_id,)).fetchone()
+            if row is None:
+                self._cache_evict(session_id)
+                return None
+            state, version, snapshot_seq, last_seq = row
+            session = self._decode(db, session_id, state, snapshot_seq, last_seq)
+        mark_clean(session, (self.path, version))
+        self._cache_put(session_id, version, session)
+        return session
+
+    def _decode(self, db: sqlite3.Connection, session_id: str, state: str,
+                snapshot_seq: int, last_seq: int) -> SessionState:
+        if last_seq <= snapshot_seq:
+            return SessionState.model_validate_json(state)
+        data = codec.loads(state)
+        for (events,) in db.execute(_SELECT_EVENTS, (session_id, snapshot_seq)):
+            apply_events(data, codec.loads(events))
+        self.replayed += 1
+        return SessionState.model_validate(data)
+
+    @staticmethod
+    @contextmanager
+    def _read_transaction(db: sqlite3.Connection):
+        if db.in_transaction:
+            yield
+            return
+        db.execute("BEGIN")
+        try:
+            yield
+        finally:
+            db.commit()
+
+    def _count(self, hit: bool) -> None:
+        with self._cache_lock:
+            if hit:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+
+    def _count_stale(self) -> None:
+        # Saved by another repository (thread or process) since we cached it
+        with self._cache_lock:
+            self.cache_stale += 1
+
+    def _cache_get(self, session_id: str) -> Optional[Tuple[int, SessionState]]:
+        with self._cache_lock:
+            entry = self._cache.get(session_id)
+            if entry is not None:
+                self._cache.move_to_end(session_id)
+            return entry
+
+    def _cache_put(self, session_id: str, version: int, session: SessionState) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[session_id] = (version, session)
+            self._cache.move_to_end(session_id)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _cache_evict(self, session_id: str) -> None:
+        with self._cache_lock:
+            self._cache.pop(session_id, None)
+
+    def _conn(self) -> sqlite3.Connection:
+        db = getattr(self._local, "db", None)
+        if db is None:
+            # Each connection is only used by its own thread; the flag just
+            # lets close() shut them all down from whichever thread calls it.
+            db = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000,
+                                 check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            # WAL + NORMAL: a commit survives a process crash; only an OS
+            # crash can lose the last transactions
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+            self._local.db = db
+            with self._connections_lock:
+                self._connections.append(db)
+        return db
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """python -m state_machine.session_repository [JSON_PATH] [DB_PATH]"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Import session_store.json into the SQLite session store.")
+    parser.add_argument("json_path", nargs="?", default=LEGACY_JSON_PATH)
+    parser.add_argument("db_path", nargs="?", default=SESSION_DB_PATH)
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.json_path):
+        print(f"No JSON session store at {args.json_path}")
+        return 1
+    with SessionRepository(args.db_path) as repository:
+        report = repository.import_json(args.json_path)
+        total = repository.count()
+    print(f"Imported {report.imported} session(s) into {args.db_path} ({total} total)")
+    if report.skipped:
+        print(f"Skipped {len(report.skipped)} invalid session(s): {', '.join(report.skipped)}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
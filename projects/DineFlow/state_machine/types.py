@@ -110,8 +110,8 @@
 
 # DineFlow/state_machine/types.py
 
-from pydantic import BaseModel, Field
-from typing import Dict, List, Optional
+from pydantic import BaseModel, Field, PrivateAttr
+from typing import Any, Dict, List, Optional, Set
 from enum import Enum
 
 
@@ -185,6 +185,26 @@ class SessionState(BaseModel):
     # Read by SemanticResolver to resolve "all", "that", "same", bare numbers.
     active_context: Dict[str, ContextItem] = Field(default_factory=dict)
 
+    # 🆕 CHANGE TRACKING (see state_machine/session_events.py)
+    # Fields assigned since the last load/save, and what was persisted then.
+    _dirty: Set[str] = PrivateAttr(default_factory=set)
+    _baseline: Optional[Any] = PrivateAttr(default=None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        super().__setattr__(name, value)
+        if name in SessionState.model_fields:
+            self._dirty.add(name)
+
+    @property
+    def dirty_fields(self) -> Set[str]:
+        return set(self._dirty)
+
+    def __eq__(self, other: Any) -> bool:
+        # Tracking is bookkeeping, not state: equal fields mean equal sessions
+        if not isinstance(other, SessionState):
+            return NotImplemented
+        return self.__dict__ == other.__dict__
+
 
 class MenuItemSnapshot(BaseModel):
     sku: str
@@ -0,0 +1,306 @@
+# DineFlow/tests/unit/test_async_loop.py
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import openai
+import pytest
+from agents.menu_expert import MenuExpertAgent
+from agents.order_taker import OrderTakerAgent
+from agents.router import IntentRouter
+from llm.transport import DeadlineExceeded, LLMTransport, TransportConfig
+from orchestration.golden_loop import async_golden_loop, golden_loop
+from orchestration.semantic_resolver import ReferenceIntent, aresolve
+from state_machine.types import ContextItem, ContextScope, KitchenSnapshot, SessionState
+from validation.schemas import ActionRequest, ActionType, IntentType
+
+
+# =============================================================================
+# SHARED FIXTURES
+# =============================================================================
+
+_REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+PATCH_AROUTE   = "orchestration.golden_loop.router.aroute"
+PATCH_ROUTE    = "orchestration.golden_loop.router.route"
+PATCH_REGISTRY = "orchestration.golden_loop.AGENT_REGISTRY"
+PATCH_SCOPE    = "orchestration.golden_loop.decide_context_scope"
+
+MOCK_SCOPE_POLICY = {
+    "context_scope": ContextScope.FULL_CATALOG,
+    "system_hint": "Test: Full catalog authorized.",
+    "classifier_reasoning": "mocked",
+    "classifier_confidence": 1.0,
+    "resolved_entity": None,
+}
+
+
+def _ok(content='{"ok": true}'):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(prompt_tokens=3, completion_tokens=2),
+    )
+
+
+class AsyncFakeClient:
+    """Awaitable chat.completions.create replaying a script; tracks concurrency."""
+
+    def __init__(self, *script, delay=0.0):
+        self.script = list(script)
+        self.delay = delay
+        self.calls = []
+        self.in_flight = 0
+        self.peak = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    async def _create(self, **kwargs):
+        self.calls.append(kwargs)
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            outcome = self.script.pop(0) if len(self.script) > 1 else self.script[0]
+            if isinstance(outcome, BaseException):
+                raise outcome
+            return outcome
+        finally:
+            self.in_flight -= 1
+
+
+async def _no_sleep(_seconds):
+    return None
+
+
+def _transport(client, **overrides):
+    config = TransportConfig(**{"base_delay": 0.001, "max_delay": 0.002, **overrides})
+    return LLMTransport(config, async_client=client, async_sleep=_no_sleep)
+
+
+def _session(session_id, agent="OrderTaker"):
+    return SessionState(session_id=session_id, user_id="u", active_agent=agent,
+                        tool_budget_remaining=5, cart={})
+
+
+# =============================================================================
+# TRANSPORT — acomplete
+# =============================================================================
+
+class TestAsyncTransport:
+    def test_returns_content_and_records_metrics(self):
+        client = AsyncFakeClient(_ok('{"a": 1}'))
+        transport = _transport(client)
+        assert asyncio.run(transport.acomplete("sys", "hi")) == '{"a": 1}'
+        assert client.calls[0]["response_format"] == {"type": "json_object"}
+        assert transport.stats()["calls"] == 1
+
+    def test_retryable_errors_share_the_sync_retry_policy(self):
+        error = openai.APIStatusError("busy", response=httpx.Response(503, request=_REQUEST), body=None)
+        client = AsyncFakeClient(error, _ok())
+        transport = _transport(client)
+        asyncio.run(transport.acomplete("s", "u"))
+        assert len(client.calls) == 2
+        assert transport.stats()["retries"] == 1
+
+    def test_concurrency_capped_by_semaphore(self):
+        client = AsyncFakeClient(_ok(), delay=0.02)
+        transport = _transport(client, max_concurrency=3)
+
+        async def burst():
+            await asyncio.gather(*(transport.acomplete("s", "u") for _ in range(10)))
+
+        asyncio.run(burst())
+        assert client.peak == 3
+
+    def test_waiting_for_a_slot_counts_against_the_deadline(self):
+        client = AsyncFakeClient(_ok(), delay=0.2)
+        transport = _transport(client, max_concurrency=1)
+
+        async def contend():
+            return await asyncio.gather(
+                transport.acomplete("s", "u"),
+                transport.acomplete("s", "u", deadline=0.05),
+                return_exceptions=True,
+            )
+
+        first, second = asyncio.run(contend())
+        assert first == '{"ok": true}'
+        assert isinstance(second, DeadlineExceeded)
+
+
+# =============================================================================
+# ROUTER / RESOLVER / AGENTS
+# =============================================================================
+
+class TestAsyncComponents:
+    def test_aroute_deterministic_tier_never_calls_llm(self):
+        with patch("agents.router.async_call_llm", new=AsyncMock()) as llm:
+            action = asyncio.run(IntentRouter().aroute("hello", "OrderTaker"))
+        assert action.target_agent == "Greeter"
+        llm.assert_not_awaited()
+
+    def test_aroute_llm_tier_matches_route(self):
+        raw = '{"action_type": "TRANSFER", "target_agent": "MenuExpert", "intent": "INQUIRY", "confidence": 0.8}'
+        router = IntentRouter()
+        with patch.object(IntentRouter, "_load_prompt", return_value="prompt"), \
+             patch("agents.router.async_call_llm", new=AsyncMock(return_value=raw)), \
+             patch("agents.router.call_llm", return_value=raw):
+            async_action = asyncio.run(router.aroute("is the soup spicy", "OrderTaker"))
+            sync_action = router.route("is the soup spicy", "OrderTaker")
+        assert async_action == sync_action
+        assert async_action.meta["routing"] == "llm_fallback"
+
+    def test_aroute_llm_failure_falls_back(self):
+        with patch.object(IntentRouter, "_load_prompt", return_value="prompt"), \
+             patch("agents.router.async_call_llm", new=AsyncMock(side_effect=TimeoutError())):
+            action = asyncio.run(IntentRouter().aroute("is the soup spicy", "OrderTaker"))
+        assert action.meta["routing"] == "fallback_error"
+
+    def test_aresolve_awaits_llm_fallback(self):
+        session = _session("s_res")
+        session.turn_id = 1
+        session.active_context["PZ-MARG"] = ContextItem(
+            sku="PZ-MARG", name="Margherita Pizza", mentioned=True, last_mentioned_turn=100,
+        )
+        raw = '{"intent": "ADD_ALL", "quantity": null, "confidence": 0.9}'
+        with patch("llm.client.async_call_llm", new=AsyncMock(return_value=raw)) as llm:
+            resolved = asyncio.run(aresolve("sab", session))
+        llm.assert_awaited_once()
+        assert resolved.intent == ReferenceIntent.ADD_ALL
+        assert resolved.skus == ["PZ-MARG"]
+
+    def test_order_taker_arun_enforces_contract(self):
+        agent = OrderTakerAgent([], MagicMock())
+        raw = '{"action_type": "TRANSFER", "target_agent": "Greeter", "confidence": 0.9}'
+        with patch.object(OrderTakerAgent, "_build_prompt", return_value="prompt"), \
+             patch("agents.order_taker.async_call_llm", new=AsyncMock(return_value=raw)):
+            action = asyncio.run(agent.arun("hi", _session("s_ot"), MagicMock()))
+        assert action.action_type == ActionType.NO_OP
+
+    @pytest.mark.parametrize("agent_cls, prep, prep_result, module", [
+        (OrderTakerAgent, "_build_prompt", "prompt", "agents.order_taker"),
+        (MenuExpertAgent, "_prepare", ("prompt", []), "agents.menu_expert"),
+    ])
+    def test_blocking_prompt_prep_leaves_the_loop_free(self, agent_cls, prep, prep_result, module):
+        delay = 0.2
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def blocking_prep(self, user_input, session, memory):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(delay)           # hybrid_search / embedding / Chroma stand-in
+            with lock:
+                active[0] -= 1
+            return prep_result
+
+        async def serve(agent):
+            return await asyncio.gather(*(agent.arun("menu?", _session(f"s{i}"), MagicMock()) for i in range(2)))
+
+        agent = agent_cls([], MagicMock())
+        raw = '{"action_type": "NO_OP", "message": "ok", "confidence": 0.9}'
+        with patch.object(agent_cls, prep, blocking_prep), \
+             patch(f"{module}.async_call_llm", new=AsyncMock(return_value=raw)):
+            start = time.perf_counter()
+            asyncio.run(serve(agent))
+            elapsed = time.perf_counter() - start
+
+        assert peak[0] == 2
+        assert elapsed < 2 * delay
+
+
+# =============================================================================
+# async_golden_loop
+# =============================================================================
+
+def _routing(agent="MenuExpert"):
+    return ActionRequest(action_type=ActionType.TRANSFER, target_agent=agent,
+                         intent=IntentType.INQUIRY, confidence=0.9)
+
+
+class SlowAsyncAgent:
+    """Agent whose arun spends `delay` seconds awaiting a (fake) LLM."""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    async def arun(self, user_input, session, memory):
+        await asyncio.sleep(self.delay)
+        return ActionRequest(action_type=ActionType.NO_OP, message=f"echo {user_input}")
+
+    def run(self, user_input, session, memory):
+        time.sleep(self.delay)
+        return ActionRequest(action_type=ActionType.NO_OP, message=f"echo {user_input}")
+
+
+class TestAsyncGoldenLoop:
+    def test_matches_sync_loop(self):
+        agent = SlowAsyncAgent(0)
+        kitchen = KitchenSnapshot(load_percentage=10)
+        with patch(PATCH_ROUTE, return_value=_routing()), \
+             patch(PATCH_AROUTE, new=AsyncMock(return_value=_routing())), \
+             patch(PATCH_REGISTRY, {"MenuExpert": agent}), \
+             patch(PATCH_SCOPE, return_value=MOCK_SCOPE_POLICY):
+            sync_session, async_session = _session("s1"), _session("s2")
+            sync_resp = golden_loop(session=sync_session, user_input="what is good",
+                                    kitchen=kitchen, memory=MagicMock())
+            async_resp = asyncio.run(async_golden_loop(session=async_session, user_input="what is good",
+                                                       kitchen=kitchen, memory=MagicMock()))
+        assert sync_resp == async_resp == "echo what is good"
+        assert sync_session.active_agent == async_session.active_agent == "MenuExpert"
+        assert sync_session.turn_id == async_session.turn_id == 1
+
+    def test_sessions_are_multiplexed_on_one_loop(self):
+        delay, sessions = 0.05, 20
+        kitchen = KitchenSnapshot(load_percentage=10)
+
+        async def slow_route(user_input, active_agent):
+            await asyncio.sleep(delay)
+            return _routing()
+
+        async def serve():
+            return await asyncio.gather(*(
+                async_golden_loop(session=_session(f"s{i}"), user_input=f"q{i}",
+                                  kitchen=kitchen, memory=MagicMock())
+                for i in range(sessions)
+            ))
+
+        with patch(PATCH_AROUTE, new=slow_route), \
+             patch(PATCH_REGISTRY, {"MenuExpert": SlowAsyncAgent(delay)}), \
+             patch(PATCH_SCOPE, return_value=MOCK_SCOPE_POLICY):
+            start = time.perf_counter()
+            responses = asyncio.run(serve())
+            elapsed = time.perf_counter() - start
+
+        assert responses == [f"echo q{i}" for i in range(sessions)]
+        # Serially this is sessions * 2 * delay = 2s
+        assert elapsed < sessions * 2 * delay / 4
+
+    def test_agent_without_arun_runs_off_the_loop(self):
+        mock_agent = MagicMock()
+        mock_agent.run.return_value = ActionRequest(action_type=ActionType.NO_OP, message="sync agent")
+        with patch(PATCH_AROUTE, new=AsyncMock(return_value=_routing())), \
+             patch(PATCH_REGISTRY, {"MenuExpert": mock_agent}), \
+             patch(PATCH_SCOPE, return_value=MOCK_SCOPE_POLICY):
+            response = asyncio.run(async_golden_loop(session=_session("s_mock"), user_input="menu?",
+                                                     kitchen=KitchenSnapshot(load_percentage=10),
+                                                     memory=MagicMock()))
+        assert response == "sync agent"
+        mock_agent.run.assert_called_once()
+
+    def test_age_confirmation_llm_is_awaited(self):
+        session = _session("s_age")
+        session.pending_deferred_sku = "BV-BEER"
+        with patch("llm.client.async_call_llm", new=AsyncMock(return_value='{"confirmed": true}')) as llm, \
+             patch("orchestration.golden_loop.evaluate_action", return_value=MagicMock(approved=False)), \
+             patch("orchestration.golden_loop.generate_response", return_value="Age noted."):
+            response = asyncio.run(async_golden_loop(session=session, user_input="sí, tengo veinte",
+                                                     kitchen=KitchenSnapshot(load_percentage=10),
+                                                     memory=MagicMock()))
+        llm.assert_awaited_once()
+        assert session.age_verified is True
+        assert response == "Age noted."
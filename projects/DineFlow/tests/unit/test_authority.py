@@ -705,4 +705,12 @@ class TestDecideContextScope:
         policy = decide_context_scope(session, "", simple_menu)
 
         # Empty input → AMBIGUOUS → FULL_CATALOG
-        assert policy["context_scope"] == ContextScope.FULL_CATALOG
\ No newline at end of file
+        assert policy["context_scope"] == ContextScope.FULL_CATALOG
+    def test_without_a_menu_uses_the_last_classifier(self, simple_menu):
+        """Called without all_menu_items or menu_id, the last-used classifier still classifies."""
+        session = self._make_session()
+        decide_context_scope(session, "Tell me about the Pepperoni Pizza", simple_menu)
+        policy = decide_context_scope(session, "Tell me about the Pepperoni Pizza")
+
+        assert policy["context_scope"] == ContextScope.FILTERED_SEARCH
+        assert policy["classifier_reasoning"]
@@ -0,0 +1,247 @@
+# DineFlow/tests/unit/test_bm25.py
+import pytest
+from state_machine.types import MenuItemSnapshot
+from tools.registry import get_menu_items
+from tools.search.bm25 import MenuBM25, tokenize_item, tokenize_query
+
+
+# =============================================================================
+# SHARED FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def menu():
+    return get_menu_items()
+
+
+@pytest.fixture
+def engine(menu):
+    return MenuBM25(menu)
+
+
+QUERIES = [
+    "anything spicy",
+    "the Pepperoni Pizza is our only spicy option",
+    "Fancy Truffle Pizza, Pepperoni Pizza or Margherita Pizza?",
+    "cold beer",
+    "pizza pizza",
+    "nothing matches this",
+    "",
+]
+
+
+# =============================================================================
+# PARITY WITH rank_bm25
+# =============================================================================
+
+class TestRankBM25Parity:
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_scores_match_bm25okapi(self, menu, engine, query):
+        """
+        The native engine must reproduce BM25Okapi scores exactly — the
+        relative thresholds in golden_loop were tuned against them.
+        """
+        rank_bm25 = pytest.importorskip("rank_bm25")
+        reference = rank_bm25.BM25Okapi([tokenize_item(i) for i in menu])
+        expected = reference.get_scores(tokenize_query(query))
+
+        scores = {item.sku: score for item, score in engine.score_all(query)}
+        for item, value in zip(menu, expected):
+            assert scores[item.sku] == pytest.approx(value, abs=1e-12)
+
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_score_all_order_matches_stable_sort(self, menu, engine, query):
+        """score_all must order items exactly like sorted(zip(...), reverse=True)."""
+        rank_bm25 = pytest.importorskip("rank_bm25")
+        reference = rank_bm25.BM25Okapi([tokenize_item(i) for i in menu])
+        expected = sorted(
+            zip(menu, reference.get_scores(tokenize_query(query))),
+            key=lambda x: x[1], reverse=True
+        )
+        assert [i.sku for i, _ in engine.score_all(query)] == [i.sku for i, _ in expected]
+
+
+# =============================================================================
+# SEARCH API
+# =============================================================================
+
+class TestSearch:
+    def test_search_returns_only_positive_matches(self, engine):
+        skus = engine.search("spicy")
+        assert skus[0] == "PZ-PEP"
+        assert "BEER-002" not in skus
+
+    def test_search_with_no_matching_tokens_is_empty(self, engine):
+        assert engine.search("xyzzy") == []
+
+    def test_search_n_caps_results(self, engine):
+        assert len(engine.search("pizza", n=2)) == 2
+        assert engine.search("pizza", n=2) == engine.search("pizza")[:2]
+
+    def test_top_k_is_prefix_of_full_ranking(self, engine):
+        full = engine.score_all("classic mild beer")
+        top = engine.top_k("classic mild beer", 3)
+        assert [i.sku for i, _ in top] == [i.sku for i, _ in full[:3]]
+
+    def test_top_k_zero_is_empty(self, engine):
+        assert engine.top_k("pizza", 0) == []
+
+    @pytest.mark.parametrize("mode", ["index", "sparse"])
+    def test_filters_pushed_into_selection(self, menu, mode):
+        engine = MenuBM25(menu, mode=mode)
+        full = engine.search("pizza beer")
+        soft = engine.search("pizza beer", filters={"is_alcohol": False})
+        assert soft == [sku for sku in full if not sku.startswith("BEER")]
+        # the two best raw matches are excluded — k allowed items still come back
+        top = engine.top_k("beer pizza", 2, filters={"is_alcohol": False})
+        assert [i.sku for i, _ in top] == soft[:2]
+
+    def test_unknown_filter_rejected(self, engine):
+        with pytest.raises(ValueError):
+            engine.search("pizza", filters={"instock": True})
+
+
+class TestScoreAll:
+    def test_score_all_includes_every_item(self, menu, engine):
+        scored = engine.score_all("truffle")
+        assert len(scored) == len(menu)
+        assert scored[0][0].sku == "PZ-FANCY"
+        assert all(score == 0.0 for _, score in scored[1:])
+
+    def test_empty_corpus(self):
+        engine = MenuBM25([])
+        assert engine.score_all("pizza") == []
+        assert engine.search("pizza") == []
+
+    def test_duplicate_names_keep_insertion_order_on_ties(self):
+        twins = [
+            MenuItemSnapshot(sku="A", name="House Pizza", price=1.0, in_stock=True),
+            MenuItemSnapshot(sku="B", name="House Pizza", price=1.0, in_stock=True),
+        ]
+        engine = MenuBM25(twins)
+        assert [i.sku for i, _ in engine.score_all("house pizza")] == ["A", "B"]
+
+
+# =============================================================================
+# SPARSE (CSR) MODE & BATCH SCORING
+# =============================================================================
+
+class TestSparseMode:
+    @pytest.fixture
+    def sparse_engine(self, menu):
+        pytest.importorskip("scipy")
+        return MenuBM25(menu, mode="sparse")
+
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_sparse_scores_match_index(self, engine, sparse_engine, query):
+        index_scores = {i.sku: s for i, s in engine.score_all(query)}
+        sparse_scores = {i.sku: s for i, s in sparse_engine.score_all(query)}
+        assert sparse_scores == pytest.approx(index_scores, abs=1e-12)
+
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_sparse_search_matches_index(self, engine, sparse_engine, query):
+        assert sparse_engine.search(query) == engine.search(query)
+
+    def test_score_batch_rows_match_single_queries(self, engine, menu):
+        pytest.importorskip("scipy")
+        batch = engine.score_batch(QUERIES)
+        assert batch.shape == (len(QUERIES), len(menu))
+        for row, query in zip(batch, QUERIES):
+            single = {i.sku: s for i, s in engine.score_all(query)}
+            assert dict(zip([i.sku for i in menu], row)) == pytest.approx(single, abs=1e-12)
+
+    def test_search_batch_matches_search(self, engine):
+        pytest.importorskip("scipy")
+        assert engine.search_batch(QUERIES) == [engine.search(q) for q in QUERIES]
+        assert engine.search_batch(QUERIES, n=2) == [engine.search(q, n=2) for q in QUERIES]
+
+    def test_zero_results_requested(self, engine, sparse_engine):
+        query = QUERIES[0]
+        assert engine.search(query, n=0) == []
+        assert sparse_engine.search(query, n=0) == []
+        assert sparse_engine.search_batch(QUERIES, n=0) == [[] for _ in QUERIES]
+
+    def test_score_batch_empty_inputs(self, engine):
+        assert engine.score_batch([]).shape == (0, 5)
+        assert MenuBM25([]).score_batch(["pizza"]).shape == (1, 0)
+
+    def test_unknown_mode_rejected(self, menu):
+        with pytest.raises(ValueError):
+            MenuBM25(menu, mode="dense")
+
+
+# =============================================================================
+# INCREMENTAL UPDATES
+# =============================================================================
+
+def _scores(engine, query):
+    return {item.sku: score for item, score in engine.score_all(query)}
+
+
+class TestIncrementalUpdates:
+    @pytest.fixture
+    def extra(self):
+        return MenuItemSnapshot(
+            sku="WINGS-01", name="Spicy Chicken Wings", price=9.5,
+            in_stock=True, is_alcohol=False, complexity_score=2,
+            description="Crispy wings tossed in a hot buffalo sauce.",
+            tags=["spicy", "hot", "chicken"],
+        )
+
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_add_items_matches_rebuild(self, menu, extra, query):
+        engine = MenuBM25(menu[:3])
+        engine.score_all(query)  # warm the impact cache before mutating
+        engine.add_items(menu[3:] + [extra])
+        rebuilt = MenuBM25(menu + [extra])
+        assert _scores(engine, query) == pytest.approx(_scores(rebuilt, query), abs=1e-12)
+        assert engine.search(query) == rebuilt.search(query)
+
+    @pytest.mark.parametrize("query", QUERIES)
+    def test_remove_skus_matches_rebuild(self, menu, engine, query):
+        engine.score_all(query)
+        assert engine.remove_skus(["PZ-PEP", "NOT-A-SKU"]) == 1
+        rebuilt = MenuBM25([i for i in menu if i.sku != "PZ-PEP"])
+        assert _scores(engine, query) == pytest.approx(_scores(rebuilt, query), abs=1e-12)
+        assert [i.sku for i, _ in engine.score_all(query)] == \
+               [i.sku for i, _ in rebuilt.score_all(query)]
+
+    def test_update_item_keeps_slot_and_matches_rebuild(self, menu, engine):
+        changed = menu[1].model_copy(update={"description": "Mild pepperoni, no heat.", "tags": ["mild"]})
+        engine.update_item(changed)
+        rebuilt = MenuBM25([changed if i.sku == changed.sku else i for i in menu])
+
+        assert [i.sku for i in engine.items] == [i.sku for i in menu]
+        assert engine.items[1] is changed
+        assert _scores(engine, "spicy") == pytest.approx(_scores(rebuilt, "spicy"), abs=1e-12)
+        assert "PZ-PEP" not in engine.search("spicy")
+
+    def test_mutations_drop_cached_impacts_of_touched_terms(self, engine, extra):
+        engine.add_items([extra])
+        engine.score_all("wings buffalo pizza")
+        assert {"wings", "buffalo", "pizza"} <= set(engine._impacts)
+        engine.remove_skus(["WINGS-01"])
+        assert not {"wings", "buffalo"} & set(engine._impacts)
+        engine.score_all("pepperoni")
+        engine.update_item(engine.items[1].model_copy(update={"tags": ["mild"]}))
+        assert "pepperoni" not in engine._impacts
+
+    def test_update_unknown_sku_appends(self, engine, extra):
+        engine.update_item(extra)
+        assert engine.corpus_size == 6
+        assert engine.search("wings") == ["WINGS-01"]
+
+    def test_add_existing_sku_rejected(self, menu, engine):
+        with pytest.raises(ValueError):
+            engine.add_items([menu[0]])
+        assert engine.corpus_size == 5
+
+    def test_sparse_matrix_refreshes_after_update(self, menu, extra):
+        pytest.importorskip("scipy")
+        engine = MenuBM25(menu, mode="sparse")
+        assert engine.search("wings") == []
+        engine.add_items([extra])
+        assert engine.search("wings") == ["WINGS-01"]
+        engine.remove_skus(["WINGS-01"])
+        assert engine.score_batch(["wings"]).shape == (1, 5)
+        assert engine.search("wings") == []
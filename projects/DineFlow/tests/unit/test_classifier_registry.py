@@ -0,0 +1,147 @@
+# DineFlow/tests/unit/test_classifier_registry.py
+import threading
+from unittest.mock import patch
+
+import pytest
+from state_machine.classifier_registry import ClassifierRegistry
+from state_machine.query_classifier import QueryClassifier
+from state_machine.types import MenuItemSnapshot
+from tools.registry import MenuCatalog, catalog_version
+
+
+# =============================================================================
+# SHARED FIXTURES
+# =============================================================================
+
+def _item(sku, name):
+    return MenuItemSnapshot(sku=sku, name=name, price=5.0, in_stock=True,
+                            is_alcohol=False, complexity_score=1)
+
+
+@pytest.fixture
+def old_menu():
+    return [_item("PZ-PEP", "Pepperoni Pizza"), _item("BEER-001", "Craft Beer")]
+
+
+@pytest.fixture
+def new_menu(old_menu):
+    return old_menu + [_item("PZ-HAW", "Hawaiian Pizza")]
+
+
+def _entity(classifier, text):
+    return classifier.classify(text).resolved_entity
+
+
+# =============================================================================
+# VERSIONING
+# =============================================================================
+
+class TestVersioning:
+    def test_equal_menus_share_a_version(self, old_menu):
+        assert catalog_version(old_menu) == catalog_version(list(old_menu))
+        assert MenuCatalog(old_menu).version == catalog_version(old_menu)
+
+    def test_any_edit_changes_the_version(self, old_menu):
+        edited = [old_menu[0].model_copy(update={"name": "Spicy Pepperoni"}), old_menu[1]]
+        assert catalog_version(edited) != catalog_version(old_menu)
+
+    def test_same_version_is_built_once(self, old_menu):
+        registry = ClassifierRegistry()
+        first = registry.get(old_menu)
+        assert registry.get(list(old_menu)) is first
+        assert registry.stats()["builds"] == 1
+
+    def test_unchanged_list_is_not_rehashed_or_rewrapped(self, old_menu):
+        registry = ClassifierRegistry()
+        first = registry.get(old_menu, "default")
+        with patch("state_machine.classifier_registry.catalog_version") as hashed, \
+                patch("state_machine.classifier_registry.MenuCatalog.__init__") as wrapped:
+            assert registry.get(list(old_menu), "default") is first
+        assert not hashed.called and not wrapped.called
+        assert registry.stats()["hits"] == 1
+
+    def test_edited_list_is_rebuilt(self, old_menu, new_menu):
+        registry = ClassifierRegistry()
+        registry.get(old_menu, "default")
+        old_menu.append(new_menu[-1])
+        assert registry.get(old_menu) is not registry.current("default")
+        assert registry.stats()["builds"] == 2
+
+    def test_menus_are_isolated(self, old_menu, new_menu):
+        registry = ClassifierRegistry()
+        a = registry.get(old_menu, "a")
+        b = registry.get(new_menu, "b")
+        assert _entity(a, "hawaiian pizza please") is None
+        assert _entity(b, "hawaiian pizza please") == "PZ-HAW"
+
+    def test_lru_bounds_cached_versions(self, old_menu):
+        registry = ClassifierRegistry(maxsize=2)
+        menus = [[_item(f"S{i}", f"Item {i}")] for i in range(3)]
+        for menu in menus:
+            registry.get(menu)
+        registry.get(menus[0])
+        assert registry.stats()["versions"] == 2
+        assert registry.stats()["builds"] == 4
+
+
+# =============================================================================
+# BACKGROUND REBUILD
+# =============================================================================
+
+class TestBackgroundRebuild:
+    def test_changed_menu_served_stale_then_swapped(self, old_menu, new_menu):
+        registry = ClassifierRegistry()
+        old = registry.get(old_menu, "default")
+
+        release = threading.Event()
+        real_init = QueryClassifier.__init__
+
+        def slow_init(self, items):
+            release.wait(2)
+            real_init(self, items)
+
+        with patch.object(QueryClassifier, "__init__", slow_init):
+            assert registry.get(new_menu, "default") is old      # not blocked
+            assert registry.stats()["stale_serves"] == 1
+            release.set()
+            assert registry.wait_idle(timeout=2)
+
+        fresh = registry.current("default")
+        assert fresh is not old
+        assert _entity(fresh, "hawaiian pizza") == "PZ-HAW"
+        assert registry.get(new_menu, "default") is fresh
+
+    def test_first_build_for_a_menu_is_synchronous(self, old_menu):
+        registry = ClassifierRegistry()
+        classifier = registry.get(old_menu, "default")
+        assert registry.current("default") is classifier
+        assert _entity(classifier, "craft beer") == "BEER-001"
+
+    def test_late_build_does_not_roll_back_a_newer_menu(self, old_menu, new_menu):
+        registry = ClassifierRegistry()
+        registry.get(old_menu, "default")
+        newest = new_menu + [_item("X-1", "Lemonade")]
+        registry.get(new_menu, "default")
+        registry.get(newest, "default")
+        assert registry.wait_idle(timeout=2)
+        assert _entity(registry.current("default"), "lemonade") == "X-1"
+
+    def test_clear_drops_pending_builds_and_their_results(self, old_menu, new_menu):
+        registry = ClassifierRegistry()
+        registry.get(old_menu, "default")
+        release = threading.Event()
+        real_init = QueryClassifier.__init__
+
+        def slow_init(self, items):
+            release.wait(2)
+            real_init(self, items)
+
+        with patch.object(QueryClassifier, "__init__", slow_init):
+            registry.get(new_menu, "default")
+            registry.clear()
+            assert registry.stats()["building"] == 0
+            release.set()
+            registry._pool.shutdown(wait=True)
+
+        assert registry.stats()["versions"] == 0
+        assert registry.current("default") is None
@@ -0,0 +1,98 @@
+# DineFlow/tests/unit/test_codec.py
+import json
+
+import pytest
+from llm.response_parser import parse_action
+from validation.codec import CODECS, Codec, JsonCodec, get_codec
+from validation.schemas import ActionType
+
+
+# =============================================================================
+# SHARED FIXTURES
+# =============================================================================
+
+SAMPLE = {
+    "cart": {"PZ-PEP": 2, "BV-COKE": 1},
+    "events": [["agent", None, "MenuExpert"], ["set", "turn_id", 7]],
+    "name": "Jalapeño Poppers",
+    "confidence": 0.95,
+    "verified": False,
+}
+
+
+@pytest.fixture(params=sorted(CODECS))
+def codec(request):
+    try:
+        return get_codec(request.param)
+    except ImportError:
+        pytest.skip(f"{request.param} not installed")
+
+
+# =============================================================================
+# CODECS
+# =============================================================================
+
+class TestCodecs:
+    def test_round_trip(self, codec):
+        encoded = codec.dumps(SAMPLE)
+        assert isinstance(encoded, bytes)
+        assert codec.loads(encoded) == SAMPLE
+        assert codec.loads(encoded.decode("utf-8")) == SAMPLE
+
+    def test_output_is_compact_json_any_codec_can_read(self, codec):
+        encoded = codec.dumps(SAMPLE)
+        assert b", " not in encoded and b": " not in encoded
+        assert json.loads(encoded) == SAMPLE
+
+    def test_malformed_input_raises_json_decode_error(self, codec):
+        with pytest.raises(json.JSONDecodeError):
+            codec.loads(b'{"action_type": ')
+
+    def test_auto_falls_back_to_stdlib(self, monkeypatch):
+        def missing():
+            raise ImportError
+
+        monkeypatch.setitem(CODECS, "orjson", missing)
+        monkeypatch.setitem(CODECS, "msgspec", missing)
+        assert isinstance(get_codec("auto"), JsonCodec)
+
+    def test_codec_must_implement_dumps_and_loads(self):
+        class Half(Codec):
+            def dumps(self, obj):
+                return b"{}"
+
+        with pytest.raises(TypeError):
+            Half()
+
+    def test_unknown_codec(self):
+        with pytest.raises(ValueError):
+            get_codec("pickle")
+
+
+# =============================================================================
+# parse_action
+# =============================================================================
+
+class TestParseAction:
+    def test_validates_bytes_directly(self):
+        action = parse_action(b'{"action_type": "ADD_TO_CART", "sku": "PZ-PEP", "quantity": 2}')
+        assert action.action_type == ActionType.ADD_TO_CART
+        assert action.quantity == 2
+
+    def test_fenced_json_still_extracted(self):
+        raw = 'Sure!\n```json\n{"action_type": "TRANSFER", "target_agent": "MenuExpert"}\n```'
+        assert parse_action(raw).target_agent == "MenuExpert"
+
+    def test_incomplete_json_still_auto_fixed(self):
+        action = parse_action(b'{"message": "Hi there"}')
+        assert action.action_type == ActionType.NO_OP
+        assert action.message == "Hi there"
+
+    def test_invalid_action_keeps_salvaged_message(self):
+        action = parse_action('{"action_type": "TRANSFER", "message": "One moment"}')
+        assert action.meta["parser_error"] == "validation_error"
+        assert action.message == "One moment"
+
+    def test_plain_text_becomes_message(self):
+        action = parse_action("We are closed today.")
+        assert action.meta["parser_error"] == "invalid_json"
@@ -0,0 +1,132 @@
+# DineFlow/tests/unit/test_embedding_cache.py
+import threading
+
+import numpy as np
+import pytest
+from tools.search.embedding_cache import EmbeddingCache, normalise_text
+from tools.search.vector import VectorBackend
+
+
+# =============================================================================
+# SHARED FIXTURES
+# =============================================================================
+
+class CountingEncoder:
+    """Records every batch it is asked to embed; vectors derive from the text."""
+
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, texts):
+        with self._lock:
+            self.calls.append(list(texts))
+        return np.asarray([[len(t), sum(map(ord, t)) % 97, 1.0] for t in texts], dtype=np.float32)
+
+    # SentenceTransformer.encode signature, for VectorBackend._encoder
+    def encode(self, texts, **_):
+        return self(texts)
+
+    @property
+    def embedded(self):
+        return [t for batch in self.calls for t in batch]
+
+
+@pytest.fixture
+def encoder():
+    return CountingEncoder()
+
+
+# =============================================================================
+# LRU SEMANTICS
+# =============================================================================
+
+class TestEmbeddingCache:
+    def test_repeat_lookup_hits(self, encoder):
+        cache = EmbeddingCache(8)
+        first = cache.get_many(["anything spicy"], encoder)
+        second = cache.get_many(["anything spicy"], encoder)
+        assert np.array_equal(first, second)
+        assert encoder.embedded == ["anything spicy"]
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    def test_keys_are_normalised(self, encoder):
+        cache = EmbeddingCache(8)
+        cache.get_many(["Anything  SPICY "], encoder)
+        cache.get_many(["anything spicy"], encoder)
+        assert encoder.embedded == ["anything spicy"]
+        assert normalise_text("  Cold\tBeer\n") == "cold beer"
+
+    def test_misses_batched_and_deduplicated(self, encoder):
+        cache = EmbeddingCache(8)
+        cache.get_many(["a"], encoder)
+        out = cache.get_many(["b", "a", "B", "c", "b"], encoder)
+        assert encoder.calls == [["a"], ["b", "c"]]
+        assert out.shape == (5, 3)
+        assert np.array_equal(out[0], out[2]) and np.array_equal(out[0], out[4])
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"]) == (3, 3)
+
+    def test_lru_eviction_order_and_counter(self, encoder):
+        cache = EmbeddingCache(2)
+        cache.get_many(["a"], encoder)
+        cache.get_many(["b"], encoder)
+        cache.get_many(["a"], encoder)   # a is now most recent
+        cache.get_many(["c"], encoder)   # evicts b
+        assert len(cache) == 2
+        assert cache.stats()["evictions"] == 1
+        cache.get_many(["a"], encoder)
+        cache.get_many(["b"], encoder)
+        assert encoder.embedded == ["a", "b", "c", "b"]
+
+    def test_cached_vectors_are_read_only(self, encoder):
+        cache = EmbeddingCache(4)
+        cache.get_many(["a"], encoder)
+        vec = cache._entries["a"]
+        with pytest.raises(ValueError):
+            vec[0] = 0.0
+
+    def test_stats_and_clear(self, encoder):
+        cache = EmbeddingCache(4)
+        cache.get_many(["a", "a"], encoder)
+        assert cache.stats()["hit_rate"] == pytest.approx(0.5)
+        cache.clear()
+        assert cache.stats() == {
+            "size": 0, "maxsize": 4, "hits": 0, "misses": 0, "evictions": 0, "hit_rate": 0.0,
+        }
+
+    def test_invalid_maxsize(self):
+        with pytest.raises(ValueError):
+            EmbeddingCache(0)
+
+    def test_concurrent_access_stays_bounded(self, encoder):
+        cache = EmbeddingCache(16)
+        texts = [f"query {i}" for i in range(40)]
+
+        def worker(offset):
+            for i in range(200):
+                cache.get_many([texts[(offset + i) % len(texts)]], encoder)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        stats = cache.stats()
+        assert stats["size"] <= 16
+        assert stats["hits"] + stats["misses"] == 8 * 200
+
+
+# =============================================================================
+# VECTOR BACKEND INTEGRATION
+# =============================================================================
+
+class TestBackendQueryCache:
+    def test_embed_query_runs_encoder_once_per_distinct_string(self, encoder):
+        backend = VectorBackend(index_path=None)
+        backend._encoder = encoder
+        backend.embed_query(["anything spicy"])
+        backend.embed_query(["anything spicy", "cold beer"])
+        backend.embed_query(["Anything spicy"])
+        assert encoder.embedded == ["anything spicy", "cold beer"]
+        assert backend.query_cache.stats()["hits"] == 2
@@ -249,7 +249,7 @@
 # DineFlow/tests/unit/test_golden_loop_v2.py
 from unittest.mock import patch, MagicMock, call
 import pytest
-from orchestration.golden_loop import golden_loop
+from orchestration.golden_loop import _populate_context_from_response, golden_loop
 from state_machine.types import SessionState, KitchenSnapshot, ContextScope
 from validation.schemas import ActionRequest, ActionType
 from validation.errors import ViolationType, Severity
@@ -697,4 +697,24 @@ class TestScopeGovernance:
 
         # First positional arg is session, second must be the raw user_input
         call_args = mock_scope.call_args
-        assert call_args.args[1] == "Anything spicy?"
\ No newline at end of file
+        assert call_args.args[1] == "Anything spicy?"
+
+class TestContextPopulation:
+    def test_item_named_in_its_own_sentence_enters_context(self):
+        """
+        Scored as a whole, the Margherita's common words fall under half the
+        truffle pizza's score; scored per sentence (one score_batch call) it
+        is the best match of its own sentence and is added too.
+        """
+        session = create_valid_session("s_context_sentences", agent="MenuExpert")
+        _populate_context_from_response(
+            "Our Fancy Truffle Pizza is a luxurious white pizza with black truffle oil, "
+            "wild mushrooms and thyme. Prefer something simple? Try the Margherita Pizza.",
+            session,
+        )
+        assert list(session.active_context) == ["PZ-FANCY", "PZ-MARG"]
+
+    def test_single_sentence_keeps_only_the_named_item(self):
+        session = create_valid_session("s_context_single", agent="MenuExpert")
+        _populate_context_from_response("the Pepperoni Pizza is our only spicy option", session)
+        assert list(session.active_context) == ["PZ-PEP"]
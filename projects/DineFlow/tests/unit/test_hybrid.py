@@ -0,0 +1,189 @@
+# DineFlow/tests/unit/test_hybrid.py
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+from tools.registry import MenuCatalog, get_menu_items
+from tools.search.bm25 import MenuBM25
+from tools.search.hybrid import HybridResult, _rrf_fuse, hybrid_search
+
+PATCH_VECTOR = "tools.search.hybrid.vector_search"
+
+
+# =============================================================================
+# SHARED FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def menu():
+    return get_menu_items()
+
+
+@pytest.fixture
+def engine(menu):
+    return MenuBM25(menu)
+
+
+def _skus(items):
+    return [i.sku for i in items]
+
+
+# =============================================================================
+# CONCURRENT LEGS
+# =============================================================================
+
+class TestParallelLegs:
+    def test_parallel_matches_serial(self, menu, engine):
+        with patch(PATCH_VECTOR, return_value=["BEER-001", "PZ-PEP"]):
+            parallel = hybrid_search("anything spicy", menu, engine)
+            serial = hybrid_search("anything spicy", menu, engine, parallel=False)
+        assert _skus(parallel) == _skus(serial)
+        assert parallel.meta["mode"] == "parallel" and serial.meta["mode"] == "serial"
+        assert not parallel.meta["degraded"]
+
+    def test_result_is_a_plain_list_with_timing_meta(self, menu, engine):
+        with patch(PATCH_VECTOR, return_value=[]):
+            result = hybrid_search("cold beer", menu, engine)
+        assert isinstance(result, HybridResult) and isinstance(result, list)
+        assert len(result) == len(menu)
+        for key in ("vector_ms", "bm25_ms", "total_ms"):
+            assert result.meta[key] >= 0.0
+
+    def test_vector_leg_runs_off_the_calling_thread(self, menu, engine):
+        seen = {}
+
+        def vector(query):
+            seen["thread"] = threading.current_thread().name
+            return []
+
+        with patch(PATCH_VECTOR, side_effect=vector):
+            hybrid_search("pizza", menu, engine)
+        assert seen["thread"].startswith("hybrid-leg")
+
+    def test_slow_vector_leg_degrades_to_bm25_only(self, menu, engine):
+        release = threading.Event()
+
+        def slow_vector(query):
+            release.wait(2)
+            return ["BEER-002"]
+
+        with patch(PATCH_VECTOR, side_effect=slow_vector):
+            start = time.perf_counter()
+            result = hybrid_search("anything spicy", menu, engine, vector_timeout=0.05)
+            elapsed = time.perf_counter() - start
+            release.set()
+
+        assert elapsed < 1.0
+        assert result.meta["degraded"] and result.meta["vector_error"] == "timeout"
+        assert result.meta["vector_ms"] is None
+        assert result[0].sku == engine.search("anything spicy")[0]
+
+    @pytest.mark.parametrize("ready, degraded", [(False, False), (True, True)])
+    def test_default_timeout_only_once_the_backend_is_ready(self, menu, engine, ready, degraded):
+        def slow_vector(query):
+            time.sleep(0.2)
+            return ["BEER-002"]
+
+        with patch(PATCH_VECTOR, side_effect=slow_vector), \
+                patch("tools.search.hybrid.VECTOR_LEG_TIMEOUT", 0.02), \
+                patch("tools.search.hybrid.backend") as backend:
+            backend.ready = ready
+            result = hybrid_search("anything spicy", menu, engine)
+        assert result.meta["degraded"] is degraded
+        assert (result.meta["vector_ms"] is None) is degraded
+
+    def test_failing_vector_leg_degrades_to_bm25_only(self, menu, engine):
+        with patch(PATCH_VECTOR, side_effect=RuntimeError("model missing")):
+            result = hybrid_search("cold beer", menu, engine)
+        assert result.meta["degraded"]
+        assert "model missing" in result.meta["vector_error"]
+        assert _skus(result)[:2] == engine.search("cold beer")[:2]
+
+    def test_serial_mode_still_raises(self, menu, engine):
+        with patch(PATCH_VECTOR, side_effect=RuntimeError("model missing")):
+            with pytest.raises(RuntimeError):
+                hybrid_search("cold beer", menu, engine, parallel=False)
+
+
+# =============================================================================
+# FUSED TOP-K & FILTERS
+# =============================================================================
+
+class TestFusedTopK:
+    @pytest.mark.parametrize("query", ["anything spicy", "cold beer", "pizza", "xyzzy"])
+    @pytest.mark.parametrize("k", [1, 3, 5, 8])
+    def test_top_k_is_prefix_of_full_ranking(self, menu, engine, query, k):
+        with patch(PATCH_VECTOR, return_value=["BEER-001", "PZ-PEP"]):
+            full = hybrid_search(query, menu, engine)
+            top = hybrid_search(query, menu, engine, k=k)
+        assert _skus(top) == _skus(full)[:k]
+
+    def test_plain_list_edited_in_place_is_reindexed(self, menu, engine):
+        items = list(menu)
+        with patch(PATCH_VECTOR, return_value=["BEER-001"]):
+            hybrid_search("cold beer", items, engine, k=3)
+            items.reverse()
+            assert _skus(hybrid_search("xyzzy", items, MenuBM25(items), k=2)) == ["BEER-001", "BEER-002"]
+
+    def test_catalog_carries_first_positions(self, menu):
+        catalog = MenuCatalog(menu + menu[:1])
+        assert catalog.positions == {item.sku: pos for pos, item in enumerate(menu)}
+        with patch(PATCH_VECTOR, return_value=[]):
+            assert _skus(hybrid_search("xyzzy", catalog, MenuBM25(menu), k=2)) == _skus(menu)[:2]
+
+    def test_zero_score_items_pad_in_menu_order(self, menu, engine):
+        with patch(PATCH_VECTOR, return_value=[]):
+            result = hybrid_search("xyzzy", menu, engine, k=3)
+        assert _skus(result) == _skus(menu)[:3]
+
+    def test_filters_reach_both_legs(self, menu, engine):
+        seen = {}
+
+        def vector(query, n_results=3, filters=None):
+            seen["filters"] = filters
+            return ["PZ-MARG"]
+
+        with patch(PATCH_VECTOR, side_effect=vector):
+            result = hybrid_search("cold beer", menu, engine, k=2, filters={"is_alcohol": False})
+        assert seen["filters"] == {"is_alcohol": False}
+        assert result[0].sku == "PZ-MARG"
+        assert all(not item.is_alcohol for item in result)
+
+    def test_filtered_full_list_matches_filtered_fusion(self, menu, engine):
+        filters = {"is_alcohol": True}
+        with patch(PATCH_VECTOR, return_value=["BEER-002"]):
+            result = hybrid_search("pizza beer", menu, engine, filters=filters)
+        expected = _rrf_fuse(["BEER-002"], engine.search("pizza beer", filters=filters), menu, filters)
+        assert _skus(result) == _skus(expected) == ["BEER-002", "BEER-001"]
+
+    def test_suggestions_filter_only_when_asked(self, menu):
+        from orchestration.ambiguity_gate import AmbiguityGate
+
+        menu = [i.model_copy(update={"in_stock": False}) if i.sku == "PZ-PEP" else i for i in menu]
+        engine = MenuBM25(menu)
+        with patch(PATCH_VECTOR, return_value=["PZ-PEP"]):
+            default = AmbiguityGate.top_suggestions("pepperoni pizza", menu, engine)
+            in_stock = AmbiguityGate.top_suggestions("pepperoni pizza", menu, engine,
+                                                     filters={"in_stock": True})
+        assert default[0] == "Pepperoni Pizza"
+        assert len(in_stock) == 3 and "Pepperoni Pizza" not in in_stock
+
+    @pytest.mark.parametrize("search_filters, offered", [(None, True), ({"in_stock": True}, False)])
+    def test_menu_expert_filters_only_when_configured(self, menu, search_filters, offered):
+        from agents.menu_expert import MenuExpertAgent
+        from state_machine.types import ContextScope, SessionState
+
+        menu = [i.model_copy(update={"in_stock": False}) if i.sku == "PZ-PEP" else i for i in menu]
+        agent = MenuExpertAgent(menu, MenuBM25(menu), search_filters=search_filters)
+        session = SessionState(session_id="s", user_id="u", active_agent="MenuExpert",
+                               context_scope=ContextScope.FILTERED_SEARCH)
+        memory = MagicMock()
+        memory.get_context.return_value = ""
+        with patch(PATCH_VECTOR, return_value=["PZ-PEP"]):
+            _, items = agent._prepare("pepperoni pizza", session, memory)
+        assert ("PZ-PEP" in [i.sku for i in items]) is offered
+
+    def test_unknown_filter_rejected(self, menu, engine):
+        with pytest.raises(ValueError):
+            hybrid_search("pizza", menu, engine, k=3, filters={"vegan": True})
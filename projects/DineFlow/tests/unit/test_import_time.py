@@ -0,0 +1,74 @@
+# DineFlow/tests/unit/test_import_time.py
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from tools.registry import get_menu_items
+from tools.search.vector import VectorBackend
+
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Modules that must only load on the first vector query / explicit warm-up.
+HEAVY_MODULES = ("chromadb", "sentence_transformers", "torch", "transformers")
+
+# Cumulative wall-clock budget (µs) per entry point, as reported by
+# `python -X importtime`. Generous on purpose — these catch regressions of
+# the "loads a model at import" kind (seconds), not millisecond drift.
+IMPORT_BUDGETS_US = {
+    "orchestration.golden_loop": 4_000_000,
+    "tools.search.vector": 500_000,
+}
+
+
+def _importtime(module: str) -> dict:
+    """Runs a fresh interpreter with -X importtime; returns {module: cumulative µs}."""
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "test-key")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+# =============================================================================
+# IMPORT-TIME REGRESSIONS
+# =============================================================================
+
+class TestImportTime:
+    @pytest.mark.parametrize("module", sorted(IMPORT_BUDGETS_US))
+    def test_no_heavy_modules_at_import(self, module):
+        timings = _importtime(module)
+        loaded = {name.split(".")[0] for name in timings}
+        assert not loaded & set(HEAVY_MODULES)
+
+    @pytest.mark.parametrize("module,budget", sorted(IMPORT_BUDGETS_US.items()))
+    def test_import_within_budget(self, module, budget):
+        timings = _importtime(module)
+        assert timings[module] < budget, f"{module} took {timings[module] / 1e6:.2f}s to import"
+
+
+# =============================================================================
+# LAZY VECTOR BACKEND
+# =============================================================================
+
+class TestVectorBackend:
+    def test_construction_does_not_initialise(self):
+        backend = VectorBackend()
+        assert not backend.ready
+
+    def test_set_menu_does_not_embed(self):
+        backend = VectorBackend()
+        backend.set_menu(get_menu_items())
+        assert not backend.ready
+        assert backend._encoder is None and backend._menu_index is None
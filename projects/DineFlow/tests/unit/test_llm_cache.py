@@ -0,0 +1,206 @@
+# DineFlow/tests/unit/test_llm_cache.py
+import asyncio
+import threading
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from agents.greeter import GreeterAgent
+from agents.menu_expert import MenuExpertAgent
+from agents.order_taker import OrderTakerAgent
+from llm import client
+from llm.cache import ResponseCache, cache_key, is_cacheable
+from orchestration.golden_loop import _llm_detect_age_confirmation
+from state_machine.types import SessionState
+
+
+# =============================================================================
+# SHARED FIXTURES
+# =============================================================================
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def clean_client_cache():
+    client.response_cache.clear()
+    yield
+    client.response_cache.clear()
+
+
+# =============================================================================
+# ResponseCache
+# =============================================================================
+
+class TestResponseCache:
+    def test_key_separates_model_prompt_and_input(self):
+        base = cache_key("m", "prompt", "hi")
+        assert base == cache_key("m", "prompt", "hi")
+        assert base != cache_key("other", "prompt", "hi")
+        assert base != cache_key("m", "prompt2", "hi")
+        assert base != cache_key("m", "prompt", "hi!")
+        # Moving characters across the prompt/input boundary is a different key
+        assert cache_key("m", "ab", "c") != cache_key("m", "a", "bc")
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = ResponseCache(max_entries=2)
+        cache.put("a", "1")
+        cache.put("b", "2")
+        cache.get("a")
+        cache.put("c", "3")
+        assert cache.get("b") is None
+        assert cache.get("a") == "1" and cache.get("c") == "3"
+
+    def test_ttl_expiry_and_per_entry_override(self):
+        clock = FakeClock()
+        cache = ResponseCache(default_ttl=10, clock=clock)
+        cache.put("short", "x", ttl=1)
+        cache.put("long", "y")
+        clock.now += 5
+        assert cache.get("short") is None
+        assert cache.get("long") == "y"
+        clock.now += 10
+        assert cache.get("long") is None
+        assert cache.stats()["expired"] == 2
+
+    def test_disk_tier_survives_a_new_instance(self, tmp_path):
+        path = str(tmp_path / "llm_cache.sqlite")
+        first = ResponseCache(path=path)
+        first.put("k", '{"a": 1}')
+        first.close()
+
+        second = ResponseCache(path=path)
+        assert second.get("k") == '{"a": 1}'
+        assert second.get("k") == '{"a": 1}'
+        stats = second.stats()
+        # First read came from disk and was promoted into memory
+        assert stats["disk_hits"] == 1 and stats["memory_hits"] == 1
+        second.close()
+
+    def test_expired_disk_entries_are_dropped(self, tmp_path):
+        clock = FakeClock()
+        path = str(tmp_path / "llm_cache.sqlite")
+        ResponseCache(path=path, clock=clock).put("k", "v", ttl=1)
+        clock.now += 2
+        cache = ResponseCache(path=path, clock=clock)
+        assert cache.get("k") is None
+        assert cache._connect().execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] == 0
+
+    def test_memory_hit_does_not_wait_for_disk_io(self, tmp_path):
+        cache = ResponseCache(path=str(tmp_path / "llm_cache.sqlite"))
+        cache.put("hot", '{"a": 1}')
+        served = []
+        with cache._db_lock:    # another thread's disk write in flight
+            reader = threading.Thread(target=lambda: served.append(cache.get("hot")))
+            reader.start()
+            reader.join(timeout=1)
+            assert served == ['{"a": 1}']
+        cache.close()
+
+    def test_hit_rate(self):
+        cache = ResponseCache()
+        cache.put("k", "v")
+        cache.get("k")
+        cache.get("k")
+        cache.get("missing")
+        cache.record_bypass()
+        stats = cache.stats()
+        assert stats["hits"] == 2 and stats["misses"] == 1 and stats["bypassed"] == 1
+        assert stats["hit_rate"] == pytest.approx(2 / 3, abs=1e-4)
+
+    def test_only_json_objects_are_cacheable(self):
+        assert is_cacheable('{"intent": "ADD_ALL"}')
+        assert not is_cacheable('{"intent": "ADD_')
+        assert not is_cacheable("Sure! Here you go")
+        assert not is_cacheable("")
+
+
+# =============================================================================
+# call_llm INTEGRATION
+# =============================================================================
+
+class TestCallLLMCache:
+    def test_repeated_call_served_from_cache(self):
+        with patch.object(client.transport, "complete", return_value='{"ok": 1}') as complete:
+            assert client.call_llm("router prompt", "menu please", cache=True) == '{"ok": 1}'
+            assert client.call_llm("router prompt", "menu please", cache=True) == '{"ok": 1}'
+            client.call_llm("router prompt", "what's good here", cache=True)
+        assert complete.call_count == 2
+        assert client.response_cache.stats()["hits"] == 1
+
+    def test_opt_out_always_calls_transport(self):
+        with patch.object(client.transport, "complete", return_value='{"ok": 1}') as complete:
+            client.call_llm("p", "u", cache=False)
+            client.call_llm("p", "u", cache=False)
+        assert complete.call_count == 2
+        assert client.response_cache.stats()["bypassed"] == 2
+
+    def test_off_by_default_until_a_caller_opts_in(self):
+        assert client.settings.LLM_CACHE_ENABLED is False
+        with patch.object(client.transport, "complete", return_value='{"ok": 1}') as complete:
+            client.call_llm("p", "u")
+            client.call_llm("p", "u")
+            client.call_llm("p", "u", cache=True)
+            client.call_llm("p", "u", cache=True)
+        assert complete.call_count == 3
+
+    def test_malformed_response_not_cached(self):
+        with patch.object(client.transport, "complete", return_value="not json") as complete:
+            client.call_llm("p", "u", cache=True)
+            client.call_llm("p", "u", cache=True)
+        assert complete.call_count == 2
+
+    def test_async_call_shares_the_cache(self):
+        with patch.object(client.transport, "complete", return_value='{"ok": 1}'), \
+             patch.object(client.transport, "acomplete", new=AsyncMock()) as acomplete:
+            client.call_llm("p", "u", cache=True)
+            assert asyncio.run(client.async_call_llm("p", "u", cache=True)) == '{"ok": 1}'
+        acomplete.assert_not_awaited()
+
+    def test_async_call_does_disk_io_off_the_loop(self, tmp_path, monkeypatch):
+        cache = ResponseCache(path=str(tmp_path / "llm_cache.sqlite"))
+        monkeypatch.setattr(client, "response_cache", cache)
+        disk_threads = []
+        for name in ("_disk_get", "_disk_put"):
+            real = getattr(cache, name)
+
+            def spy(*args, _real=real):
+                disk_threads.append(threading.get_ident())
+                return _real(*args)
+
+            monkeypatch.setattr(cache, name, spy)
+
+        async def turn():
+            await client.async_call_llm("p", "u", cache=True)
+            return threading.get_ident()
+
+        with patch.object(client.transport, "acomplete", new=AsyncMock(return_value='{"ok": 1}')):
+            loop_thread = asyncio.run(turn())
+        assert len(disk_threads) == 2           # read on the miss, write of the reply
+        assert loop_thread not in disk_threads
+        cache.close()
+
+    @pytest.mark.parametrize("agent_factory, module, cache", [
+        (lambda: GreeterAgent(), "agents.greeter", False),
+        (lambda: OrderTakerAgent([], MagicMock()), "agents.order_taker", False),
+        (lambda: MenuExpertAgent([], MagicMock()), "agents.menu_expert", True),
+    ])
+    def test_agents_choose_caching_explicitly(self, agent_factory, module, cache):
+        agent = agent_factory()
+        raw = '{"action_type": "NO_OP", "message": "ok", "confidence": 0.9}'
+        session = SessionState(session_id="s", user_id="u", active_agent="Greeter", tool_budget_remaining=5)
+        with patch.object(type(agent), "_build_prompt", return_value="p", create=True), \
+             patch.object(type(agent), "_prepare", return_value=("p", []), create=True), \
+             patch(f"{module}.call_llm", return_value=raw) as llm:
+            agent.run("hi", session, MagicMock())
+        assert llm.call_args.kwargs["cache"] is cache
+
+    def test_age_confirmation_opts_out(self):
+        with patch.object(client.transport, "complete", return_value='{"confirmed": true}') as complete:
+            assert _llm_detect_age_confirmation("sí, tengo veinte")
+            assert _llm_detect_age_confirmation("sí, tengo veinte")
+        assert complete.call_count == 2
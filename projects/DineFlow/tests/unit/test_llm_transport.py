@@ -0,0 +1,191 @@
+# DineFlow/tests/unit/test_llm_transport.py
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import httpx
+import openai
+import pytest
+from llm.transport import DeadlineExceeded, LLMTransport, RetryBudget, TransportConfig
+
+
+# =============================================================================
+# SHARED FIXTURES
+# =============================================================================
+
+_REQUEST = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+
+
+def _status_error(status):
+    response = httpx.Response(status, request=_REQUEST)
+    return openai.APIStatusError("boom", response=response, body=None)
+
+
+def _ok(content='{"ok": true}', prompt=11, completion=5):
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=SimpleNamespace(prompt_tokens=prompt, completion_tokens=completion),
+    )
+
+
+class FakeClient:
+    """chat.completions.create that replays a script of responses / exceptions."""
+
+    def __init__(self, *script, delay=0.0):
+        self.script = list(script)
+        self.delay = delay
+        self.calls = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls.append(kwargs)
+        if self.delay:
+            time.sleep(self.delay)
+        outcome = self.script.pop(0) if len(self.script) > 1 else self.script[0]
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+
+def _transport(client, **overrides):
+    config = TransportConfig(**{"base_delay": 0.001, "max_delay": 0.002, **overrides})
+    return LLMTransport(config, client=client, sleep=lambda s: None)
+
+
+# =============================================================================
+# REQUEST SHAPE & METRICS
+# =============================================================================
+
+class TestCall:
+    def test_request_and_content(self):
+        client = FakeClient(_ok('{"a": 1}'))
+        assert _transport(client).complete("sys", "hi") == '{"a": 1}'
+        call = client.calls[0]
+        assert call["response_format"] == {"type": "json_object"}
+        assert call["messages"][1] == {"role": "user", "content": "hi"}
+        assert 0 < call["timeout"] <= 20.0
+
+    def test_metrics_record_latency_and_tokens(self):
+        transport = _transport(FakeClient(_ok(prompt=7, completion=3)))
+        transport.complete("s", "u")
+        transport.complete("s", "u")
+        stats = transport.stats()
+        assert stats["calls"] == 2 and stats["retries"] == 0
+        assert stats["prompt_tokens"] == 14 and stats["completion_tokens"] == 6
+        assert stats["p50_ms"] is not None
+
+
+# =============================================================================
+# RETRIES, BUDGET, DEADLINES
+# =============================================================================
+
+class TestRetries:
+    def test_retryable_errors_are_retried(self):
+        client = FakeClient(_status_error(503), openai.APIConnectionError(request=_REQUEST), _ok())
+        transport = _transport(client)
+        assert transport.complete("s", "u") == '{"ok": true}'
+        assert len(client.calls) == 3
+        assert transport.stats()["retries"] == 2
+
+    def test_client_errors_are_not_retried(self):
+        client = FakeClient(_status_error(400))
+        transport = _transport(client)
+        with pytest.raises(openai.APIStatusError):
+            transport.complete("s", "u")
+        assert len(client.calls) == 1
+        assert transport.stats()["failures"] == 1
+
+    def test_max_retries_bounds_attempts(self):
+        client = FakeClient(_status_error(500))
+        with pytest.raises(openai.APIStatusError):
+            _transport(client, max_retries=2).complete("s", "u")
+        assert len(client.calls) == 3
+
+    def test_exhausted_budget_stops_retrying(self):
+        client = FakeClient(_status_error(429))
+        transport = _transport(client, retry_budget_min=1.0, retry_budget_ratio=0.0)
+        with pytest.raises(openai.APIStatusError):
+            transport.complete("s", "u")
+        assert len(client.calls) == 2          # one retry, then the budget is empty
+        with pytest.raises(openai.APIStatusError):
+            transport.complete("s", "u")
+        assert len(client.calls) == 3          # no retry at all
+        assert transport.stats()["budget_exhausted"] == 2
+
+    def test_budget_deposits_per_first_attempt(self):
+        budget = RetryBudget(ratio=0.5, minimum=0.0)
+        assert not budget.try_withdraw()
+        budget.deposit()
+        budget.deposit()
+        assert budget.try_withdraw() and not budget.try_withdraw()
+
+
+class TestDeadlines:
+    def test_deadline_bounds_each_attempt_timeout(self):
+        client = FakeClient(_ok())
+        _transport(client).complete("s", "u", deadline=0.5)
+        assert client.calls[0]["timeout"] <= 0.5
+
+    def test_backoff_that_would_pass_the_deadline_gives_up(self):
+        client = FakeClient(_status_error(503))
+        transport = LLMTransport(TransportConfig(base_delay=5.0, max_delay=5.0), client=client,
+                                 sleep=lambda s: pytest.fail("should not sleep past the deadline"))
+        # random.uniform(0, 5) almost surely exceeds a 1ms deadline
+        with pytest.raises(openai.APIStatusError):
+            transport.complete("s", "u", deadline=0.001)
+
+    def test_waiting_for_a_slot_counts_against_the_deadline(self):
+        client = FakeClient(_ok(), delay=0.3)
+        transport = _transport(client, max_concurrency=1)
+        worker = threading.Thread(target=transport.complete, args=("s", "u"))
+        worker.start()
+        time.sleep(0.05)
+        with pytest.raises(DeadlineExceeded):
+            transport.complete("s", "u", deadline=0.05)
+        worker.join()
+        assert transport.stats()["deadline_exceeded"] == 1
+
+
+# =============================================================================
+# CONFIG
+# =============================================================================
+
+class TestConfig:
+    def test_pool_sized_from_worker_count(self):
+        settings = SimpleNamespace(LLM_MODEL="m", LLM_WORKERS=4, LLM_TIMEOUT_S=9.0,
+                                   LLM_MAX_RETRIES=1, LLM_RETRY_BUDGET_RATIO=0.1)
+        config = TransportConfig.from_settings(settings)
+        assert (config.max_connections, config.max_keepalive, config.max_concurrency) == (8, 4, 8)
+        assert config.deadline == 9.0 and config.model == "m"
+
+    def test_client_built_lazily_with_sdk_retries_off(self):
+        transport = LLMTransport(TransportConfig(), api_key="sk-test")
+        assert transport._client is None
+        client = transport.client
+        assert client.max_retries == 0
+        assert transport.client is client
+
+    def test_aclose_closes_the_loops_async_client(self):
+        transport = LLMTransport(TransportConfig(), api_key="sk-test")
+
+        async def run():
+            client, _ = transport._async_state()
+            await transport.aclose()
+            reopened, _ = transport._async_state()
+            await transport.aclose()
+            return client, reopened
+
+        client, reopened = asyncio.run(run())
+        assert client.is_closed() and reopened.is_closed()
+        assert reopened is not client
+
+    def test_aclose_leaves_an_injected_client_open(self):
+        injected = SimpleNamespace(close=None)
+        transport = LLMTransport(TransportConfig(), async_client=injected)
+
+        async def run():
+            transport._async_state()
+            await transport.aclose()
+
+        asyncio.run(run())      # close=None would raise if it were awaited
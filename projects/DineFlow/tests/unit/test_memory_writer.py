@@ -0,0 +1,184 @@
+# DineFlow/tests/unit/test_memory_writer.py
+import threading
+import time
+
+import pytest
+from tools.search.memory_writer import MemoryWriter
+
+
+# =============================================================================
+# SHARED FIXTURES
+# =============================================================================
+
+class GatedSink:
+    """Collects batches; blocks inside the call while the gate is closed."""
+
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+        self.fail = fail
+
+    def __call__(self, ids, docs, metas):
+        self.entered.set()
+        self.gate.wait(5)
+        if self.fail:
+            raise RuntimeError("chroma down")
+        self.batches.append(list(ids))
+
+
+class PausingLock:
+    """A Lock that runs on_release (once) right after the next release."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.on_release = None
+
+    def acquire(self, blocking=True, timeout=-1):
+        return self._lock.acquire(blocking, timeout)
+
+    def release(self):
+        self._lock.release()
+        hook, self.on_release = self.on_release, None
+        if hook is not None:
+            hook()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def _record(i, session="s1"):
+    return (f"{session}_{i}", f"turn {i}", {"session_id": session})
+
+
+@pytest.fixture
+def sink():
+    return GatedSink()
+
+
+@pytest.fixture
+def writer(sink):
+    w = MemoryWriter(sink, queue_size=64, batch_size=8, put_timeout=0.05)
+    yield w
+    sink.gate.set()
+    w.close()
+
+
+# =============================================================================
+# WRITE-BEHIND
+# =============================================================================
+
+class TestMemoryWriter:
+    def test_submit_returns_before_write_and_flush_waits(self, writer, sink):
+        sink.gate.clear()
+        writer.submit(_record(0), session_id="s1")
+        assert sink.entered.wait(2)
+        assert writer.has_pending("s1")
+        assert not writer.flush(timeout=0.05)
+
+        sink.gate.set()
+        assert writer.flush(timeout=2)
+        assert sink.batches == [["s1_0"]]
+        assert not writer.has_pending("s1")
+
+    def test_queued_turns_are_written_as_batches(self, writer, sink):
+        sink.gate.clear()
+        writer.submit(_record(0), session_id="s1")
+        assert sink.entered.wait(2)
+        for i in range(1, 20):
+            writer.submit(_record(i), session_id="s1")
+        sink.gate.set()
+        assert writer.flush(timeout=2)
+
+        assert [len(b) for b in sink.batches] == [1, 8, 8, 3]
+        assert [i for b in sink.batches for i in b] == [f"s1_{i}" for i in range(20)]
+        stats = writer.stats()
+        assert (stats["written"], stats["batches"], stats["failed"]) == (20, 4, 0)
+        assert stats["max_depth"] >= 8
+
+    def test_pending_is_tracked_per_session(self, writer, sink):
+        sink.gate.clear()
+        writer.submit(_record(0, "a"), session_id="a")
+        assert sink.entered.wait(2)
+        writer.submit(_record(1, "b"), session_id="b")
+        assert writer.has_pending("a") and writer.has_pending("b")
+        assert not writer.has_pending("c")
+        sink.gate.set()
+        writer.flush(timeout=2)
+        assert not writer.has_pending("a") and not writer.has_pending("b")
+
+    def test_full_queue_falls_back_to_synchronous_write(self, sink):
+        writer = MemoryWriter(sink, queue_size=1, batch_size=8, put_timeout=0.01)
+        sink.gate.clear()
+        writer.submit(_record(0))          # taken by the worker, blocked in the sink
+        assert sink.entered.wait(2)
+        writer.submit(_record(1))          # fills the queue
+
+        done = threading.Event()
+        threading.Thread(target=lambda: (writer.submit(_record(2)), done.set())).start()
+        assert not done.wait(0.1)          # synchronous fallback is stuck behind the same sink
+        sink.gate.set()
+        assert done.wait(2)
+        assert writer.flush(timeout=2)
+
+        stats = writer.stats()
+        assert stats["blocked_puts"] == 1 and stats["sync_fallbacks"] == 1
+        assert sorted(i for b in sink.batches for i in b) == ["s1_0", "s1_1", "s1_2"]
+        writer.close()
+
+    def test_failed_batches_are_counted_not_raised(self):
+        sink = GatedSink(fail=True)
+        writer = MemoryWriter(sink)
+        writer.submit(_record(0))
+        assert writer.flush(timeout=2)
+        assert writer.stats()["failed"] == 1 and writer.stats()["written"] == 0
+        writer.close()
+
+    def test_close_drains_then_writes_synchronously(self, writer, sink):
+        sink.gate.clear()
+        for i in range(5):
+            writer.submit(_record(i))
+        sink.gate.set()
+        writer.close()
+        assert sum(len(b) for b in sink.batches) == 5
+
+        writer.submit(_record(5))
+        assert sink.batches[-1] == ["s1_5"]
+
+    @pytest.mark.parametrize("worker_running", [True, False])
+    def test_close_racing_a_submit_still_writes_the_record(self, sink, worker_running):
+        # close() lands right after submit() releases the lock that guarded
+        # its closed check — before the enqueue, and (first submit) right
+        # after the worker was started lazily
+        writer = MemoryWriter(sink)
+        writer._lock = lock = PausingLock()
+        writer._idle = threading.Condition(lock)
+        expected = []
+        if worker_running:
+            writer.submit(_record(0))
+            assert writer.flush(timeout=2)
+            expected.append("s1_0")
+
+        closer = threading.Thread(target=writer.close)
+
+        def race():
+            closer.start()
+            while not writer._closed:
+                time.sleep(0.001)
+            time.sleep(0.05)
+
+        lock.on_release = race
+        writer.submit(_record(1))
+        closer.join(2)
+
+        assert not closer.is_alive()
+        assert writer.flush(timeout=0.5)
+        assert [i for b in sink.batches for i in b] == expected + ["s1_1"]
+        # close() saw the worker and sent it the stop sentinel
+        writer._worker.join(2)
+        assert not writer._worker.is_alive()
@@ -0,0 +1,117 @@
+# DineFlow/tests/unit/test_name_matcher.py
+import random
+
+import pytest
+from state_machine.query_classifier import QueryClassifier
+from state_machine.types import MenuItemSnapshot
+from tools.registry import MenuCatalog, get_menu_items
+from tools.search.name_matcher import KIND_NAME, MenuNameMatcher, matcher_for
+
+
+# =============================================================================
+# SHARED FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def menu():
+    return get_menu_items()
+
+
+@pytest.fixture
+def matcher(menu):
+    return MenuNameMatcher(menu)
+
+
+def _item(sku, name):
+    return MenuItemSnapshot(sku=sku, name=name, price=1.0, in_stock=True,
+                            is_alcohol=False, complexity_score=1)
+
+
+def _old_has_named_item(text, items):
+    """The scan golden_loop used before the automaton."""
+    text = text.lower()
+    return [
+        item.sku for item in items
+        if any(len(t) > 3 for t in item.name.lower().split())
+        and all(t in text for t in item.name.lower().split() if len(t) > 3)
+    ]
+
+
+# =============================================================================
+# MATCHING
+# =============================================================================
+
+class TestFind:
+    def test_reports_names_and_tokens_with_spans(self, matcher):
+        text = "Two Pepperoni Pizzas please"
+        names = [m for m in matcher.find(text) if m.kind == KIND_NAME]
+        assert [(m.sku, m.start, m.end) for m in names] == [("PZ-PEP", 4, 19)]
+        assert text.lower()[4:19] == "pepperoni pizza"
+
+    def test_shared_token_reported_for_every_owner(self, matcher):
+        skus = {m.sku for m in matcher.find("any pizza") if m.text == "pizza"}
+        assert skus == {"PZ-FANCY", "PZ-PEP", "PZ-MARG"}
+
+    def test_overlapping_patterns_all_found(self):
+        matcher = MenuNameMatcher([_item("A", "Beer"), _item("B", "Root Beer"), _item("C", "Rootbeer Float")])
+        found = {(m.sku, m.text) for m in matcher.find("rootbeer float")}
+        assert ("A", "beer") in found and ("C", "rootbeer float") in found
+
+    def test_empty_input(self, matcher):
+        assert matcher.find("") == [] and matcher.find(None) == []
+
+    def test_matches_brute_force_substring_search(self):
+        rng = random.Random(7)
+        alphabet = "abc "
+        for _ in range(200):
+            items = [_item(f"S{i}", "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 9))))
+                     for i in range(6)]
+            matcher = MenuNameMatcher(items)
+            for _ in range(10):
+                text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+                expected = sorted(
+                    (sku, start, start + len(pattern))
+                    for pid, pattern in enumerate(matcher._patterns)
+                    for sku, _ in matcher._owners[pid]
+                    for start in range(len(text)) if text.startswith(pattern, start)
+                )
+                assert sorted((m.sku, m.start, m.end) for m in matcher.find(text)) == expected
+                assert matcher.named_skus(text) == _old_has_named_item(text, items)
+
+
+# =============================================================================
+# CALL-SITE QUESTIONS
+# =============================================================================
+
+class TestCallSiteQueries:
+    @pytest.mark.parametrize("text", [
+        "add a pepperoni pizza", "two heineken", "craft beer please", "pizza", "yes", "",
+    ])
+    def test_named_skus_matches_old_scan(self, menu, matcher, text):
+        assert matcher.named_skus(text) == _old_has_named_item(text, menu)
+
+    def test_mentioned_skus_any_token(self, matcher):
+        assert matcher.mentioned_skus("our Margherita is mild") == {"PZ-MARG"}
+
+    def test_first_named_prefers_menu_order(self):
+        matcher = MenuNameMatcher([_item("A", "Craft Beer"), _item("B", "Beer")])
+        assert matcher.first_named("one beer and a craft beer") == "A"
+        assert matcher.first_named("one beer") == "B"
+        assert matcher.first_named("water") is None
+
+    def test_matcher_for_is_keyed_on_menu_version(self, menu):
+        first = matcher_for(menu)
+        assert matcher_for(list(menu)) is first
+        assert matcher_for(MenuCatalog(menu)) is first
+
+        edited = [menu[0].model_copy(update={"name": "Truffle Special"})] + menu[1:]
+        other = matcher_for(edited)
+        assert other is not first and other.first_named("one truffle special") == menu[0].sku
+        # Alternating between two menus does not rebuild either
+        assert matcher_for(menu) is first and matcher_for(edited) is other
+
+    def test_classifier_resolves_entities_through_matcher(self, menu):
+        classifier = QueryClassifier(menu)
+        assert classifier.classify("is the craft beer cold?").resolved_entity == "BEER-001"
+        assert classifier.classify("Heineken Beer").resolved_entity == "BEER-002"
+        assert classifier.classify("anything spicy").resolved_entity is None
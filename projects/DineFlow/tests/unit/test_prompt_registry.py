@@ -0,0 +1,100 @@
+# DineFlow/tests/unit/test_prompt_registry.py
+import os
+
+import pytest
+from agents.greeter import GreeterAgent
+from llm.prompt_registry import PROMPTS_DIR, PromptRegistry, PromptTemplate, prompts
+
+
+# =============================================================================
+# SHARED FIXTURES
+# =============================================================================
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def prompt_dir(tmp_path):
+    (tmp_path / "router.md").write_text("Route for {{ACTIVE_AGENT}}.", encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("not a prompt", encoding="utf-8")
+    return tmp_path
+
+
+def _touch(path, text, bump_ns=10**9):
+    st = os.stat(path)
+    path.write_text(text, encoding="utf-8")
+    # Guarantee a new mtime even on coarse-grained filesystems
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + bump_ns))
+
+
+# =============================================================================
+# PromptTemplate
+# =============================================================================
+
+class TestPromptTemplate:
+    def test_render_matches_chained_replace(self):
+        text = "Menu:\n{{MENU_CONTEXT}}\nHistory:\n{{CHAT_HISTORY}}\nAgain {{MENU_CONTEXT}}"
+        template = PromptTemplate("t", text)
+        expected = text.replace("{{MENU_CONTEXT}}", "M").replace("{{CHAT_HISTORY}}", "H")
+        assert template.render(MENU_CONTEXT="M", CHAT_HISTORY="H") == expected
+        assert template.placeholders == {"MENU_CONTEXT", "CHAT_HISTORY"}
+
+    def test_inserted_values_are_not_rescanned(self):
+        template = PromptTemplate("t", "{{CHAT_HISTORY}}|{{MENU_CONTEXT}}")
+        rendered = template.render(CHAT_HISTORY="user said {{MENU_CONTEXT}}", MENU_CONTEXT="menu")
+        assert rendered == "user said {{MENU_CONTEXT}}|menu"
+
+    def test_missing_value_left_as_written(self):
+        assert PromptTemplate("t", "a {{X}} b").render() == "a {{X}} b"
+
+    def test_real_prompts_render_like_before(self):
+        raw = (PROMPTS_DIR / "order_taker.md").read_text(encoding="utf-8")
+        expected = raw.replace("{{MENU_CONTEXT}}", "MENU").replace("{{CHAT_HISTORY}}", "HIST")
+        assert prompts.render("order_taker", MENU_CONTEXT="MENU", CHAT_HISTORY="HIST") == expected
+
+
+# =============================================================================
+# PromptRegistry
+# =============================================================================
+
+class TestPromptRegistry:
+    def test_loads_markdown_templates_at_startup(self, prompt_dir):
+        registry = PromptRegistry(prompt_dir)
+        assert registry.stats()["templates"] == ["router"]
+        assert registry.render("router", ACTIVE_AGENT="Greeter") == "Route for Greeter."
+        with pytest.raises(KeyError):
+            registry.get("notes")
+
+    def test_edit_applies_after_check_interval(self, prompt_dir):
+        clock = FakeClock()
+        registry = PromptRegistry(prompt_dir, check_interval=5.0, clock=clock)
+        _touch(prompt_dir / "router.md", "v2 {{ACTIVE_AGENT}}")
+
+        clock.now = 1.0
+        assert registry.render("router", ACTIVE_AGENT="X") == "Route for X."
+        clock.now = 6.0
+        assert registry.render("router", ACTIVE_AGENT="X") == "v2 X"
+        assert registry.stats()["reloads"] == 1
+
+    def test_unchanged_files_are_not_reread(self, prompt_dir):
+        clock = FakeClock()
+        registry = PromptRegistry(prompt_dir, check_interval=1.0, clock=clock)
+        first = registry.get("router")
+        clock.now = 10.0
+        assert registry.get("router") is first
+
+    def test_new_file_picked_up_and_deleted_file_keeps_last_version(self, prompt_dir):
+        registry = PromptRegistry(prompt_dir, check_interval=0.0)
+        (prompt_dir / "greeter.md").write_text("hello", encoding="utf-8")
+        (prompt_dir / "router.md").unlink()
+        assert registry.render("greeter") == "hello"
+        assert registry.render("router", ACTIVE_AGENT="A") == "Route for A."
+
+    def test_greeter_uses_its_prompt_file(self):
+        system_prompt = GreeterAgent()._system_prompt()
+        assert system_prompt.startswith("<!-- DineFlow/llm/prompts/greeter.md -->")
@@ -0,0 +1,99 @@
+# DineFlow/tests/unit/test_registry.py
+import pytest
+from orchestration.helpers import resolve_menu_item
+from response.generator import _resolve_item_name
+from state_machine.types import MenuItemSnapshot
+from tools.registry import MenuCatalog, get_menu_catalog, get_menu_items
+
+
+# =============================================================================
+# SHARED FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def menu():
+    return get_menu_items()
+
+
+@pytest.fixture
+def catalog():
+    return get_menu_catalog()
+
+
+def _skus(items):
+    return [i.sku for i in items]
+
+
+def _item(sku, name, price, in_stock=True, tags=()):
+    return MenuItemSnapshot(sku=sku, name=name, price=price, in_stock=in_stock,
+                            is_alcohol=False, complexity_score=1, tags=list(tags))
+
+
+# =============================================================================
+# SEQUENCE BEHAVIOUR
+# =============================================================================
+
+class TestSequence:
+    def test_behaves_like_the_menu_list(self, menu, catalog):
+        assert len(catalog) == len(menu)
+        assert _skus(catalog) == _skus(menu)
+        assert catalog[0].sku == menu[0].sku
+        assert _skus(catalog[1:3]) == _skus(menu[1:3])
+        assert menu[2] in catalog
+
+
+# =============================================================================
+# LOOKUPS
+# =============================================================================
+
+class TestLookups:
+    def test_sku_lookup_is_case_and_space_insensitive(self, catalog):
+        assert catalog.get(" pz-pep ").name == "Pepperoni Pizza"
+        assert catalog.get("NOPE") is None
+        assert catalog.get(None) is None
+
+    def test_name_lookup(self, catalog):
+        assert catalog.by_name("craft BEER").sku == "BEER-001"
+        assert catalog.by_name("beer") is None
+
+    def test_duplicate_sku_resolves_to_first(self):
+        catalog = MenuCatalog([_item("A-1", "First", 1.0), _item("a-1", "Second", 2.0)])
+        assert catalog.get("A-1").name == "First"
+
+    @pytest.mark.parametrize("sku", ["PZ-MARG", "beer-002", "missing", None])
+    def test_helpers_agree_with_list_scan(self, menu, catalog, sku):
+        assert resolve_menu_item(catalog, sku) == resolve_menu_item(menu, sku)
+        assert _resolve_item_name(sku, catalog) == _resolve_item_name(sku, menu)
+
+
+# =============================================================================
+# FILTERED VIEWS
+# =============================================================================
+
+class TestFilteredViews:
+    @pytest.fixture
+    def mixed(self):
+        return MenuCatalog([
+            _item("A", "Alpha", 9.0, tags=["spicy", "meat"]),
+            _item("B", "Bravo", 3.0, in_stock=False, tags=["spicy"]),
+            _item("C", "Charlie", 5.0, tags=["Vegan"]),
+            _item("D", "Delta", 5.0, tags=["spicy", "vegan"]),
+        ])
+
+    def test_tag_view_in_menu_order(self, mixed):
+        assert _skus(mixed.with_tag("SPICY")) == ["A", "B", "D"]
+        assert _skus(mixed.with_tag("vegan")) == ["C", "D"]
+        assert mixed.with_tag("sweet") == []
+
+    def test_in_stock_view(self, mixed):
+        assert _skus(mixed.in_stock()) == ["A", "C", "D"]
+
+    def test_price_between_cheapest_first(self, mixed):
+        assert _skus(mixed.price_between(4.0, 9.0)) == ["C", "D", "A"]
+        assert _skus(mixed.price_between(high=3.0)) == ["B"]
+
+    def test_where_combines_filters(self, mixed):
+        assert _skus(mixed.where(tags=["spicy"], in_stock=True)) == ["A", "D"]
+        assert _skus(mixed.where(tags=["spicy"], in_stock=False)) == ["B"]
+        assert _skus(mixed.where(tags=["spicy", "vegan"], max_price=5.0)) == ["D"]
+        assert _skus(mixed.where()) == ["A", "B", "C", "D"]
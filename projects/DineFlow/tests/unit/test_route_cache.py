@@ -0,0 +1,188 @@
+# DineFlow/tests/unit/test_route_cache.py
+import json
+import os
+import zlib
+from pathlib import Path
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from agents import route_cache
+from agents.route_cache import LEARNED_PATH, SOURCE_LEARNED, SemanticRouteCache
+from agents.router import IntentRouter
+
+
+# =============================================================================
+# SHARED FIXTURES
+# =============================================================================
+
+DIM = 64
+
+
+class BagOfWordsEmbedder:
+    """Deterministic stand-in for MiniLM: hashed word counts, L2-normalised."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, texts):
+        self.calls += 1
+        out = np.zeros((len(texts), DIM), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().replace("?", "").split():
+                out[row, zlib.crc32(word.encode()) % DIM] += 1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return out / norms
+
+
+SEED = [
+    {"text": "show me the menu", "target_agent": "MenuExpert", "intent": "INQUIRY"},
+    {"text": "i want a pizza", "target_agent": "OrderTaker", "intent": "ORDERING"},
+    {"text": "good morning", "target_agent": "Greeter", "intent": "GREETING"},
+]
+
+
+@pytest.fixture
+def seed_path(tmp_path):
+    path = tmp_path / "seed.json"
+    path.write_text(json.dumps(SEED))
+    return path
+
+
+@pytest.fixture
+def embed():
+    return BagOfWordsEmbedder()
+
+
+def _cache(embed, seed_path, learned_path=None, **kwargs):
+    return SemanticRouteCache(embed=embed, seed_path=seed_path, learned_path=learned_path, **kwargs)
+
+
+# =============================================================================
+# LOOKUP
+# =============================================================================
+
+class TestLookup:
+    def test_nearest_seed_above_threshold(self, embed, seed_path):
+        match = _cache(embed, seed_path).lookup("show me the menu?")
+        assert match.exemplar.target_agent == "MenuExpert"
+        assert match.similarity == pytest.approx(1.0, abs=1e-5)
+
+    def test_below_threshold_is_a_miss(self, embed, seed_path):
+        assert _cache(embed, seed_path).lookup("refund my card") is None
+
+    def test_close_rival_target_is_ambiguous(self, embed, tmp_path):
+        path = tmp_path / "seed.json"
+        path.write_text(json.dumps([
+            {"text": "pizza menu", "target_agent": "MenuExpert", "intent": "INQUIRY"},
+            {"text": "pizza menu", "target_agent": "OrderTaker", "intent": "ORDERING"},
+        ]))
+        cache = _cache(embed, path)
+        assert cache.lookup("pizza menu") is None
+        assert cache.stats()["ambiguous"] == 1
+
+    def test_never_loads_the_model(self, embed, seed_path):
+        cache = _cache(embed, seed_path, ready=lambda: False)
+        assert cache.lookup("show me the menu") is None
+        assert cache.learn("anything", "OrderTaker", "ORDERING", 1.0) is False
+        assert embed.calls == 0
+
+
+# =============================================================================
+# LEARNING
+# =============================================================================
+
+class TestLearning:
+    def test_confident_route_becomes_exemplar(self, embed, seed_path):
+        cache = _cache(embed, seed_path)
+        assert cache.learn("bring the check", "OrderTaker", "ORDERING", 0.95)
+        match = cache.lookup("bring the check")
+        assert match.exemplar.source == SOURCE_LEARNED
+
+    def test_low_confidence_and_duplicates_are_skipped(self, embed, seed_path):
+        cache = _cache(embed, seed_path)
+        assert not cache.learn("bring the check", "OrderTaker", "ORDERING", 0.7)
+        assert not cache.learn("show me the menu", "MenuExpert", "INQUIRY", 0.95)
+        assert cache.stats()["learned_exemplars"] == 0
+
+    def test_learned_routes_are_scoped_to_the_active_agent(self, embed, seed_path):
+        cache = _cache(embed, seed_path)
+        cache.learn("yes please", "MenuExpert", "INQUIRY", 0.95, active_agent="MenuExpert")
+        assert cache.lookup("yes please", active_agent="MenuExpert") is not None
+        assert cache.lookup("yes please", active_agent="OrderTaker") is None
+
+    def test_learned_routes_survive_restart(self, embed, seed_path, tmp_path):
+        learned = str(tmp_path / "routes" / "learned.jsonl")
+        _cache(embed, seed_path, learned).learn("bring the check", "OrderTaker", "ORDERING", 0.95)
+        restarted = _cache(embed, seed_path, learned)
+        assert restarted.lookup("bring the check").exemplar.target_agent == "OrderTaker"
+
+    def test_learned_file_is_bounded(self, embed, seed_path, tmp_path):
+        learned = tmp_path / "learned.jsonl"
+        cache = _cache(embed, seed_path, str(learned), max_learned=2)
+        texts = ["alpha beta", "gamma delta", "epsilon zeta", "eta theta", "iota kappa"]
+        for text in texts:
+            cache.learn(text, "OrderTaker", "ORDERING", 0.95)
+        rows = learned.read_text().splitlines()
+        assert len(rows) <= 2 * 2
+        assert json.loads(rows[-1])["text"] == "iota kappa"
+
+        # Oversized file (older process, larger cap) is compacted on load
+        with learned.open("a") as f:
+            f.writelines(json.dumps({"text": t, "target_agent": "OrderTaker", "intent": "ORDERING"}) + "\n"
+                         for t in ("lambda mu", "nu xi", "omicron pi"))
+        _cache(embed, seed_path, str(learned), max_learned=2).lookup("anything")
+        assert [json.loads(r)["text"] for r in learned.read_text().splitlines()] == ["nu xi", "omicron pi"]
+
+    def test_default_learned_path_is_anchored_to_the_package(self):
+        assert os.path.isabs(LEARNED_PATH)
+        assert Path(LEARNED_PATH).parent.parent == Path(route_cache.__file__).parent.parent
+
+    def test_oldest_learned_evicted_first(self, embed, seed_path):
+        cache = _cache(embed, seed_path, max_learned=2)
+        for text in ("alpha beta", "gamma delta", "epsilon zeta"):
+            cache.learn(text, "OrderTaker", "ORDERING", 0.95)
+        assert cache.stats()["learned_exemplars"] == 2
+        assert cache.lookup("alpha beta") is None
+        assert cache.lookup("epsilon zeta") is not None
+
+
+# =============================================================================
+# ROUTER INTEGRATION
+# =============================================================================
+
+LLM_ROUTE = ('{"action_type": "TRANSFER", "target_agent": "OrderTaker", '
+             '"intent": "ORDERING", "confidence": 0.95}')
+
+
+class TestRouterSemanticTier:
+    def test_semantic_hit_skips_the_llm(self, embed, seed_path):
+        router = IntentRouter(semantic_cache=_cache(embed, seed_path))
+        with patch("agents.router.call_llm") as llm:
+            action = router.route("show me the menu", "OrderTaker")
+        llm.assert_not_called()
+        assert action.target_agent == "MenuExpert"
+        assert action.meta["routing"] == "semantic"
+        assert action.meta["exemplar"] == "show me the menu"
+
+    def test_llm_route_is_learned_and_reused(self, embed, seed_path):
+        router = IntentRouter(semantic_cache=_cache(embed, seed_path))
+        with patch.object(IntentRouter, "_load_prompt", return_value="prompt"), \
+             patch("agents.router.call_llm", return_value=LLM_ROUTE) as llm:
+            first = router.route("bring the check", "OrderTaker")
+            second = router.route("bring the check", "OrderTaker")
+        assert llm.call_count == 1
+        assert first.meta["routing"] == "llm_fallback"
+        assert second.meta["routing"] == "semantic"
+        stats = router.stats()
+        assert stats["decisions"] == {"llm_fallback": 1, "semantic": 1}
+        assert stats["llm_calls_avoided"] == 1
+
+    def test_every_decision_logged_with_source(self, embed, seed_path, caplog):
+        router = IntentRouter(semantic_cache=_cache(embed, seed_path))
+        with caplog.at_level("INFO", logger="agents.router"):
+            router.route("hello", "OrderTaker")
+            router.route("show me the menu", "OrderTaker")
+        sources = [r.getMessage().split()[1] for r in caplog.records if r.getMessage().startswith("route ")]
+        assert sources == ["source=deterministic:greeting", "source=semantic"]
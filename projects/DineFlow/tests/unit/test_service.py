@@ -0,0 +1,258 @@
+# DineFlow/tests/unit/test_service.py
+import asyncio
+import queue
+from collections import Counter
+from unittest.mock import patch
+
+import httpx
+import pytest
+from service.app import BackgroundServer, DineFlowService, create_app
+from service.fake_llm import FakeLLM
+from service.workers import GoldenLoopHandler, SessionLocks, WorkerPool, WorkerUnavailable, _serve, worker_for
+from state_machine.session_repository import SessionRepository
+from state_machine.types import SessionState
+
+
+# =============================================================================
+# SHARED FIXTURES
+# =============================================================================
+
+class FakePool:
+    """In-process stand-in for WorkerPool: records submits, replays outcomes."""
+
+    def __init__(self, outcome=None):
+        self.outcome = outcome
+        self.submits = []
+        self.started = self.stopped = False
+
+    def start(self):
+        self.started = True
+
+    def stop(self):
+        self.stopped = True
+
+    def stats(self):
+        return {"workers": 1, "submitted": [len(self.submits)]}
+
+    async def submit(self, session_id, payload):
+        self.submits.append((session_id, payload))
+        if isinstance(self.outcome, BaseException):
+            raise self.outcome
+        return self.outcome or {"session_id": session_id, "response": "ok"}
+
+
+def _request(app, method, path, **kwargs):
+    async def go():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://service") as client:
+            return await client.request(method, path, **kwargs)
+    return asyncio.run(go())
+
+
+class CountingHandler:
+    """Worker-side handler (loaded by path in each process): numbers each session's turns."""
+
+    def __init__(self, delay=0.02):
+        self.delay = delay
+        self.turns = Counter()
+        self.in_flight = Counter()
+
+    async def __call__(self, session_id, payload):
+        self.in_flight[session_id] += 1
+        overlap = self.in_flight[session_id] > 1
+        await asyncio.sleep(self.delay)
+        self.in_flight[session_id] -= 1
+        if overlap:
+            raise RuntimeError(f"turns of {session_id} overlapped")
+        self.turns[session_id] += 1
+        return {"session_id": session_id, "turn": self.turns[session_id], "message": payload["message"]}
+
+
+def offline_golden_loop_handler(db_path):
+    """The real GoldenLoopHandler with long-term memory writes disabled (no embedding model here)."""
+    patch("orchestration.memory_manager.save_memory").start()
+    return GoldenLoopHandler(db_path=db_path)
+
+
+# =============================================================================
+# AFFINITY + LOCKS
+# =============================================================================
+
+class TestAffinity:
+    SESSIONS = [f"sess-{n:04d}" for n in range(2000)]
+
+    def test_stable_and_spread_evenly(self):
+        assignment = Counter(worker_for(s, 4) for s in self.SESSIONS)
+        assert set(assignment) == {0, 1, 2, 3}
+        assert all(400 <= n <= 600 for n in assignment.values())
+        assert [worker_for(s, 4) for s in self.SESSIONS[:50]] == [worker_for(s, 4) for s in self.SESSIONS[:50]]
+
+    def test_adding_a_worker_only_moves_sessions_onto_it(self):
+        moved = [s for s in self.SESSIONS if worker_for(s, 4) != worker_for(s, 5)]
+        assert {worker_for(s, 5) for s in moved} == {4}
+        assert len(moved) < len(self.SESSIONS) * 0.3
+
+    def test_single_worker(self):
+        assert worker_for("anything", 1) == 0
+
+
+class TestSessionLocks:
+    def test_same_session_serialised_others_concurrent(self):
+        locks = SessionLocks()
+        active = Counter()
+        peak = Counter()
+
+        async def turn(session_id):
+            async with locks.hold(session_id):
+                active[session_id] += 1
+                peak[session_id] = max(peak[session_id], active[session_id])
+                peak["all"] = max(peak["all"], sum(active[s] for s in ("a", "b")))
+                await asyncio.sleep(0.01)
+                active[session_id] -= 1
+
+        async def run():
+            await asyncio.gather(*(turn(s) for s in ["a", "b"] * 5))
+
+        asyncio.run(run())
+        assert peak["a"] == peak["b"] == 1
+        assert peak["all"] == 2
+        assert len(locks) == 0
+
+
+# =============================================================================
+# HTTP LAYER
+# =============================================================================
+
+class TestService:
+    def test_turn_is_forwarded_to_the_pool(self):
+        pool = FakePool()
+        response = _request(DineFlowService(pool), "POST", "/sessions/s-1/turns",
+                            json={"message": "hi", "user_id": "u1"})
+        assert response.status_code == 200
+        assert response.json() == {"session_id": "s-1", "response": "ok"}
+        assert pool.submits == [("s-1", {"message": "hi", "user_id": "u1"})]
+
+    @pytest.mark.parametrize("method, path, body, status", [
+        ("POST", "/sessions/s-1/turns", b"{not json", 400),
+        ("POST", "/sessions/s-1/turns", b'{"message": "  "}', 422),
+        ("POST", "/sessions/s-1/turns", b'["hi"]', 422),
+        ("GET", "/sessions/s-1/turns", None, 405),
+        ("POST", "/sessions/a%20b/turns", b'{"message": "hi"}', 404),
+        ("POST", "/orders", b'{"message": "hi"}', 404),
+    ])
+    def test_rejects_bad_requests(self, method, path, body, status):
+        pool = FakePool()
+        assert _request(DineFlowService(pool), method, path, content=body).status_code == status
+        assert pool.submits == []
+
+    def test_oversized_body(self):
+        body = b'{"message": "' + b"x" * 70_000 + b'"}'
+        assert _request(DineFlowService(FakePool()), "POST", "/sessions/s/turns", content=body).status_code == 413
+
+    @pytest.mark.parametrize("outcome, status", [
+        (asyncio.TimeoutError(), 504),
+        (WorkerUnavailable("Worker pool is not running"), 503),
+        (RuntimeError("KeyError: 'cart'"), 500),
+    ])
+    def test_pool_failures(self, outcome, status):
+        response = _request(DineFlowService(FakePool(outcome)), "POST", "/sessions/s/turns",
+                            json={"message": "hi"})
+        assert response.status_code == status
+
+    def test_internal_errors_are_logged_not_returned(self, caplog):
+        response = _request(DineFlowService(FakePool(RuntimeError("KeyError: 'cart'"))), "POST",
+                            "/sessions/s/turns", json={"message": "hi"})
+        assert response.json() == {"error": "turn failed", "session_id": "s"}
+        assert "KeyError: 'cart'" in caplog.text
+
+    def test_healthz(self):
+        assert _request(DineFlowService(FakePool()), "GET", "/healthz").json()["workers"] == 1
+
+
+# =============================================================================
+# WORKER PROCESSES
+# =============================================================================
+
+class TestWorkerPool:
+    def test_affinity_and_per_session_ordering_across_processes(self):
+        sessions = [f"s{n}" for n in range(8)]
+
+        async def run(pool):
+            jobs = [pool.submit(s, {"message": f"turn {k}"}) for k in range(3) for s in sessions]
+            return await asyncio.gather(*jobs)
+
+        with WorkerPool(workers=2, handler="tests.unit.test_service:CountingHandler") as pool:
+            results = asyncio.run(run(pool))
+            stats = pool.stats()
+
+        by_session = {}
+        for result in results:
+            by_session.setdefault(result["session_id"], []).append(result)
+        for session_id, turns in by_session.items():
+            assert sorted(r["turn"] for r in turns) == [1, 2, 3]
+            assert {r["worker"] for r in turns} == {worker_for(session_id, 2)}
+            assert len({r["pid"] for r in turns}) == 1
+        assert len({r["pid"] for r in results}) == 2
+        assert sum(stats["submitted"]) == 24 and stats["failed"] == 0
+
+    def test_submit_requires_a_running_pool(self):
+        with pytest.raises(WorkerUnavailable):
+            asyncio.run(WorkerPool(workers=1).submit("s", {"message": "hi"}))
+
+
+class TestGoldenLoopHandler:
+    def test_failed_turn_does_not_leak_into_the_next(self, tmp_path):
+        handler = offline_golden_loop_handler(str(tmp_path / "sessions.sqlite"))
+        handler.repository.save(SessionState(session_id="s1", user_id="u1", active_agent="OrderTaker"))
+
+        async def failing_loop(session, **_):
+            session.cart["PZ-PEP"] = 3
+            raise RuntimeError("LLM down")
+
+        handler._golden_loop = failing_loop
+        with pytest.raises(RuntimeError):
+            asyncio.run(handler("s1", {"message": "a pepperoni"}))
+        assert handler.repository.get("s1").cart == {}
+        handler.repository.close()
+
+
+    def test_worker_shutdown_closes_the_loops_llm_client(self, tmp_path):
+        from llm.client import transport
+
+        handler = offline_golden_loop_handler(str(tmp_path / "sessions.sqlite"))
+        inbox = queue.Queue()
+        inbox.put(None)
+
+        async def serve():
+            client, _ = transport._async_state()
+            await _serve(0, inbox, queue.Queue(), handler)
+            return client
+
+        with patch("tools.search.vector.memory_writer"):
+            client = asyncio.run(serve())
+        assert client.is_closed()
+
+
+class TestEndToEnd:
+    def test_golden_loop_over_http_with_a_fake_llm(self, tmp_path):
+        db_path = str(tmp_path / "sessions.sqlite")
+        fake = FakeLLM()
+        with BackgroundServer(fake) as llm:
+            env = {"OPENAI_BASE_URL": llm.url + "/v1", "OPENAI_API_KEY": "fake", "HF_HUB_OFFLINE": "1"}
+            app = create_app(workers=2, handler="tests.unit.test_service:offline_golden_loop_handler",
+                             handler_kwargs={"db_path": db_path}, env=env, timeout=30)
+            with BackgroundServer(app, lifespan="on") as service, \
+                    httpx.Client(base_url=service.url, timeout=30) as client:
+                replies = [client.post(f"/sessions/{s}/turns", json={"message": "hi", "user_id": "u1"})
+                           for s in ("alpha", "beta", "alpha")]
+
+        assert [r.status_code for r in replies] == [200, 200, 200]
+        first, _, again = (r.json() for r in replies)
+        assert first["response"] == "Hello from DineFlow! What can I get you?"
+        assert first["active_agent"] == "Greeter"
+        assert (first["turn_id"], again["turn_id"]) == (1, 2)
+        assert first["pid"] == again["pid"]
+        assert fake.calls == 3
+        with SessionRepository(db_path) as repository:
+            assert repository.get("alpha").turn_id == 2
+            assert repository.get("beta").user_id == "u1"
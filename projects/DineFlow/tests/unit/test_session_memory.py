@@ -0,0 +1,188 @@
+# DineFlow/tests/unit/test_session_memory.py
+import numpy as np
+import pytest
+import tools.search.vector as vector
+from tools.search.memory_writer import MemoryWriter
+from tools.search.session_memory import SessionMemoryStore
+
+
+# =============================================================================
+# SHARED FIXTURES
+# =============================================================================
+
+VOCAB = ["pizza", "beer", "nuts", "allergic", "spicy", "vegan", "order", "cart"]
+
+
+def _bag_embed(texts):
+    """Bag-of-words over a tiny vocabulary — cosine ranks by shared words."""
+    rows = []
+    for text in texts:
+        words = text.lower().split()
+        rows.append([float(sum(w.strip(".,:[]") == v for w in words)) for v in VOCAB] + [0.01])
+    return np.asarray(rows, dtype=np.float32)
+
+
+class CountingEmbed:
+    def __init__(self):
+        self.texts = []
+
+    def __call__(self, texts):
+        self.texts.extend(texts)
+        return _bag_embed(texts)
+
+
+class FakeCollection:
+    """The subset of a Chroma collection that vector.py's memory path uses."""
+
+    def __init__(self):
+        self.rows = []   # (id, doc, meta, vec)
+        self.queries = 0
+        self.gets = 0
+
+    def add(self, ids, documents, metadatas, embeddings):
+        self.rows.extend(zip(ids, documents, metadatas, embeddings))
+
+    def get(self, where, include):
+        self.gets += 1
+        rows = [r for r in self.rows if r[2]["session_id"] == where["session_id"]]
+        return {"ids": [r[0] for r in rows], "documents": [r[1] for r in rows],
+                "embeddings": [r[3] for r in rows]}
+
+    def query(self, query_embeddings, where, n_results):
+        self.queries += 1
+        rows = [r for r in self.rows if r[2]["session_id"] == where["session_id"]]
+        q = np.asarray(query_embeddings[0])
+        rows.sort(key=lambda r: -float(np.dot(r[3], q) / (np.linalg.norm(r[3]) * np.linalg.norm(q))))
+        return {"documents": [[r[1] for r in rows[:n_results]]]}
+
+
+class FakeBackend:
+    def __init__(self):
+        self.memory_coll = FakeCollection()
+        self.embed = CountingEmbed()
+
+    def embed_query(self, texts):
+        return _bag_embed(texts)
+
+
+@pytest.fixture
+def fake_vector(monkeypatch):
+    """vector.py's memory functions wired to in-memory fakes; 3-turn local tier."""
+    backend = FakeBackend()
+    writer = MemoryWriter(vector._add_memory_batch)
+    monkeypatch.setattr(vector, "backend", backend)
+    monkeypatch.setattr(vector, "session_memory", SessionMemoryStore(max_turns=3))
+    monkeypatch.setattr(vector, "memory_writer", writer)
+    yield backend
+    writer.close()
+
+
+# =============================================================================
+# STORE
+# =============================================================================
+
+class TestSessionMemoryStore:
+    def test_unseeded_session_falls_back(self):
+        store = SessionMemoryStore()
+        assert store.search("s1", _bag_embed(["pizza"])[0], 2, _bag_embed) is None
+        store.record("s1", "t1", "pizza")  # ignored until seeded
+        assert not store.is_seeded("s1")
+
+    def test_search_ranks_by_cosine(self):
+        store = SessionMemoryStore()
+        docs = ["I want beer", "I am allergic to nuts", "spicy pizza please"]
+        store.seed("s1", ["a", "b", "c"], docs, list(_bag_embed(docs)))
+        assert store.search("s1", _bag_embed(["nuts allergic"])[0], 1, _bag_embed) == [docs[1]]
+        assert store.search("s1", _bag_embed(["pizza"])[0], 2, _bag_embed)[0] == docs[2]
+
+    def test_recorded_turns_embedded_lazily_once(self):
+        store = SessionMemoryStore()
+        store.seed("s1", [], [])
+        embed = CountingEmbed()
+        store.record("s1", "t1", "beer please")
+        store.record("s1", "t2", "vegan pizza")
+        assert store.search("s1", _bag_embed(["vegan"])[0], 1, embed) == ["vegan pizza"]
+        store.search("s1", _bag_embed(["beer"])[0], 1, embed)
+        assert embed.texts == ["beer please", "vegan pizza"]
+
+    def test_attached_vectors_skip_embedding(self):
+        store = SessionMemoryStore()
+        store.seed("s1", [], [])
+        store.record("s1", "t1", "beer please")
+        store.attach(["s1"], ["t1"], _bag_embed(["beer please"]))
+        embed = CountingEmbed()
+        assert store.search("s1", _bag_embed(["beer"])[0], 1, embed) == ["beer please"]
+        assert embed.texts == []
+
+    def test_overflow_switches_session_to_fallback(self):
+        store = SessionMemoryStore(max_turns=2)
+        store.seed("s1", [], [])
+        store.record("s1", "t1", "one")
+        store.record("s1", "t2", "two")
+        assert store.search("s1", _bag_embed(["x"])[0], 1, _bag_embed) is not None
+        store.record("s1", "t3", "three")
+        assert store.search("s1", _bag_embed(["x"])[0], 1, _bag_embed) is None
+        assert store.stats()["fallbacks"] == 1
+
+    def test_seeding_an_oversized_session_falls_back(self):
+        store = SessionMemoryStore(max_turns=1)
+        store.seed("s1", ["a", "b"], ["x", "y"])
+        assert store.is_seeded("s1")
+        assert store.search("s1", _bag_embed(["x"])[0], 1, _bag_embed) is None
+
+    def test_start_registers_an_empty_session_once(self):
+        store = SessionMemoryStore()
+        store.start("s1")
+        assert store.search("s1", _bag_embed(["x"])[0], 1, _bag_embed) == []
+        store.record("s1", "t1", "pizza")
+        store.start("s1")  # already known — keeps its turns
+        assert store.search("s1", _bag_embed(["pizza"])[0], 1, _bag_embed) == ["pizza"]
+
+    def test_least_recently_used_sessions_forgotten(self):
+        store = SessionMemoryStore(max_sessions=2)
+        store.seed("a", [], [])
+        store.seed("b", [], [])
+        store.search("a", _bag_embed(["x"])[0], 1, _bag_embed)
+        store.seed("c", [], [])
+        assert store.is_seeded("a") and store.is_seeded("c")
+        assert not store.is_seeded("b")
+
+
+# =============================================================================
+# retrieve_memories INTEGRATION
+# =============================================================================
+
+class TestRetrieveMemories:
+    def test_short_session_never_queries_chroma(self, fake_vector):
+        assert vector.retrieve_memories("s1", "anything") == []
+        vector.save_memory("s1", "OrderTaker", "I am allergic to nuts", "Noted.")
+        vector.save_memory("s1", "OrderTaker", "one beer", "Added.")
+        vector.memory_writer.flush(timeout=2)
+
+        past = vector.retrieve_memories("s1", "nuts", n=1)
+        assert past == ["[OrderTaker] User: I am allergic to nuts\n[OrderTaker] DineFlow: Noted."]
+        assert fake_vector.memory_coll.queries == 0
+        # each turn document embedded exactly once (by the writer)
+        assert len(fake_vector.embed.texts) == 2
+
+    def test_new_session_is_never_seeded_from_chroma(self, fake_vector):
+        vector.start_session_memory("s1")
+        assert vector.retrieve_memories("s1", "anything") == []
+        vector.save_memory("s1", "OrderTaker", "spicy pizza", "Added.")
+        assert vector.retrieve_memories("s1", "pizza", n=1)[0].startswith("[OrderTaker] User: spicy pizza")
+        assert fake_vector.memory_coll.gets == 0
+        assert fake_vector.memory_coll.queries == 0
+
+    def test_resumed_session_is_seeded_from_chroma(self, fake_vector):
+        vector.save_memory("s1", "OrderTaker", "spicy pizza", "Added.", sync=True)
+        vector.session_memory.forget("s1")   # as if a new process picked the session up
+
+        assert vector.retrieve_memories("s1", "pizza", n=1)[0].startswith("[OrderTaker] User: spicy pizza")
+        assert fake_vector.memory_coll.queries == 0
+
+    def test_large_session_falls_back_to_chroma(self, fake_vector):
+        vector.retrieve_memories("s1", "seed")
+        for i in range(4):
+            vector.save_memory("s1", "OrderTaker", f"order {i} pizza", "Added.")
+        assert vector.retrieve_memories("s1", "pizza", n=2)
+        assert fake_vector.memory_coll.queries == 1
@@ -0,0 +1,341 @@
+# DineFlow/tests/unit/test_session_repository.py
+import json
+import sqlite3
+import threading
+from unittest.mock import patch
+
+import pytest
+from state_machine.session_repository import SessionRepository, main
+from state_machine.types import ContextItem, ContextScope, SessionState
+
+
+# =============================================================================
+# SHARED FIXTURES
+# =============================================================================
+
+@pytest.fixture
+def repository(tmp_path):
+    repo = SessionRepository(str(tmp_path / "sessions.sqlite"))
+    yield repo
+    repo.close()
+
+
+def _session(session_id, user_id="u1", status="DRAFT", **fields):
+    return SessionState(session_id=session_id, user_id=user_id, active_agent="OrderTaker",
+                        order_status=status, **fields)
+
+
+# =============================================================================
+# CRUD
+# =============================================================================
+
+class TestSessionRepository:
+    def test_round_trip_preserves_full_state(self, repository):
+        session = _session(
+            "s1", cart={"PZ-PEP": 2}, context_scope=ContextScope.FULL_CATALOG, turn_id=4,
+            active_context={"PZ-PEP": ContextItem(sku="PZ-PEP", name="Pepperoni Pizza", mentioned=True)},
+        )
+        repository.save(session)
+        assert repository.get("s1") == session
+        assert repository.get("missing") is None
+
+    def test_save_is_an_upsert(self, repository):
+        session = _session("s1")
+        repository.save(session)
+        session.cart["BV-COKE"] = 1
+        session.order_status = "PLACED"
+        repository.save(session)
+        assert repository.count() == 1
+        assert repository.get("s1").cart == {"BV-COKE": 1}
+        assert repository.find_active("u1") is None
+
+    def test_find_active_returns_newest_draft_for_user(self, repository):
+        repository.save(_session("old"))
+        repository.save(_session("placed", status="PLACED"))
+        repository.save(_session("other-user", user_id="u2"))
+        repository.save(_session("new"))
+        assert repository.find_active("u1").session_id == "new"
+        assert repository.find_active("u1", "PLACED").session_id == "placed"
+        assert repository.find_active("nobody") is None
+
+    def test_uses_wal_and_user_status_index(self, repository):
+        db = repository._conn()
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        plan = db.execute(
+            "EXPLAIN QUERY PLAN SELECT state FROM sessions WHERE user_id = ? AND order_status = ?",
+            ("u1", "DRAFT"),
+        ).fetchall()
+        assert any("ix_sessions_user_status" in row[-1] for row in plan)
+
+    def test_delete(self, repository):
+        repository.save(_session("s1"))
+        assert repository.delete("s1") is True
+        assert repository.delete("s1") is False
+
+    def test_concurrent_writers_lose_nothing(self, tmp_path):
+        path = str(tmp_path / "sessions.sqlite")
+        repositories = [SessionRepository(path) for _ in range(4)]
+
+        def writer(n, repo):
+            for i in range(25):
+                repo.save(_session(f"w{n}-{i}", user_id=f"u{n}"))
+
+        threads = [threading.Thread(target=writer, args=(n, r)) for n, r in enumerate(repositories)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert repositories[0].count() == 100
+        for repo in repositories:
+            repo.close()
+
+
+# =============================================================================
+# ACTIVE-SESSION INDEX + HOT-SESSION CACHE
+# =============================================================================
+
+def _parses(call, *args):
+    with patch.object(SessionState, "model_validate_json",
+                      wraps=SessionState.model_validate_json) as parse:
+        result = call(*args)
+    return result, parse.call_count
+
+
+class TestActiveSessionIndex:
+    def test_find_active_reads_the_index_not_the_history(self, repository):
+        db = repository._conn()
+        plan = db.execute(
+            "EXPLAIN QUERY PLAN SELECT s.session_id, s.version FROM user_sessions u"
+            " JOIN sessions s ON s.session_id = u.session_id"
+            " WHERE u.user_id = ? AND u.order_status = ?", ("u1", "DRAFT"),
+        ).fetchall()
+        details = " ".join(row[-1] for row in plan)
+        assert "SCAN" not in details
+
+    def test_placing_an_order_hands_the_slot_to_the_next_draft(self, repository):
+        repository.save(_session("older"))
+        newer = _session("newer")
+        repository.save(newer)
+        newer.order_status = "PLACED"
+        repository.save(newer)
+        assert repository.find_active("u1").session_id == "older"
+        assert repository.find_active("u1", "PLACED").session_id == "newer"
+
+    def test_delete_repoints_the_index(self, repository):
+        repository.save(_session("older"))
+        repository.save(_session("newer"))
+        repository.delete("newer")
+        assert repository.find_active("u1").session_id == "older"
+        repository.delete("older")
+        assert repository.find_active("u1") is None
+
+    def test_hot_session_is_served_without_parsing(self, repository):
+        session = _session("s1", cart={"PZ-PEP": 1})
+        repository.save(session)
+        found, parses = _parses(repository.find_active, "u1")
+        assert found is session
+        assert parses == 0
+        assert repository.stats()["hits"] == 1
+
+    def test_cold_session_is_parsed_once_then_cached(self, repository):
+        repository.save(_session("s1"))
+        fresh = SessionRepository(repository.path)
+        first, parses = _parses(fresh.get, "s1")
+        second, again = _parses(fresh.get, "s1")
+        assert (parses, again) == (1, 0)
+        assert second is first
+        fresh.close()
+
+    def test_write_from_another_repository_invalidates_the_cache(self, repository):
+        repository.save(_session("s1"))
+        other = SessionRepository(repository.path)
+        other.save(_session("s1", cart={"BV-COKE": 2}))
+        assert repository.find_active("u1").cart == {"BV-COKE": 2}
+        assert repository.get("s1").cart == {"BV-COKE": 2}
+        assert repository.stats()["stale"] == 1
+        other.close()
+
+    def test_unsaved_assignments_are_not_served(self, repository):
+        repository.save(_session("s1"))
+        failed = repository.get("s1")
+        failed.turn_id = 9
+        reloaded = repository.get("s1")
+        assert reloaded is not failed
+        assert reloaded.turn_id == 0
+        assert repository.stats()["hits"] == 1
+
+    def test_discard_drops_in_place_edits(self, repository):
+        repository.save(_session("s1"))
+        failed = repository.get("s1")
+        failed.cart["PZ-PEP"] = 3
+        repository.discard("s1")
+        reloaded = repository.get("s1")
+        assert reloaded is not failed
+        assert reloaded.cart == {}
+        reloaded.cart["BV-COKE"] = 1
+        repository.save(reloaded)
+        assert repository.stats()["deltas"] == 1
+
+    def test_lru_is_bounded(self, tmp_path):
+        repo = SessionRepository(str(tmp_path / "sessions.sqlite"), cache_size=2)
+        for n in range(3):
+            repo.save(_session(f"s{n}", user_id=f"u{n}"))
+        assert repo.stats()["size"] == 2
+        _, parses = _parses(repo.get, "s0")
+        assert parses == 1
+        repo.close()
+
+    def test_upgrades_a_database_without_the_index(self, tmp_path):
+        path = str(tmp_path / "legacy.sqlite")
+        db = sqlite3.connect(path)
+        db.execute("CREATE TABLE sessions (session_id TEXT PRIMARY KEY, user_id TEXT NOT NULL,"
+                   " order_status TEXT NOT NULL, state TEXT NOT NULL, updated_at REAL NOT NULL)")
+        for session_id, updated_at in (("old", 1.0), ("new", 2.0)):
+            db.execute("INSERT INTO sessions VALUES (?, 'u1', 'DRAFT', ?, ?)",
+                       (session_id, _session(session_id).model_dump_json(), updated_at))
+        db.commit()
+        db.close()
+        with SessionRepository(path) as repo:
+            assert repo.find_active("u1").session_id == "new"
+            repo.save(_session("old", cart={"PZ-PEP": 1}))
+            assert repo.find_active("u1").session_id == "old"
+
+
+# =============================================================================
+# DELTA PERSISTENCE
+# =============================================================================
+
+def _stored(repository, session_id):
+    db = repository._conn()
+    state = db.execute("SELECT state FROM sessions WHERE session_id = ?", (session_id,)).fetchone()[0]
+    events = [json.loads(e) for (e,) in db.execute(
+        "SELECT events FROM session_events WHERE session_id = ? ORDER BY seq", (session_id,))]
+    return state, events
+
+
+def _play_turn(session):
+    session.turn_id += 1
+    session.active_agent = "MenuExpert"
+    session.cart["PZ-PEP"] = session.cart.get("PZ-PEP", 0) + 1
+    session.cart.pop("BV-COKE", None)
+    session.active_context["PZ-PEP"].selected = True
+    session.active_context["WG-HOT"] = ContextItem(sku="WG-HOT", name="Hot Wings", mentioned=True)
+
+
+class TestDeltaPersistence:
+    @pytest.fixture
+    def saved(self, repository):
+        session = _session(
+            "s1", cart={"BV-COKE": 1},
+            active_context={"PZ-PEP": ContextItem(sku="PZ-PEP", name="Pepperoni Pizza", mentioned=True)},
+        )
+        repository.save(session)
+        return session
+
+    def test_dirty_fields_track_assignments(self):
+        session = _session("s1")
+        assert session.dirty_fields == set()
+        session.turn_id += 1
+        session.order_status = "PLACED"
+        assert session.dirty_fields == {"turn_id", "order_status"}
+        assert session == _session("s1", turn_id=1, status="PLACED")
+
+    def test_turn_appends_only_its_events(self, repository, saved):
+        snapshot, _ = _stored(repository, "s1")
+        _play_turn(saved)
+        repository.save(saved)
+
+        state, events = _stored(repository, "s1")
+        assert state == snapshot
+        assert events == [[
+            ["agent", None, "MenuExpert"],
+            ["set", "turn_id", 1],
+            ["cart", "PZ-PEP", 1],
+            ["cart", "BV-COKE", None],
+            ["context", "PZ-PEP", {"sku": "PZ-PEP", "name": "Pepperoni Pizza", "mentioned": True,
+                                   "selected": True, "last_mentioned_turn": 0, "confidence": 1.0}],
+            ["context", "WG-HOT", {"sku": "WG-HOT", "name": "Hot Wings", "mentioned": True,
+                                   "selected": False, "last_mentioned_turn": 0, "confidence": 1.0}],
+        ]]
+        assert repository.stats()["deltas"] == 1
+
+    def test_unchanged_session_appends_nothing(self, repository, saved):
+        repository.save(saved)
+        assert _stored(repository, "s1")[1] == []
+
+    def test_load_replays_the_log(self, repository, saved):
+        for _ in range(3):
+            _play_turn(saved)
+            repository.save(saved)
+        fresh = SessionRepository(repository.path)
+        loaded = fresh.find_active("u1")
+        assert loaded == saved
+        assert loaded.cart == {"PZ-PEP": 3}
+        assert fresh.stats()["replayed"] == 1
+        # The replayed copy keeps saving deltas
+        _play_turn(loaded)
+        fresh.save(loaded)
+        assert len(_stored(fresh, "s1")[1]) == 4
+        fresh.close()
+
+    def test_log_is_compacted_into_a_snapshot(self, tmp_path):
+        repo = SessionRepository(str(tmp_path / "sessions.sqlite"), snapshot_every=2)
+        session = _session("s1", active_context={
+            "PZ-PEP": ContextItem(sku="PZ-PEP", name="Pepperoni Pizza")})
+        repo.save(session)
+        for expected_events in (1, 2, 0, 1):
+            _play_turn(session)
+            repo.save(session)
+            assert len(_stored(repo, "s1")[1]) == expected_events
+        state, _ = _stored(repo, "s1")
+        assert json.loads(state)["turn_id"] == 3
+        assert SessionRepository(repo.path).get("s1") == session
+        repo.close()
+
+    def test_row_written_elsewhere_gets_a_full_snapshot(self, repository, saved):
+        other = SessionRepository(repository.path)
+        other.save(_session("s1", cart={"BV-COKE": 5}, turn_id=9))
+        _play_turn(saved)
+        repository.save(saved)
+        state, events = _stored(repository, "s1")
+        assert events == []
+        assert SessionState.model_validate_json(state) == saved
+        other.close()
+
+
+# =============================================================================
+# JSON MIGRATION
+# =============================================================================
+
+class TestJsonMigration:
+    def _write_store(self, tmp_path, data):
+        path = tmp_path / "session_store.json"
+        path.write_text(json.dumps(data, indent=2))
+        return str(path)
+
+    def test_imports_valid_sessions_and_reports_invalid(self, repository, tmp_path):
+        json_path = self._write_store(tmp_path, {
+            "sess-a": _session("sess-a", cart={"PZ-PEP": 1}).model_dump(mode="json"),
+            "sess-b": {"user_id": "u2", "active_agent": "Greeter"},
+            "sess-bad": {"user_id": "u3"},
+        })
+        report = repository.import_json(json_path)
+        assert report.imported == 2
+        assert report.skipped == ["sess-bad"]
+        assert repository.get("sess-a").cart == {"PZ-PEP": 1}
+        # session_id falls back to the JSON key
+        assert repository.get("sess-b").user_id == "u2"
+
+    def test_reimport_is_idempotent(self, repository, tmp_path):
+        json_path = self._write_store(tmp_path, {"s1": _session("s1").model_dump(mode="json")})
+        repository.import_json(json_path)
+        repository.import_json(json_path)
+        assert repository.count() == 1
+
+    def test_command_line_tool(self, tmp_path, capsys):
+        json_path = self._write_store(tmp_path, {"s1": _session("s1").model_dump(mode="json")})
+        db_path = str(tmp_path / "out.sqlite")
+        assert main([json_path, db_path]) == 0
+        assert "Imported 1 session(s)" in capsys.readouterr().out
+        with SessionRepository(db_path) as repo:
+            assert repo.get("s1") is not None
@@ -0,0 +1,81 @@
+# DineFlow/tests/unit/test_turn_features.py
+import re
+import string
+
+import pytest
+from validation.turn_features import (
+    CATEGORICAL_PATTERNS, COMPARATOR_PATTERNS, GREETINGS, POLITENESS_RE, turn_features,
+)
+
+
+# =============================================================================
+# SHARED FIXTURES
+# =============================================================================
+
+INPUTS = [
+    "Hello!", "thank you", "add 2 pepperoni pizzas", "Anything spicy?",
+    "what do you have under $10", "same again please", "the second one",
+    "2", "three", "remove 3", "Any vegan options?", "cheapest beer",
+    "  Which pizza is mild?  ", "sab add kar do", "", "!!!", "one more, thanks",
+]
+
+
+def _old_router(text):
+    text = text.lower().strip()
+    text_clean = text.translate(str.maketrans('', '', string.punctuation))
+    return text_clean, set(text_clean.split())
+
+
+def _old_resolver_clean(text):
+    text = text.lower().strip()
+    text = re.sub(r"[^\w\s]", "", text)
+    text = POLITENESS_RE.sub("", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+# =============================================================================
+# PARITY WITH THE PER-STAGE NORMALISATION IT REPLACES
+# =============================================================================
+
+class TestParity:
+    @pytest.mark.parametrize("text", INPUTS)
+    def test_router_views(self, text):
+        bare, tokens = _old_router(text)
+        f = turn_features(text)
+        assert f.bare == bare and f.token_set == tokens
+        assert f.is_greeting == (bare in GREETINGS)
+
+    @pytest.mark.parametrize("text", INPUTS)
+    def test_resolver_views(self, text):
+        clean = _old_resolver_clean(text)
+        f = turn_features(text)
+        assert f.clean == clean
+        match = re.search(r"\b(\d+)\b", clean)
+        assert f.first_number == (int(match.group(1)) if match else None)
+
+    @pytest.mark.parametrize("text", INPUTS)
+    def test_classifier_flags(self, text):
+        lowered = text.lower().strip()
+        f = turn_features(text)
+        assert f.is_categorical == any(p in lowered for p in CATEGORICAL_PATTERNS)
+        assert f.is_comparator == any(p in lowered for p in COMPARATOR_PATTERNS)
+
+    @pytest.mark.parametrize("text", INPUTS)
+    def test_gate_words(self, text):
+        expected = ''.join(c if c.isalnum() or c == ' ' else ' ' for c in text.lower()).split()
+        assert list(turn_features(text).words) == expected
+
+
+# =============================================================================
+# SHARING
+# =============================================================================
+
+class TestSharing:
+    def test_same_input_returns_the_same_object(self):
+        assert turn_features("add a beer") is turn_features("add a beer")
+
+    def test_positions_and_flags(self):
+        f = turn_features("the LAST one please")
+        assert f.position == -1
+        assert turn_features("add 2 beers").has_order_verb
+        assert turn_features("one more").is_continuation
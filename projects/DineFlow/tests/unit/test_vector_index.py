@@ -0,0 +1,249 @@
+# DineFlow/tests/unit/test_vector_index.py
+import os
+from unittest.mock import patch
+
+import numpy as np
+import pytest
+from tools.registry import get_menu_items
+import tools.search.vector as vector
+from tools.search.vector import VectorBackend
+from tools.search.vector_index import MenuVectorIndex, menu_document, menu_fingerprint
+
+
+# =============================================================================
+# SHARED FIXTURES
+# =============================================================================
+
+DIM = 16
+
+
+def _hash_embed(texts):
+    """Deterministic stand-in for the encoder: one seeded vector per text."""
+    rows = [np.random.default_rng(abs(hash(t)) % (2 ** 32)).standard_normal(DIM) for t in texts]
+    return np.asarray(rows, dtype=np.float32)
+
+
+class RecordingEncoder:
+    """SentenceTransformer-shaped encoder that records which texts it embedded."""
+
+    def __init__(self):
+        self.embedded = []
+
+    def encode(self, texts, **_):
+        self.embedded.extend(texts)
+        return _hash_embed(texts)
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(3)
+
+
+@pytest.fixture
+def index(rng):
+    skus = [f"SKU-{i:03d}" for i in range(50)]
+    return MenuVectorIndex(skus, rng.standard_normal((50, DIM)))
+
+
+def _brute_force(index, query, k):
+    q = query / np.linalg.norm(query)
+    scores = np.asarray(index.matrix) @ q
+    order = sorted(range(len(scores)), key=lambda i: -scores[i])[:k]
+    return [index.skus[i] for i in order]
+
+
+# =============================================================================
+# QUERIES
+# =============================================================================
+
+class TestTopK:
+    def test_rows_are_normalised_float32(self, index):
+        assert index.matrix.dtype == np.float32
+        assert index.matrix.flags["C_CONTIGUOUS"]
+        assert np.allclose(np.linalg.norm(index.matrix, axis=1), 1.0, atol=1e-6)
+
+    @pytest.mark.parametrize("k", [1, 3, 10, 50, 80])
+    def test_top_k_matches_brute_force(self, index, rng, k):
+        for _ in range(5):
+            query = rng.standard_normal(DIM)
+            assert index.search(query, k) == _brute_force(index, query, k)
+
+    def test_scores_are_cosine_similarity_descending(self, index, rng):
+        hits = index.top_k(rng.standard_normal(DIM), 5)
+        scores = [s for _, s in hits]
+        assert scores == sorted(scores, reverse=True)
+        assert all(-1.0 <= s <= 1.0 for s in scores)
+
+    def test_batch_matches_single(self, index, rng):
+        queries = rng.standard_normal((7, DIM))
+        assert index.search_batch(queries, 4) == [index.search(q, 4) for q in queries]
+
+    def test_empty_index_and_zero_k(self, index, rng):
+        empty = MenuVectorIndex.build([], _hash_embed)
+        assert len(empty) == 0
+        assert empty.search(rng.standard_normal(DIM)) == []
+        assert index.search(rng.standard_normal(DIM), 0) == []
+
+    def test_mask_excludes_rows_before_selection(self, index, rng):
+        query = rng.standard_normal(DIM)
+        mask = np.arange(len(index)) % 2 == 0
+        allowed = [sku for sku in _brute_force(index, query, len(index))
+                   if int(sku[-3:]) % 2 == 0]
+        assert index.search(query, 5, mask) == allowed[:5]
+        assert index.search(query, 5, np.zeros(len(index), dtype=bool)) == []
+
+    def test_shape_mismatch_rejected(self):
+        with pytest.raises(ValueError):
+            MenuVectorIndex(["A", "B"], np.zeros((3, DIM)))
+
+
+# =============================================================================
+# BUILD & PERSISTENCE
+# =============================================================================
+
+class TestBuildAndPersistence:
+    def test_build_dedupes_by_sku_last_wins(self):
+        menu = get_menu_items()
+        changed = menu[0].model_copy(update={"description": "Changed."})
+        index = MenuVectorIndex.build(menu + [changed], _hash_embed)
+        assert index.skus == [i.sku for i in menu]
+        expected = _hash_embed([menu_document(changed)])[0]
+        assert np.allclose(index.matrix[0], expected / np.linalg.norm(expected), atol=1e-6)
+
+    def test_exact_document_is_its_own_nearest_neighbour(self):
+        menu = get_menu_items()
+        index = MenuVectorIndex.build(menu, _hash_embed)
+        for item in menu:
+            assert index.search(_hash_embed([menu_document(item)])[0], 1) == [item.sku]
+
+    def test_save_load_roundtrip_is_memory_mapped(self, tmp_path):
+        menu = get_menu_items()
+        index = MenuVectorIndex.build(menu, _hash_embed, model_name="m")
+        path = str(tmp_path / "idx" / "menu.npy")
+        index.save(path)
+
+        loaded = MenuVectorIndex.load(path, fingerprint=menu_fingerprint(menu, "m"))
+        assert isinstance(loaded.matrix, np.memmap)
+        assert loaded.skus == index.skus
+        assert np.array_equal(np.asarray(loaded.matrix), index.matrix)
+
+    def test_load_rejects_stale_fingerprint(self, tmp_path):
+        menu = get_menu_items()
+        path = str(tmp_path / "menu.npy")
+        MenuVectorIndex.build(menu, _hash_embed, model_name="m").save(path)
+
+        assert MenuVectorIndex.load(path, fingerprint=menu_fingerprint(menu, "other-model")) is None
+        assert MenuVectorIndex.load(path, fingerprint=menu_fingerprint(menu[:-1], "m")) is None
+
+    def test_matrix_is_committed_with_its_sidecar(self, tmp_path):
+        """A crash after the new matrix is written but before the sidecar is replaced keeps the old pair."""
+        menu = get_menu_items()
+        path = str(tmp_path / "menu.npy")
+        old = MenuVectorIndex.build(menu, _hash_embed, model_name="m")
+        old.save(path)
+        reordered = MenuVectorIndex.build(list(reversed(menu)), _hash_embed, model_name="m")
+
+        real_replace = os.replace
+        replaced = []
+
+        def crash_on_second_replace(src, dst):
+            replaced.append(dst)
+            if len(replaced) == 2:
+                raise OSError("crash")
+            real_replace(src, dst)
+
+        with patch("tools.search.vector_index.os.replace", side_effect=crash_on_second_replace):
+            with pytest.raises(OSError):
+                reordered.save(path)
+
+        loaded = MenuVectorIndex.load(path, fingerprint=old.fingerprint)
+        assert loaded.skus == old.skus
+        assert np.array_equal(np.asarray(loaded.matrix), old.matrix)
+
+    def test_save_removes_superseded_matrices_only(self, tmp_path):
+        menu = get_menu_items()
+        path = str(tmp_path / "menu.npy")
+        (tmp_path / "menu.v2.npy").write_bytes(b"another index")
+        MenuVectorIndex.build(menu, _hash_embed, model_name="m").save(path)
+        MenuVectorIndex.build(menu[:-1], _hash_embed, model_name="m").save(path)
+        names = sorted(p.name for p in tmp_path.iterdir())
+        assert len([n for n in names if n.startswith("menu.") and n != "menu.v2.npy"]) == 2  # one .npy + .json
+        assert "menu.v2.npy" in names
+        assert MenuVectorIndex.load(path).skus == [i.sku for i in menu[:-1]]
+
+    def test_default_paths_are_anchored_to_the_package(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        package_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(vector.__file__))))
+        for path in (vector.CHROMA_PATH, vector.MENU_INDEX_PATH):
+            assert os.path.isabs(path)
+            assert os.path.commonpath([path, package_dir]) == package_dir
+
+    def test_load_missing_file_returns_none(self, tmp_path):
+        assert MenuVectorIndex.load(str(tmp_path / "nope.npy")) is None
+
+
+# =============================================================================
+# CONTENT-ADDRESSED (INCREMENTAL) SYNC
+# =============================================================================
+
+class TestIncrementalSync:
+    def test_unchanged_menu_embeds_nothing(self):
+        menu = get_menu_items()
+        previous = MenuVectorIndex.build(menu, _hash_embed, "m")
+        encoder = RecordingEncoder()
+        index, report = MenuVectorIndex.build_incremental(menu, encoder.encode, "m", previous)
+        assert encoder.embedded == []
+        assert (report.embedded, report.skipped, report.removed) == (0, 5, 0)
+        assert np.array_equal(index.matrix, previous.matrix)
+
+    def test_only_changed_items_reembedded(self):
+        menu = get_menu_items()
+        previous = MenuVectorIndex.build(menu, _hash_embed, "m")
+        changed = menu[2].model_copy(update={"tags": menu[2].tags + ["new"]})
+        new_menu = [changed if i.sku == changed.sku else i for i in menu]
+
+        encoder = RecordingEncoder()
+        index, report = MenuVectorIndex.build_incremental(new_menu, encoder.encode, "m", previous)
+        assert encoder.embedded == [menu_document(changed)]
+        assert (report.embedded, report.skipped) == (1, 4)
+        rebuilt = MenuVectorIndex.build(new_menu, _hash_embed, "m")
+        assert np.allclose(index.matrix, rebuilt.matrix, atol=1e-6)
+        assert index.hashes == rebuilt.hashes and index.fingerprint == rebuilt.fingerprint
+
+    def test_added_and_removed_skus(self):
+        menu = get_menu_items()
+        previous = MenuVectorIndex.build(menu[:4], _hash_embed, "m")
+        index, report = MenuVectorIndex.build_incremental(menu[1:], _hash_embed, "m", previous)
+        assert (report.embedded, report.skipped, report.removed) == (1, 3, 1)
+        assert index.skus == [i.sku for i in menu[1:]]
+
+    def test_model_change_reembeds_everything(self):
+        menu = get_menu_items()
+        previous = MenuVectorIndex.build(menu, _hash_embed, "m")
+        _, report = MenuVectorIndex.build_incremental(menu, _hash_embed, "other", previous)
+        assert (report.embedded, report.skipped) == (5, 0)
+
+    def test_backend_sync_persists_hashes_across_processes(self, tmp_path):
+        path = str(tmp_path / "menu.npy")
+        menu = get_menu_items()
+
+        first = VectorBackend(index_path=path)
+        first._encoder = RecordingEncoder()
+        first.set_menu(menu)
+        first.menu_index
+        assert first.last_sync_report.embedded == 5
+
+        # A fresh process with the same menu maps the file and embeds nothing
+        second = VectorBackend(index_path=path)
+        second._encoder = RecordingEncoder()
+        second.set_menu(menu)
+        second.menu_index
+        assert second._encoder.embedded == []
+        assert second.last_sync_report.skipped == 5
+
+        # An edit to one item re-embeds that item only
+        changed = menu[0].model_copy(update={"description": "Now with extra truffle."})
+        second.set_menu([changed] + menu[1:])
+        second.menu_index
+        assert second._encoder.embedded == [menu_document(changed)]
+        assert (second.last_sync_report.embedded, second.last_sync_report.skipped) == (1, 4)
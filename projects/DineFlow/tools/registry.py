@@ -54,6 +54,11 @@
 
 
 # DineFlow/tools/registry.py
+import hashlib
+from bisect import bisect_left, bisect_right
+from collections.abc import Sequence
+from typing import Dict, Iterable, Iterator, List, Optional
+
 from state_machine.types import MenuItemSnapshot
 
 
@@ -149,4 +154,144 @@ def get_menu_items() -> list[MenuItemSnapshot]:
             ),
             tags=["alcohol", "beer", "lager", "cold", "mild", "classic", "refreshing"],
         ),
-    ]
\ No newline at end of file
+    ]
+
+
+def catalog_version(menu_items: Iterable[MenuItemSnapshot]) -> str:
+    """Content hash of the menu: equal menus share a version, any edit changes it."""
+    digest = hashlib.sha256()
+    for item in menu_items:
+        digest.update(item.model_dump_json().encode() + b"\0")
+    return digest.hexdigest()[:16]
+
+
+def menu_version(menu_items: Iterable[MenuItemSnapshot]) -> str:
+    """A MenuCatalog's precomputed version; hashed on the fly for plain lists."""
+    if isinstance(menu_items, MenuCatalog):
+        return menu_items.version
+    return catalog_version(menu_items)
+
+
+def _bits(bitmap: int) -> Iterator[int]:
+    """Positions of the set bits, ascending."""
+    while bitmap:
+        low = bitmap & -bitmap
+        yield low.bit_length() - 1
+        bitmap ^= low
+
+
+class MenuCatalog(Sequence):
+    """
+    The menu as an immutable, indexed sequence.
+
+    Every hot-path lookup used to be a linear scan of the item list —
+    resolve_menu_item, _resolve_item_name and get_focus_block each did a
+    next(...) with .upper() on every item, several times per turn and once
+    per line inside _execute_bulk_add. The catalog is built once at bootstrap
+    and shared by golden_loop and all agents:
+
+        SKU index     case-insensitive SKU → item           get(sku)
+        name index    case-insensitive name → item          by_name(name)
+        tag index     tag → bitmap of positions             with_tag(tag)
+        stock bitmap  bit i set when item i is in stock     in_stock()
+        price order   positions sorted by price             price_between(lo, hi)
+        positions     exact SKU → first position            positions[sku]
+
+    Filtered views (where()) AND the bitmaps together and only then touch
+    items, so they cost O(matches) rather than O(menu).
+
+    It is still a Sequence of MenuItemSnapshot in menu order — every caller
+    that iterates, slices or len()s the menu list works unchanged. Duplicate
+    SKUs / names resolve to the first occurrence, as the old scans did.
+    Menu changes build a new catalog; nothing is mutated in place, so
+    version (a content hash) identifies the catalogue for caches keyed on it.
+    """
+
+    def __init__(self, items: Iterable[MenuItemSnapshot]):
+        self._items = tuple(items)
+        self._by_sku: Dict[str, MenuItemSnapshot] = {}
+        self._by_name: Dict[str, MenuItemSnapshot] = {}
+        self._tag_bits: Dict[str, int] = {}
+        self._stock_bits = 0
+        self.positions: Dict[str, int] = {}
+        for pos, item in enumerate(self._items):
+            self.positions.setdefault(item.sku, pos)
+            self._by_sku.setdefault(item.sku.upper(), item)
+            self._by_name.setdefault(item.name.lower(), item)
+            for tag in item.tags:
+                key = tag.lower()
+                self._tag_bits[key] = self._tag_bits.get(key, 0) | (1 << pos)
+            if item.in_stock:
+                self._stock_bits |= 1 << pos
+        self._all_bits = (1 << len(self._items)) - 1
+        self._price_order = sorted(range(len(self._items)), key=lambda pos: self._items[pos].price)
+        self._prices = [self._items[pos].price for pos in self._price_order]
+        self.version = catalog_version(self._items)
+
+    # ── Sequence ───────────────────────────────────────────────────────────────
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self._items[index])
+        return self._items[index]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[MenuItemSnapshot]:
+        return iter(self._items)
+
+    def __repr__(self) -> str:
+        return f"MenuCatalog({len(self._items)} items)"
+
+    # ── Point lookups ──────────────────────────────────────────────────────────
+
+    def get(self, sku: Optional[str]) -> Optional[MenuItemSnapshot]:
+        """Item for a SKU (case- and whitespace-insensitive), or None."""
+        if not sku:
+            return None
+        return self._by_sku.get(sku.strip().upper())
+
+    def by_name(self, name: Optional[str]) -> Optional[MenuItemSnapshot]:
+        """Item whose full name matches (case-insensitive), or None."""
+        if not name:
+            return None
+        return self._by_name.get(name.strip().lower())
+
+    # ── Filtered views (menu order unless noted) ───────────────────────────────
+
+    def with_tag(self, tag: str) -> List[MenuItemSnapshot]:
+        return self._select(self._tag_bits.get(tag.lower(), 0))
+
+    def in_stock(self) -> List[MenuItemSnapshot]:
+        return self._select(self._stock_bits)
+
+    def price_between(self, low: float = float("-inf"), high: float = float("inf")) -> List[MenuItemSnapshot]:
+        """Items priced in [low, high], cheapest first (bisect on the price order)."""
+        lo = bisect_left(self._prices, low)
+        hi = bisect_right(self._prices, high)
+        return [self._items[pos] for pos in self._price_order[lo:hi]]
+
+    def where(self, *, tags: Iterable[str] = (), in_stock: Optional[bool] = None,
+              max_price: Optional[float] = None) -> List[MenuItemSnapshot]:
+        """Items carrying every tag, matching in_stock and priced <= max_price."""
+        bits = self._all_bits
+        for tag in tags:
+            bits &= self._tag_bits.get(tag.lower(), 0)
+        if in_stock is not None:
+            bits &= self._stock_bits if in_stock else self._all_bits & ~self._stock_bits
+        if max_price is not None and bits:
+            hi = bisect_right(self._prices, max_price)
+            price_bits = 0
+            for pos in self._price_order[:hi]:
+                price_bits |= 1 << pos
+            bits &= price_bits
+        return self._select(bits)
+
+    def _select(self, bits: int) -> List[MenuItemSnapshot]:
+        return [self._items[pos] for pos in _bits(bits)]
+
+
+def get_menu_catalog() -> MenuCatalog:
+    """The static menu as an indexed MenuCatalog (see get_menu_items)."""
+    return MenuCatalog(get_menu_items())
@@ -102,54 +102,382 @@
 
 
 # DineFlow/tools/search/bm25.py
-from rank_bm25 import BM25Okapi
-from typing import List
+import heapq
+import math
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
 from state_machine.types import MenuItemSnapshot
+from tools.search.filters import ItemFilters, matches_filters, validate_filters
+
+
+# ── Okapi BM25 parameters ─────────────────────────────────────────────────────
+# Same defaults as rank_bm25.BM25Okapi so scores (and therefore every
+# threshold tuned on top of them, e.g. the 50% relative cut-off in
+# golden_loop._populate_context_from_response) are unchanged.
+K1 = 1.5
+B = 0.75
+EPSILON = 0.25
+
+# Scoring backends — see MenuBM25 docstring.
+MODE_INDEX = "index"
+MODE_SPARSE = "sparse"
+
+
+def tokenize_item(item: MenuItemSnapshot) -> List[str]:
+    """
+    Builds the BM25 document for one menu item.
+
+    ── Expanded Corpus ───────────────────────────────────────────────────────
+    v1 (old): Only tokenized item name + SKU.
+      "Pepperoni Pizza" → ["pepperoni", "pizza", "pz-pep"]
+      Problem: "spicy" does not appear → BM25 score = 0 → item never retrieved.
+
+    v2 (new): Tokenizes name + description + tags + SKU.
+      Now "spicy" exists in the corpus → BM25 finds it → item retrieved.
+
+    Tag tokens are deliberately repeated because BM25 uses term frequency —
+    a token appearing in both the description and tags gets a higher TF
+    score, which is correct behaviour: if "spicy" is in both prose and the
+    curated tag list, it is more relevant than if it appears in prose alone.
+    """
+    return (
+        item.name.lower().split()
+        + item.description.lower().split()
+        + [tag.lower() for tag in item.tags]
+        + [item.sku.lower()]
+    )
+
+
+def tokenize_query(query: str) -> List[str]:
+    """Query tokenizer — must stay symmetric with tokenize_item()."""
+    return query.lower().split()
 
 
 class MenuBM25:
-    def __init__(self, menu_items: List[MenuItemSnapshot]):
-        self.items = menu_items
-
-        # ── Expanded Corpus ────────────────────────────────────────────────────
-        #
-        # v1 (old): Only tokenized item name + SKU.
-        #   "Pepperoni Pizza" → ["pepperoni", "pizza", "pz-pep"]
-        #   Problem: "spicy" does not appear → BM25 score = 0 → item never retrieved.
-        #
-        # v2 (new): Tokenizes name + description + tags + SKU.
-        #   "Pepperoni Pizza ... spicy pepperoni ... [spicy, hot, classic]"
-        #   → ["pepperoni", "pizza", ..., "spicy", "pepperoni", ..., "spicy", "hot", "classic", "pz-pep"]
-        #   Now "spicy" exists in the corpus → BM25 finds it → item retrieved.
-        #
-        # Tag tokens are deliberately repeated via join because BM25Okapi uses
-        # term frequency — a token appearing in both the description and tags
-        # gets a higher TF score, which is correct behaviour: if "spicy" is in
-        # both prose and the curated tag list, it is more relevant than if it
-        # appears in prose alone.
-        self.corpus = []
+    """
+    Native Okapi BM25 engine over the menu catalogue.
+
+    ── Why not rank_bm25 ─────────────────────────────────────────────────────
+    BM25Okapi.get_scores() walks EVERY document for EVERY query token and the
+    old search()/score_all() then sorted the full zip(items, scores) list.
+    That is O(N · |q|) + O(N log N) per call, several times per turn.
+
+    This engine keeps an inverted index (term → {doc slot: tf}). A query only
+    visits the postings of its own tokens, so cost is proportional to the
+    number of documents that actually contain a query term, and top-k
+    selection uses a bounded heap instead of a full sort.
+
+    ── Score parity ──────────────────────────────────────────────────────────
+    IDF, the epsilon floor for very common terms, and the length
+    normalisation are computed exactly like BM25Okapi. Scores are identical
+    to the previous implementation, so callers' thresholds keep working.
+
+    ── Document slots ────────────────────────────────────────────────────────
+    Each document gets an integer slot in insertion order. Ties are always
+    broken by slot, which reproduces the stable sort order the previous
+    sorted(zip(...)) implementation produced.
+
+    ── Modes ─────────────────────────────────────────────────────────────────
+    "index"  — postings walk in pure Python. Best for short queries on small
+               and medium catalogues; no build cost beyond the index itself.
+    "sparse" — the same impacts stored as a CSR doc × term matrix (SciPy).
+               A query, or a whole batch of queries, is one sparse mat-vec.
+               Best for large catalogues and long queries (a whole response
+               scored by score_all()).
+
+    score_batch()/search_batch() always use the matrix, whatever the mode;
+    it is built lazily on first use and rebuilt when the corpus changes.
+    Context population scores a response and each of its sentences with
+    one score_batch() call.
+    """
+
+    def __init__(self, menu_items: List[MenuItemSnapshot], k1: float = K1, b: float = B,
+                 epsilon: float = EPSILON, mode: str = MODE_INDEX):
+        if mode not in (MODE_INDEX, MODE_SPARSE):
+            raise ValueError(f"Unknown MenuBM25 mode: {mode!r}")
+        self.k1 = k1
+        self.b = b
+        self.epsilon = epsilon
+        self.mode = mode
+
+        # Guards the index against live updates while sessions are querying.
+        self._lock = threading.RLock()
+
+        self._slots: Dict[int, MenuItemSnapshot] = {}
+        self._sku_slots: Dict[str, List[int]] = {}
+        self._doc_len: Dict[int, int] = {}
+        self._doc_terms: Dict[int, Dict[str, int]] = {}
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._total_len = 0
+        self._next_slot = 0
+
+        # IDF and length normalisation depend on corpus-wide statistics (N and
+        # avgdl), so every mutation bumps _version. The per-posting
+        # contribution ("impact") of a term is computed on first use per
+        # version and cached; a query is then a plain sum of cached impacts.
+        # Only terms that are actually queried are ever recomputed after an
+        # update — no full-corpus pass on add/remove/update.
+        self._version = 0
+        self._impacts: Dict[str, Tuple[int, Dict[int, float]]] = {}
+        self._average_idf: Tuple[int, float] = (-1, 0.0)
+
+        # Lazily built CSR matrix (rows = slots in order, cols = vocabulary).
+        self._matrix = None
+        self._matrix_version = -1
+        self._row_slots: List[int] = []
+        self._vocab: Dict[str, int] = {}
+
         for item in menu_items:
-            tokens = (
-                item.name.lower().split()
-                + item.description.lower().split()
-                + [tag.lower() for tag in item.tags]
-                + [item.sku.lower()]
+            self._index_item(item)
+
+    # ── Corpus accessors ───────────────────────────────────────────────────────
+
+    @property
+    def items(self) -> List[MenuItemSnapshot]:
+        """Indexed items in slot (insertion) order."""
+        return list(self._slots.values())
+
+    @property
+    def corpus_size(self) -> int:
+        return len(self._slots)
+
+    @property
+    def avgdl(self) -> float:
+        return self._total_len / len(self._slots) if self._slots else 0.0
+
+    @property
+    def average_idf(self) -> float:
+        """
+        Mean raw IDF over the vocabulary — the base of the epsilon floor.
+        O(V) once per corpus version, and only if a floored term is queried.
+        """
+        version, value = self._average_idf
+        if version != self._version:
+            n_docs = len(self._slots)
+            total = sum(
+                math.log(n_docs - len(p) + 0.5) - math.log(len(p) + 0.5)
+                for p in self._postings.values()
             )
-            self.corpus.append(tokens)
+            value = total / len(self._postings) if self._postings else 0.0
+            self._average_idf = (self._version, value)
+        return value
 
-        self.bm25 = BM25Okapi(self.corpus)
+    def idf(self, term: str) -> float:
+        """
+        BM25Okapi IDF: log(N - n + 0.5) - log(n + 0.5).
+
+        Terms present in more than half the corpus get a negative raw IDF;
+        like BM25Okapi they are floored to epsilon * average_idf so a very
+        common word ("pizza" on a pizza menu) never subtracts relevance.
+        """
+        postings = self._postings.get(term)
+        if not postings:
+            return 0.0
+        freq = len(postings)
+        value = math.log(len(self._slots) - freq + 0.5) - math.log(freq + 0.5)
+        if value < 0:
+            return self.epsilon * self.average_idf
+        return value
+
+    # ── Index maintenance ──────────────────────────────────────────────────────
+
+    def _index_item(self, item: MenuItemSnapshot, slot: Optional[int] = None) -> int:
+        if slot is None:
+            slot = self._next_slot
+            self._next_slot += 1
+            self._sku_slots.setdefault(item.sku, []).append(slot)
+
+        tokens = tokenize_item(item)
+        self._slots[slot] = item
+        self._doc_len[slot] = len(tokens)
+        self._total_len += len(tokens)
+
+        frequencies: Dict[str, int] = {}
+        for token in tokens:
+            frequencies[token] = frequencies.get(token, 0) + 1
+        for token, tf in frequencies.items():
+            self._postings.setdefault(token, {})[slot] = tf
+        self._doc_terms[slot] = frequencies
+        self._version += 1
+        return slot
+
+    def _unindex_slot(self, slot: int) -> None:
+        """Removes one document's postings; df, total length and the cached impacts follow."""
+        for token in self._doc_terms.pop(slot):
+            postings = self._postings[token]
+            del postings[slot]
+            self._impacts.pop(token, None)
+            if not postings:
+                del self._postings[token]
+        self._total_len -= self._doc_len.pop(slot)
+        self._version += 1
+
+    def add_items(self, items: List[MenuItemSnapshot]) -> None:
+        """
+        Indexes new menu items without touching existing documents.
 
-    def search(self, query: str, n: int = 3) -> List[str]:
+        Cost is proportional to the new items' tokens. Raises ValueError for a
+        SKU that is already indexed — use update_item() to change an item.
+        """
+        with self._lock:
+            for item in items:
+                if item.sku in self._sku_slots:
+                    raise ValueError(f"SKU already indexed: {item.sku}; use update_item()")
+            for item in items:
+                self._index_item(item)
+
+    def remove_skus(self, skus: List[str]) -> int:
+        """
+        Drops every document for the given SKUs. Unknown SKUs are ignored.
+        Returns the number of documents removed.
+        """
+        removed = 0
+        with self._lock:
+            for sku in skus:
+                for slot in self._sku_slots.pop(sku, []):
+                    self._unindex_slot(slot)
+                    del self._slots[slot]
+                    removed += 1
+        return removed
+
+    def update_item(self, item: MenuItemSnapshot) -> None:
+        """
+        Re-indexes one item in place (new name, description, tags or stock).
+
+        The item keeps its slot, so its position among equal scores — and
+        therefore score_all()/search() ordering — is unchanged. An unknown SKU
+        is added as a new item.
+        """
+        with self._lock:
+            slots = self._sku_slots.get(item.sku)
+            if not slots:
+                self._index_item(item)
+                return
+            first, duplicates = slots[0], slots[1:]
+            for slot in duplicates:
+                self._unindex_slot(slot)
+                del self._slots[slot]
+            self._sku_slots[item.sku] = [first]
+            self._unindex_slot(first)
+            self._index_item(item, slot=first)
+
+    # ── Scoring ────────────────────────────────────────────────────────────────
+
+    def _term_impacts(self, term: str) -> Dict[int, float]:
+        """
+        idf · tf·(k1+1) / (tf + k1·(1 - b + b·dl/avgdl)) for every posting of
+        term — the exact per-term contribution BM25Okapi adds at query time.
+        Cached until the next corpus change.
+        """
+        cached = self._impacts.get(term)
+        if cached is not None and cached[0] == self._version:
+            return cached[1]
+
+        postings = self._postings.get(term)
+        if not postings:
+            return {}
+        k1 = self.k1
+        b = self.b
+        avgdl = self.avgdl
+        doc_len = self._doc_len
+        idf = self.idf(term)
+        impacts = {
+            slot: idf * (tf * (k1 + 1) / (tf + k1 * (1 - b + b * doc_len[slot] / avgdl)))
+            for slot, tf in postings.items()
+        }
+        self._impacts[term] = (self._version, impacts)
+        return impacts
+
+    def _score_postings(self, tokens: List[str]) -> Dict[int, float]:
+        """
+        Returns {slot: score} for documents containing at least one query
+        token. Documents absent from the result score exactly 0.
+
+        Duplicate query tokens contribute once per occurrence, matching
+        BM25Okapi.get_scores().
+        """
+        scores: Dict[int, float] = {}
+        with self._lock:
+            for token in tokens:
+                impacts = self._term_impacts(token)
+                if not impacts:
+                    continue
+                if not scores:
+                    scores = dict(impacts)
+                    continue
+                get = scores.get
+                for slot, impact in impacts.items():
+                    scores[slot] = get(slot, 0.0) + impact
+        return scores
+
+    def _positive_matches(self, query: str, filters: ItemFilters) -> List[Tuple[int, float]]:
+        """(slot, score) for every matched document with a positive score that passes filters."""
+        scores = self._score_postings(tokenize_query(query))
+        if not filters:
+            return [(slot, score) for slot, score in scores.items() if score > 0]
+        return [
+            (slot, score) for slot, score in scores.items()
+            if score > 0 and matches_filters(self._slots[slot], filters)
+        ]
+
+    def _filtered_row(self, query: str, filters: ItemFilters) -> np.ndarray:
+        """Sparse-mode score row with filtered-out columns zeroed (never ranked)."""
+        row = self.score_batch([query])[0]
+        if filters:
+            mask = np.fromiter((matches_filters(item, filters) for item in self.items),
+                               dtype=bool, count=len(row))
+            row = np.where(mask, row, 0.0)
+        return row
+
+    def top_k(self, query: str, k: int, filters: ItemFilters = None) -> List[Tuple[MenuItemSnapshot, float]]:
+        """
+        Returns up to k (item, score) pairs with a positive score, best first.
+
+        Heap selection over the matched documents only: O(m log k) where m is
+        the number of documents containing a query token. filters (attribute →
+        required value) are applied to those m documents before selection, so
+        k results are returned even when the best raw matches are excluded.
+        """
+        if k <= 0:
+            return []
+        filters = validate_filters(filters)
+        with self._lock:
+            if self.mode == MODE_SPARSE:
+                row = self._filtered_row(query, filters)
+                items = self.items
+                return [(items[i], float(row[i])) for i in _rank_positive(row, k)]
+            best = heapq.nlargest(
+                k, self._positive_matches(query, filters),
+                key=lambda pair: (pair[1], -pair[0]),
+            )
+            return [(self._slots[slot], score) for slot, score in best]
+
+    def search(self, query: str, n: Optional[int] = None, filters: ItemFilters = None) -> List[str]:
         """
         Returns SKUs ranked by BM25 keyword relevance.
 
         Only items with a positive score are returned — a score of 0 means
         none of the query tokens appeared in that item's corpus document.
+
+        n caps the result length. None (default) returns every positive match,
+        which is what hybrid_search's rank fusion relies on. filters works as
+        in top_k().
         """
-        tokenized_query = query.lower().split()
-        scores = self.bm25.get_scores(tokenized_query)
-        ranked = sorted(zip(self.items, scores), key=lambda x: x[1], reverse=True)
-        return [item.sku for item, score in ranked if score > 0]
+        filters = validate_filters(filters)
+        with self._lock:
+            if self.mode == MODE_SPARSE:
+                if not filters:
+                    return self.search_batch([query], n)[0]
+                row = self._filtered_row(query, filters)
+                items = self.items
+                return [items[i].sku for i in _rank_positive(row, n)]
+            matched = self._positive_matches(query, filters)
+            if n is not None:
+                matched = heapq.nlargest(n, matched, key=lambda pair: (pair[1], -pair[0]))
+            else:
+                matched.sort(key=lambda pair: (-pair[1], pair[0]))
+            return [self._slots[slot].sku for slot, _ in matched]
 
     def score_all(self, query: str) -> List[tuple]:
         """
@@ -160,14 +488,118 @@ class MenuBM25:
         Used by context population logic to distinguish truly matching items
         from items that merely share common words like "pizza" or "burger".
         BM25's IDF component naturally down-weights tokens that appear in many
-        items (e.g. "pizza" when half the menu is pizza) and up-weights rare
-        discriminating tokens (e.g. "truffle", "margherita", "heineken").
+        items and up-weights rare discriminating tokens ("truffle", "heineken").
+
+        Only matched documents are scored and sorted; unmatched items are
+        appended in slot order with score 0.0, which is exactly where a stable
+        descending sort over the full score vector would have put them.
+        """
+        with self._lock:
+            if self.mode == MODE_SPARSE:
+                row = self.score_batch([query])[0]
+                items = self.items
+                return [(items[i], float(row[i])) for i in np.argsort(-row, kind="stable")]
+            scores = self._score_postings(tokenize_query(query))
+            ranked = sorted(scores.items(), key=lambda pair: (-pair[1], pair[0]))
+
+            positive = [(self._slots[s], v) for s, v in ranked if v > 0]
+            negative = [(self._slots[s], v) for s, v in ranked if v < 0]
+            zero = [
+                (item, 0.0) for slot, item in self._slots.items()
+                if scores.get(slot, 0.0) == 0.0
+            ]
+            return positive + zero + negative
+
+    # ── Sparse matrix backend ──────────────────────────────────────────────────
+
+    def _ensure_matrix(self):
+        """
+        Builds the CSR doc × term impact matrix for the current corpus version.
+
+        Each cell holds idf · tf·(k1+1) / (tf + norm), so IDF and length
+        normalisation are baked in and scoring is a pure mat-vec. After an
+        incremental update the matrix is rebuilt on the next batch call —
+        sparse mode suits large, mostly static catalogues.
+        """
+        if self._matrix is not None and self._matrix_version == self._version:
+            return self._matrix
+        from scipy.sparse import csr_matrix
+
+        self._row_slots = list(self._slots.keys())
+        row_of = {slot: row for row, slot in enumerate(self._row_slots)}
+        self._vocab = {term: col for col, term in enumerate(self._postings)}
+
+        rows, cols, data = [], [], []
+        for term, col in self._vocab.items():
+            for slot, impact in self._term_impacts(term).items():
+                rows.append(row_of[slot])
+                cols.append(col)
+                data.append(impact)
+        self._matrix = csr_matrix(
+            (np.asarray(data, dtype=np.float64), (rows, cols)),
+            shape=(len(self._row_slots), max(len(self._vocab), 1)),
+        )
+        self._matrix_version = self._version
+        return self._matrix
+
+    def _query_matrix(self, token_lists: Sequence[List[str]]):
+        """
+        Term × query count matrix. Counts (not 0/1) so a repeated query token
+        contributes once per occurrence, like the index path.
+        """
+        from scipy.sparse import csc_matrix
+
+        rows, cols, data = [], [], []
+        for col, tokens in enumerate(token_lists):
+            counts: Dict[int, int] = {}
+            for token in tokens:
+                term_col = self._vocab.get(token)
+                if term_col is not None:
+                    counts[term_col] = counts.get(term_col, 0) + 1
+            for term_col, count in counts.items():
+                rows.append(term_col)
+                cols.append(col)
+                data.append(float(count))
+        return csc_matrix(
+            (np.asarray(data, dtype=np.float64), (rows, cols)),
+            shape=(max(len(self._vocab), 1), len(token_lists)),
+        )
+
+    def score_batch(self, queries: Sequence[str]) -> np.ndarray:
+        """
+        Scores many queries in one sparse product.
 
-        This makes context population menu-agnostic — it works correctly
-        whether the menu has 5 items or 500, and whether items have similar
-        or distinct names.
+        Returns a dense (len(queries), len(items)) float64 array whose columns
+        follow self.items order. Row i equals the scores score_all(queries[i])
+        would report, before sorting.
         """
-        tokenized_query = query.lower().split()
-        scores = self.bm25.get_scores(tokenized_query)
-        ranked = sorted(zip(self.items, scores), key=lambda x: x[1], reverse=True)
-        return ranked
\ No newline at end of file
+        with self._lock:
+            if not self._slots or not queries:
+                return np.zeros((len(queries), len(self._slots)))
+            matrix = self._ensure_matrix()
+            query_matrix = self._query_matrix([tokenize_query(q) for q in queries])
+        return (matrix @ query_matrix).T.toarray()
+
+    def search_batch(self, queries: Sequence[str], n: Optional[int] = None) -> List[List[str]]:
+        """Batched search(): one ranked SKU list (positive scores only) per query."""
+        with self._lock:
+            scores = self.score_batch(queries)
+            items = self.items
+        return [[items[i].sku for i in _rank_positive(row, n)] for row in scores]
+
+
+def _rank_positive(row: np.ndarray, n: Optional[int] = None) -> np.ndarray:
+    """
+    Column indices with a positive score, best first, ties in column order.
+
+    With n set, np.partition narrows to the n-th best score first; everything
+    tied with it is kept so the stable sort still breaks ties by slot.
+    """
+    matched = np.flatnonzero(row > 0)
+    if n is not None and n <= 0:
+        return matched[:0]
+    if n is not None and len(matched) > n:
+        cutoff = np.partition(row[matched], len(matched) - n)[len(matched) - n]
+        matched = matched[row[matched] >= cutoff]
+    order = matched[np.argsort(-row[matched], kind="stable")]
+    return order if n is None else order[:n]
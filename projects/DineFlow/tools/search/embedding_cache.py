@@ -0,0 +1,111 @@
+# DineFlow/tools/search/embedding_cache.py
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+DEFAULT_MAXSIZE = 1024
+
+
+def normalise_text(text: str) -> str:
+    """
+    Cache key for a query string: lowercased, whitespace collapsed.
+
+    all-MiniLM-L6-v2 uses an uncased tokenizer, so "Anything  SPICY" and
+    "anything spicy" produce the same embedding — the cache embeds the
+    normalised form itself, so a hit and a miss always return identical vectors.
+    """
+    return " ".join(text.lower().split())
+
+
+class EmbeddingCache:
+    """
+    Bounded, thread-safe LRU of query embeddings keyed by normalised text.
+
+    One user turn embeds the same string several times — hybrid_search's
+    vector leg, MemoryManager.get_context's memory retrieval, and the
+    AmbiguityGate's re-search. Each of those was a MiniLM forward pass on the
+    CPU. With this cache in front of the encoder every distinct string is
+    embedded at most once while it stays in the LRU window.
+
+    get_many() deduplicates within a call and sends all misses to the encoder
+    as one batch. The encoder runs outside the lock so a slow forward pass
+    never blocks hits on other threads; two threads missing the same key at
+    the same moment may both compute it, and the second insert is a no-op.
+
+    Cached vectors are returned read-only — callers share them.
+    """
+
+    def __init__(self, maxsize: int = DEFAULT_MAXSIZE):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_many(self, texts: Sequence[str],
+                 compute: Callable[[List[str]], np.ndarray]) -> np.ndarray:
+        """(len(texts), dim) matrix; compute() only sees distinct missing keys."""
+        keys = [normalise_text(t) for t in texts]
+        found: Dict[str, np.ndarray] = {}
+        missing: Dict[str, None] = {}  # insertion-ordered set
+        with self._lock:
+            for key in keys:
+                if key in found or key in missing:
+                    continue
+                vec = self._entries.get(key)
+                if vec is None:
+                    missing[key] = None
+                    continue
+                self._entries.move_to_end(key)
+                found[key] = vec
+            # A repeat of a missing key within the call is served by that one
+            # miss, so it counts as a hit: misses == strings sent to the model.
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            computed = np.asarray(compute(list(missing)), dtype=np.float32)
+            with self._lock:
+                for key, vec in zip(missing, computed):
+                    vec = vec.copy()
+                    vec.flags.writeable = False
+                    found[key] = vec
+                    self._put(key, vec)
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
+
+    def _put(self, key: str, vec: np.ndarray) -> None:
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return
+        self._entries[key] = vec
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
@@ -0,0 +1,30 @@
+# DineFlow/tools/search/filters.py
+from typing import Any, Dict, Optional
+
+from state_machine.types import MenuItemSnapshot
+
+# Attribute -> required value, e.g. {"in_stock": True, "is_alcohol": False}
+ItemFilters = Optional[Dict[str, Any]]
+
+
+def validate_filters(filters: ItemFilters) -> ItemFilters:
+    """
+    Rejects filters on attributes MenuItemSnapshot does not have.
+
+    Without this a typo ("instock") would silently match nothing — getattr
+    with a default can never equal the required value — and every search
+    would come back empty.
+    """
+    if not filters:
+        return None
+    unknown = set(filters) - set(MenuItemSnapshot.model_fields)
+    if unknown:
+        raise ValueError(f"Unknown menu item filter(s): {sorted(unknown)}")
+    return filters
+
+
+def matches_filters(item: MenuItemSnapshot, filters: ItemFilters) -> bool:
+    """Equality on every filtered attribute; no filters matches everything."""
+    if not filters:
+        return True
+    return all(getattr(item, key) == value for key, value in filters.items())
@@ -66,15 +66,103 @@
 
 # claud recent version testing,,,
 # DineFlow/tools/search/hybrid.py
-from typing import List
+import heapq
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as LegTimeout
+from typing import Dict, List, Optional
 from state_machine.types import MenuItemSnapshot
-from .vector import vector_search
+from tools.registry import MenuCatalog
+from .filters import ItemFilters, matches_filters, validate_filters
+from .vector import backend, vector_search
 
+logger = logging.getLogger(__name__)
 
-def hybrid_search(query: str, menu_items: List[MenuItemSnapshot], bm25_engine: any) -> List[MenuItemSnapshot]:
+# Budget for the vector leg once BM25 has finished, applied only once the
+# VectorBackend is ready: a cold process waits for the model load rather
+# than quietly answering its first turns with BM25 alone.
+VECTOR_LEG_TIMEOUT = 1.0
+LEG_POOL_WORKERS = 4
+# Candidates taken from the vector leg (vector_search's historical default)
+VECTOR_RESULTS = 3
+RRF_K = 60
+
+_leg_pool: Optional[ThreadPoolExecutor] = None
+_leg_pool_lock = threading.Lock()
+
+
+def _get_leg_pool() -> ThreadPoolExecutor:
+    global _leg_pool
+    if _leg_pool is None:
+        with _leg_pool_lock:
+            if _leg_pool is None:
+                _leg_pool = ThreadPoolExecutor(max_workers=LEG_POOL_WORKERS, thread_name_prefix="hybrid-leg")
+    return _leg_pool
+
+
+class HybridResult(list):
+    """
+    hybrid_search's ranked items — a plain list for every existing caller —
+    plus .meta with per-leg timing:
+
+        mode          "parallel" or "serial"
+        vector_ms     vector leg wall time (None if it did not finish in time)
+        bm25_ms       BM25 leg wall time
+        total_ms      whole call, fusion included
+        degraded      True when the vector leg timed out or failed and the
+                      ranking is BM25-only
+        vector_error  repr of the exception / "timeout", when degraded
+    """
+
+    def __init__(self, items=(), meta: Optional[dict] = None):
+        super().__init__(items)
+        self.meta = meta or {}
+
+
+def _timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - start) * 1e3
+
+
+def hybrid_search(query: str, menu_items: List[MenuItemSnapshot], bm25_engine: any,
+                  k: Optional[int] = None, filters: ItemFilters = None,
+                  parallel: bool = True, vector_timeout: Optional[float] = None
+                  ) -> HybridResult:
     """
     Fuses BM25 and Vector results using RRF (Reciprocal Rank Fusion).
 
+    ── Fused Top-k & Filter Pushdown ─────────────────────────────────────────
+    k=None returns every (filtered) menu item, fused order — the original
+    contract. With k set only the k best items come back: the BM25 leg is
+    asked for its top k + VECTOR_RESULTS, the fused candidates (at most that
+    many plus the vector hits) go through a heap, and the menu is only walked
+    to pad with zero-score items when fewer than k candidates matched. Nothing
+    proportional to the catalogue is scored or sorted per turn.
+
+    An item outside BM25's top k + VECTOR_RESULTS cannot reach the fused
+    top-k on BM25 alone — that many items outrank it — so the only
+    approximation is a vector hit whose deep BM25 rank adds < 1/(k+63).
+
+    filters (attribute → required value, e.g. {"in_stock": True}) are pushed
+    into both legs, so each leg returns its best *allowed* items and k results
+    come back even when the raw best matches are excluded.
+
+    ── Concurrent Legs ───────────────────────────────────────────────────────
+    parallel=True (default) submits the vector leg to a shared thread pool and
+    scores BM25 on the calling thread meanwhile. The MiniLM forward pass spends
+    its time in torch kernels that release the GIL, so the two legs genuinely
+    overlap. BM25 is in-process and CPU-bound, so it gets no pool hop and no
+    timeout of its own; the vector leg gets vector_timeout seconds after BM25
+    is done. vector_timeout=None (default) means VECTOR_LEG_TIMEOUT once the
+    VectorBackend is ready and no limit while the model or index is still
+    loading. A vector leg that times out or raises degrades the call to a
+    BM25-only ranking (meta["degraded"]) instead of failing the turn; a
+    timed-out leg is cancelled if it has not started, and logged when it
+    finishes otherwise. parallel=False runs the legs one after the other, as
+    before.
+
     ── Why This File Required No Logic Changes ───────────────────────────────
     The RRF algorithm here is correct and unchanged. The "spicy" failure was
     never in the fusion logic — it was upstream:
@@ -86,28 +174,139 @@ def hybrid_search(query: str, menu_items: List[MenuItemSnapshot], bm25_engine: a
     Both are now fixed in bm25.py and vector.py. This function receives better
     candidate lists and fuses them the same way — no change needed here.
 
-    ── RRF Constant (k=60) ───────────────────────────────────────────────────
+    ── RRF Constant (RRF_K=60) ───────────────────────────────────────────────
     The constant 60 is the standard RRF default from the original Cormack et al.
     paper. It controls how much weight rank position has vs. raw score.
-    Increasing k flattens the curve (all ranks contribute more equally).
-    Decreasing k sharpens it (top ranks dominate heavily).
+    Increasing it flattens the curve (all ranks contribute more equally).
+    Decreasing it sharpens it (top ranks dominate heavily).
     For a small menu (5–50 items), 60 is appropriate. Tune if catalog grows.
 
     ── Zero-Score Items ──────────────────────────────────────────────────────
     Items not present in either result list get a score of 0.0 and sort to
-    the bottom. They are still returned in the list — callers are responsible
-    for slicing to the desired top-k (menu_expert.py does [:5]).
+    the bottom in menu order. With k=None they are all returned; with k set
+    they only pad the result up to k (menu_expert.py asks for k=5).
     """
-    v_ids = vector_search(query)
-    b_ids = bm25_engine.search(query)
+    start = time.perf_counter()
+    filters = validate_filters(filters)
+    meta = {"mode": "parallel" if parallel else "serial", "degraded": False}
+
+    def vector_leg():
+        if filters:
+            return vector_search(query, VECTOR_RESULTS, filters=filters)
+        return vector_search(query)
+
+    def bm25_leg():
+        depth = None if k is None else k + VECTOR_RESULTS
+        if filters:
+            return bm25_engine.search(query, depth, filters=filters)
+        return bm25_engine.search(query) if depth is None else bm25_engine.search(query, depth)
+
+    if not parallel:
+        v_ids, meta["vector_ms"] = _timed(vector_leg)
+        b_ids, meta["bm25_ms"] = _timed(bm25_leg)
+    else:
+        timeout = vector_timeout
+        if timeout is None and backend.ready:
+            timeout = VECTOR_LEG_TIMEOUT
+        future = _get_leg_pool().submit(_timed, vector_leg)
+        b_ids, meta["bm25_ms"] = _timed(bm25_leg)
+        try:
+            v_ids, meta["vector_ms"] = future.result(timeout=timeout)
+        except LegTimeout:
+            v_ids, meta["vector_ms"] = [], None
+            meta.update(degraded=True, vector_error="timeout")
+            logger.warning("hybrid_search: vector leg exceeded %.2fs, using BM25 only", timeout)
+            _abandon(future)
+        except Exception as exc:
+            v_ids, meta["vector_ms"] = [], None
+            meta.update(degraded=True, vector_error=repr(exc))
+            logger.warning("hybrid_search: vector leg failed (%s), using BM25 only", exc)
 
-    # RRF Score Calculation
+    if k is None:
+        fused = _rrf_fuse(v_ids, b_ids, menu_items, filters)
+    else:
+        fused = _rrf_top_k(v_ids, b_ids, menu_items, k, filters)
+    meta["total_ms"] = (time.perf_counter() - start) * 1e3
+    return HybridResult(fused, meta)
+
+
+def _rrf_fuse(v_ids: List[str], b_ids: List[str], menu_items: List[MenuItemSnapshot],
+              filters: ItemFilters = None) -> List[MenuItemSnapshot]:
+    """RRF over the two ranked SKU lists; every (filtered) menu item is returned."""
+    if filters:
+        menu_items = [item for item in menu_items if matches_filters(item, filters)]
     scores = {item.sku: 0.0 for item in menu_items}
     for rank, sku in enumerate(v_ids):
         if sku in scores:
-            scores[sku] += 1.0 / (rank + 60)
+            scores[sku] += 1.0 / (rank + RRF_K)
     for rank, sku in enumerate(b_ids):
         if sku in scores:
-            scores[sku] += 1.0 / (rank + 60)
+            scores[sku] += 1.0 / (rank + RRF_K)
+
+    return sorted(menu_items, key=lambda x: scores[x.sku], reverse=True)
+
+
+def _abandon(future) -> None:
+    """Cancels a timed-out vector leg, or logs its outcome when it does finish."""
+    if not future.cancel():
+        future.add_done_callback(_log_late_leg)
+
+
+def _log_late_leg(future) -> None:
+    exc = future.exception()
+    if exc is not None:
+        logger.warning("hybrid_search: abandoned vector leg failed: %s", exc)
+    else:
+        logger.info("hybrid_search: abandoned vector leg finished after %.0f ms", future.result()[1])
+
+
+def _menu_positions(menu_items: List[MenuItemSnapshot]) -> Dict[str, int]:
+    """
+    SKU → first position in menu_items; ties in the fused score are broken
+    by menu position exactly like _rrf_fuse's stable sort.
+
+    golden_loop and the agents pass the immutable MenuCatalog, which carries
+    this map; a plain list is indexed on each call.
+    """
+    if isinstance(menu_items, MenuCatalog):
+        return menu_items.positions
+    positions: Dict[str, int] = {}
+    for pos, item in enumerate(menu_items):
+        positions.setdefault(item.sku, pos)
+    return positions
+
+
+def _rrf_top_k(v_ids: List[str], b_ids: List[str], menu_items: List[MenuItemSnapshot],
+               k: int, filters: ItemFilters = None) -> List[MenuItemSnapshot]:
+    """
+    The first k items of _rrf_fuse(), scoring only the legs' candidates.
+
+    Candidates are heap-selected by (score desc, menu position asc). If fewer
+    than k have a positive score, zero-score items that pass filters follow
+    in menu order — which is where the full stable sort put them.
+    """
+    if k <= 0:
+        return []
+    positions = _menu_positions(menu_items)
+    scores: Dict[str, float] = {}
+    for ids in (v_ids, b_ids):
+        for rank, sku in enumerate(ids):
+            if sku in positions:
+                scores[sku] = scores.get(sku, 0.0) + 1.0 / (rank + RRF_K)
+
+    if filters:
+        scores = {sku: score for sku, score in scores.items()
+                  if matches_filters(menu_items[positions[sku]], filters)}
+
+    best = heapq.nlargest(k, scores.items(), key=lambda pair: (pair[1], -positions[pair[0]]))
+    result = [menu_items[positions[sku]] for sku, _ in best]
 
-    return sorted(menu_items, key=lambda x: scores[x.sku], reverse=True)
\ No newline at end of file
+    if len(result) < k:
+        chosen = {item.sku for item in result}
+        for item in menu_items:
+            if len(result) >= k:
+                break
+            if item.sku not in chosen and matches_filters(item, filters):
+                chosen.add(item.sku)
+                result.append(item)
+    return result
\ No newline at end of file
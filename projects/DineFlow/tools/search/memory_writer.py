@@ -0,0 +1,210 @@
+# DineFlow/tools/search/memory_writer.py
+import atexit
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from typing import Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (id, document, metadata) — one Chroma row
+MemoryRecord = Tuple[str, str, dict]
+# Receives parallel id / document / metadata lists for one batched add
+MemorySink = Callable[[List[str], List[str], List[dict]], None]
+
+DEFAULT_QUEUE_SIZE = 256
+DEFAULT_BATCH_SIZE = 32
+DEFAULT_PUT_TIMEOUT = 0.5
+
+_STOP = object()
+
+
+class MemoryWriter:
+    """
+    Write-behind queue between MemoryManager.update and the Chroma memory store.
+
+    save_memory used to embed the turn text and insert it into Chroma before
+    golden_loop could return its response — a MiniLM forward pass plus a
+    SQLite write on the user-visible path. Now the turn is enqueued and a
+    single daemon worker drains the queue, sending everything that has piled
+    up as one batched add (up to batch_size rows), which also lets the
+    embedding function batch its forward pass.
+
+    ── Backpressure ──────────────────────────────────────────────────────────
+    The queue is bounded (queue_size). When it is full, submit() blocks for up
+    to put_timeout seconds; if there is still no room the record is written
+    synchronously on the caller's thread, so a full queue never drops a
+    record — under sustained overload the caller simply pays the old
+    synchronous cost. stats() reports blocked puts, synchronous fallbacks and
+    the high-water queue depth so that regime is visible.
+
+    A batch whose sink call raises is logged and counted in stats()["failed"]
+    and not retried — the same outcome as the old synchronous save_memory
+    failing, which never failed the turn either.
+
+    ── Consistency ───────────────────────────────────────────────────────────
+    has_pending(session_id) tells readers whether this session still has
+    queued rows; retrieve_memories flushes first in that case so a session
+    always reads its own writes.
+
+    The worker starts on the first submit() and close() (registered with
+    atexit) drains the queue before the process exits. submit() checks
+    _closed and starts the worker under the same lock close() sets _closed
+    with, so a record is either counted — with the worker already running —
+    before close() starts waiting for the queue to empty, or written
+    synchronously. None can land behind the worker's stop sentinel, and
+    close() never misses a worker that is just starting.
+    """
+
+    def __init__(self, sink: MemorySink, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 batch_size: int = DEFAULT_BATCH_SIZE, put_timeout: float = DEFAULT_PUT_TIMEOUT):
+        self._sink = sink
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._outstanding = 0
+        self._pending_by_session: Counter = Counter()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.failed = 0
+        self.blocked_puts = 0
+        self.sync_fallbacks = 0
+        self.max_depth = 0
+
+    # ── Producer side ──────────────────────────────────────────────────────────
+
+    def submit(self, record: MemoryRecord, session_id: str = "") -> None:
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._outstanding += 1
+                self._pending_by_session[session_id] += 1
+                if self._worker is None:
+                    self._start_worker()
+        if closed:
+            self._write([record])
+            return
+        item = (record, session_id)
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.blocked_puts += 1
+            try:
+                self._queue.put(item, timeout=self.put_timeout)
+            except queue.Full:
+                with self._lock:
+                    self.sync_fallbacks += 1
+                self._write([record])
+                self._done([session_id])
+                return
+        with self._lock:
+            self.enqueued += 1
+            self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    def has_pending(self, session_id: str) -> bool:
+        with self._lock:
+            return self._pending_by_session.get(session_id, 0) > 0
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until every submitted record is written. False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            while self._outstanding:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0) -> None:
+        """Drains the queue and stops the worker; later submits write synchronously."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        if self._worker is not None:
+            # Every record counted before _closed was set is written first,
+            # so nothing is queued behind _STOP
+            deadline = None if timeout is None else time.monotonic() + timeout
+            if not self.flush(timeout):
+                logger.warning("Memory writer closed with %d turn(s) still pending", self._outstanding)
+            self._queue.put(_STOP)
+            self._worker.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    # ── Worker side ────────────────────────────────────────────────────────────
+
+    def _start_worker(self) -> None:
+        # Caller holds self._lock
+        self._worker = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+        self._worker.start()
+        atexit.register(self.close)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            stop = False
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._write([record for record, _ in batch])
+            self._done([session_id for _, session_id in batch])
+            if stop:
+                return
+
+    def _write(self, records: List[MemoryRecord]) -> None:
+        ids = [r[0] for r in records]
+        docs = [r[1] for r in records]
+        metas = [r[2] for r in records]
+        try:
+            self._sink(ids, docs, metas)
+        except Exception as exc:
+            logger.warning("Memory write of %d turn(s) failed: %s", len(records), exc)
+            with self._lock:
+                self.failed += len(records)
+            return
+        with self._lock:
+            self.written += len(records)
+            self.batches += 1
+
+    def _done(self, session_ids: List[str]) -> None:
+        with self._idle:
+            self._outstanding -= len(session_ids)
+            for session_id in session_ids:
+                self._pending_by_session[session_id] -= 1
+                if self._pending_by_session[session_id] <= 0:
+                    del self._pending_by_session[session_id]
+            if not self._outstanding:
+                self._idle.notify_all()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "depth": self._queue.qsize(),
+                "max_depth": self.max_depth,
+                "capacity": self._queue.maxsize,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "batches": self.batches,
+                "avg_batch": self.written / self.batches if self.batches else 0.0,
+                "failed": self.failed,
+                "blocked_puts": self.blocked_puts,
+                "sync_fallbacks": self.sync_fallbacks,
+            }
@@ -0,0 +1,205 @@
+# DineFlow/tools/search/name_matcher.py
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+
+from state_machine.types import MenuItemSnapshot
+from tools.registry import menu_version
+
+# Name tokens shorter than this are not "significant" ("and", "the", "ipa")
+MIN_TOKEN_LEN = 4
+
+KIND_NAME = "name"
+KIND_TOKEN = "token"
+
+
+@dataclass(frozen=True)
+class NameMatch:
+    sku: str
+    start: int     # span in the lower-cased input, end exclusive
+    end: int
+    kind: str      # KIND_NAME (full item name) or KIND_TOKEN (significant name token)
+    text: str
+
+
+def significant_tokens(name: str) -> List[str]:
+    """Lower-cased name tokens longer than 3 characters, in name order."""
+    return [tok for tok in name.lower().split() if len(tok) >= MIN_TOKEN_LEN]
+
+
+class MenuNameMatcher:
+    """
+    Aho-Corasick automaton over every menu name and significant name token.
+
+    Three places used to look for menu names in free text, each with its own
+    nested loop of substring checks over the whole menu: golden_loop's
+    _has_named_item, QueryClassifier._resolve_entity and
+    _populate_context_from_response's name confirmation. Here the patterns
+    are compiled once and find() makes a single pass over the input whatever
+    the menu size, reporting every occurrence with its span.
+
+    Matching is plain substring matching on the lower-cased text — the same
+    semantics as the `tok in text` checks it replaces — so "pizzas" still
+    contains "pizza". The three questions those call sites asked are answered
+    from one scan:
+
+        named_skus(text)      every significant token of the item occurs
+        mentioned_skus(text)  at least one significant token occurs
+        first_named(text)     first item (menu order) whose full name occurs
+
+    The last scanned text is memoised, so the router-side and classifier-side
+    checks on the same user turn share one pass. Built per menu — use
+    matcher_for(), which keeps one per menu version.
+    """
+
+    def __init__(self, menu_items: Sequence[MenuItemSnapshot]):
+        self._skus: List[str] = []
+        self._required: Dict[str, int] = {}       # sku → distinct significant tokens
+        self._patterns: List[str] = []
+        self._owners: List[List[Tuple[str, str]]] = []  # pattern → [(sku, kind)]
+        pattern_ids: Dict[str, int] = {}
+
+        def add(pattern: str, sku: str, kind: str) -> None:
+            pid = pattern_ids.get(pattern)
+            if pid is None:
+                pid = pattern_ids[pattern] = len(self._patterns)
+                self._patterns.append(pattern)
+                self._owners.append([])
+            if (sku, kind) not in self._owners[pid]:
+                self._owners[pid].append((sku, kind))
+
+        for item in menu_items:
+            if item.sku in self._required:
+                continue
+            self._skus.append(item.sku)
+            name = item.name.lower()
+            if name:
+                add(name, item.sku, KIND_NAME)
+            tokens = set(significant_tokens(item.name))
+            self._required[item.sku] = len(tokens)
+            for tok in tokens:
+                add(tok, item.sku, KIND_TOKEN)
+
+        self._order = {sku: pos for pos, sku in enumerate(self._skus)}
+        self._build()
+        self._last: Tuple[Optional[str], List[NameMatch]] = (None, [])
+
+    def __len__(self) -> int:
+        return len(self._skus)
+
+    # ── Automaton ──────────────────────────────────────────────────────────────
+
+    def _build(self) -> None:
+        goto: List[Dict[str, int]] = [{}]
+        out: List[List[int]] = [[]]
+        for pid, pattern in enumerate(self._patterns):
+            node = 0
+            for ch in pattern:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[node][ch] = nxt
+                    goto.append({})
+                    out.append([])
+                node = nxt
+            out[node].append(pid)
+
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in goto[node].items():
+                queue.append(nxt)
+                if node:
+                    f = fail[node]
+                    while f and ch not in goto[f]:
+                        f = fail[f]
+                    fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] = out[nxt] + out[fail[nxt]]
+
+        self._goto, self._fail, self._out = goto, fail, out
+
+    def find(self, text: str) -> List[NameMatch]:
+        """Every name / token occurrence in text, ordered by start then end."""
+        text = (text or "").lower()
+        last_text, last_matches = self._last
+        if text == last_text:
+            return last_matches
+
+        goto, fail, out = self._goto, self._fail, self._out
+        patterns, owners = self._patterns, self._owners
+        matches: List[NameMatch] = []
+        node = 0
+        for end, ch in enumerate(text, 1):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pid in out[node]:
+                pattern = patterns[pid]
+                start = end - len(pattern)
+                for sku, kind in owners[pid]:
+                    matches.append(NameMatch(sku, start, end, kind, pattern))
+        matches.sort(key=lambda m: (m.start, m.end))
+        self._last = (text, matches)
+        return matches
+
+    # ── Questions the call sites ask ───────────────────────────────────────────
+
+    def named_skus(self, text: str) -> List[str]:
+        """
+        Items (menu order) whose significant name tokens ALL occur in text.
+        Items without a significant token never count.
+        """
+        seen: Dict[str, Set[str]] = {}
+        for m in self.find(text):
+            if m.kind == KIND_TOKEN:
+                seen.setdefault(m.sku, set()).add(m.text)
+        hits = [sku for sku, toks in seen.items() if len(toks) == self._required[sku]]
+        return sorted(hits, key=self._order.__getitem__)
+
+    def mentioned_skus(self, text: str) -> Set[str]:
+        """Items with at least one significant name token in text."""
+        return {m.sku for m in self.find(text) if m.kind == KIND_TOKEN}
+
+    def has_significant_tokens(self, sku: str) -> bool:
+        return self._required.get(sku, 0) > 0
+
+    def first_named(self, text: str) -> Optional[str]:
+        """SKU of the first item, in menu order, whose full name occurs in text."""
+        best = None
+        for m in self.find(text):
+            if m.kind == KIND_NAME and (best is None or self._order[m.sku] < self._order[best]):
+                best = m.sku
+        return best
+
+
+# Matchers kept for distinct menu versions (LRU beyond this)
+MAX_MATCHERS = 8
+
+_matchers: "OrderedDict[str, MenuNameMatcher]" = OrderedDict()
+_matchers_lock = threading.Lock()
+
+
+def matcher_for(menu_items: Sequence[MenuItemSnapshot]) -> MenuNameMatcher:
+    """
+    The shared matcher for menu_items, keyed on tools.registry.menu_version.
+
+    Equal menus share one matcher whatever object carries them, an edited
+    menu gets its own, and several menus in one process alternate without
+    rebuilding. A MenuCatalog's version is precomputed; a plain list is
+    hashed per call, which is still far cheaper than building the automaton.
+    """
+    version = menu_version(menu_items)
+    with _matchers_lock:
+        matcher = _matchers.get(version)
+        if matcher is not None:
+            _matchers.move_to_end(version)
+            return matcher
+    built = MenuNameMatcher(menu_items)
+    with _matchers_lock:
+        matcher = _matchers.setdefault(version, built)
+        _matchers.move_to_end(version)
+        while len(_matchers) > MAX_MATCHERS:
+            _matchers.popitem(last=False)
+    return matcher
@@ -0,0 +1,171 @@
+# DineFlow/tools/search/session_memory.py
+import threading
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence
+
+import numpy as np
+
+DEFAULT_MAX_TURNS = 64
+DEFAULT_MAX_SESSIONS = 256
+
+Embedder = Callable[[List[str]], np.ndarray]
+
+
+class _SessionTurns:
+    __slots__ = ("ids", "docs", "vecs", "overflowed", "_matrix")
+
+    def __init__(self):
+        self.ids: List[str] = []
+        self.docs: List[str] = []
+        self.vecs: List[Optional[np.ndarray]] = []
+        self.overflowed = False
+        self._matrix: Optional[np.ndarray] = None
+
+
+class SessionMemoryStore:
+    """
+    In-process memory tier: the active sessions' turns and their embeddings.
+
+    retrieve_memories used to run a filtered Chroma query (where=session_id)
+    on every turn, even for a session with three turns that all still sit in
+    the sliding window. Most sessions stay under 15 turns, so for those the
+    whole per-session corpus fits in a tiny matrix and brute-force cosine over
+    it is exact and effectively free.
+
+    Lifecycle per session:
+      start()   a session created in this process — nothing is stored for it
+                yet, so it is registered empty and never seeded from Chroma
+      seed()    first retrieval in this process — loads the turns already in
+                Chroma (documents + stored embeddings, one metadata-filtered
+                get, no vector search) so resumed sessions see their history
+      record()  every saved turn; the embedding is attached later by the
+                memory writer (attach()) or computed lazily on search
+      search()  brute-force top-n; None once the session is over max_turns,
+                which tells the caller to use the Chroma query instead
+
+    Bounded twice: max_turns per session (overflow drops the in-process copy
+    for good — Chroma is authoritative from then on) and max_sessions overall
+    (least recently used sessions are forgotten and re-seeded if they return).
+    """
+
+    def __init__(self, max_turns: int = DEFAULT_MAX_TURNS, max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.max_turns = max_turns
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, _SessionTurns]" = OrderedDict()
+        self.local_hits = 0
+        self.fallbacks = 0
+
+    def is_seeded(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._sessions
+
+    def start(self, session_id: str) -> None:
+        """Registers a brand-new session as seeded with no turns (no-op if known)."""
+        with self._lock:
+            if session_id in self._sessions:
+                return
+        self.seed(session_id, [], [])
+
+    def seed(self, session_id: str, ids: Sequence[str], docs: Sequence[str],
+             vecs: Optional[Sequence[Optional[np.ndarray]]] = None) -> None:
+        turns = _SessionTurns()
+        if len(ids) > self.max_turns:
+            turns.overflowed = True
+        else:
+            turns.ids = list(ids)
+            turns.docs = list(docs)
+            turns.vecs = [None if v is None else np.asarray(v, dtype=np.float32)
+                          for v in (vecs if vecs is not None else [None] * len(ids))]
+        with self._lock:
+            self._sessions[session_id] = turns
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def record(self, session_id: str, turn_id: str, doc: str) -> None:
+        """Appends a saved turn — only for sessions this process has seeded."""
+        with self._lock:
+            turns = self._sessions.get(session_id)
+            if turns is None or turns.overflowed:
+                return
+            if len(turns.ids) >= self.max_turns:
+                self._sessions[session_id] = overflowed = _SessionTurns()
+                overflowed.overflowed = True
+                return
+            turns.ids.append(turn_id)
+            turns.docs.append(doc)
+            turns.vecs.append(None)
+            turns._matrix = None
+
+    def attach(self, session_ids: Sequence[str], ids: Sequence[str], vecs: np.ndarray) -> None:
+        """Fills in embeddings computed elsewhere (the memory writer)."""
+        with self._lock:
+            for session_id, turn_id, vec in zip(session_ids, ids, vecs):
+                turns = self._sessions.get(session_id)
+                if turns is None or turns.overflowed:
+                    continue
+                # Recent turns are at the end — scan backwards
+                for pos in range(len(turns.ids) - 1, -1, -1):
+                    if turns.ids[pos] == turn_id:
+                        if turns.vecs[pos] is None:
+                            turns.vecs[pos] = np.asarray(vec, dtype=np.float32)
+                            turns._matrix = None
+                        break
+
+    def search(self, session_id: str, query_vec: np.ndarray, n: int,
+               embed: Embedder) -> Optional[List[str]]:
+        """
+        Top-n documents by cosine similarity, best first.
+
+        Returns None when the caller must fall back to Chroma: the session
+        was never seeded or has outgrown max_turns.
+        """
+        with self._lock:
+            turns = self._sessions.get(session_id)
+            if turns is None or turns.overflowed:
+                self.fallbacks += 1
+                return None
+            self._sessions.move_to_end(session_id)
+            self.local_hits += 1
+            missing = [pos for pos, vec in enumerate(turns.vecs) if vec is None]
+            missing_docs = [turns.docs[pos] for pos in missing]
+            docs = list(turns.docs)
+
+        if missing:
+            fresh = np.asarray(embed(missing_docs), dtype=np.float32)
+            with self._lock:
+                for pos, vec in zip(missing, fresh):
+                    if pos < len(turns.vecs) and turns.vecs[pos] is None:
+                        turns.vecs[pos] = vec
+                turns._matrix = None
+
+        if not docs or n <= 0:
+            return []
+        with self._lock:
+            # Turns recorded while we were embedding are not part of this
+            # search; the cached matrix only ever covers a filled prefix.
+            if turns._matrix is None or len(turns._matrix) < len(docs):
+                matrix = np.stack(turns.vecs[:len(docs)])
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                turns._matrix = matrix / norms
+            matrix = turns._matrix[:len(docs)]
+
+        query = np.asarray(query_vec, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        scores = matrix @ query
+        order = np.argsort(-scores, kind="stable")[:n]
+        return [docs[i] for i in order]
+
+    def forget(self, session_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "local_hits": self.local_hits,
+                "fallbacks": self.fallbacks,
+            }
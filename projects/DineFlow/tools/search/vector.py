@@ -236,55 +236,317 @@
 
 
 # DineFlow/tools/search/vector.py
-import chromadb
-from chromadb.utils import embedding_functions
-from typing import List
-from state_machine.types import MenuItemSnapshot
-
-# 1. Local Embeddings (Fast & No Cost)
-local_ef = embedding_functions.SentenceTransformerEmbeddingFunction(model_name="all-MiniLM-L6-v2")
-
-# 2. Persistent Client (Saves to disk)
-client = chromadb.PersistentClient(path="./chroma_db")
-
-# 3. Create Collections
-menu_coll = client.get_or_create_collection("menu", embedding_function=local_ef)
-memory_coll = client.get_or_create_collection("memory", embedding_function=local_ef)
+import logging
+import threading
+from pathlib import Path
+from typing import List, Optional
 
-
-def sync_menu_to_vector(menu_items: List[MenuItemSnapshot]):
+import numpy as np
+from state_machine.types import MenuItemSnapshot
+from tools.search.embedding_cache import EmbeddingCache
+from tools.search.filters import ItemFilters, matches_filters, validate_filters
+from tools.search.memory_writer import MemoryWriter
+from tools.search.session_memory import SessionMemoryStore
+from tools.search.vector_index import MenuVectorIndex, SyncReport, menu_fingerprint
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+# Anchored to the package, not the working directory, so every entry point
+# (cli_app, the service workers, benchmarks) shares one store and one index
+PACKAGE_DIR = Path(__file__).resolve().parent.parent.parent
+CHROMA_PATH = str(PACKAGE_DIR / "chroma_db")
+MENU_INDEX_PATH = str(PACKAGE_DIR / "vector_index" / "menu.npy")
+QUERY_CACHE_SIZE = 1024
+# Sessions with more saved turns than this are retrieved from Chroma instead
+# of the in-process session tier.
+SESSION_MEMORY_MAX_TURNS = 64
+
+
+class VectorBackend:
+    """
+    Lazy handle over the embedding model, the menu index and the Chroma client.
+
+    Importing chromadb and loading the SentenceTransformer (torch + model
+    weights) costs several seconds. Doing it at import time made every process
+    that touched the orchestration package pay for it — tests, inspect_db.py,
+    one-off scripts — even when no vector query was ever issued.
+
+    Three independently lazy parts, each initialised once under its own lock:
+      encoder      SentenceTransformer, on the first embed(); query strings go
+                   through embed_query() and its LRU (query_cache) first
+      menu_index   MenuVectorIndex for vector_search — memory-mapped from
+                   MENU_INDEX_PATH when the menu fingerprint matches, otherwise
+                   re-embedded for changed SKUs only and saved
+      memory_coll  Chroma, used for session memory only
+
+    warm_up() does all of it on a background thread while the user is still
+    typing.
     """
-    Syncs the current registry to ChromaDB.
-
-    Embedding Document Structure (v2):
-      Structured prose covering name, description, and tags.
-      "spicy" in the query maps close to "spicy pepperoni" in the embedding
-      space, so vector_search returns PZ-PEP as a top result.
-
-    Tag formatting: comma-separated phrase — sentence transformers handle
-    "Tags: spicy, hot, classic" better than "spicy hot classic" as noise.
 
-    Deduplication: upsert by SKU prevents DuplicateIDError on re-sync.
+    def __init__(self, path: str = CHROMA_PATH, model_name: str = EMBEDDING_MODEL,
+                 index_path: Optional[str] = MENU_INDEX_PATH,
+                 query_cache_size: int = QUERY_CACHE_SIZE):
+        self.path = path
+        self.model_name = model_name
+        self.index_path = index_path
+        self.query_cache = EmbeddingCache(query_cache_size)
+        self.warmup_error: Optional[BaseException] = None
+        self._encoder_lock = threading.Lock()
+        self._index_lock = threading.Lock()
+        self._chroma_lock = threading.Lock()
+        self._encoder = None
+        self._menu_items: Optional[List[MenuItemSnapshot]] = None
+        self._menu_index: Optional[MenuVectorIndex] = None
+        self._previous_index: Optional[MenuVectorIndex] = None
+        self._mask_cache_owner: Optional[MenuVectorIndex] = None
+        self._mask_cache: dict = {}
+        self.last_sync_report: Optional[SyncReport] = None
+        self._client = None
+        self._embedding_fn = None
+        self._memory_coll = None
+        self._warmup_thread: Optional[threading.Thread] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._encoder is not None and self._menu_index is not None
+
+    @property
+    def encoder_ready(self) -> bool:
+        """True once the model is loaded — embedding no longer costs a model load."""
+        return self._encoder is not None
+
+    # ── Embedding model ────────────────────────────────────────────────────────
+
+    @property
+    def encoder(self):
+        if self._encoder is None:
+            with self._encoder_lock:
+                if self._encoder is None:
+                    from sentence_transformers import SentenceTransformer
+                    self._encoder = SentenceTransformer(self.model_name, device="cpu")
+        return self._encoder
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """(len(texts), dim) float32 matrix of L2-normalised embeddings."""
+        return self.encoder.encode(
+            list(texts), convert_to_numpy=True, normalize_embeddings=True
+        ).astype(np.float32, copy=False)
+
+    def embed_query(self, texts: List[str]) -> np.ndarray:
+        """
+        embed() for query strings, through the shared LRU.
+
+        Every consumer that embeds user text (vector_search, retrieve_memories)
+        goes through here, so one turn runs the model at most once per distinct
+        string. Menu and memory documents use embed()/Chroma directly — they
+        are embedded once and would only churn the cache.
+        """
+        return self.query_cache.get_many(texts, self.embed)
+
+    # ── Menu index ─────────────────────────────────────────────────────────────
+
+    def set_menu(self, menu_items: List[MenuItemSnapshot]) -> None:
+        """Registers the menu; the index is (re)built on its next access."""
+        with self._index_lock:
+            self._menu_items = list(menu_items)
+            # Filtered attributes (in_stock, ...) are not part of the embedded
+            # text, so an unchanged index can still need new masks.
+            self._mask_cache_owner = None
+            if self._menu_index is not None:
+                self._previous_index = self._menu_index
+            self._menu_index = None
+
+    @property
+    def menu_index(self) -> MenuVectorIndex:
+        index = self._menu_index
+        if index is not None:
+            return index
+        with self._index_lock:
+            if self._menu_index is None:
+                self._menu_index = self._load_or_build(self._menu_items or [])
+            return self._menu_index
+
+    def _load_or_build(self, menu_items: List[MenuItemSnapshot]) -> MenuVectorIndex:
+        """
+        Content-addressed sync: an unchanged menu maps the persisted .npy and
+        embeds nothing; otherwise only SKUs whose document hash changed are
+        re-embedded (rows are reused from the in-memory or persisted index).
+        """
+        unique_items = list({item.sku: item for item in menu_items}.values())
+        fingerprint = menu_fingerprint(unique_items, self.model_name)
+
+        previous = self._previous_index
+        self._previous_index = None
+        if previous is None and self.index_path:
+            previous = MenuVectorIndex.load(self.index_path)
+        if previous is not None and previous.fingerprint == fingerprint:
+            self.last_sync_report = SyncReport(skipped=len(previous))
+            logger.info("Menu vector sync: unchanged, %d skipped", len(previous))
+            return previous
+
+        index, report = MenuVectorIndex.build_incremental(
+            unique_items, self.embed, self.model_name, previous=previous
+        )
+        self.last_sync_report = report
+        logger.info(
+            "Menu vector sync: %d embedded, %d skipped, %d removed",
+            report.embedded, report.skipped, report.removed,
+        )
+        if self.index_path and len(index):
+            try:
+                index.save(self.index_path)
+            except OSError as exc:
+                logger.warning("Could not persist menu vector index: %s", exc)
+        return index
+
+    def filter_mask(self, index: MenuVectorIndex, filters: ItemFilters) -> Optional[np.ndarray]:
+        """
+        Boolean row mask of index for filters (None when unfiltered).
+
+        Masks are cached per index object and filter set — a handful of
+        distinct filter combinations are used per process, and the index only
+        changes on a menu sync.
+        """
+        if not filters:
+            return None
+        key = frozenset(filters.items())
+        with self._index_lock:
+            if self._mask_cache_owner is not index:
+                self._mask_cache_owner, self._mask_cache = index, {}
+            mask = self._mask_cache.get(key)
+            if mask is None:
+                by_sku = {item.sku: item for item in self._menu_items or []}
+                mask = np.fromiter(
+                    (sku in by_sku and matches_filters(by_sku[sku], filters) for sku in index.skus),
+                    dtype=bool, count=len(index.skus),
+                )
+                self._mask_cache[key] = mask
+            return mask
+
+    # ── Chroma (session memory) ────────────────────────────────────────────────
+
+    @property
+    def client(self):
+        self._ensure_chroma()
+        return self._client
+
+    @property
+    def embedding_fn(self):
+        self._ensure_chroma()
+        return self._embedding_fn
+
+    @property
+    def memory_coll(self):
+        self._ensure_chroma()
+        return self._memory_coll
+
+    def _ensure_chroma(self) -> None:
+        if self._client is not None:
+            return
+        with self._chroma_lock:
+            if self._client is not None:
+                return
+            import chromadb
+            from chromadb.utils import embedding_functions
+
+            # Chroma caches models per name at class level; seeding that cache
+            # with our encoder means the model is loaded once per process.
+            embedding_functions.SentenceTransformerEmbeddingFunction.models.setdefault(
+                self.model_name, self.encoder
+            )
+            embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
+                model_name=self.model_name
+            )
+            client = chromadb.PersistentClient(path=self.path)
+            self._embedding_fn = embedding_fn
+            self._memory_coll = client.get_or_create_collection("memory", embedding_function=embedding_fn)
+            self._client = client
+
+    # ── Warm-up ────────────────────────────────────────────────────────────────
+
+    def _warm(self) -> None:
+        self.encoder
+        self.menu_index
+        self._ensure_chroma()
+
+    def warm_up(self, background: bool = True) -> Optional[threading.Thread]:
+        """
+        Initialises the encoder, the menu index and Chroma ahead of first use.
+
+        background=True returns the (daemon) thread doing the work; a failure
+        is logged and kept in warmup_error rather than raised, and the next
+        real use retries initialisation and raises normally.
+        """
+        if self.ready and self._client is not None:
+            return None
+        if not background:
+            self._warm()
+            return None
+        if self._warmup_thread is not None and self._warmup_thread.is_alive():
+            return self._warmup_thread
+
+        def _run():
+            try:
+                self._warm()
+            except BaseException as exc:  # surfaced via warmup_error / next use
+                self.warmup_error = exc
+                logger.warning("Vector backend warm-up failed: %s", exc)
+
+        self._warmup_thread = threading.Thread(target=_run, name="vector-warmup", daemon=True)
+        self._warmup_thread.start()
+        return self._warmup_thread
+
+
+backend = VectorBackend()
+
+
+def __getattr__(name: str):
+    # Keeps `from tools.search.vector import memory_coll` (and friends) working
+    # without re-introducing import-time initialisation.
+    if name in ("client", "memory_coll", "menu_index"):
+        return getattr(backend, name)
+    if name == "local_ef":
+        return backend.embedding_fn
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def sync_menu_to_vector(menu_items: List[MenuItemSnapshot], defer: bool = False) -> Optional[SyncReport]:
     """
-    unique_map = {item.sku: item for item in menu_items}
-    unique_items = list(unique_map.values())
+    Syncs the current registry to the in-process menu vector index.
 
-    ids = [item.sku for item in unique_items]
+    Document structure and per-SKU deduplication live in vector_index.py
+    (menu_document / MenuVectorIndex.build).
 
-    docs = [
-        f"Name: {item.name}. {item.description} Tags: {', '.join(item.tags)}."
-        for item in unique_items
-    ]
+    Only SKUs whose embedded text changed since the last sync are
+    re-embedded. Returns the SyncReport (embedded / skipped / removed), or
+    None with defer=True — the report is then available as
+    backend.last_sync_report once the index has been built.
 
-    metadatas = [{"sku": item.sku, "name": item.name} for item in unique_items]
+    defer=True only registers the items; they are embedded (or the persisted
+    index is memory-mapped) on the first vector_search or warm_up(). Module-
+    level bootstrap code must use it so importing stays cheap.
+    """
+    backend.set_menu(menu_items)
+    if defer:
+        return None
+    backend.menu_index
+    return backend.last_sync_report
 
-    menu_coll.upsert(ids=ids, documents=docs, metadatas=metadatas)
 
+def vector_search(query: str, n_results: int = 3, filters: ItemFilters = None) -> List[str]:
+    """
+    Returns top-k SKUs based on semantic similarity.
 
-def vector_search(query: str, n_results: int = 3) -> List[str]:
-    """Returns top-k SKUs based on semantic similarity."""
-    results = menu_coll.query(query_texts=[query], n_results=n_results)
-    return results['ids'][0] if results['ids'] else []
+    filters (attribute → required value) are pushed into the top-k: excluded
+    items are masked out before selection, so n_results allowed SKUs come back.
+    """
+    filters = validate_filters(filters)
+    index = backend.menu_index
+    if not len(index):
+        return []
+    mask = backend.filter_mask(index, filters)
+    return index.search(backend.embed_query([query])[0], n_results, mask)
 
 
 def _sanitize_metadata(meta: dict) -> dict:
@@ -321,14 +583,37 @@ def _sanitize_metadata(meta: dict) -> dict:
     return sanitized
 
 
+def _add_memory_batch(ids: List[str], docs: List[str], metadatas: List[dict]) -> None:
+    # Embedded here rather than by the collection's embedding function so the
+    # same vectors can be handed to the in-process session tier.
+    vecs = backend.embed(docs)
+    backend.memory_coll.add(ids=ids, documents=docs, metadatas=metadatas, embeddings=vecs.tolist())
+    session_memory.attach([m.get("session_id", "") for m in metadatas], ids, vecs)
+
+
+# In-process per-session tier in front of the Chroma memory collection
+session_memory = SessionMemoryStore(max_turns=SESSION_MEMORY_MAX_TURNS)
+
+
+# Write-behind queue for save_memory — see memory_writer.py
+memory_writer = MemoryWriter(_add_memory_batch)
+
+
 def save_memory(
     session_id: str,
     agent_name: str,
     user_in: str,
     dine_flow: str,
-    meta: dict | None = None
+    meta: dict | None = None,
+    sync: bool = False,
 ):
-    """Saves a turn into the vector memory with unique nanosecond IDs."""
+    """
+    Saves a turn into the vector memory with unique nanosecond IDs.
+
+    The turn is queued on memory_writer and embedded + inserted in the
+    background, batched with other pending turns; sync=True writes it
+    before returning.
+    """
     import time
     import uuid
 
@@ -347,19 +632,57 @@ def save_memory(
     # non-primitive types cause "Cannot convert Python object to MetadataValue"
     metadata = _sanitize_metadata(metadata)
 
-    memory_coll.add(
-        ids=[turn_id],
-        documents=[
-            f"[{agent_name}] User: {user_in}\n[{agent_name}] DineFlow: {dine_flow}"
-        ],
-        metadatas=[metadata]
+    record = (
+        turn_id,
+        f"[{agent_name}] User: {user_in}\n[{agent_name}] DineFlow: {dine_flow}",
+        metadata,
+    )
+    session_memory.record(session_id, turn_id, record[1])
+    if sync:
+        _add_memory_batch([record[0]], [record[1]], [record[2]])
+    else:
+        memory_writer.submit(record, session_id=session_id)
+
+
+def start_session_memory(session_id: str) -> None:
+    """
+    Marks a session created in this process as having no stored turns, so
+    its first retrieve_memories skips the Chroma get that seeds the tier.
+    """
+    session_memory.start(session_id)
+
+
+def _seed_session_memory(session_id: str) -> None:
+    """Loads a session's stored turns (with their embeddings) into the tier once."""
+    if memory_writer.has_pending(session_id):
+        memory_writer.flush()
+    got = backend.memory_coll.get(where={"session_id": session_id}, include=["documents", "embeddings"])
+    embeddings = got.get("embeddings")
+    session_memory.seed(
+        session_id, got["ids"], got["documents"],
+        list(embeddings) if embeddings is not None else None,
     )
 
 
 def retrieve_memories(session_id: str, query: str, n: int = 2) -> List[str]:
-    """Retrieves relevant past turns for this specific session."""
-    results = memory_coll.query(
-        query_texts=[query],
+    """
+    Retrieves relevant past turns for this specific session.
+
+    Sessions up to SESSION_MEMORY_MAX_TURNS are answered from the in-process
+    session tier (brute-force cosine over that session's turns); only larger
+    sessions run a filtered Chroma query.
+    """
+    if not session_memory.is_seeded(session_id):
+        _seed_session_memory(session_id)
+    local = session_memory.search(session_id, backend.embed_query([query])[0], n, backend.embed)
+    if local is not None:
+        return local
+
+    if memory_writer.has_pending(session_id):
+        # Read-your-writes: this session's last turns may still be queued
+        memory_writer.flush()
+    results = backend.memory_coll.query(
+        query_embeddings=backend.embed_query([query]).tolist(),
         where={"session_id": session_id},
         n_results=n
     )
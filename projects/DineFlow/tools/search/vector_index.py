@@ -0,0 +1,278 @@
+# DineFlow/tools/search/vector_index.py
+import hashlib
+import json
+import os
+import re
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from state_machine.types import MenuItemSnapshot
+
+Embedder = Callable[[List[str]], np.ndarray]
+
+
+def menu_document(item: MenuItemSnapshot) -> str:
+    """
+    Embedding document for one menu item (v2 structure).
+
+    Structured prose covering name, description, and tags. "spicy" in the
+    query maps close to "spicy pepperoni" in the embedding space, so
+    vector_search returns PZ-PEP as a top result.
+
+    Tag formatting: comma-separated phrase — sentence transformers handle
+    "Tags: spicy, hot, classic" better than "spicy hot classic" as noise.
+    """
+    return f"Name: {item.name}. {item.description} Tags: {', '.join(item.tags)}."
+
+
+def document_hash(item: MenuItemSnapshot, model_name: str) -> str:
+    """Per-SKU content hash: changes iff the embedded text or the model changes."""
+    return hashlib.sha256(f"{model_name}\0{menu_document(item)}".encode()).hexdigest()
+
+
+def menu_fingerprint(menu_items: Sequence[MenuItemSnapshot], model_name: str) -> str:
+    """Hash of everything the embeddings depend on: model, SKUs and documents."""
+    digest = hashlib.sha256(model_name.encode())
+    for item in menu_items:
+        digest.update(b"\0" + item.sku.encode() + b"\0" + menu_document(item).encode())
+    return digest.hexdigest()
+
+
+def _normalise(matrix: np.ndarray) -> np.ndarray:
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+@dataclass
+class SyncReport:
+    """Outcome of one menu sync — how much embedding work was actually done."""
+    embedded: int = 0
+    skipped: int = 0
+    removed: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.embedded + self.skipped
+
+
+class MenuVectorIndex:
+    """
+    In-process cosine-similarity index over the menu embeddings.
+
+    ── Why Not Chroma For The Menu ───────────────────────────────────────────
+    A Chroma query is a SQLite read plus an HNSW walk for a catalogue whose
+    whole embedding matrix (items × 384 float32) fits in L2 cache. Here the
+    matrix is one contiguous, row-normalised float32 array, so a query is a
+    single mat-vec (cosine == dot product) and top-k is an argpartition — no
+    IO, no approximate graph, exact results.
+
+    ── Persistence ───────────────────────────────────────────────────────────
+    save() writes the matrix to <path>.<content hash>.npy, then a small JSON
+    sidecar <path>.json (SKUs, per-SKU document hashes, the menu fingerprint
+    — which covers the model name — and the matrix file's name). Replacing
+    the sidecar is the commit: a crash before it leaves the old sidecar
+    naming the old, still-present matrix, so a matrix is never paired with
+    another save's SKUs. Superseded matrix files are removed afterwards.
+    load() memory-maps the named .npy, so startup embeds nothing when the
+    menu has not changed.
+
+    ── Incremental Sync ──────────────────────────────────────────────────────
+    Each row carries document_hash() of the text it was embedded from (also
+    persisted in the sidecar). build_incremental() compares those hashes with
+    the new menu and only re-embeds SKUs whose name, description or tags
+    changed; every other row is copied from the previous index.
+
+    Deduplication: one row per SKU — the last occurrence wins, mirroring the
+    upsert-by-SKU behaviour the Chroma menu collection had.
+    """
+
+    def __init__(self, skus: Sequence[str], embeddings: np.ndarray, fingerprint: str = "",
+                 hashes: Optional[Sequence[str]] = None, normalised: bool = False):
+        if not isinstance(embeddings, np.memmap):
+            embeddings = np.asarray(embeddings)
+        if embeddings.ndim != 2 or embeddings.shape[0] != len(skus):
+            raise ValueError(
+                f"embeddings must be (len(skus), dim); got {embeddings.shape} for {len(skus)} SKUs"
+            )
+        self.skus: List[str] = list(skus)
+        self.fingerprint = fingerprint
+        self.hashes: List[str] = list(hashes) if hashes is not None else []
+        # A read-only memmap from load() is already normalised float32 — keep
+        # it mapped instead of copying it into the heap. Rows assembled by
+        # build_incremental() are normalised too; dividing them by their
+        # (not exactly 1.0) norms again would move reused rows by a few ulps.
+        if isinstance(embeddings, np.memmap) and embeddings.dtype == np.float32:
+            self.matrix = embeddings
+        elif normalised:
+            self.matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+        else:
+            self.matrix = _normalise(embeddings)
+
+    @classmethod
+    def build(cls, menu_items: Sequence[MenuItemSnapshot], embed: Embedder,
+              model_name: str = "") -> "MenuVectorIndex":
+        return cls.build_incremental(menu_items, embed, model_name)[0]
+
+    @classmethod
+    def build_incremental(cls, menu_items: Sequence[MenuItemSnapshot], embed: Embedder,
+                          model_name: str = "", previous: Optional["MenuVectorIndex"] = None
+                          ) -> Tuple["MenuVectorIndex", SyncReport]:
+        """
+        Builds the index for menu_items, reusing previous' rows where the
+        per-SKU document hash is unchanged. Only changed or new SKUs are
+        passed to embed(), in one batch.
+        """
+        unique_items = list({item.sku: item for item in menu_items}.values())
+        skus = [item.sku for item in unique_items]
+        hashes = [document_hash(item, model_name) for item in unique_items]
+
+        reusable = {}
+        if previous is not None and len(previous.hashes) == len(previous.skus):
+            reusable = {sku: (row, h) for row, (sku, h) in enumerate(zip(previous.skus, previous.hashes))}
+
+        reuse_rows, embed_rows = [], []
+        for pos, (sku, h) in enumerate(zip(skus, hashes)):
+            prev = reusable.get(sku)
+            if prev is not None and prev[1] == h:
+                reuse_rows.append((pos, prev[0]))
+            else:
+                embed_rows.append(pos)
+
+        fresh = None
+        if embed_rows:
+            fresh = _normalise(embed([menu_document(unique_items[pos]) for pos in embed_rows]))
+        if fresh is not None:
+            dim = fresh.shape[1]
+        elif reuse_rows:
+            dim = previous.matrix.shape[1]
+        else:
+            dim = 0
+
+        matrix = np.empty((len(skus), dim), dtype=np.float32)
+        for pos, row in reuse_rows:
+            matrix[pos] = previous.matrix[row]
+        for i, pos in enumerate(embed_rows):
+            matrix[pos] = fresh[i]
+
+        removed = len(set(previous.skus) - set(skus)) if previous is not None else 0
+        report = SyncReport(embedded=len(embed_rows), skipped=len(reuse_rows), removed=removed)
+        index = cls(skus, matrix, menu_fingerprint(unique_items, model_name), hashes, normalised=True)
+        return index, report
+
+    def __len__(self) -> int:
+        return len(self.skus)
+
+    # ── Queries ────────────────────────────────────────────────────────────────
+
+    def top_k(self, query_vec: np.ndarray, k: int,
+              mask: Optional[np.ndarray] = None) -> List[Tuple[str, float]]:
+        """Returns up to k (sku, cosine similarity) pairs, most similar first."""
+        return self.top_k_batch(np.asarray(query_vec)[None, :], k, mask)[0]
+
+    def top_k_batch(self, query_vecs: np.ndarray, k: int,
+                    mask: Optional[np.ndarray] = None) -> List[List[Tuple[str, float]]]:
+        """
+        top_k() for a (num_queries, dim) matrix: one matmul for the whole batch.
+
+        mask is an optional boolean array over rows; False rows are never
+        returned (filter pushdown — k results come from the allowed rows only).
+        """
+        query_vecs = np.asarray(query_vecs)
+        if k <= 0 or not self.skus:
+            return [[] for _ in range(len(query_vecs))]
+        scores = _normalise(query_vecs) @ self.matrix.T
+        if mask is not None:
+            k = min(k, int(np.count_nonzero(mask)))
+            if k == 0:
+                return [[] for _ in range(len(query_vecs))]
+            scores[:, ~mask] = -np.inf
+        k = min(k, scores.shape[1])
+        if k < scores.shape[1]:
+            candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+        results = []
+        for row, cand in zip(scores, candidates):
+            order = cand[np.argsort(-row[cand], kind="stable")]
+            results.append([(self.skus[i], float(row[i])) for i in order])
+        return results
+
+    def search(self, query_vec: np.ndarray, n: int = 3, mask: Optional[np.ndarray] = None) -> List[str]:
+        return [sku for sku, _ in self.top_k(query_vec, n, mask)]
+
+    def search_batch(self, query_vecs: np.ndarray, n: int = 3,
+                     mask: Optional[np.ndarray] = None) -> List[List[str]]:
+        return [[sku for sku, _ in hits] for hits in self.top_k_batch(query_vecs, n, mask)]
+
+    # ── Persistence ────────────────────────────────────────────────────────────
+
+    @staticmethod
+    def _paths(path: str) -> Tuple[str, str]:
+        """(base path, sidecar path) for <path> with or without the .npy suffix."""
+        base = path[:-4] if path.endswith(".npy") else path
+        return base, base + ".json"
+
+    def save(self, path: str) -> None:
+        """Writes <path>.<hash>.npy, then commits it by replacing <path>.json."""
+        base, meta_path = self._paths(path)
+        directory = os.path.dirname(base) or "."
+        os.makedirs(directory, exist_ok=True)
+
+        matrix = np.ascontiguousarray(self.matrix, dtype=np.float32)
+        digest = hashlib.sha256(matrix.tobytes())
+        digest.update("\0".join(self.skus).encode())
+        matrix_name = f"{os.path.basename(base)}.{digest.hexdigest()[:16]}.npy"
+        npy_path = os.path.join(directory, matrix_name)
+
+        tmp_npy = npy_path + ".tmp"
+        with open(tmp_npy, "wb") as f:
+            np.save(f, matrix)
+        os.replace(tmp_npy, npy_path)
+
+        tmp_meta = meta_path + ".tmp"
+        with open(tmp_meta, "w") as f:
+            json.dump({"skus": self.skus, "fingerprint": self.fingerprint, "hashes": self.hashes,
+                       "matrix": matrix_name}, f)
+        os.replace(tmp_meta, meta_path)
+        self._remove_superseded(base, keep=npy_path)
+
+    @staticmethod
+    def _remove_superseded(base: str, keep: str) -> None:
+        # Older matrices (and the pre-sidecar-commit <path>.npy). A process that
+        # still has one memory-mapped keeps reading it after the unlink.
+        directory = os.path.dirname(base) or "."
+        own = re.compile(re.escape(os.path.basename(base)) + r"(\.[0-9a-f]{16})?\.npy")
+        for name in os.listdir(directory):
+            candidate = os.path.join(directory, name)
+            if own.fullmatch(name) and candidate != keep:
+                try:
+                    os.remove(candidate)
+                except OSError:
+                    pass
+
+    @classmethod
+    def load(cls, path: str, fingerprint: Optional[str] = None,
+             mmap: bool = True) -> Optional["MenuVectorIndex"]:
+        """
+        Loads a saved index, memory-mapped by default.
+
+        Returns None when nothing usable is on disk — missing or unreadable
+        files, or a fingerprint that no longer matches the current menu — so
+        the caller can rebuild and save.
+        """
+        base, meta_path = cls._paths(path)
+        try:
+            with open(meta_path) as f:
+                meta = json.load(f)
+            if fingerprint is not None and meta.get("fingerprint") != fingerprint:
+                return None
+            # Only the matrix file the sidecar names belongs with its SKUs
+            npy_path = os.path.join(os.path.dirname(base) or ".", meta["matrix"])
+            matrix = np.load(npy_path, mmap_mode="r" if mmap else None)
+            # A shape mismatch raises ValueError in __init__ → rebuild
+            return cls(meta["skus"], matrix, meta.get("fingerprint", ""), meta.get("hashes"))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
@@ -0,0 +1,123 @@
+# DineFlow/validation/codec.py
+"""
+Pluggable JSON codec for the data DineFlow persists and parses.
+
+Pydantic models already have a fast path: model_dump_json() and
+model_validate_json(bytes) run in pydantic-core without building an
+intermediate dict, so SessionState snapshots and ActionRequests go through
+those. Everything else — session event batches, legacy session_store.json
+imports, LLM outputs that need repairing before validation — is plain
+data, and goes through the active codec:
+
+    orjson    compact bytes, several times faster than the stdlib
+    msgspec   msgspec.json, similar speed
+    json      stdlib with compact separators; always available
+
+SERIALIZATION_CODEC (env) picks one by name; "auto" (default) uses the
+first of orjson → msgspec → json that is installed. Every codec returns
+bytes from dumps(), accepts str or bytes in loads(), and raises
+json.JSONDecodeError (a ValueError) on malformed input, so callers are
+codec-agnostic.
+"""
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CODEC = os.getenv("SERIALIZATION_CODEC", "auto")
+AUTO_ORDER = ("orjson", "msgspec", "json")
+
+
+class Codec(ABC):
+    """dumps(obj) -> bytes and loads(str | bytes) -> obj for JSON-compatible data."""
+
+    name = "base"
+
+    @abstractmethod
+    def dumps(self, obj: Any) -> bytes:
+        ...
+
+    @abstractmethod
+    def loads(self, data: Union[str, bytes]) -> Any:
+        ...
+
+    def __repr__(self) -> str:
+        return f"<{type(self).__name__} {self.name}>"
+
+
+class JsonCodec(Codec):
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec(Codec):
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+        self._dumps = orjson.dumps
+        self._loads = orjson.loads   # orjson.JSONDecodeError subclasses json.JSONDecodeError
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._dumps(obj)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        return self._loads(data)
+
+
+class MsgspecCodec(Codec):
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+        self._decode_error = msgspec.DecodeError
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        try:
+            return self._decoder.decode(data)
+        except self._decode_error as e:
+            text = data.decode("utf-8", "replace") if isinstance(data, bytes) else data
+            raise json.JSONDecodeError(str(e), text, 0) from e
+
+
+CODECS: Dict[str, Callable[[], Codec]] = {
+    "json": JsonCodec,
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+}
+
+
+def get_codec(name: Optional[str] = None) -> Codec:
+    """
+    The codec registered as name ("auto" or None: fastest installed).
+    An explicitly named codec whose package is missing raises ImportError.
+    """
+    name = (name or DEFAULT_CODEC).lower()
+    if name != "auto":
+        if name not in CODECS:
+            raise ValueError(f"Unknown codec {name!r}; choose from {sorted(CODECS)} or 'auto'")
+        return CODECS[name]()
+    for candidate in AUTO_ORDER:
+        try:
+            return CODECS[candidate]()
+        except ImportError:
+            continue
+    return JsonCodec()
+
+
+# Shared by session persistence and the LLM response parser
+codec = get_codec()
+logger.debug("Serialization codec: %s", codec.name)
@@ -0,0 +1,147 @@
+# DineFlow/validation/turn_features.py
+"""
+Turn Features — tokenise the user's input once per turn.
+
+Before this module every stage normalised the same string on its own:
+golden_loop built a token list for the resolver gate, semantic_resolver
+stripped punctuation and politeness for _classify, IntentRouter lower-cased
+and stripped punctuation again for its greeting / order-verb sets, and
+QueryClassifier ran two lists of `p in text` checks. turn_features() does
+all of it in one pass and is memoised per input string, so every stage of a
+turn reads the same TurnFeatures object.
+
+Each field reproduces exactly what the stage that uses it computed before —
+the stages differed slightly (ASCII vs Unicode punctuation, politeness
+stripping) and those differences are behaviour, not noise.
+"""
+
+import re
+import string
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, Optional, Tuple
+
+# ── Router vocabulary (IntentRouter's deterministic tier) ─────────────────────
+GREETINGS = frozenset({"hi", "hello", "hey", "bye", "thanks", "thank you"})
+
+STRONG_ORDER_VERBS = frozenset({"add", "order", "buy", "checkout"})
+
+CONTINUATION_PHRASES = frozenset({"same", "another", "one more", "same again"})
+
+# ── Resolver normalisation ────────────────────────────────────────────────────
+POLITENESS_RE = re.compile(
+    r"\b(please|pls|plz|kindly|thanks|thank you|thank you so much|thx|cheers)\b",
+    re.IGNORECASE
+)
+
+POSITION_WORDS: Dict[str, int] = {
+    "first": 0, "second": 1, "third": 2, "fourth": 3, "last": -1,
+}
+
+# ── QueryClassifier structural patterns (substring semantics) ─────────────────
+CATEGORICAL_PATTERNS = (
+    "anything",
+    "something",
+    "any ",
+    "what's on",
+    "what do you have",
+    "what do you offer",
+    "which ",
+    "do you have any",
+    "do you have anything",
+    "what are your",
+    "show me",
+    "what kind",
+    "options",
+    "what can i get",
+    "what would you recommend",
+    "suggestions",
+)
+
+COMPARATOR_PATTERNS = (
+    "under $",
+    "over $",
+    "less than $",
+    "more than $",
+    "cheaper than",
+    "most expensive",
+    "least expensive",
+    "cheapest",
+    "between $",
+    "around $",
+    "within my budget",
+    "affordable",
+)
+
+
+def _alternation(patterns) -> "re.Pattern":
+    """One compiled regex equivalent to any(p in text for p in patterns)."""
+    return re.compile("|".join(re.escape(p) for p in sorted(patterns, key=len, reverse=True)))
+
+
+CATEGORICAL_RE = _alternation(CATEGORICAL_PATTERNS)
+COMPARATOR_RE = _alternation(COMPARATOR_PATTERNS)
+
+_ASCII_PUNCT = str.maketrans('', '', string.punctuation)
+_NON_WORD_RE = re.compile(r"[^\w\s]")
+_SPACES_RE = re.compile(r"\s+")
+_NUMBER_RE = re.compile(r"\b(\d+)\b")
+
+
+@dataclass(frozen=True)
+class TurnFeatures:
+    raw: str
+    text: str                    # lower-cased, stripped
+    bare: str                    # text minus ASCII punctuation (router)
+    token_set: FrozenSet[str]    # bare.split() as a set (router)
+    words: Tuple[str, ...]       # alphanumeric runs — golden_loop's length gate
+    clean: str                   # punctuation + politeness stripped, collapsed (resolver)
+    clean_tokens: Tuple[str, ...]
+    numbers: Tuple[int, ...]     # integers in clean, in order
+    position: Optional[int]      # first/second/.../last → index, else None
+    is_greeting: bool
+    has_order_verb: bool
+    is_continuation: bool
+    is_categorical: bool
+    is_comparator: bool
+
+    @property
+    def first_number(self) -> Optional[int]:
+        return self.numbers[0] if self.numbers else None
+
+
+@lru_cache(maxsize=256)
+def turn_features(user_input: str) -> TurnFeatures:
+    """All normalised views of user_input, computed once per distinct string."""
+    text = (user_input or "").lower().strip()
+    bare = text.translate(_ASCII_PUNCT)
+    token_set = frozenset(bare.split())
+    words = tuple(''.join(c if c.isalnum() or c == ' ' else ' ' for c in text).split())
+
+    clean = _NON_WORD_RE.sub("", text)
+    clean = POLITENESS_RE.sub("", clean)
+    clean = _SPACES_RE.sub(" ", clean).strip()
+    clean_tokens = tuple(clean.split())
+
+    position = None
+    for word, pos in POSITION_WORDS.items():
+        if word in clean_tokens:
+            position = pos
+            break
+
+    return TurnFeatures(
+        raw=user_input,
+        text=text,
+        bare=bare,
+        token_set=token_set,
+        words=words,
+        clean=clean,
+        clean_tokens=clean_tokens,
+        numbers=tuple(int(n) for n in _NUMBER_RE.findall(clean)),
+        position=position,
+        is_greeting=bare in GREETINGS,
+        has_order_verb=bool(token_set & STRONG_ORDER_VERBS),
+        is_continuation=bare in CONTINUATION_PHRASES or bool(token_set & CONTINUATION_PHRASES),
+        is_categorical=CATEGORICAL_RE.search(text) is not None,
+        is_comparator=COMPARATOR_RE.search(text) is not None,
+    )